@@ -0,0 +1,140 @@
+"""
+Điểm vào chung cho các công cụ thống kê test.
+
+    python analytics_cli.py summary [jest-report.json ...] [--summaries FILE ...] [--json]
+    python analytics_cli.py charts [jest-report.json] [--headless] [--history DIR] ...
+    python analytics_cli.py watch|html|flaky|durations|history|shards|batch|jest|diff|defects|revenue|orders|load|search|serve|generate|coverage|bench|trace ...
+    python analytics_cli.py startup-benchmark
+
+Lệnh `summary` chỉ import thư viện chuẩn và các module không vẽ (analytics_data,
+jest_report, shard_summary), nên khởi động nhanh. Các lệnh còn lại được chuyển
+nguyên tham số cho `main()` của script tương ứng, script đó chỉ được import
+(cùng matplotlib/NumPy) khi lệnh được gọi.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+
+# Lệnh -> (module, mô tả); module chỉ được import khi chạy lệnh
+COMMANDS = {
+    'charts': ('test_analytics_dashboard', 'tạo tất cả biểu đồ của dashboard'),
+    'watch': ('chart_watch', 'theo dõi báo cáo Jest và vẽ lại biểu đồ bị ảnh hưởng'),
+    'html': ('html_dashboard', 'tạo dashboard HTML tĩnh'),
+    'batch': ('chart_batch', 'render biểu đồ headless cho nhiều báo cáo'),
+    'history': ('run_history', 'ghi và xem lịch sử các lần chạy'),
+    'flaky': ('flaky_tests', 'phát hiện test flaky từ lịch sử'),
+    'durations': ('duration_analytics', 'phân tích thời gian chạy test'),
+    'shards': ('shard_summary', 'tổng hợp và gộp kết quả chia shard'),
+    'jest': ('jest_report', 'đọc báo cáo jest --json'),
+    'diff': ('run_diff', 'so sánh hai lần chạy: test mới fail/pass, chậm đi'),
+    'defects': ('defect_store', 'nạp defect từ file export CSV / JSON lines'),
+    'revenue': ('revenue_analytics', 'thống kê doanh thu từ mongoexport collection revenues'),
+    'orders': ('order_analytics', 'thống kê bán hàng từ mongoexport collection orders, đối chiếu soldCount'),
+    'load': ('load_test', 'tạo tải cho API tìm kiếm, báo cáo độ trễ p50/p99/p999'),
+    'search': ('catalog_search', 'chỉ mục tìm kiếm sách (bỏ dấu, lọc, sort) so với quét regex'),
+    'generate': ('synthetic_data', 'sinh dữ liệu giả lập có seed (Jest, coverage, defect, order...) ra đĩa'),
+    'serve': ('render_server', 'render daemon giữ sẵn chart engine, trả PNG/SVG qua HTTP / Unix socket'),
+    'coverage': ('coverage_report', 'coverage theo module từ coverage-final.json / lcov.info'),
+    'bench': ('chart_benchmark', 'benchmark pipeline vẽ biểu đồ'),
+    'trace': ('tracing', 'in profile phẳng của file trace, đo chi phí tracing'),
+}
+
+STARTUP_BUDGET_MS = 100
+HEAVY_MODULES = ('matplotlib', 'numpy')
+
+
+def run_summary(args):
+    from analytics_data import AnalyticsData
+    from tracing import configure
+
+    configure(args.trace, quiet=args.json)
+    data = AnalyticsData()
+    data.load_inputs(args.reports, args.summaries, keep_durations=False, verbose=not args.json)
+    if args.defects or args.defect_store:
+        data.load_defects(args.defects, args.defect_store, verbose=not args.json)
+    if args.json:
+        json.dump(data.summary_stats(), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        data.print_summary()
+
+
+def startup_benchmark(runs=10, budget_ms=STARTUP_BUDGET_MS):
+    """Đo thời gian `summary` trong process mới; trả về False nếu vượt ngân sách"""
+    import os
+    import statistics
+    import subprocess
+    import time
+
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def measure(command):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=here)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    probe = ('import sys, runpy; sys.argv = ["analytics_cli.py", "summary"]; '
+             'runpy.run_path("analytics_cli.py", run_name="__main__"); '
+             f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)')
+    loaded = subprocess.run([sys.executable, '-c', probe], check=True, capture_output=True,
+                            text=True, cwd=here).stderr.strip()
+
+    baseline = measure([sys.executable, '-c', 'pass'])
+    summary = measure([sys.executable, 'analytics_cli.py', 'summary'])
+    dashboard = measure([sys.executable, '-c', 'import test_analytics_dashboard'])
+
+    print(f'   • python -c pass:                   {baseline:7.1f} ms')
+    print(f'   • analytics_cli.py summary:         {summary:7.1f} ms')
+    print(f'   • import test_analytics_dashboard:  {dashboard:7.1f} ms')
+    print(f'   • thư viện vẽ được import bởi summary: {loaded or "không có"}')
+    ok = summary <= budget_ms and not loaded
+    print(('✅ Đạt' if ok else '❌ Không đạt') + f' ngân sách {budget_ms} ms')
+    return ok
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        # Chuyển nguyên tham số (kể cả --help) cho script tương ứng
+        module = importlib.import_module(COMMANDS[argv[0]][0])
+        return module.main(argv[1:])
+
+    parser = argparse.ArgumentParser(description='Công cụ thống kê test')
+    sub = parser.add_subparsers(dest='command')
+
+    summary = sub.add_parser('summary', help='in SUMMARY REPORT (không import thư viện vẽ)')
+    summary.add_argument('reports', nargs='*',
+                         help='báo cáo jest --json; nhiều file = các shard của cùng một lần chạy')
+    summary.add_argument('--summaries', nargs='+', default=[], metavar='FILE',
+                         help='shard summary tạo bởi shard_summary.py')
+    summary.add_argument('--json', action='store_true', help='in dạng JSON')
+    summary.add_argument('--defects', nargs='+', default=[], metavar='EXPORT',
+                         help='file export defect (.csv, .jsonl)')
+    summary.add_argument('--defect-store', metavar='FILE', help='trạng thái defect để nạp tăng dần')
+    summary.add_argument('--trace', metavar='FILE', help='ghi Chrome trace JSON (+ profile phẳng)')
+
+    benchmark = sub.add_parser('startup-benchmark', help='đo thời gian khởi động lệnh summary')
+    benchmark.add_argument('--runs', type=int, default=10)
+    benchmark.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+
+    for name, (_, description) in COMMANDS.items():
+        sub.add_parser(name, help=description, add_help=False)
+
+    args = parser.parse_args(argv)
+    if args.command == 'summary':
+        run_summary(args)
+    elif args.command == 'startup-benchmark':
+        print('⏱️ Benchmark khởi động:')
+        if not startup_benchmark(args.runs, args.budget_ms):
+            sys.exit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
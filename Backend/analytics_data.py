@@ -0,0 +1,130 @@
+"""
+Số liệu thống kê test (không phụ thuộc thư viện vẽ).
+
+Chứa dữ liệu và SUMMARY REPORT của dashboard, tách khỏi TestAnalyticsCharts để
+các lệnh chỉ cần số liệu dạng text không phải import matplotlib/NumPy.
+Module này và các module nó import chỉ dùng thư viện chuẩn.
+"""
+
+from defect_store import load_defects
+from jest_report import summarize_jest_report
+from shard_summary import ShardSummary, merge_summaries, summarize_shard
+from tracing import span
+
+
+class AnalyticsData:
+    def __init__(self):
+        # Dữ liệu thực tế từ dự án
+        self.total_tests = 127
+        self.passed_tests = 107
+        self.failed_tests = 20
+        self.not_run_tests = 0
+        self.pass_rate = 84.3
+
+        # Defect data
+        self.defects_by_severity = {
+            'Critical': {'fixed': 0, 'open': 4},
+            'High': {'fixed': 0, 'open': 8},
+            'Medium': {'fixed': 0, 'open': 6},
+            'Low': {'fixed': 0, 'open': 2}
+        }
+
+        # Module performance data
+        self.module_data = {
+            'Authorization Service': 90.6,
+            'Cart Controller': 89.7,
+            'Search Controller': 87.5,
+            'E2E Bookstore': 87.5,
+            'Order Controller': 84.6,
+            'User Profile': 46.2
+        }
+
+        # Thời gian chạy (ms), chỉ có khi nạp từ báo cáo Jest
+        self.test_durations = {}
+        self.suite_durations = {}
+
+        # Quantile thời gian test (p50, p95, p99) từ shard summary đã gộp
+        self.duration_quantiles = None
+
+    def load_jest_report(self, path, keep_durations=True):
+        """Nạp số liệu từ báo cáo `jest --json` (đọc streaming, bộ nhớ không đổi)"""
+        with span('parse.jest_report', 'parse', path=path):
+            summary = summarize_jest_report(path, keep_durations=keep_durations)
+        return self.load_summary(summary)
+
+    def load_shards(self, summaries):
+        """Nạp số liệu gộp từ nhiều ShardSummary (các node CI chạy `jest --shard`)"""
+        with span('aggregate.merge_shards', 'aggregate', shards=len(summaries)):
+            summary = merge_summaries(summaries)
+        return self.load_summary(summary)
+
+    def load_summary(self, summary):
+        """Nạp số liệu từ JestRunSummary hoặc ShardSummary"""
+        self.total_tests = summary.total
+        self.passed_tests = summary.passed
+        self.failed_tests = summary.failed
+        self.not_run_tests = summary.not_run
+        self.pass_rate = summary.pass_rate()
+        self.module_data = summary.module_pass_rates()
+        self.test_durations = summary.test_durations
+        self.suite_durations = summary.suite_durations
+        if isinstance(summary, ShardSummary):
+            self.duration_quantiles = summary.duration_quantiles()
+        return summary
+
+    def load_defects(self, exports=(), store_path=None, prune=False, verbose=True):
+        """Nạp defect từ file export CSV / JSON lines (tăng dần nếu có store_path)"""
+        store = load_defects(exports, store_path, prune, verbose)
+        self.defects_by_severity = store.by_severity()
+        return store
+
+    def load_inputs(self, reports=(), summaries=(), keep_durations=True, verbose=True):
+        """
+        Nạp một báo cáo Jest, hoặc gộp nhiều báo cáo shard / file shard summary.
+        Không có đầu vào thì giữ số liệu mặc định.
+        """
+        if len(reports) == 1 and not summaries:
+            if verbose:
+                print(f"📥 Đang đọc báo cáo Jest: {reports[0]}")
+            return self.load_jest_report(reports[0], keep_durations)
+        if reports or summaries:
+            if verbose:
+                print(f"📥 Đang gộp {len(reports) + len(summaries)} shard...")
+            with span('parse.shards', 'parse', files=len(reports) + len(summaries)):
+                shards = ([summarize_shard(path) for path in reports] +
+                          [ShardSummary.load(path) for path in summaries])
+            return self.load_shards(shards)
+        return None
+
+    def summary_stats(self):
+        """Số liệu của SUMMARY REPORT dạng dict (dùng cho output JSON)"""
+        best = max(self.module_data, key=self.module_data.get) if self.module_data else None
+        worst = min(self.module_data, key=self.module_data.get) if self.module_data else None
+        stats = {
+            'total_tests': self.total_tests,
+            'passed': self.passed_tests,
+            'failed': self.failed_tests,
+            'not_run': self.not_run_tests,
+            'pass_rate': self.pass_rate,
+            'total_defects': sum(data['open'] for data in self.defects_by_severity.values()),
+            'best_module': best and {'name': best, 'pass_rate': self.module_data[best]},
+            'worst_module': worst and {'name': worst, 'pass_rate': self.module_data[worst]},
+        }
+        if self.duration_quantiles and self.duration_quantiles[0] is not None:
+            stats['duration_ms'] = dict(zip(('p50', 'p95', 'p99'), self.duration_quantiles))
+        return stats
+
+    def print_summary(self):
+        """In SUMMARY REPORT"""
+        stats = self.summary_stats()
+        print("\n📈 SUMMARY REPORT:")
+        print(f"   • Total Tests: {stats['total_tests']}")
+        print(f"   • Pass Rate: {stats['pass_rate']}%")
+        print(f"   • Total Defects: {stats['total_defects']}")
+        for label, key in (('Best Module', 'best_module'), ('Worst Module', 'worst_module')):
+            if stats[key]:
+                print(f"   • {label}: {stats[key]['name']} ({stats[key]['pass_rate']}%)")
+        if 'duration_ms' in stats:
+            durations = stats['duration_ms']
+            print(f"   • Test Duration p50/p95/p99: {durations['p50']:.0f} / "
+                  f"{durations['p95']:.0f} / {durations['p99']:.0f} ms")
@@ -0,0 +1,473 @@
+"""
+Chỉ mục tìm kiếm sách trong bộ nhớ, so sánh với cách POST /search/filter đang
+làm (regex không phân biệt hoa thường quét toàn bộ collection, lọc giá, type,
+author rồi sort + skip/limit).
+
+Catalog được dựng từ các fixture `sampleProduct_*.js` (mảng `sampleBooks` là
+object literal JavaScript, được chuyển thành JSON) và có thể nhân lên thành
+hàng triệu sách giả lập từ từ vựng của các tên sách thật.
+
+Chỉ mục:
+    - inverted index theo từ của title đã bỏ dấu tiếng Việt ("Đắc nhân tâm" ->
+      "dac nhan tam"): mọi từ trong truy vấn phải khớp, từ cuối khớp theo tiền tố
+      (gõ tới đâu tìm tới đó). Posting list nằm trong một mảng int32 liên tục.
+    - thứ hạng theo price / rating / discount (vị trí trong mảng đã sort), nên
+      lọc khoảng giá là một lần searchsorted và sort kết quả chỉ cần
+      argpartition trên thứ hạng của trang cần lấy.
+    - bitmap (mảng bool) cho từng type, posting list cho từng author.
+
+Cách dùng:
+    python catalog_search.py "dac nhan tam"                 # tìm trong fixture
+    python catalog_search.py tư duy --type A --sort price --order -1 --limit 5
+    python catalog_search.py "ielts" --size 1000000          # catalog giả lập 1 triệu sách
+    python catalog_search.py --benchmark --sizes 10000 100000 1000000 --output search_scaling.png
+"""
+
+import glob
+import json
+import os
+import re
+import statistics
+import time
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+from tracing import traced
+
+FIXTURE_PATTERN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sampleProduct_*.js')
+PRODUCT_TYPES = ('V', 'K', 'G', 'T', 'A', 'N', 'C', 'I', 'Y', 'D')
+SORT_FIELDS = ('price', 'rating', 'discount')
+DEFAULT_LIMIT = 10
+DEFAULT_SIZES = (10000, 100000, 1000000)
+# Quét tuyến tính chậm: giới hạn số truy vấn baseline ở mỗi kích thước
+MAX_SCAN_QUERIES = 20
+
+_COMBINING = re.compile('[\u0300-\u036f]')
+_WORD = re.compile(r'\w+')
+_JS_TOKEN = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`|//[^\n]*|/\*.*?\*/'''
+                       r'''|[A-Za-z_$][\w$]*|\s+|.''', re.S)
+
+
+def fold(text):
+    """Bỏ dấu tiếng Việt và chuyển chữ thường: 'Đắc Nhân Tâm' -> 'dac nhan tam'"""
+    text = _COMBINING.sub('', unicodedata.normalize('NFD', text.lower()))
+    return text.replace('đ', 'd')
+
+
+def tokens(text):
+    return _WORD.findall(fold(text))
+
+
+def _js_string(token):
+    """Chuỗi JavaScript ('...', "...", `...`) -> chuỗi Python"""
+    quote, body = token[0], token[1:-1]
+    if quote != '"':
+        body = re.sub(r'(?<!\\)((?:\\\\)*)"', r'\1\\"', body.replace("\\'", "'").replace('\\`', '`'))
+    return json.loads(f'"{body}"', strict=False)
+
+
+def parse_js_array(source, name='sampleBooks'):
+    """
+    Lấy mảng `const <name> = [...]` trong file JavaScript và chuyển thành list
+    Python: key không có ngoặc kép, chuỗi nháy đơn, comment và dấu phẩy cuối
+    được chuyển thành JSON hợp lệ.
+    """
+    start = re.search(rf'\b{name}\s*=\s*\[', source)
+    if not start:
+        raise ValueError(f'không tìm thấy mảng {name}')
+    out, depth = [], 0
+    for match in _JS_TOKEN.finditer(source, start.end() - 1):
+        token = match.group()
+        first = token[0]
+        if first in '"\'`':
+            out.append(json.dumps(_js_string(token), ensure_ascii=False))
+        elif token.startswith(('//', '/*')) or first.isspace():
+            continue
+        elif first.isalpha() or first in '_$':
+            out.append({'undefined': 'null'}.get(token, token) if token in ('true', 'false', 'null', 'undefined')
+                       else json.dumps(token))
+        else:
+            if token in '}]' and out and out[-1] == ',':
+                out.pop()
+            out.append(token)
+            depth += token in '[{'
+            depth -= token in ']}'
+            if not depth:
+                break
+    return json.loads(''.join(out))
+
+
+def load_fixtures(pattern=FIXTURE_PATTERN):
+    """Sách trong mọi file fixture (bỏ trùng theo title + author)"""
+    books, seen = [], set()
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as f:
+            for book in parse_js_array(f.read()):
+                key = (book.get('title'), book.get('author'))
+                if key not in seen:
+                    seen.add(key)
+                    books.append(book)
+    return books
+
+
+class Catalog:
+    """Catalog dạng cột: title / author (list), type / price / rating / discount (NumPy)"""
+
+    def __init__(self, titles, authors, types, prices, ratings, discounts):
+        self.titles = list(titles)
+        self.authors = list(authors)
+        self.types = np.asarray(types, dtype='<U1')
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+        self.discounts = np.asarray(discounts, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.titles)
+
+    @classmethod
+    def from_books(cls, books):
+        def number(book, key):
+            value = book.get(key)
+            return float(value) if isinstance(value, (int, float)) else 0.0
+
+        return cls([book.get('title') or '' for book in books], [book.get('author') or '' for book in books],
+                   [book.get('type') or '' for book in books], [number(book, 'price') for book in books],
+                   [number(book, 'rating') for book in books], [number(book, 'discount') for book in books])
+
+    @classmethod
+    def synthetic(cls, size, books, seed=0):
+        """
+        Catalog `size` sách: các sách thật giữ nguyên, phần còn lại có title ghép
+        ngẫu nhiên 2-7 từ trong từ vựng của title thật (giữ dấu), author lấy từ
+        fixture hoặc sinh mới, giá / rating / discount theo phân phối của fixture.
+        """
+        base = cls.from_books(books)
+        extra = size - len(base)
+        if extra <= 0:
+            return base
+        rng = np.random.default_rng(seed)
+        vocabulary = sorted({word for title in base.titles for word in re.findall(r'\w+', title)})
+        authors = sorted(set(base.authors)) + [f'Tác giả {i}' for i in range(max(extra // 50, 1))]
+
+        lengths = rng.integers(2, 8, extra)
+        words = rng.integers(0, len(vocabulary), lengths.sum()).tolist()
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+        titles = [' '.join(vocabulary[w] for w in words[bounds[i]:bounds[i + 1]]) for i in range(extra)]
+        titles = [title.capitalize() for title in titles]
+        price = np.round(rng.lognormal(np.log(max(np.median(base.prices), 1)), 0.5, extra), -3)
+        return cls(base.titles + titles,
+                   base.authors + [authors[i] for i in rng.integers(0, len(authors), extra).tolist()],
+                   np.concatenate([base.types, rng.choice(PRODUCT_TYPES, extra)]),
+                   np.concatenate([base.prices, price]),
+                   np.concatenate([base.ratings, np.round(rng.uniform(3, 5, extra), 1)]),
+                   np.concatenate([base.discounts, rng.integers(0, 51, extra)]))
+
+
+class SearchIndex:
+    """Inverted index + thứ hạng sort + bitmap type của một Catalog"""
+
+    @traced('search.build_index')
+    def __init__(self, catalog):
+        self.catalog = catalog
+        size = len(catalog)
+
+        vocabulary, codes, docs = {}, [], []
+        for doc, title in enumerate(catalog.titles):
+            for token in set(tokens(title)):
+                code = vocabulary.get(token)
+                if code is None:
+                    code = vocabulary[token] = len(vocabulary)
+                codes.append(code)
+                docs.append(doc)
+        codes = np.asarray(codes, dtype=np.int32)
+        order = np.argsort(codes, kind='stable')     # doc id tăng dần trong mỗi từ
+        self.postings = np.asarray(docs, dtype=np.int32)[order]
+        self.offsets = np.searchsorted(codes[order], np.arange(len(vocabulary) + 1)).astype(np.int64)
+        self.terms = sorted(vocabulary)
+        self.term_codes = np.array([vocabulary[term] for term in self.terms], dtype=np.int64)
+
+        authors = {}
+        for doc, author in enumerate(catalog.authors):
+            authors.setdefault(author, []).append(doc)
+        self.authors = {author: np.asarray(ids, dtype=np.int32) for author, ids in authors.items()}
+        self.type_bitmaps = {kind: catalog.types == kind for kind in np.unique(catalog.types).tolist()}
+
+        # Thứ hạng: rank[field][doc] = vị trí của doc khi sort tăng dần theo field
+        self.order = {}
+        self.rank = {}
+        for field in SORT_FIELDS:
+            values = getattr(catalog, field + 's')
+            self.order[field] = np.argsort(values, kind='stable').astype(np.int32)
+            rank = np.empty(size, dtype=np.int32)
+            rank[self.order[field]] = np.arange(size, dtype=np.int32)
+            self.rank[field] = rank
+        self.sorted_prices = catalog.prices[self.order['price']]
+
+    def nbytes(self):
+        arrays = [self.postings, self.offsets, self.term_codes, self.sorted_prices,
+                  *self.order.values(), *self.rank.values(), *self.type_bitmaps.values(), *self.authors.values()]
+        return sum(array.nbytes for array in arrays)
+
+    def _postings(self, code):
+        return self.postings[self.offsets[code]:self.offsets[code + 1]]
+
+    def _term(self, token, prefix=False):
+        """Doc id (tăng dần) chứa từ `token`, hoặc từ bắt đầu bằng `token` nếu prefix"""
+        start = bisect_left(self.terms, token)
+        if not prefix:
+            if start < len(self.terms) and self.terms[start] == token:
+                return self._postings(self.term_codes[start])
+            return np.empty(0, dtype=np.int32)
+        end = bisect_left(self.terms, token + '\U0010ffff', start)
+        if end - start == 1:
+            return self._postings(self.term_codes[start])
+        if end == start:
+            return np.empty(0, dtype=np.int32)
+        codes = self.term_codes[start:end]
+        if (self.offsets[codes + 1] - self.offsets[codes]).sum() * 8 < len(self.catalog):
+            return np.unique(np.concatenate([self._postings(code) for code in codes]))
+        # Tiền tố ngắn khớp nhiều từ: đánh dấu trên bitmap rẻ hơn sort lại các posting
+        mask = np.zeros(len(self.catalog), dtype=bool)
+        for code in codes:
+            mask[self._postings(code)] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def match_title(self, title):
+        """Doc id khớp mọi từ của `title` (từ cuối theo tiền tố); None nếu title rỗng"""
+        words = tokens(title)
+        if not words:
+            return None
+        lists = [self._term(word, prefix=i == len(words) - 1) for i, word in enumerate(words)]
+        lists.sort(key=len)
+        ids = lists[0]
+        for other in lists[1:]:
+            if not len(ids):
+                break
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    @traced('search.query')
+    def search(self, title='', type='', author='', min_price=0, max_price=None, sort=None, order=-1,
+               page=1, limit=DEFAULT_LIMIT):
+        """
+        Như POST /search/filter: trả về (tổng số kết quả, doc id của trang `page`).
+        sort: 'price' | 'rating' | 'discount' | None (thứ tự chèn), order: 1 tăng / -1 giảm.
+        """
+        catalog = self.catalog
+        max_price = np.inf if max_price is None else max_price
+        ids = self.match_title(title) if title else None
+        if author:
+            posting = self.authors.get(author, np.empty(0, dtype=np.int32))
+            ids = posting if ids is None else np.intersect1d(ids, posting, assume_unique=True)
+
+        if ids is None:
+            low = np.searchsorted(self.sorted_prices, min_price, 'left')
+            high = np.searchsorted(self.sorted_prices, max_price, 'right')
+            if low == 0 and high == len(catalog):
+                ids = (np.flatnonzero(self.type_bitmaps.get(type, np.zeros(0, bool))).astype(np.int32)
+                       if type else np.arange(len(catalog), dtype=np.int32))
+            else:
+                ids = self.order['price'][low:high]
+                if type:
+                    ids = ids[self.type_bitmaps.get(type, np.zeros(len(catalog), bool))[ids]]
+                if sort != 'price':
+                    ids = np.sort(ids)
+        else:
+            prices = catalog.prices[ids]
+            ids = ids[(prices >= min_price) & (prices <= max_price)]
+            if type:
+                ids = ids[self.type_bitmaps.get(type, np.zeros(len(catalog), bool))[ids]]
+
+        total = len(ids)
+        start, end = (page - 1) * limit, page * limit
+        if not sort or start >= total:
+            return total, ids[start:end]
+        key = self.rank[sort][ids].astype(np.int64)
+        if order < 0:
+            key = -key
+        if end < total:
+            top = np.argpartition(key, end - 1)[:end]
+            top = top[np.argsort(key[top])]
+        else:
+            top = np.argsort(key)
+        return total, ids[top[start:end]]
+
+    def scan(self, title='', type='', author='', min_price=0, max_price=None, sort=None, order=-1,
+             page=1, limit=DEFAULT_LIMIT, folded=False):
+        """
+        Quét tuyến tính từng sách. folded=False: regex không phân biệt hoa thường
+        trên title gốc (như /filter hiện tại); folded=True: cùng quy tắc khớp với
+        chỉ mục (dùng để kiểm tra kết quả của search()).
+        """
+        catalog = self.catalog
+        max_price = float('inf') if max_price is None else max_price
+        prices = catalog.prices.tolist()
+        types = catalog.types.tolist()
+        if folded:
+            words = tokens(title)
+
+            def matches(text):
+                found = set(tokens(text))
+                return (all(word in found for word in words[:-1]) and
+                        any(token.startswith(words[-1]) for token in found)) if words else True
+        else:
+            try:
+                pattern = re.compile(title, re.I)
+            except re.error:
+                pattern = re.compile(re.escape(title), re.I)
+            matches = pattern.search
+
+        hits = []
+        for doc, text in enumerate(catalog.titles):
+            if type and types[doc] != type:
+                continue
+            if author and catalog.authors[doc] != author:
+                continue
+            if not min_price <= prices[doc] <= max_price:
+                continue
+            if title and not matches(text):
+                continue
+            hits.append(doc)
+        if sort:
+            rank = self.rank[sort]
+            hits.sort(key=lambda doc: int(rank[doc]) * (1 if order > 0 else -1))
+        return len(hits), np.asarray(hits[(page - 1) * limit:page * limit], dtype=np.int32)
+
+
+def random_queries(catalog, count, seed=0):
+    """Truy vấn giống body của /filter: từ khóa lấy từ title (có / không dấu), kèm lọc và sort"""
+    rng = np.random.default_rng(seed)
+    words = sorted({word for title in catalog.titles[:2000] for word in re.findall(r'\w+', title) if len(word) > 2})
+    queries = []
+    for _ in range(count):
+        query = {'title': ' '.join(rng.choice(words, rng.integers(1, 3)).tolist())}
+        if rng.random() < 0.5:
+            query['title'] = fold(query['title'])
+        if rng.random() < 0.5:
+            query['title'] = query['title'][:max(3, len(query['title']) - 2)]
+        if rng.random() < 0.3:
+            query['type'] = str(rng.choice(PRODUCT_TYPES))
+        if rng.random() < 0.3:
+            low = float(rng.choice((0, 50000, 100000)))
+            query.update(min_price=low, max_price=low + float(rng.choice((100000, 200000))))
+        if rng.random() < 0.7:
+            query.update(sort=str(rng.choice(SORT_FIELDS)), order=int(rng.choice((1, -1))))
+        query['page'] = int(rng.integers(1, 4))
+        queries.append(query)
+    return queries
+
+
+def _timed(function, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        function(**query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _percentile(values, pct):
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+def benchmark(sizes=DEFAULT_SIZES, num_queries=200, seed=0):
+    """
+    Độ trễ truy vấn của chỉ mục và của quét regex (như /filter) theo kích thước
+    catalog. Ở kích thước nhỏ nhất, kết quả chỉ mục được đối chiếu với quét
+    tuyến tính cùng quy tắc khớp.
+    """
+    books = load_fixtures()
+    results = {'sizes': [], 'index': {'p50': [], 'p99': []}, 'scan': {'p50': [], 'p99': []},
+               'build_s': [], 'index_mib': []}
+    for position, size in enumerate(sorted(sizes)):
+        catalog = Catalog.synthetic(size, books, seed)
+        started = time.perf_counter()
+        index = SearchIndex(catalog)
+        build = time.perf_counter() - started
+        queries = random_queries(catalog, num_queries, seed)
+
+        if position == 0:
+            for query in queries[:MAX_SCAN_QUERIES]:
+                expected = index.scan(folded=True, **query)
+                actual = index.search(**query)
+                if expected[0] != actual[0] or not np.array_equal(expected[1], actual[1]):
+                    raise AssertionError(f'kết quả chỉ mục khác quét tuyến tính: {query}')
+
+        indexed = _timed(index.search, queries)
+        scanned = _timed(index.scan, queries[:MAX_SCAN_QUERIES])
+        hits = [index.search(**query)[0] for query in queries[:MAX_SCAN_QUERIES]]
+        regex_hits = [index.scan(**query)[0] for query in queries[:MAX_SCAN_QUERIES]]
+        results['sizes'].append(size)
+        for name, timings in (('index', indexed), ('scan', scanned)):
+            results[name]['p50'].append(round(_percentile(timings, 50), 4))
+            results[name]['p99'].append(round(_percentile(timings, 99), 4))
+        results['build_s'].append(round(build, 3))
+        results['index_mib'].append(round(index.nbytes() / 2 ** 20, 1))
+        print(f'   • {size:>9d} sách: dựng chỉ mục {build:6.2f}s ({index.nbytes() / 2 ** 20:6.1f} MiB), '
+              f'chỉ mục p50 {statistics.median(indexed):7.3f} ms / p99 {_percentile(indexed, 99):7.3f} ms, '
+              f'quét regex p50 {statistics.median(scanned):8.1f} ms '
+              f'(x{statistics.median(scanned) / max(statistics.median(indexed), 1e-6):.0f}), '
+              f'kết quả {sum(hits)} vs regex {sum(regex_hits)}')
+    return results
+
+
+def benchmark_spec(results, filename='search_scaling_chart.png'):
+    return {'kind': 'search_scaling', 'style': 'dashboard',
+            'data': {'sizes': results['sizes'],
+                     'series': {'Inverted index': results['index'], 'Regex scan (/filter)': results['scan']}},
+            'output': {'filename': filename, 'dpi': 300}}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Chỉ mục tìm kiếm sách trong bộ nhớ')
+    parser.add_argument('title', nargs='*', help='từ khóa tìm trong title (có dấu hoặc không)')
+    parser.add_argument('--fixtures', default=FIXTURE_PATTERN, help='glob các file sampleProduct_*.js')
+    parser.add_argument('--size', type=int, default=0, help='nhân catalog thành SIZE sách giả lập')
+    parser.add_argument('--type', default='', choices=('',) + PRODUCT_TYPES)
+    parser.add_argument('--author', default='')
+    parser.add_argument('--min-price', type=float, default=0)
+    parser.add_argument('--max-price', type=float, default=None)
+    parser.add_argument('--sort', choices=SORT_FIELDS)
+    parser.add_argument('--order', type=int, choices=(1, -1), default=-1, help='1 tăng dần, -1 giảm dần')
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    parser.add_argument('--benchmark', action='store_true', help='so sánh chỉ mục với quét regex')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--queries', type=int, default=200, help='số truy vấn mỗi kích thước')
+    parser.add_argument('--json', metavar='FILE', help='ghi kết quả benchmark dạng JSON')
+    parser.add_argument('--output', metavar='PNG', help='vẽ biểu đồ độ trễ theo kích thước catalog')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(f'⏱️ Benchmark tìm kiếm ({args.queries} truy vấn, quét regex tối đa {MAX_SCAN_QUERIES}):')
+        results = benchmark(args.sizes, args.queries)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f'✅ Đã lưu: {args.json}')
+        if args.output:
+            from chart_engine import render
+
+            render(benchmark_spec(results, args.output))
+            print(f'✅ Đã lưu: {args.output}')
+        return
+
+    books = load_fixtures(args.fixtures)
+    catalog = Catalog.synthetic(args.size, books) if args.size else Catalog.from_books(books)
+    index = SearchIndex(catalog)
+    started = time.perf_counter()
+    total, ids = index.search(' '.join(args.title), args.type, args.author, args.min_price, args.max_price,
+                              args.sort, args.order, args.page, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f'🔎 {total} kết quả trong {len(catalog)} sách ({elapsed:.2f} ms), trang {args.page}:')
+    for doc in ids.tolist():
+        print(f'   • [{catalog.types[doc]}] {catalog.titles[doc][:60]} — {catalog.authors[doc]}, '
+              f'{catalog.prices[doc]:,.0f}₫, ★{catalog.ratings[doc]:g}, -{catalog.discounts[doc]:g}%')
+
+
+if __name__ == '__main__':
+    main()
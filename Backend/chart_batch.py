@@ -0,0 +1,167 @@
+"""
+Render biểu đồ song song ở chế độ headless (backend Agg, không gọi plt.show()).
+
+Mỗi biểu đồ `create_*` của TestAnalyticsCharts được vẽ trong một worker process
+riêng, số worker cấu hình được. Dùng cho CI (nhiều core, không có màn hình) khi
+cần tạo bộ biểu đồ cho nhiều lần chạy / nhiều module cùng lúc.
+
+Cách dùng:
+    python chart_batch.py report1.json report2.json --workers 8 --output-dir charts
+    python chart_batch.py --benchmark
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import tracing
+
+# Tên method và tên file mặc định của từng biểu đồ
+CHART_FILES = {
+    'create_pie_chart': 'test_execution_pie_chart.png',
+    'create_defect_bar_chart': 'defect_distribution_bar_chart.png',
+    'create_module_coverage_chart': 'module_coverage_horizontal_chart.png',
+    'create_pass_rate_trend_chart': 'pass_rate_trend_chart.png',
+    'create_flaky_heatmap_chart': 'flaky_tests_heatmap.png',
+    'create_slow_tests_chart': 'slow_tests_chart.png',
+    'create_runtime_share_chart': 'runtime_share_chart.png',
+    'create_run_diff_chart': 'run_diff_chart.png',
+}
+
+
+def _init_worker(trace=False):
+    """Ép worker dùng backend Agg trước khi vẽ; trace=True bật tracing trong worker"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    if trace:
+        tracing.enable(worker=True)
+
+
+def _render_job(job):
+    """
+    Vẽ một biểu đồ: job = (analytics, tên method, file output).
+    Trả về (file, thời gian vẽ, span tracing của worker cần gửi về process chính).
+    """
+    analytics, method, filename = job
+    started = time.perf_counter()
+    getattr(analytics, method)(filename)
+    return filename, time.perf_counter() - started, tracing.worker_events()
+
+
+def chart_jobs(analytics, output_dir='', methods=None):
+    """Danh sách job cho các biểu đồ của một bộ số liệu"""
+    jobs = []
+    for method in methods or analytics.chart_methods():
+        jobs.append((analytics, method, os.path.join(output_dir, CHART_FILES[method])))
+    return jobs
+
+
+def render_batch(jobs, workers=None, cache=None):
+    """
+    Render các job trên backend Agg, mỗi job trong một worker process.
+
+    workers=None dùng số core của máy; workers=1 vẽ tuần tự ngay trong process
+    hiện tại. Với `cache` (RenderCache), job có khóa không đổi được lấy từ cache
+    ngay trong process chính, chỉ các job miss mới gửi cho worker.
+    Trả về list (file, thời gian vẽ) theo đúng thứ tự job.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.environ['MPLBACKEND'] = 'Agg'
+    for _, _, filename in jobs:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    results = [None] * len(jobs)
+    keys = {}
+    todo = []
+    for i, (analytics, method, filename) in enumerate(jobs):
+        if cache is not None:
+            keys[i] = analytics.chart_key(method, filename)
+            if cache.fetch(keys[i], filename):
+                results[i] = (filename, 0.0)
+                continue
+        todo.append(i)
+
+    if workers == 1 or len(todo) <= 1:
+        _init_worker()
+        rendered = [_render_job(jobs[i]) for i in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)), initializer=_init_worker,
+                                 initargs=(tracing.enabled(),)) as pool:
+            rendered = list(pool.map(_render_job, [jobs[i] for i in todo]))
+
+    for i, (filename, elapsed, events) in zip(todo, rendered):
+        tracing.add_events(events)
+        results[i] = (filename, elapsed)
+        if cache is not None:
+            cache.store(keys[i], filename)
+    return results
+
+
+def benchmark(num_runs=12, worker_counts=None):
+    """Đo thời gian tạo `num_runs` bộ biểu đồ với số worker khác nhau"""
+    import tempfile
+    from test_analytics_dashboard import TestAnalyticsCharts
+
+    cpu = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, cpu} & set(range(1, cpu + 1)))
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = []
+        for run in range(num_runs):
+            analytics = TestAnalyticsCharts()
+            analytics.module_data = {module: max(rate - run, 0)
+                                     for module, rate in analytics.module_data.items()}
+            jobs += chart_jobs(analytics, os.path.join(tmp, f'run_{run}'))
+
+        baseline = None
+        for workers in worker_counts:
+            started = time.perf_counter()
+            render_batch(jobs, workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f'   • {workers:>3} worker(s): {len(jobs)} charts in {elapsed:6.2f}s '
+                  f'(x{baseline / elapsed:.1f})')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Render biểu đồ test song song (headless)')
+    parser.add_argument('reports', nargs='*', help='các báo cáo jest --json, mỗi file một bộ biểu đồ')
+    parser.add_argument('--workers', type=int, default=None, help='số worker process (mặc định: số core)')
+    parser.add_argument('--output-dir', default='.', help='thư mục chứa biểu đồ')
+    parser.add_argument('--no-cache', action='store_true', help='luôn vẽ lại, bỏ qua render cache')
+    parser.add_argument('--benchmark', action='store_true', help='đo thời gian theo số worker')
+    parser.add_argument('--trace', metavar='FILE', help='ghi Chrome trace JSON (+ profile phẳng)')
+    args = parser.parse_args(argv)
+    tracing.configure(args.trace)
+
+    if args.benchmark:
+        print('⏱️ Benchmark render song song:')
+        benchmark()
+        return
+
+    from chart_cache import RenderCache
+    from test_analytics_dashboard import TestAnalyticsCharts
+
+    cache = None if args.no_cache else RenderCache()
+    jobs = []
+    if not args.reports:
+        jobs = chart_jobs(TestAnalyticsCharts(), args.output_dir)
+    for report in args.reports:
+        analytics = TestAnalyticsCharts()
+        analytics.load_jest_report(report, keep_durations=False)
+        run_name = os.path.splitext(os.path.basename(report))[0]
+        jobs += chart_jobs(analytics, os.path.join(args.output_dir, run_name))
+
+    started = time.perf_counter()
+    for filename, elapsed in render_batch(jobs, args.workers, cache):
+        print(f"   ✅ Đã lưu: {filename} ({elapsed:.2f}s)")
+    print(f"\n🎉 Hoàn thành {len(jobs)} biểu đồ trong {time.perf_counter() - started:.2f}s")
+    if cache is not None:
+        print(f"📦 Render cache: {cache.report()}")
+
+
+if __name__ == '__main__':
+    main()
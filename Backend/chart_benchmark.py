@@ -0,0 +1,268 @@
+"""
+Benchmark pipeline vẽ biểu đồ, có ngưỡng phát hiện regression.
+
+Mỗi kịch bản (biểu đồ của dashboard, preset của các script riêng lẻ, và các
+kích thước dữ liệu: 6 / 60 / 600 module, 1 / 100 / 10k lần chạy) được đo theo
+từng giai đoạn:
+
+    prep          dựng số liệu và chart spec (như TestAnalyticsCharts.chart_spec)
+    draw          tạo figure và gọi hàm vẽ
+    tight_layout
+    savefig@<dpi> lưu PNG ở từng dpi
+
+cùng bộ nhớ đỉnh (RSS đỉnh của process và đỉnh heap Python). Kết quả ghi ra
+JSON; với `--baseline`, giai đoạn nào chậm hơn (hoặc đỉnh heap Python lớn hơn)
+baseline quá `--threshold` thì thoát với mã lỗi 1.
+
+Cách dùng:
+    python chart_benchmark.py -o bench.json
+    python chart_benchmark.py --baseline bench.json --threshold 0.25
+    python chart_benchmark.py --quick --only module_coverage
+"""
+
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+
+from chart_engine import ChartEngine, save_options
+from test_analytics_dashboard import TestAnalyticsCharts
+
+DEFAULT_DPIS = (100, 300)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# Chênh lệch tuyệt đối nhỏ hơn mức này không tính là regression (nhiễu đo)
+MIN_REGRESSION_SECONDS = 0.005
+MIN_REGRESSION_MIB = 1.0
+MODULE_SIZES = (6, 60, 600)
+RUN_SIZES = (1, 100, 10000)
+QUICK_MODULE_SIZES = (6, 60)
+QUICK_RUN_SIZES = (1, 100)
+
+
+def _dashboard_spec(method, modules=None, runs=None):
+    """Spec của TestAnalyticsCharts với số module / số lần chạy giả lập"""
+    analytics = TestAnalyticsCharts()
+    if modules:
+        rng = np.random.default_rng(modules)
+        rates = np.sort(rng.uniform(40, 100, modules).round(1))[::-1]
+        analytics.module_data = {f'Module {i:03d} Controller': float(rate) for i, rate in enumerate(rates)}
+    if runs:
+        rng = np.random.default_rng(runs)
+        timestamps = 1700000000000 + np.arange(runs, dtype=np.int64) * 3600000
+        rates = np.clip(85 + rng.normal(0, 5, runs), 0, 100).round(1)
+        return {'kind': 'pass_rate_trend', 'style': 'dashboard',
+                'data': {'timestamps': timestamps.tolist(), 'pass_rates': rates.tolist()},
+                'output': {'filename': 'pass_rate_trend_chart.png', 'dpi': 300}}
+    return analytics.chart_spec(method)
+
+
+def _script_spec(module, name):
+    """Spec khai báo sẵn trong các script riêng lẻ (không mở cửa sổ)"""
+    import importlib
+
+    spec = dict(getattr(importlib.import_module(module), name))
+    spec['output'] = dict(spec['output'], show=False)
+    return spec
+
+
+def _pie_preset_spec(style):
+    return {'kind': 'pie_summary', 'style': style,
+            'data': {'passed': 107, 'failed': 20, 'blocked': 0, 'not_run': 0},
+            'output': {'filename': 'test_execution_summary.png', 'dpi': 300}}
+
+
+def scenarios(quick=False):
+    """Tên kịch bản -> hàm dựng spec (phần được đo ở giai đoạn prep)"""
+    items = {
+        'create_pie_chart': lambda: _dashboard_spec('create_pie_chart'),
+        'create_defect_bar_chart': lambda: _dashboard_spec('create_defect_bar_chart'),
+    }
+    for modules in (QUICK_MODULE_SIZES if quick else MODULE_SIZES):
+        items[f'create_module_coverage_chart[{modules} modules]'] = (
+            lambda modules=modules: _dashboard_spec('create_module_coverage_chart', modules=modules))
+    for runs in (QUICK_RUN_SIZES if quick else RUN_SIZES):
+        items[f'create_pass_rate_trend_chart[{runs} runs]'] = (
+            lambda runs=runs: _dashboard_spec('create_pass_rate_trend_chart', runs=runs))
+    items.update({
+        'create_test_charts.defect': lambda: _script_spec('create_test_charts', 'DEFECT_SPEC'),
+        'create_test_charts.coverage': lambda: _script_spec('create_test_charts', 'COVERAGE_SPEC'),
+        'test_charts_complete.defect': lambda: _script_spec('test_charts_complete', 'DEFECT_DISTRIBUTION_SPEC'),
+        'test_charts_complete.coverage': lambda: _script_spec('test_charts_complete', 'TEST_COVERAGE_SPEC'),
+        'test_chart_improved': lambda: _pie_preset_spec('summary_v2'),
+        'test_execution_chart': lambda: _pie_preset_spec('execution'),
+    })
+    return items
+
+
+def _reset_peak_rss():
+    """Đặt lại mốc RSS đỉnh (VmHWM) của process; chỉ có trên Linux"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_mib(field):
+    """Trường bộ nhớ (VmRSS, VmHWM) trong /proc/self/status, tính bằng MiB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mib():
+    peak = _proc_status_mib('VmHWM')
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_stages(build_spec, engine, directory, dpis):
+    """Chạy pipeline một lần, trả về thời gian từng giai đoạn (giây)"""
+    started = time.perf_counter()
+    spec = build_spec()
+    stages = {'prep': time.perf_counter() - started}
+
+    started = time.perf_counter()
+    fig, style = engine.draw(spec)
+    stages['draw'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    fig.tight_layout()
+    stages['tight_layout'] = time.perf_counter() - started
+
+    for dpi in dpis:
+        started = time.perf_counter()
+        fig.savefig(os.path.join(directory, f'bench_{dpi}.png'), **save_options(style, dpi))
+        stages[f'savefig@{dpi}'] = time.perf_counter() - started
+    return stages
+
+
+def measure(build_spec, engine, directory, dpis=DEFAULT_DPIS, repeat=DEFAULT_REPEAT):
+    """
+    Đo một kịch bản `repeat` lần; thời gian mỗi giai đoạn lấy trung vị.
+    tracemalloc làm pipeline chậm đi nhiều lần nên thời gian (và RSS đỉnh) đo ở
+    các lần chạy không bật tracemalloc, đỉnh heap Python đo ở một lần chạy riêng.
+    """
+    timings = {}
+    peak_rss = 0.0
+    start_rss = _proc_status_mib('VmRSS') or 0.0
+    for _ in range(repeat):
+        _reset_peak_rss()
+        stages = _run_stages(build_spec, engine, directory, dpis)
+        peak_rss = max(peak_rss, _peak_rss_mib())
+        for stage, seconds in stages.items():
+            timings.setdefault(stage, []).append(seconds)
+
+    tracemalloc.start()
+    _run_stages(build_spec, engine, directory, dpis)
+    peak_py = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+
+    return {
+        'stages': {stage: round(statistics.median(values), 6) for stage, values in timings.items()},
+        'total': round(sum(statistics.median(values) for values in timings.values()), 6),
+        'peak_rss_mib': round(peak_rss, 1),
+        'peak_rss_delta_mib': round(max(peak_rss - start_rss, 0.0), 1),
+        'peak_python_mib': round(peak_py, 2),
+    }
+
+
+def run_benchmarks(dpis=DEFAULT_DPIS, repeat=DEFAULT_REPEAT, quick=False, only=None):
+    engine = ChartEngine()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, build_spec in scenarios(quick).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results[name] = result = measure(build_spec, engine, tmp, dpis, repeat)
+            stages = '  '.join(f'{stage} {seconds * 1000:7.1f}' for stage, seconds in result['stages'].items())
+            print(f'   • {name:44s} {stages}  (ms)  RSS +{result["peak_rss_delta_mib"]:.1f} MiB, '
+                  f'heap {result["peak_python_mib"]:.1f} MiB')
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'matplotlib': matplotlib.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'dpis': list(dpis),
+            'repeat': repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Danh sách regression: (kịch bản, chỉ số, baseline, hiện tại, đơn vị).
+    So sánh thời gian từng giai đoạn và đỉnh heap Python (ổn định hơn RSS).
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        checks = [(stage, base['stages'].get(stage), value, MIN_REGRESSION_SECONDS, 'ms')
+                  for stage, value in result['stages'].items()]
+        checks.append(('peak_python_mib', base.get('peak_python_mib'), result['peak_python_mib'],
+                       MIN_REGRESSION_MIB, 'MiB'))
+        for metric, before, value, slack, unit in checks:
+            if before is not None and value > before * (1 + threshold) and value - before > slack:
+                regressions.append((name, metric, before, value, unit))
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark pipeline vẽ biểu đồ')
+    parser.add_argument('-o', '--output', default='chart_benchmark.json', help='file JSON kết quả')
+    parser.add_argument('--baseline', help='file JSON baseline để so sánh')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='tỷ lệ chậm hơn baseline được chấp nhận (0.25 = 25%%)')
+    parser.add_argument('--dpi', type=int, nargs='+', default=list(DEFAULT_DPIS))
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--quick', action='store_true', help='bỏ các kích thước lớn (600 module, 10k lần chạy)')
+    parser.add_argument('--only', nargs='+', help='chỉ chạy kịch bản có tên chứa chuỗi này')
+    args = parser.parse_args(argv)
+
+    print(f'⏱️ Benchmark chart pipeline (dpi {args.dpi}, {args.repeat} lần/kịch bản):')
+    current = run_benchmarks(tuple(args.dpi), args.repeat, args.quick, args.only)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2)
+    print(f'✅ Đã lưu: {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f'❌ {len(regressions)} chỉ số tệ hơn baseline quá {args.threshold:.0%}:')
+            for name, metric, before, value, unit in regressions:
+                scale = 1000 if unit == 'ms' else 1
+                change = f'+{value / before - 1:.0%}' if before else 'baseline 0'
+                print(f'   • {name} / {metric}: {before * scale:.1f} {unit} -> {value * scale:.1f} {unit} '
+                      f'({change})')
+            sys.exit(1)
+        print(f'✅ Không có regression so với {args.baseline} (ngưỡng {args.threshold:.0%})')
+
+
+if __name__ == '__main__':
+    main()
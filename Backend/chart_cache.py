@@ -0,0 +1,109 @@
+"""
+Cache file biểu đồ theo nội dung (content-addressed).
+
+Khóa cache là hash SHA-256 của dữ liệu đầu vào, tham số style và tùy chọn
+output của biểu đồ. Nếu khóa không đổi thì bỏ qua bước vẽ và dùng lại file PNG
+đã render trước đó. Dung lượng cache có giới hạn, file ít dùng nhất bị xóa
+trước (LRU).
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+DEFAULT_CACHE_DIR = '.chart_cache'
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+INDEX_FILE = 'index.json'
+
+
+def source_fingerprint(func):
+    """Hash mã nguồn hàm/module vẽ (màu, kích thước, nhãn... nằm trong code)"""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def make_key(chart, data, style=None, output=None):
+    """Khóa cache = hash(tên biểu đồ, dữ liệu, style, tùy chọn output)"""
+    import matplotlib
+
+    payload = json.dumps([chart, data, style, output, matplotlib.__version__],
+                         sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Cache file render trên đĩa, giới hạn dung lượng, xóa theo LRU"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.index = {}     # key -> {'file', 'size', 'last_used'}
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+
+    def fetch(self, key, filename):
+        """Cache hit -> chép file đã render ra `filename` và trả về True"""
+        entry = self.index.get(key)
+        cached = entry and os.path.join(self.directory, entry['file'])
+        if not entry or not os.path.exists(cached):
+            self.index.pop(key, None)
+            self.misses += 1
+            return False
+        if os.path.abspath(cached) != os.path.abspath(filename):
+            shutil.copyfile(cached, filename)
+        entry['last_used'] = time.time()
+        self.hits += 1
+        self._save_index()
+        return True
+
+    def store(self, key, filename):
+        """Lưu file vừa render vào cache rồi xóa bớt theo LRU nếu vượt giới hạn"""
+        cached_name = key + os.path.splitext(filename)[1]
+        shutil.copyfile(filename, os.path.join(self.directory, cached_name))
+        self.index[key] = {
+            'file': cached_name,
+            'size': os.path.getsize(filename),
+            'last_used': time.time(),
+        }
+        self._evict()
+        self._save_index()
+
+    def total_bytes(self):
+        return sum(entry['size'] for entry in self.index.values())
+
+    def report(self):
+        return f"{self.hits} hit(s), {self.misses} miss(es)"
+
+    def _evict(self):
+        total = self.total_bytes()
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except OSError:
+                pass
+            total -= entry['size']
+            del self.index[key]
+
+    def _save_index(self):
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, index_path)
+
@@ -0,0 +1,950 @@
+"""
+Engine vẽ biểu đồ thống kê test dùng chung cho mọi script.
+
+Mỗi biểu đồ được mô tả bằng một spec (dict) thay vì một hàm vẽ riêng:
+
+    {
+        'kind': 'defect_severity',            # loại biểu đồ (xem DRAWERS)
+        'style': 'dashboard',                 # preset trong STYLES
+        'style_overrides': {'alpha': 0.8},    # tùy chọn, ghi đè preset
+        'data': {'by_severity': {...}},
+        'output': {'filename': 'defect.png', 'dpi': 300, 'show': False,
+                   'thumbnail': 320, 'svg': True},
+    }
+
+Mỗi biểu đồ được vẽ và layout một lần rồi xuất ra mọi định dạng được yêu cầu:
+PNG, thumbnail (thu nhỏ từ chính buffer raster của PNG, không đọc lại file),
+SVG, và một trang trong file PDF nhiều trang (`render(spec, pdf=PdfPages(...))`).
+
+Bảng màu theo ngưỡng, legend patch... được dựng một lần cho mỗi preset và
+figure được dùng lại giữa các lần render cùng loại, nên chi phí khởi tạo cho
+mỗi biểu đồ chỉ phải trả một lần khi tạo hàng trăm biến thể.
+
+Vòng đời figure do RenderContext quản lý: mặc định figure được vẽ off-screen
+(Figure + FigureCanvasAgg, không đăng ký vào pyplot) và canvas được dùng lại
+trong một pool giới hạn, nên bộ nhớ không tăng khi vẽ hàng nghìn biểu đồ.
+Chỉ khi cần mở cửa sổ (`RenderContext(interactive=True)` hoặc output `show`)
+figure mới được tạo qua pyplot, và được đóng ngay sau khi hiển thị.
+
+Kiểm tra bộ nhớ:
+    python chart_engine.py --memcheck 10000
+"""
+
+import os
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch, Rectangle
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+from chart_cache import make_key, source_fingerprint
+from downsample import downsample, pixel_width
+from tracing import span
+
+# Ngưỡng đánh giá pass rate và nhãn legend tương ứng (từ thấp tới cao)
+RATE_THRESHOLDS = (70, 80, 90)
+RATE_LABELS = ('Needs Improvement (<70%)', 'Acceptable (70-79%)', 'Good (80-89%)', 'Excellent (≥90%)')
+# Ngưỡng tỷ trọng thời gian chạy của một file test (từ thấp tới cao)
+SHARE_THRESHOLDS = (5, 10, 20)
+SHARE_LABELS = ('Minor (<5%)', 'Moderate (5-9%)', 'Heavy (10-19%)', 'Shard Candidate (≥20%)')
+
+# Preset style, mỗi preset tương ứng với một script gốc
+STYLES = {
+    # TestAnalyticsCharts (test_analytics_dashboard.py)
+    'dashboard': {
+        'pie_summary': {
+            'figsize': (10, 8), 'colors': ('#90EE90', '#FF6B6B'), 'explode': 0.05,
+            'shadow': True, 'show_autopct': True, 'pctdistance': 0.6, 'fontsize': 11,
+            'slice_label': '{name}\n{count}\n({pct:.1f}%)', 'slice_names': ('Passed', 'Failed'),
+            'legend_label': 'Test cases {name}: {count} ({pct})', 'legend_alpha': None,
+            'legend_edgecolor': None, 'legend_fontsize': None, 'legend_frame': False,
+            'legend_anchor': (1.05, 0.5), 'title_fontsize': 14, 'equal_aspect': False,
+            'facecolor': None,
+        },
+        'defect_severity': {
+            'figsize': (10, 6), 'fixed_color': '#5B9BD5', 'open_color': '#C55454', 'alpha': None,
+            'bold': True, 'title_fontsize': None, 'legend_loc': 'best', 'total_offset': 0.3,
+            'total_fontsize': None, 'count_fontsize': 12, 'ylim_pad': 3, 'axis_below': False,
+        },
+        'module_pass_rate': {
+            'figsize': (12, 8), 'palette': ('#FF6B6B', '#F79646', '#FFC000', '#92D050'),
+            'alpha': None, 'linewidth': 0.8, 'height': 0.7, 'line_alpha': 0.8,
+            'overall_label': '{rate}%', 'overall_offset': 0.3, 'bold': True, 'title_fontsize': None,
+            'value_offset': 3, 'white_below': 60, 'axis_below': False,
+        },
+        'pass_rate_trend': {
+            'figsize': (12, 6), 'palette': ('#FF6B6B', '#F79646', '#FFC000', '#92D050'),
+            'line_color': '#5B9BD5', 'linewidth': 1.5, 'max_markers': 200,
+            'downsample': 'minmax', 'pixel_budget': None,
+        },
+        'flaky_heatmap': {
+            'figsize': (14, 8), 'colors': ('#D9D9D9', '#FF6B6B', '#92D050'), 'max_label': 60,
+        },
+        'slow_tests': {
+            'figsize': (12, 8), 'p95_color': '#F79646', 'p50_color': '#FFC000',
+            'p99_color': '#C55454', 'height': 0.7, 'linewidth': 0.8, 'max_label': 60,
+        },
+        'runtime_share': {
+            'figsize': (12, 8), 'palette': ('#92D050', '#FFC000', '#F79646', '#FF6B6B'),
+            'linewidth': 0.8, 'height': 0.7,
+        },
+        'run_diff': {
+            'figsize': (12, 6), 'linewidth': 0.8, 'height': 0.7,
+            'colors': {'newly_failed': '#C55454', 'newly_passed': '#92D050', 'slower': '#F79646',
+                       'faster': '#5B9BD5', 'added': '#A5A5A5', 'removed': '#7F7F7F',
+                       'still_failing': '#FF6B6B'},
+        },
+        'revenue_trend': {
+            'figsize': (12, 6), 'bar_color': '#5B9BD5', 'line_color': '#1F4E79',
+            'average_color': '#F79646', 'forecast_color': '#C55454', 'alpha': 0.8,
+            'linewidth': 0.8, 'max_bars': 120, 'downsample': 'lttb', 'pixel_budget': None,
+        },
+        'top_products': {
+            'figsize': (12, 8), 'bar_color': '#5B9BD5', 'sold_color': '#C55454', 'height': 0.7,
+            'linewidth': 0.8, 'max_label': 50,
+        },
+        'latency_percentiles': {
+            'figsize': (12, 6), 'colors': ('#5B9BD5', '#F79646', '#92D050', '#C55454', '#A5A5A5'),
+            'linewidth': 2,
+        },
+        'search_scaling': {
+            'figsize': (12, 6), 'colors': ('#5B9BD5', '#C55454', '#92D050', '#F79646'), 'linewidth': 2,
+        },
+    },
+    # create_test_charts.py
+    'classic': {
+        'defect_severity': {
+            'bold': False, 'total_offset': 0.5, 'count_fontsize': None, 'ylim_pad': None,
+        },
+        'module_pass_rate': {
+            'figsize': (12, 7), 'height': 0.8, 'line_alpha': None, 'bold': False,
+        },
+    },
+    # test_charts_complete.py
+    'complete': {
+        'defect_severity': {
+            'fixed_color': '#6495ED', 'open_color': '#DC143C', 'alpha': 0.8, 'title_fontsize': 12,
+            'legend_loc': 'upper right', 'total_offset': 0.5, 'total_fontsize': 10,
+            'count_fontsize': None, 'ylim_pad': None, 'axis_below': True,
+        },
+        'module_pass_rate': {
+            'palette': ('#FF6B6B', '#FFA500', '#FFD700', '#90EE90'), 'alpha': 0.8,
+            'linewidth': 0.5, 'height': 0.8, 'overall_label': 'Overall: {rate}%',
+            'overall_offset': 0.5, 'title_fontsize': 14, 'value_offset': 2, 'white_below': 50,
+            'axis_below': True,
+        },
+    },
+    # test_chart_improved.py
+    'summary_v2': {
+        'pie_summary': {
+            'explode': 0, 'shadow': False, 'show_autopct': False, 'pctdistance': 0.85,
+            'fontsize': 9, 'slice_label': 'Number of test\ncases {name}\n{count}\n({pct:.1f}%)',
+            'slice_names': ('passed', 'failed'), 'legend_label': 'Number of test cases {name}: {count} ({pct})',
+            'legend_alpha': 0.8, 'legend_fontsize': 9, 'legend_frame': True, 'equal_aspect': True,
+            'facecolor': 'white',
+        },
+    },
+    # test_execution_chart.py
+    'execution': {
+        'pie_summary': {
+            'figsize': (12, 8), 'fontsize': 10, 'slice_label': 'Test Cases {name}\n{count} ({pct:.1f}%)',
+            'legend_label': 'Number of test cases {name}: {count} ({pct})', 'legend_alpha': 0.7,
+            'legend_edgecolor': 'black', 'legend_fontsize': 9, 'legend_frame': True,
+            'legend_anchor': (1, 0.5), 'title_fontsize': 16, 'facecolor': 'white',
+        },
+    },
+}
+
+# Chiều rộng mặc định (pixel) của thumbnail
+THUMBNAIL_WIDTH = 320
+
+# Số canvas off-screen tối đa giữ lại để dùng lại (mỗi figsize một canvas)
+DEFAULT_POOL_SIZE = 6
+
+DRAWERS = {}
+
+
+def register_chart(kind):
+    """Đăng ký hàm vẽ cho một loại biểu đồ: draw(ax, data, style)"""
+    def decorator(draw):
+        DRAWERS[kind] = draw
+        return draw
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def _resolved_style(preset, kind):
+    style = dict(STYLES['dashboard'].get(kind, {}))
+    if preset != 'dashboard':
+        style.update(STYLES[preset].get(kind, {}))
+    return style
+
+
+def resolve_style(spec):
+    """Style cuối cùng của spec: preset 'dashboard' <- preset của spec <- style_overrides"""
+    style = _resolved_style(spec.get('style', 'dashboard'), spec['kind'])
+    overrides = spec.get('style_overrides')
+    return {**style, **overrides} if overrides else style
+
+
+@lru_cache(maxsize=None)
+def shared_objects(palette):
+    """Bảng ngưỡng màu và legend patch, dựng một lần cho mỗi bảng màu"""
+    return {
+        'thresholds': np.asarray(RATE_THRESHOLDS, dtype=float),
+        'palette': np.asarray(palette),
+        'rate_legend': [Patch(facecolor=color, label=label)
+                        for color, label in reversed(list(zip(palette, RATE_LABELS)))],
+    }
+
+
+def rate_colors(rates, palette):
+    """Màu theo ngưỡng cho cả mảng pass rate (vector hóa bằng searchsorted)"""
+    shared = shared_objects(tuple(palette))
+    levels = np.searchsorted(shared['thresholds'], np.asarray(rates, dtype=float), side='right')
+    return shared['palette'][levels].tolist()
+
+
+@register_chart('pie_summary')
+def _draw_pie_summary(ax, data, style):
+    """Biểu đồ tròn - Test Case Execution Summary"""
+    passed, failed = data['passed'], data['failed']
+    blocked, not_run = data.get('blocked', 0), data.get('not_run', 0)
+    total = passed + failed
+
+    def pct(count):
+        return count / total * 100 if total else 0.0
+
+    names = style['slice_names']
+    labels = [style['slice_label'].format(name=names[0], count=passed, pct=pct(passed)),
+              style['slice_label'].format(name=names[1], count=failed, pct=pct(failed))]
+    explode = (style['explode'], style['explode']) if style['explode'] else None
+
+    wedges, texts, autotexts = ax.pie([passed, failed], labels=labels, colors=style['colors'],
+                                      explode=explode, autopct='%1.1f%%', shadow=style['shadow'],
+                                      startangle=90, pctdistance=style['pctdistance'],
+                                      textprops={'fontsize': style['fontsize'], 'fontweight': 'bold'})
+    if not style['show_autopct']:
+        for autotext in autotexts:
+            autotext.set_visible(False)
+
+    ax.set_title('Test Case Execution Summary', fontsize=style['title_fontsize'],
+                 fontweight='bold', pad=20)
+
+    entries = [('#DDA0DD', 'executed', total, '100%'),
+               (style['colors'][0], 'passed', passed, f'{pct(passed):.1f}%'),
+               (style['colors'][1], 'failed', failed, f'{pct(failed):.1f}%'),
+               ('#FFD700', 'blocked', blocked, f'{pct(blocked):.0f}%'),
+               ('#FFA500', 'not run', not_run, f'{not_run / max(total + not_run, 1) * 100:.0f}%')]
+    legend_elements = [
+        Rectangle((0, 0), 1, 1, facecolor=color, alpha=style['legend_alpha'],
+                  edgecolor=style['legend_edgecolor'], linewidth=0.5 if style['legend_edgecolor'] else None,
+                  label=style['legend_label'].format(name=name, count=count, pct=share))
+        for color, name, count, share in entries
+    ]
+    legend_kwargs = {'fontsize': style['legend_fontsize']}
+    if style['legend_frame']:
+        legend_kwargs.update(frameon=True, fancybox=True, shadow=True)
+    ax.legend(handles=legend_elements, loc='center left', bbox_to_anchor=style['legend_anchor'],
+              **legend_kwargs)
+    if style['equal_aspect']:
+        ax.set_aspect('equal')
+
+
+@register_chart('defect_severity')
+def _draw_defect_severity(ax, data, style):
+    """Biểu đồ cột - Defect Distribution by Severity"""
+    by_severity = data['by_severity']
+    categories = list(by_severity)
+    fixed_counts = np.array([by_severity[cat]['fixed'] for cat in categories])
+    open_counts = np.array([by_severity[cat]['open'] for cat in categories])
+    totals = fixed_counts + open_counts
+    weight = 'bold' if style['bold'] else None
+
+    x = np.arange(len(categories))
+    width = 0.6
+    ax.bar(x, fixed_counts, width, label='Number of defects fixed',
+           color=style['fixed_color'], alpha=style['alpha'])
+    ax.bar(x, open_counts, width, bottom=fixed_counts, label='Number of defects remain open',
+           color=style['open_color'], alpha=style['alpha'])
+
+    ax.set_ylabel('Number of defects', fontweight=weight)
+    ax.set_xlabel('Severity', fontweight=weight)
+    ax.set_title(data.get('title') or
+                 f'Defect Distribution by Severity\nTotal: {totals.sum()} Defects '
+                 f'({fixed_counts.sum()} Fixed, {open_counts.sum()} Open)',
+                 fontweight=weight, fontsize=style['title_fontsize'])
+    ax.set_xticks(x)
+    ax.set_xticklabels(categories)
+    ax.legend(loc=style['legend_loc'])
+
+    # Thêm labels trên bars
+    for i, total in enumerate(totals):
+        ax.text(i, total + style['total_offset'], f'Total: {total}', ha='center', va='bottom',
+                fontweight='bold', fontsize=style['total_fontsize'])
+        if open_counts[i] > 0:
+            ax.text(i, fixed_counts[i] + open_counts[i] / 2, str(open_counts[i]), ha='center',
+                    va='center', color='white', fontweight='bold', fontsize=style['count_fontsize'])
+
+    ax.grid(True, alpha=0.3, axis='y')
+    if style['axis_below']:
+        ax.set_axisbelow(True)
+    if style['ylim_pad'] is not None and len(totals):
+        ax.set_ylim(0, totals.max() + style['ylim_pad'])
+
+
+@register_chart('module_pass_rate')
+def _draw_module_pass_rate(ax, data, style):
+    """Biểu đồ ngang - Test Coverage by Module (pass rate)"""
+    modules = list(data['modules'])
+    pass_rates = list(data['modules'].values())
+    overall = data['overall']
+    weight = 'bold' if style['bold'] else None
+    shared = shared_objects(tuple(style['palette']))
+
+    y_pos = np.arange(len(modules))
+    bars = ax.barh(y_pos, pass_rates, color=rate_colors(pass_rates, style['palette']),
+                   alpha=style['alpha'], edgecolor='black', linewidth=style['linewidth'],
+                   height=style['height'])
+
+    # Overall pass rate line
+    ax.axvline(x=overall, color='red', linestyle='--', linewidth=2, alpha=style['line_alpha'])
+    ax.text(overall + 1, len(modules) - style['overall_offset'],
+            style['overall_label'].format(rate=overall),
+            rotation=90, va='top', ha='left', color='red', fontweight='bold')
+
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(modules)
+    ax.set_xlabel(data.get('xlabel', 'Pass Rate (%)'), fontweight=weight)
+    ax.set_ylabel('Module', fontweight=weight)
+    ax.set_title(data.get('title') or
+                 f'Test Coverage by Module - Pass Rate\nOverall Pass Rate: {overall}%',
+                 fontweight=weight, fontsize=style['title_fontsize'])
+
+    # Thêm phần trăm trên bars
+    for bar, rate in zip(bars, pass_rates):
+        ax.text(bar.get_width() - style['value_offset'], bar.get_y() + bar.get_height() / 2,
+                f'{rate}%', ha='right', va='center', fontweight='bold',
+                color='white' if rate < style['white_below'] else 'black')
+
+    ax.legend(handles=shared['rate_legend'], loc='lower right')
+    ax.set_xlim(0, 100)
+    ax.grid(True, alpha=0.3, axis='x')
+    if style['axis_below']:
+        ax.set_axisbelow(True)
+
+
+def plot_points(ax, x, y, style):
+    """
+    (x, y) để vẽ đường: rút gọn theo style['downsample'] ('lttb' | 'minmax' | None)
+    với ngân sách style['pixel_budget'] hoặc chiều rộng axes theo pixel ở dpi lưu file.
+    """
+    method = style.get('downsample')
+    if not method:
+        return x, y
+    budget = style.get('pixel_budget') or pixel_width(ax, style.get('dpi'))
+    with span('render.downsample', 'render', method=method, points=len(y), budget=budget):
+        return downsample(x, y, budget, method)
+
+
+@register_chart('pass_rate_trend')
+def _draw_pass_rate_trend(ax, data, style):
+    """Biểu đồ đường - Pass Rate Over Time (cùng thang màu với module_pass_rate)"""
+    times = np.asarray(data['timestamps'], dtype='int64').astype('datetime64[ms]')
+    rates = np.asarray(data['pass_rates'], dtype=float)
+    shared = shared_objects(tuple(style['palette']))
+
+    ax.plot(*plot_points(ax, times, rates, style), color=style['line_color'], linewidth=style['linewidth'],
+            zorder=2)
+    if len(rates) <= style['max_markers']:
+        ax.scatter(times, rates, c=rate_colors(rates, style['palette']), edgecolor='black',
+                   linewidth=0.5, s=36, zorder=3)
+
+    # Pass rate trung bình
+    average = round(float(rates.mean()), 1) if len(rates) else 0.0
+    ax.axhline(y=average, color='red', linestyle='--', linewidth=2, alpha=0.8)
+    if len(rates):
+        ax.text(times[0], average + 1, f'Average: {average}%', va='bottom', ha='left',
+                color='red', fontweight='bold')
+
+    latest = f'{rates[-1]}%' if len(rates) else 'n/a'
+    ax.set_xlabel('Run Date', fontweight='bold')
+    ax.set_ylabel('Pass Rate (%)', fontweight='bold')
+    ax.set_title(data.get('title') or
+                 f'Pass Rate Over Time\n{len(rates)} Runs, Latest: {latest}',
+                 fontweight='bold')
+    ax.legend(handles=shared['rate_legend'], loc='lower right')
+    ax.set_ylim(0, 100)
+    ax.grid(True, alpha=0.3)
+    for label in ax.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha('right')
+
+
+def _short_label(name, limit):
+    return name if len(name) <= limit else name[:limit - 1] + '…'
+
+
+@register_chart('slow_tests')
+def _draw_slow_tests(ax, data, style):
+    """Biểu đồ ngang - Slowest Tests (p95, kèm p50 và p99)"""
+    tests = data['tests']
+    p50, p95, p99 = (np.asarray(data[key], dtype=float) for key in ('p50', 'p95', 'p99'))
+
+    y_pos = np.arange(len(tests))
+    bars = ax.barh(y_pos, p95, color=style['p95_color'], edgecolor='black',
+                   linewidth=style['linewidth'], height=style['height'], label='p95')
+    ax.barh(y_pos, p50, color=style['p50_color'], edgecolor='black',
+            linewidth=style['linewidth'], height=style['height'] / 2, label='p50')
+    ax.scatter(p99, y_pos, marker='|', s=300, linewidths=3, color=style['p99_color'],
+               zorder=3, label='p99')
+
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels([_short_label(name, style['max_label']) for name in tests], fontsize=8)
+    ax.invert_yaxis()
+    ax.set_xlabel('Duration (ms)', fontweight='bold')
+    ax.set_ylabel('Test', fontweight='bold')
+    ax.set_title(data.get('title') or
+                 f'Slowest Tests - p95 Duration\nTop {len(tests)} over {data.get("runs", 1)} Run(s)',
+                 fontweight='bold')
+
+    # Thêm thời gian p95 trên bars
+    for bar, value in zip(bars, p95):
+        ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f' {value:.0f} ms',
+                ha='left', va='center', fontweight='bold', fontsize=8)
+
+    ax.legend(loc='lower right')
+    if len(tests):
+        ax.set_xlim(0, max(p99.max(), p95.max()) * 1.15)
+    ax.grid(True, alpha=0.3, axis='x')
+
+
+@register_chart('run_diff')
+def _draw_run_diff(ax, data, style):
+    """Biểu đồ ngang - Run Diff (số test theo từng nhóm thay đổi)"""
+    names = list(data['counts'])
+    counts = [data['counts'][name] for name in names]
+
+    y_pos = np.arange(len(names))
+    bars = ax.barh(y_pos, counts, color=[style['colors'][name] for name in names],
+                   edgecolor='black', linewidth=style['linewidth'], height=style['height'])
+
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels([data['labels'][name] for name in names])
+    ax.invert_yaxis()
+    ax.set_xlabel('Number of Tests', fontweight='bold')
+    ax.set_ylabel('Change', fontweight='bold')
+    ax.set_title(data.get('title') or
+                 f'Run Diff - {data["base"]} vs {data["current"]}\n'
+                 f'Pass Rate: {data["base_rate"]}% → {data["current_rate"]}%',
+                 fontweight='bold')
+
+    # Thêm số test trên bars
+    for bar, count in zip(bars, counts):
+        ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f' {count}',
+                ha='left', va='center', fontweight='bold')
+
+    ax.set_xlim(0, max(max(counts, default=0), 1) * 1.15)
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.grid(True, alpha=0.3, axis='x')
+
+
+@register_chart('revenue_trend')
+def _draw_revenue_trend(ax, data, style):
+    """Biểu đồ cột / đường - Doanh thu theo tháng hoặc quý, kèm trung bình trượt và dự báo"""
+    periods = np.asarray(data['periods'], dtype='datetime64[M]').astype('datetime64[D]')
+    values = np.asarray(data['values'], dtype=float)
+    averages = np.asarray(data['moving_average'], dtype=float)
+    quarter = data.get('period') == 'quarter'
+    unit = 'Quarter' if quarter else 'Month'
+
+    if len(values) <= style['max_bars']:
+        width = 80 if quarter else 25
+        ax.bar(periods, np.nan_to_num(values), width=width, color=style['bar_color'],
+               alpha=style['alpha'], edgecolor='black', linewidth=style['linewidth'], label='Revenue')
+    else:
+        ax.plot(*plot_points(ax, periods, values, style), color=style['line_color'], linewidth=1,
+                label='Revenue')
+    ax.plot(*plot_points(ax, periods, averages, style), color=style['average_color'], linewidth=2,
+            label=f'{data["window"]}-{unit} Moving Average')
+
+    if data.get('forecast'):
+        months = np.asarray(data['forecast_periods'], dtype='datetime64[M]').astype('datetime64[D]')
+        forecast = np.asarray(data['forecast'], dtype=float)
+        ax.plot(months, forecast, color=style['forecast_color'], linestyle='--', linewidth=2,
+                marker='o', markersize=3, label='Forecast')
+        if data.get('sigma'):
+            ax.fill_between(months, np.clip(forecast - 1.96 * data['sigma'], 0, None),
+                            forecast + 1.96 * data['sigma'], color=style['forecast_color'], alpha=0.15)
+
+    growth = f', YoY: {data["yoy"]:+.1f}%' if data.get('yoy') is not None else ''
+    ax.set_xlabel(unit, fontweight='bold')
+    ax.set_ylabel('Revenue (VND)', fontweight='bold')
+    ax.set_title(data.get('title') or
+                 f'Revenue by {unit}\nTotal: {data["total"]:,.0f} VND{growth}',
+                 fontweight='bold')
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f'{value:,.0f}'))
+    ax.set_ylim(bottom=0)
+    ax.legend(loc='upper left')
+    ax.grid(True, alpha=0.3, axis='y')
+    for label in ax.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha('right')
+
+
+@register_chart('top_products')
+def _draw_top_products(ax, data, style):
+    """Biểu đồ ngang - Top sản phẩm theo số lượng bán từ order, kèm soldCount đang lưu"""
+    products = data['products']
+    units = np.asarray(data['units'], dtype=float)
+
+    y_pos = np.arange(len(products))
+    bars = ax.barh(y_pos, units, color=style['bar_color'], edgecolor='black',
+                   linewidth=style['linewidth'], height=style['height'], label='Units Sold (Orders)')
+    limit = units.max() if len(units) else 0
+    if data.get('sold_count'):
+        sold = np.array([np.nan if value is None else value for value in data['sold_count']], dtype=float)
+        ax.scatter(sold, y_pos, marker='|', s=300, linewidths=3, color=style['sold_color'],
+                   zorder=3, label='Stored soldCount')
+        limit = max(limit, np.nanmax(sold) if (~np.isnan(sold)).any() else 0)
+
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels([_short_label(name, style['max_label']) for name in products], fontsize=9)
+    ax.invert_yaxis()
+    ax.set_xlabel('Units Sold', fontweight='bold')
+    ax.set_ylabel('Product', fontweight='bold')
+    ax.set_title(data.get('title') or
+                 f'Top {len(products)} Products by Units Sold\nFrom {data["orders"]:,} Orders',
+                 fontweight='bold')
+
+    # Thêm số lượng bán trên bars
+    for bar, value in zip(bars, units):
+        ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f' {value:,.0f}',
+                ha='left', va='center', fontweight='bold', fontsize=8)
+
+    ax.legend(loc='lower right')
+    ax.set_xlim(0, max(limit, 1) * 1.15)
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.grid(True, alpha=0.3, axis='x')
+
+
+@register_chart('latency_percentiles')
+def _draw_latency_percentiles(ax, data, style):
+    """Biểu đồ đường - Phổ percentile độ trễ của từng endpoint (trục x theo số số 9)"""
+    percentiles = np.asarray(data['percentiles'], dtype=float)
+    # 50% -> 0.3, 90% -> 1, 99% -> 2, 99.9% -> 3...
+    positions = -np.log10(1 - percentiles / 100)
+
+    for color, (name, values) in zip(style['colors'] * len(data['series']), data['series'].items()):
+        ax.plot(positions, values, color=color, linewidth=style['linewidth'], marker='o',
+                markersize=4, label=name)
+
+    ticks = [pct for pct in (0, 50, 90, 99, 99.9, 99.99) if pct <= percentiles.max()]
+    ax.set_xticks(-np.log10(1 - np.asarray(ticks) / 100))
+    ax.set_xticklabels([f'{pct:g}%' for pct in ticks])
+    ax.set_yscale('log')
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f'{value:g}'))
+    ax.yaxis.set_minor_formatter(FuncFormatter(lambda value, _: f'{value:g}'))
+    ax.set_xlabel('Percentile', fontweight='bold')
+    ax.set_ylabel('Latency (ms)', fontweight='bold')
+    mode = f'{data["rate"]:g} req/s target' if data.get('rate') else 'closed-loop'
+    ax.set_title(data.get('title') or
+                 f'Latency by Percentile - {data.get("target", "")}\n'
+                 f'{data["throughput"]:,.1f} req/s achieved ({mode}), {data["errors"]} errors',
+                 fontweight='bold')
+    if data['series']:
+        ax.legend(loc='upper left')
+    ax.grid(True, alpha=0.3, which='both')
+
+
+@register_chart('search_scaling')
+def _draw_search_scaling(ax, data, style):
+    """Biểu đồ đường log-log - Độ trễ truy vấn theo kích thước catalog (p50 liền, p99 đứt)"""
+    sizes = data['sizes']
+    for color, (name, values) in zip(style['colors'] * len(data['series']), data['series'].items()):
+        ax.plot(sizes, values['p50'], color=color, linewidth=style['linewidth'], marker='o',
+                markersize=5, label=f'{name} p50')
+        ax.plot(sizes, values['p99'], color=color, linewidth=style['linewidth'] / 2, linestyle='--',
+                alpha=0.7, label=f'{name} p99')
+
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xticks(sizes)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda value, _: f'{value:,.0f}'))
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f'{value:g}'))
+    ax.set_xlabel('Catalog Size (books)', fontweight='bold')
+    ax.set_ylabel('Query Latency (ms)', fontweight='bold')
+    ax.set_title(data.get('title') or 'Search Latency vs Catalog Size', fontweight='bold')
+    ax.legend(loc='upper left')
+    ax.grid(True, alpha=0.3, which='both')
+
+
+@lru_cache(maxsize=None)
+def share_legend(palette):
+    """Legend theo ngưỡng tỷ trọng thời gian, dựng một lần cho mỗi bảng màu"""
+    return [Patch(facecolor=color, label=label)
+            for color, label in reversed(list(zip(palette, SHARE_LABELS)))]
+
+
+@register_chart('runtime_share')
+def _draw_runtime_share(ax, data, style):
+    """Biểu đồ ngang - Runtime Share by Test File"""
+    suites = data['suites']
+    shares = np.asarray(data['shares'], dtype=float)
+    levels = np.searchsorted(np.asarray(SHARE_THRESHOLDS, dtype=float), shares, side='right')
+
+    y_pos = np.arange(len(suites))
+    bars = ax.barh(y_pos, shares, color=np.asarray(style['palette'])[levels].tolist(),
+                   edgecolor='black', linewidth=style['linewidth'], height=style['height'])
+
+    # Tỷ trọng nếu thời gian chia đều cho mọi file
+    if len(suites):
+        even = 100 / len(suites)
+        ax.axvline(x=even, color='red', linestyle='--', linewidth=2, alpha=0.8)
+        ax.text(even + 0.5, -0.4, f'Even: {even:.1f}%', rotation=90,
+                va='top', ha='left', color='red', fontweight='bold')
+
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(suites)
+    ax.invert_yaxis()
+    ax.set_xlabel('Share of Total Runtime (%)', fontweight='bold')
+    ax.set_ylabel('Test File', fontweight='bold')
+    ax.set_title(data.get('title') or
+                 f'Runtime Share by Test File\nTotal: {data.get("total_seconds", 0)}s '
+                 f'over {data.get("runs", 1)} Run(s)',
+                 fontweight='bold')
+
+    for bar, share in zip(bars, shares):
+        ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f' {share}%',
+                ha='left', va='center', fontweight='bold')
+
+    ax.legend(handles=share_legend(tuple(style['palette'])), loc='lower right')
+    ax.set_xlim(0, min(100, max(shares.max() * 1.4, 10)) if len(shares) else 100)
+    ax.grid(True, alpha=0.3, axis='x')
+
+
+@lru_cache(maxsize=None)
+def status_legend(colors):
+    """Legend Not run / Failed / Passed cho heatmap, dựng một lần"""
+    return [Patch(facecolor=color, label=label)
+            for color, label in zip(colors[::-1], ('Passed', 'Failed', 'Not run'))]
+
+
+@register_chart('flaky_heatmap')
+def _draw_flaky_heatmap(ax, data, style):
+    """Heatmap - Flaky Tests (pass/fail của từng test qua các lần chạy)"""
+    from matplotlib.colors import ListedColormap
+
+    tests = data['tests']
+    ax.set_title(f'Flaky Tests - Pass/Fail History\nTop {len(tests)} by Flakiness Score',
+                 fontweight='bold')
+    if not tests:
+        ax.text(0.5, 0.5, 'No flaky tests detected', ha='center', va='center',
+                fontweight='bold', transform=ax.transAxes)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        return
+
+    cells = np.asarray(data['cells'], dtype=float).reshape(len(tests), -1)
+    first = data.get('first_run', 0)
+    ax.imshow(cells, cmap=ListedColormap(style['colors']), vmin=-1, vmax=1, aspect='auto',
+              interpolation='nearest', extent=(first - 0.5, first + cells.shape[1] - 0.5,
+                                               len(tests) - 0.5, -0.5))
+
+    labels = [_short_label(name, style['max_label']) + f' ({score:.2f})'
+              for name, score in zip(tests, data['scores'])]
+    ax.set_yticks(np.arange(len(tests)))
+    ax.set_yticklabels(labels, fontsize=8)
+    ax.set_xlabel('Run', fontweight='bold')
+    ax.set_ylabel('Test (flakiness score)', fontweight='bold')
+    ax.legend(handles=status_legend(tuple(style['colors'])), loc='upper left',
+              bbox_to_anchor=(1.01, 1))
+
+
+def export_targets(output):
+    """Các file được xuất cho một spec: [(hậu tố khóa cache, tên file)]"""
+    filename = output['filename']
+    stem = os.path.splitext(filename)[0]
+    targets = [('', filename)]
+    if output.get('thumbnail'):
+        targets.append(('-thumb', f'{stem}_thumb.png'))
+    if output.get('svg'):
+        targets.append(('-svg', f'{stem}.svg'))
+    return targets
+
+
+def save_thumbnail(fig, source, filename, width):
+    """
+    Thumbnail PNG rộng `width` pixel. Với canvas Agg, buffer của canvas sau
+    savefig chính là ảnh PNG vừa ghi nên được thu nhỏ trực tiếp; backend khác
+    thì đọc lại file PNG.
+    """
+    from PIL import Image
+
+    if isinstance(fig.canvas, FigureCanvasAgg):
+        image = Image.fromarray(np.asarray(fig.canvas.buffer_rgba()))
+    else:
+        image = Image.open(source)
+    height = max(1, round(image.height * width / image.width))
+    image.resize((width, height), Image.LANCZOS).save(filename, optimize=True)
+
+
+def save_options(style, dpi):
+    """Tham số savefig chung cho mọi định dạng"""
+    options = {'dpi': dpi, 'bbox_inches': 'tight'}
+    if style.get('facecolor'):
+        options.update(facecolor=style['facecolor'], edgecolor='none')
+    return options
+
+
+@lru_cache(maxsize=None)
+def engine_fingerprint():
+    """Hash mã nguồn module này, tính một lần mỗi process (mã không đổi khi đang chạy)"""
+    return source_fingerprint(sys.modules[__name__])
+
+
+def spec_key(spec):
+    """Khóa render cache của spec: dữ liệu + style đã resolve + tùy chọn output + mã engine"""
+    output = {k: v for k, v in spec.get('output', {}).items() if k not in ('filename', 'show')}
+    output['format'] = os.path.splitext(spec['output']['filename'])[1]
+    style = [resolve_style(spec), engine_fingerprint()]
+    return make_key(spec['kind'], spec['data'], style, output)
+
+
+class RenderContext:
+    """
+    Quản lý vòng đời figure.
+
+    interactive=False: Figure + FigureCanvasAgg ngoài registry của pyplot, dùng
+    lại theo figsize; pool giữ tối đa `max_figures` canvas, canvas ít dùng nhất
+    bị bỏ. interactive=True: figure pyplot (mỗi loại biểu đồ một cửa sổ), đóng
+    hết sau show() hoặc close().
+    """
+
+    def __init__(self, interactive=False, max_figures=DEFAULT_POOL_SIZE):
+        self.interactive = interactive
+        self.max_figures = max_figures
+        self._figures = OrderedDict()   # khóa -> figure, cũ nhất ở đầu
+
+    def figure(self, kind, figsize):
+        """Figure sạch (đã clf) cho một lần vẽ"""
+        key = (kind, tuple(figsize)) if self.interactive else tuple(figsize)
+        fig = self._figures.pop(key, None)
+        if fig is not None and (not self.interactive or plt.fignum_exists(fig.number)):
+            fig.clf()
+        elif self.interactive:
+            fig = plt.figure(figsize=figsize)
+        else:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+        self._figures[key] = fig
+        if not self.interactive:
+            while len(self._figures) > self.max_figures:
+                self._release(self._figures.popitem(last=False)[1])
+        return fig
+
+    def _release(self, fig):
+        if self.interactive:
+            plt.close(fig)
+        else:
+            fig.clf()
+
+    def show(self):
+        """Hiển thị các figure pyplot (chặn tới khi đóng cửa sổ) rồi giải phóng"""
+        if self.interactive and self._figures:
+            plt.show()
+        self.close()
+
+    def close(self):
+        while self._figures:
+            self._release(self._figures.popitem()[1])
+
+    def __len__(self):
+        return len(self._figures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ChartEngine:
+    """Render biểu đồ từ spec trong một RenderContext"""
+
+    def __init__(self, context=None):
+        self.context = context if context is not None else RenderContext()
+
+    def draw(self, spec, context=None):
+        """Vẽ spec lên một figure sạch (chưa layout, chưa lưu); trả về (figure, style)"""
+        style = resolve_style(spec)
+        if 'dpi' in spec.get('output', {}):
+            # dpi lưu file, để tính ngân sách pixel khi rút gọn điểm
+            style = dict(style, dpi=spec['output']['dpi'])
+        fig = (context if context is not None else self.context).figure(spec['kind'], style['figsize'])
+        DRAWERS[spec['kind']](fig.add_subplot(), spec['data'], style)
+        return fig, style
+
+    def render(self, spec, cache=None, context=None, pdf=None):
+        """
+        Vẽ và lưu một biểu đồ ra mọi định dạng trong output (xem export_targets);
+        `pdf` (PdfPages) nhận thêm một trang. Với `cache` (RenderCache), spec có
+        khóa không đổi được lấy lại từ cache và trả về None thay vì figure.
+        Output có `show` được vẽ trên figure pyplot riêng, hiển thị rồi đóng ngay.
+        Cửa sổ cần figure thật: với `show` hoặc context interactive biểu đồ luôn
+        được vẽ lại (file vẫn được lưu vào cache).
+        """
+        output = spec['output']
+        filename = output['filename']
+        targets = export_targets(output)
+        context = context if context is not None else self.context
+        if cache is not None:
+            with span('render.cache_lookup', 'render', kind=spec['kind']):
+                key = spec_key(spec)
+                hit = (pdf is None and not output.get('show') and not context.interactive and
+                       all(cache.fetch(key + suffix, target) for suffix, target in targets))
+            if hit:
+                return None
+
+        if output.get('show'):
+            context = RenderContext(interactive=True)
+        with span('render.draw', 'render', kind=spec['kind']):
+            fig, style = self.draw(spec, context)
+        with span('render.tight_layout', 'render', kind=spec['kind']):
+            fig.tight_layout()
+
+        savefig_kwargs = save_options(style, output.get('dpi', 300))
+        with span('render.savefig_png', 'encode', file=filename, dpi=output.get('dpi', 300)):
+            fig.savefig(filename, **savefig_kwargs)
+        if output.get('thumbnail'):
+            with span('render.thumbnail', 'encode'):
+                save_thumbnail(fig, filename, dict(targets)['-thumb'], output['thumbnail'])
+        if output.get('svg'):
+            with span('render.savefig_svg', 'encode'):
+                fig.savefig(dict(targets)['-svg'], format='svg', **savefig_kwargs)
+        if pdf is not None:
+            with span('render.pdf_page', 'encode'):
+                pdf.savefig(fig, **savefig_kwargs)
+        if cache is not None:
+            for suffix, target in targets:
+                cache.store(key + suffix, target)
+        if output.get('show'):
+            context.show()
+        return fig
+
+    def render_all(self, specs, cache=None, context=None, pdf=None):
+        return [self.render(spec, cache, context, pdf) for spec in specs]
+
+
+def _rss_kib():
+    """RSS hiện tại (KiB) đọc từ /proc; None nếu không có /proc"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_kib():
+    """
+    RSS đỉnh (KiB) của process. Ưu tiên VmHWM trong /proc: ru_maxrss trên Linux
+    giữ mức đỉnh của process cha khi fork + exec, nên không đo được process con.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def memcheck(renders=10000, dpi=50, warmup=0.1, tolerance_mib=20, pyplot=False):
+    """
+    Vẽ `renders` biểu đồ liên tiếp (xoay vòng các loại) và so sánh RSS đỉnh sau
+    giai đoạn khởi động với RSS đỉnh cuối cùng. Trả về True nếu mức tăng không
+    quá `tolerance_mib`. pyplot=True: cách cũ (plt.figure không đóng) để so sánh.
+    """
+    import tempfile
+    import time
+
+    specs = [
+        {'kind': 'pie_summary', 'data': {'passed': 107, 'failed': 20}},
+        {'kind': 'defect_severity', 'data': {'by_severity': {
+            'Critical': {'fixed': 1, 'open': 4}, 'High': {'fixed': 2, 'open': 8}}}},
+        {'kind': 'module_pass_rate', 'data': {'modules': {'Cart': 89.7, 'Order': 84.6},
+                                              'overall': 84.3}},
+        {'kind': 'pass_rate_trend', 'data': {'timestamps': [1700000000000 + i * 86400000
+                                                            for i in range(30)],
+                                             'pass_rates': [80 + i % 7 for i in range(30)]}},
+    ]
+    engine = ChartEngine()
+    warm = max(1, int(renders * warmup))
+    baseline = None
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(renders):
+            spec = dict(specs[i % len(specs)], style='dashboard',
+                        output={'filename': os.path.join(tmp, f'chart{i % len(specs)}.png'), 'dpi': dpi})
+            # Dữ liệu khác nhau ở mỗi lần vẽ, giống vẽ theo từng module/nhánh/lần chạy
+            spec['data'] = dict(spec['data'], title=f'Chart #{i}')
+            if pyplot:
+                style = resolve_style(spec)
+                fig = plt.figure(figsize=style['figsize'])
+                DRAWERS[spec['kind']](fig.add_subplot(), spec['data'], style)
+                fig.savefig(spec['output']['filename'], dpi=dpi)
+            else:
+                engine.render(spec)
+            if i + 1 == warm:
+                baseline = _peak_rss_kib()
+            if (i + 1) % max(1, renders // 10) == 0:
+                print(f'   • {i + 1:6d} biểu đồ: RSS {(_rss_kib() or 0) / 1024:7.1f} MiB, '
+                      f'pyplot figures {len(plt.get_fignums())}, {time.perf_counter() - started:6.1f}s')
+    peak = _peak_rss_kib()
+    growth_mib = (peak - baseline) / 1024
+    ok = growth_mib <= tolerance_mib
+    print(f'{"✅" if ok else "❌"} RSS đỉnh tăng {growth_mib:.1f} MiB sau {renders - warm} biểu đồ '
+          f'(giới hạn {tolerance_mib} MiB)')
+    return ok
+
+
+# Engine mặc định dùng chung trong một process
+ENGINE = ChartEngine()
+
+
+def render(spec, cache=None, context=None, pdf=None):
+    return ENGINE.render(spec, cache, context, pdf)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Chart engine')
+    parser.add_argument('--memcheck', type=int, metavar='N',
+                        help='vẽ N biểu đồ liên tiếp và kiểm tra RSS không tăng')
+    parser.add_argument('--dpi', type=int, default=50, help='dpi khi chạy memcheck')
+    parser.add_argument('--tolerance-mib', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=0.1,
+                        help='tỷ lệ số biểu đồ vẽ trước khi lấy mốc RSS')
+    parser.add_argument('--pyplot', action='store_true',
+                        help='memcheck với plt.figure không đóng (cách cũ) để so sánh')
+    args = parser.parse_args(argv)
+
+    if args.memcheck:
+        print(f'🧪 Memcheck: {args.memcheck} biểu đồ liên tiếp')
+        if not memcheck(args.memcheck, args.dpi, args.warmup, args.tolerance_mib, args.pyplot):
+            sys.exit(1)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
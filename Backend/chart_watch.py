@@ -0,0 +1,161 @@
+"""
+Watch mode: theo dõi thư mục kết quả Jest và chỉ vẽ lại biểu đồ bị ảnh hưởng.
+
+Thư mục được quét định kỳ (polling theo mtime/kích thước, không cần thư viện
+ngoài). Mỗi báo cáo `jest --json` được tóm tắt thành một ShardSummary và giữ
+lại; khi có thay đổi chỉ file thay đổi được đọc lại, rồi các summary được gộp
+như các shard của cùng một lần chạy. Biểu đồ nào có spec (dữ liệu + style)
+không đổi thì bỏ qua, ví dụ một suite thay đổi kết quả mà tổng số pass/fail
+giữ nguyên thì chỉ biểu đồ module coverage được vẽ lại.
+
+Thay đổi được debounce: chỉ vẽ khi thư mục đứng yên `--quiet` giây, nên một
+loạt suite ghi kết quả liên tiếp chỉ gây ra một lần vẽ.
+
+Cách dùng:
+    npx jest --watch --json --outputFile=results/jest-report.json
+    python chart_watch.py results [--output-dir charts] [--interval 0.5] [--quiet 1.0]
+"""
+
+import fnmatch
+import os
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+from chart_batch import CHART_FILES
+from chart_cache import RenderCache
+from chart_engine import render, spec_key
+from shard_summary import summarize_shard
+from test_analytics_dashboard import TestAnalyticsCharts
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_QUIET = 1.0
+
+
+class ChartWatcher:
+    """Giữ summary từng báo cáo và khóa spec của biểu đồ đã vẽ giữa các lần quét"""
+
+    def __init__(self, directory, pattern='*.json', output_dir='', cache=None,
+                 interval=DEFAULT_INTERVAL, quiet=DEFAULT_QUIET):
+        self.directory = directory
+        self.pattern = pattern
+        self.output_dir = output_dir
+        self.cache = cache
+        self.interval = interval
+        self.quiet = quiet
+        self.summaries = {}     # path -> ((mtime_ns, size), ShardSummary)
+        self.rendered = {}      # method -> khóa spec của lần vẽ gần nhất
+
+    def scan(self):
+        """Ảnh chụp thư mục: path -> (mtime_ns, size) của các báo cáo"""
+        snapshot = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return snapshot
+        for entry in entries:
+            if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def refresh(self, snapshot):
+        """Đọc lại các báo cáo mới/đã đổi, bỏ báo cáo đã xóa; trả về số file đã đọc"""
+        for path in list(self.summaries):
+            if path not in snapshot:
+                del self.summaries[path]
+        loaded = 0
+        for path, signature in snapshot.items():
+            cached = self.summaries.get(path)
+            if cached and cached[0] == signature:
+                continue
+            try:
+                self.summaries[path] = (signature, summarize_shard(path))
+                loaded += 1
+            except (OSError, ValueError) as e:
+                # File đang được ghi dở: giữ summary cũ, lần quét sau đọc lại
+                print(f"   ⚠️ Bỏ qua {os.path.basename(path)}: {e}")
+        return loaded
+
+    def render_changed(self):
+        """Vẽ lại các biểu đồ có spec thay đổi; trả về danh sách file đã vẽ"""
+        analytics = TestAnalyticsCharts()
+        analytics.load_shards([summary for _, summary in self.summaries.values()])
+        written = []
+        for method in analytics.chart_methods():
+            spec = analytics.chart_spec(method, os.path.join(self.output_dir, CHART_FILES[method]))
+            key = spec_key(spec)
+            if self.rendered.get(method) == key:
+                continue
+            render(spec, self.cache)
+            self.rendered[method] = key
+            written.append(spec['output']['filename'])
+        return written, analytics
+
+    def update(self, snapshot):
+        loaded = self.refresh(snapshot)
+        if not self.summaries:
+            print("⏳ Chưa có báo cáo Jest nào, đang chờ...")
+            return []
+        started = time.perf_counter()
+        written, analytics = self.render_changed()
+        elapsed = time.perf_counter() - started
+        stamp = time.strftime('%H:%M:%S')
+        if written:
+            print(f"🔄 [{stamp}] Đọc {loaded} báo cáo, vẽ lại {len(written)} biểu đồ ({elapsed:.2f}s) - "
+                  f"pass rate {analytics.pass_rate}%")
+            for filename in written:
+                print(f"   ✅ Đã lưu: {filename}")
+        else:
+            print(f"✔️ [{stamp}] Đọc {loaded} báo cáo, không có biểu đồ nào thay đổi")
+        return written
+
+    def run(self, once=False):
+        """Vòng lặp polling; chỉ cập nhật khi thư mục đứng yên `quiet` giây"""
+        if once:
+            return self.update(self.scan())
+
+        print(f"👀 Đang theo dõi {self.directory} ({self.pattern}), Ctrl+C để dừng")
+        last_snapshot = None
+        changed_at = None
+        try:
+            while True:
+                snapshot = self.scan()
+                now = time.monotonic()
+                if snapshot != last_snapshot:
+                    last_snapshot = snapshot
+                    changed_at = now
+                elif changed_at is not None and now - changed_at >= self.quiet:
+                    changed_at = None
+                    self.update(snapshot)
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\n👋 Đã dừng watch mode")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Theo dõi báo cáo Jest và vẽ lại biểu đồ bị ảnh hưởng')
+    parser.add_argument('directory', help='thư mục chứa báo cáo jest --json')
+    parser.add_argument('--pattern', default='*.json', help='mẫu tên file báo cáo')
+    parser.add_argument('--output-dir', default='', help='thư mục ghi biểu đồ')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='chu kỳ quét (giây)')
+    parser.add_argument('--quiet', type=float, default=DEFAULT_QUIET,
+                        help='thời gian thư mục phải đứng yên trước khi vẽ (giây)')
+    parser.add_argument('--once', action='store_true', help='quét và vẽ một lần rồi thoát')
+    parser.add_argument('--no-cache', action='store_true', help='bỏ qua render cache')
+    args = parser.parse_args(argv)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    cache = None if args.no_cache else RenderCache()
+    watcher = ChartWatcher(args.directory, args.pattern, args.output_dir, cache,
+                           args.interval, args.quiet)
+    watcher.run(once=args.once)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""
+Đọc báo cáo coverage của Jest (Istanbul `coverage-final.json` hoặc `lcov.info`)
+và tổng hợp line / branch / function coverage theo module Backend.
+
+Module là từng file trực tiếp trong `controllers/`, `services/`, `models/`
+(ví dụ `controllers/orderController.js` -> `Order Controller`,
+`models/Order.js` -> `Order Model`, `services/cloudinary.config.js` ->
+`Cloudinary Config`); file ngoài các thư mục này bị bỏ qua.
+
+Cả hai định dạng được đọc streaming nên file coverage vài trăm MB không phải
+nạp toàn bộ: `coverage-final.json` được tách theo từng file nguồn (mỗi entry
+parse bằng json C rồi bỏ), `lcov.info` được đọc theo chunk và cắt theo record.
+Số liệu của từng file được đếm bằng NumPy và cộng dồn theo module bằng bincount.
+
+Cách dùng:
+    npx jest --coverage --coverageReporters=json --coverageReporters=lcov
+    python coverage_report.py coverage/coverage-final.json
+    python coverage_report.py coverage/lcov.info --metric branches
+    python coverage_report.py --benchmark
+"""
+
+import itertools
+import json
+import os
+import re
+
+import numpy as np
+
+from jest_report import CHUNK_SIZE, suite_display_name
+from tracing import traced
+
+METRICS = ('lines', 'branches', 'functions')
+METRIC_LABELS = {'lines': 'Line', 'branches': 'Branch', 'functions': 'Function'}
+MODULE_DIRS = ('controllers', 'services', 'models')
+
+_MODULE_PATH = re.compile(r'(?:^|[\\/])(controllers|services|models)[\\/]([^\\/]+\.[cm]?[jt]sx?)$')
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Record lcov (bắt đầu bằng xuống dòng sau khi cắt theo end_of_record); mẫu bắt đầu
+# bằng chuỗi cố định để re tìm nhanh thay vì thử ở từng đầu dòng
+_LCOV_SF = re.compile(r'SF:([^\r\n]*)')
+_LCOV_DA = re.compile(r'\nDA:\d+,(\d+)')
+_LCOV_BRDA = re.compile(r'\nBRDA:[^,\n]*,[^,\n]*,[^,\n]*,([\d-]+)')
+_LCOV_FNDA = re.compile(r'\nFNDA:(\d+),')
+
+
+def module_name(path):
+    """Tên module của file nguồn, None nếu file không thuộc controllers/services/models"""
+    match = _MODULE_PATH.search(path)
+    if match is None:
+        return None
+    directory, filename = match.groups()
+    stem = re.sub(r'\.[cm]?[jt]sx?$', '', filename)
+    name = suite_display_name(stem.replace('.', ' '))
+    if directory == 'models' and not name.endswith('Model'):
+        name += ' Model'
+    return name
+
+
+def iter_istanbul_entries(fp, chunk_size=CHUNK_SIZE):
+    """
+    Sinh (đường dẫn file, entry) từ `coverage-final.json` mà không nạp cả file.
+
+    Object ngoài cùng được duyệt từng key; mỗi entry được parse bằng
+    json.JSONDecoder.raw_decode, đọc thêm dữ liệu khi entry chưa trọn. Bộ nhớ
+    chỉ phụ thuộc vào entry lớn nhất.
+    """
+    decoder = json.JSONDecoder()
+    buf = fp.read(chunk_size)
+    pos = 0
+    eof = not buf
+    read_size = chunk_size
+    expect = '{'
+    key = None
+
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos >= len(buf):
+            if eof:
+                if expect != 'end':
+                    raise ValueError('coverage JSON bị cắt ngang')
+                return
+            buf = fp.read(chunk_size)
+            pos = 0
+            eof = not buf
+            continue
+
+        ch = buf[pos]
+        if expect == '{':
+            if ch != '{':
+                raise ValueError(f'coverage JSON phải là object, gặp {buf[pos:pos + 40]!r}')
+            pos += 1
+            expect = 'key'
+        elif expect in ('key', ',') and ch == '}':
+            pos += 1
+            expect = 'end'
+        elif expect == ',' and ch == ',':
+            pos += 1
+            expect = 'key'
+        elif expect == ':' and ch == ':':
+            pos += 1
+            expect = 'value'
+        elif expect in ('key', 'value'):
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f'coverage JSON không hợp lệ gần: {buf[pos:pos + 40]!r}')
+                complete = False
+            if not complete:
+                # Entry chưa trọn trong buffer: đọc thêm (tăng dần để tránh parse lại nhiều lần)
+                more = fp.read(read_size)
+                read_size *= 2
+                buf = buf[pos:] + more
+                pos = 0
+                eof = not more
+                continue
+            read_size = chunk_size
+            pos = end
+            if expect == 'key':
+                key = value
+                expect = ':'
+            else:
+                yield key, value
+                expect = ','
+        else:
+            raise ValueError(f'coverage JSON không hợp lệ gần: {buf[pos:pos + 40]!r}')
+
+
+def istanbul_file_totals(entry):
+    """
+    (lines, lines covered, branches, branches covered, functions, functions covered)
+    của một entry Istanbul. Dòng được tính như istanbul-lib-coverage: dòng bắt đầu
+    của mỗi statement, covered nếu có statement trên dòng đó chạy ít nhất một lần.
+    """
+    if 's' not in entry and 'data' in entry:
+        entry = entry['data']
+    statement_map = entry.get('statementMap', {})
+    hits = entry.get('s', {})
+    ids = [sid for sid in hits if sid in statement_map]
+    lines = np.fromiter((statement_map[sid]['start']['line'] for sid in ids), np.int64, len(ids))
+    counts = np.fromiter((hits[sid] for sid in ids), np.int64, len(ids))
+    branches = np.fromiter(itertools.chain.from_iterable(entry.get('b', {}).values()), np.int64)
+    functions = np.fromiter(entry.get('f', {}).values(), np.int64)
+    return (len(np.unique(lines)), len(np.unique(lines[counts > 0])),
+            len(branches), int(np.count_nonzero(branches)),
+            len(functions), int(np.count_nonzero(functions)))
+
+
+def _hit_counts(values):
+    """Chuỗi số lần chạy của lcov ('-' = nhánh chưa được đánh giá) -> mảng int64, parse bằng NumPy"""
+    return np.array(['0' if value == '-' else value for value in values], dtype=np.int64)
+
+
+def lcov_record_totals(record):
+    """Totals (như istanbul_file_totals) của nội dung một record lcov, không tách từng dòng"""
+    line_hits = _hit_counts(_LCOV_DA.findall(record))
+    branch_hits = _hit_counts(_LCOV_BRDA.findall(record))
+    function_hits = _hit_counts(_LCOV_FNDA.findall(record))
+    return (len(line_hits), int(np.count_nonzero(line_hits)),
+            len(branch_hits), int(np.count_nonzero(branch_hits)),
+            record.count('\nFN:'), int(np.count_nonzero(function_hits)))
+
+
+def iter_lcov_records(fp, chunk_size=CHUNK_SIZE):
+    """
+    Sinh (đường dẫn file, totals như istanbul_file_totals) cho từng record
+    `SF:` ... `end_of_record` của lcov.info của các file module. File được đọc
+    theo chunk và cắt theo `end_of_record`; số lần chạy của `DA:` / `BRDA:` /
+    `FNDA:` trong record được lấy bằng regex rồi đếm bằng NumPy.
+    """
+    marker = 'end_of_record'
+    tail = ''
+    while True:
+        chunk = fp.read(chunk_size)
+        # Record dài hơn một chunk: chỉ cắt khi marker có thể nằm trong phần mới đọc
+        if chunk and marker not in tail[-len(marker):] + chunk:
+            tail += chunk
+            continue
+        *records, tail = (tail + chunk).split(marker)
+        for record in records:
+            source = _LCOV_SF.search(record)
+            if source is not None and _MODULE_PATH.search(source.group(1)):
+                yield source.group(1), lcov_record_totals(record)
+        if not chunk:
+            return
+
+
+class CoverageReport:
+    """Số liệu coverage đã tổng hợp theo module"""
+
+    def __init__(self, modules, totals, files=0):
+        self.modules = list(modules)
+        # totals: mảng (số module x 6) theo thứ tự của istanbul_file_totals
+        self.totals = np.asarray(totals, dtype=np.int64).reshape(len(self.modules), 6)
+        self.files = files
+
+    @classmethod
+    def from_file_totals(cls, items):
+        """Gộp các (đường dẫn, totals) theo module bằng bincount"""
+        index = {}
+        module_ids = []
+        rows = []
+        files = 0
+        for path, totals in items:
+            name = module_name(path)
+            if name is None:
+                continue
+            module_ids.append(index.setdefault(name, len(index)))
+            rows.append(totals)
+            files += 1
+        module_ids = np.asarray(module_ids, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1, 6)
+        totals = np.column_stack([np.bincount(module_ids, rows[:, i], minlength=len(index))
+                                  for i in range(6)]) if len(index) else np.zeros((0, 6))
+        return cls(index, totals, files)
+
+    @classmethod
+    @traced(category='parse')
+    def load(cls, path, chunk_size=CHUNK_SIZE):
+        """Đọc coverage-final.json hoặc lcov.info (nhận dạng theo nội dung)"""
+        with open(path, encoding='utf-8') as fp:
+            head = fp.read(1)
+            while head.isspace():
+                head = fp.read(1)
+            fp.seek(0)
+            if head == '{':
+                items = ((name, istanbul_file_totals(entry))
+                         for name, entry in iter_istanbul_entries(fp, chunk_size)
+                         if module_name(name) is not None)
+            else:
+                items = iter_lcov_records(fp, chunk_size)
+            return cls.from_file_totals(items)
+
+    def _column(self, metric):
+        i = METRICS.index(metric) * 2
+        return self.totals[:, i], self.totals[:, i + 1]
+
+    def percentages(self, metric='lines'):
+        """Module -> % coverage (bỏ module không có mục nào), giảm dần như biểu đồ gốc"""
+        total, covered = self._column(metric)
+        rates = {module: round(float(hit) / float(found) * 100, 1)
+                 for module, found, hit in zip(self.modules, total, covered) if found}
+        return dict(sorted(rates.items(), key=lambda item: item[1], reverse=True))
+
+    def overall(self, metric='lines'):
+        total, covered = self._column(metric)
+        found = int(total.sum())
+        return round(int(covered.sum()) / found * 100, 1) if found else 0.0
+
+    def module_spec(self, metric='lines', filename='module_coverage_horizontal_chart.png'):
+        """Spec biểu đồ Test Coverage by Module từ coverage thật"""
+        label = METRIC_LABELS[metric]
+        overall = self.overall(metric)
+        return {'kind': 'module_pass_rate', 'style': 'dashboard',
+                'data': {'modules': self.percentages(metric), 'overall': overall,
+                         'title': f'Test Coverage by Module - {label} Coverage\n'
+                                  f'Overall {label} Coverage: {overall}%',
+                         'xlabel': f'{label} Coverage (%)'},
+                'output': {'filename': filename, 'dpi': 300}}
+
+
+def _write_benchmark_coverage(path, num_files, statements=400):
+    """Ghi coverage-final.json giả lập (ghi dần từng entry)"""
+    with open(path, 'w', encoding='utf-8') as fp:
+        fp.write('{')
+        for i in range(num_files):
+            directory = MODULE_DIRS[i % len(MODULE_DIRS)]
+            source = f'/app/Backend/{directory}/module{i % 40}File{i}.js'
+            entry = {
+                'path': source,
+                'statementMap': {str(s): {'start': {'line': s + 1, 'column': 4},
+                                          'end': {'line': s + 1, 'column': 30}}
+                                 for s in range(statements)},
+                'fnMap': {str(f): {'name': f'fn{f}', 'line': f * 10 + 1} for f in range(statements // 20)},
+                'branchMap': {str(b): {'type': 'if', 'line': b * 8 + 1} for b in range(statements // 10)},
+                's': {str(s): (s * 7 + i) % 5 for s in range(statements)},
+                'f': {str(f): (f + i) % 3 for f in range(statements // 20)},
+                'b': {str(b): [(b + i) % 4, (b * 3) % 2] for b in range(statements // 10)},
+            }
+            fp.write(('' if i == 0 else ',') + json.dumps(source) + ':' + json.dumps(entry))
+        fp.write('}')
+
+
+def benchmark(scales=(1, 10, 100), base_files=30):
+    """Thời gian và bộ nhớ đỉnh khi file coverage lớn gấp `scales` lần"""
+    import tempfile
+    import time
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = os.path.join(tmp, f'coverage_{scale}x.json')
+            _write_benchmark_coverage(path, base_files * scale)
+            size_mb = os.path.getsize(path) / 1e6
+
+            started = time.perf_counter()
+            report = CoverageReport.load(path)
+            elapsed = time.perf_counter() - started
+
+            # Đo bộ nhớ ở lần đọc riêng vì tracemalloc làm chậm parser nhiều lần
+            tracemalloc.start()
+            CoverageReport.load(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f'   • {scale:>4}x: {size_mb:8.1f} MB, {report.files:>5} files, '
+                  f'{size_mb / elapsed:6.1f} MB/s, peak {peak / 2 ** 20:6.1f} MiB, '
+                  f'line coverage {report.overall():.1f}%')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Coverage theo module từ coverage-final.json / lcov.info')
+    parser.add_argument('coverage', nargs='?', help='coverage-final.json hoặc lcov.info')
+    parser.add_argument('--metric', choices=METRICS, default='lines')
+    parser.add_argument('--benchmark', action='store_true', help='đo tốc độ và bộ nhớ với file 1x/10x/100x')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark đọc coverage (bộ nhớ đỉnh chỉ phụ thuộc entry lớn nhất):')
+        benchmark()
+    elif args.coverage:
+        report = CoverageReport.load(args.coverage)
+        print(f'📊 {report.files} file trong {", ".join(MODULE_DIRS)}')
+        for metric in METRICS:
+            print(f'   {METRIC_LABELS[metric]} Coverage: {report.overall(metric)}%')
+        print(f'\n{METRIC_LABELS[args.metric]} coverage theo module:')
+        for module, rate in report.percentages(args.metric).items():
+            print(f'   • {module}: {rate}%')
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+Nạp defect từ file export của issue tracker (CSV hoặc JSON lines) và đếm theo
+severity x status x module.
+
+File export được đọc từng dòng (csv.DictReader / từng dòng JSON), mỗi defect
+được chuẩn hóa thành một nhóm (severity, fixed/open, module) và cộng dồn vào
+bảng đếm, không giữ lại nội dung dòng. Với `--store`, id -> nhóm của mọi defect
+được lưu lại nên lần nạp sau chỉ áp dụng các dòng thay đổi (trừ nhóm cũ, cộng
+nhóm mới); dòng không đổi bị bỏ qua.
+
+Tên cột được nhận theo các tên thường gặp (Jira, GitHub, Redmine...), không
+phân biệt hoa thường: id/key/issue key, severity/priority, status/state,
+module/component/components. Module chỉ dùng thư viện chuẩn.
+
+Cách dùng:
+    python defect_store.py defects.csv [--store .defects.json] [--prune]
+    python defect_store.py export.jsonl --store .defects.json --module "Cart Controller"
+    python defect_store.py --benchmark
+"""
+
+import csv
+import json
+import os
+from collections import Counter
+
+from tracing import traced
+
+DEFAULT_STORE = '.defects.json'
+SEVERITIES = ('Critical', 'High', 'Medium', 'Low')
+UNASSIGNED = 'Unassigned'
+
+ID_FIELDS = ('id', 'key', 'issue key', 'issue_key', 'number', 'issue id')
+SEVERITY_FIELDS = ('severity', 'priority')
+STATUS_FIELDS = ('status', 'state', 'resolution')
+MODULE_FIELDS = ('module', 'component', 'components', 'component/s')
+
+SEVERITY_ALIASES = {
+    'critical': 'Critical', 'blocker': 'Critical', 'highest': 'Critical', 'urgent': 'Critical',
+    'p0': 'Critical', 's1': 'Critical',
+    'high': 'High', 'major': 'High', 'p1': 'High', 's2': 'High',
+    'medium': 'Medium', 'normal': 'Medium', 'moderate': 'Medium', 'p2': 'Medium', 's3': 'Medium',
+    'low': 'Low', 'minor': 'Low', 'trivial': 'Low', 'lowest': 'Low', 'p3': 'Low', 'p4': 'Low',
+    's4': 'Low',
+}
+FIXED_STATUSES = frozenset(('fixed', 'resolved', 'closed', 'done', 'verified', 'released'))
+
+
+def normalize_severity(value):
+    value = str(value or '').strip()
+    return SEVERITY_ALIASES.get(value.lower(), value.title() or 'Medium')
+
+
+def normalize_status(value):
+    """Trạng thái defect -> 'fixed' hoặc 'open'"""
+    return 'fixed' if str(value or '').strip().lower() in FIXED_STATUSES else 'open'
+
+
+def normalize_module(value):
+    if isinstance(value, list):
+        value = value[0] if value else ''
+    if isinstance(value, dict):
+        value = value.get('name', '')
+    value = str(value or '').replace(';', ',').split(',')[0].strip()
+    return value or UNASSIGNED
+
+
+FIELDS = (ID_FIELDS, SEVERITY_FIELDS, STATUS_FIELDS, MODULE_FIELDS)
+
+
+def _column(header, names):
+    """Vị trí cột đầu tiên có tên trong `names` (không phân biệt hoa thường), None nếu không có"""
+    lowered = [(name or '').strip().lower() for name in header]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+
+def iter_export(path):
+    """
+    Sinh (id, severity, status, module) thô cho từng dòng của file CSV hoặc
+    JSON lines. Với CSV, vị trí cột được xác định một lần từ header.
+    """
+    with open(path, encoding='utf-8-sig', newline='') as fp:
+        if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson', '.json'):
+            for line in fp:
+                if not line.strip():
+                    continue
+                row = {key.lower(): value for key, value in json.loads(line).items()}
+                yield tuple(next((row[name] for name in names if name in row), None) for names in FIELDS)
+        else:
+            reader = csv.reader(fp)
+            header = next(reader, [])
+            columns = [_column(header, names) for names in FIELDS]
+            for row in reader:
+                yield tuple(row[i] if i is not None and i < len(row) else None for i in columns)
+
+
+class DefectStore:
+    """Bảng đếm defect theo nhóm (severity, status, module) + id -> nhóm để nạp tăng dần"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.groups = []        # id nhóm -> (severity, status, module)
+        self._group_ids = {}
+        self._raw_groups = {}   # (severity, status, module) thô -> id nhóm
+        self.defects = {}       # id defect -> id nhóm
+        self.counts = Counter()  # id nhóm -> số defect
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            for group in state['groups']:
+                self._group_id(tuple(group))
+            self.defects = state['defects']
+            self.counts = Counter(self.defects.values())
+
+    def _group_id(self, group):
+        group_id = self._group_ids.get(group)
+        if group_id is None:
+            group_id = self._group_ids[group] = len(self.groups)
+            self.groups.append(group)
+        return group_id
+
+    def upsert(self, defect_id, severity, status, module):
+        """Cập nhật một defect; trả về True nếu có thay đổi"""
+        raw = (severity, status, module if isinstance(module, str) or module is None else repr(module))
+        group_id = self._raw_groups.get(raw)
+        if group_id is None:
+            group_id = self._raw_groups[raw] = self._group_id(
+                (normalize_severity(severity), normalize_status(status), normalize_module(module)))
+        old = self.defects.get(defect_id)
+        if old == group_id:
+            return False
+        if old is not None:
+            self.counts[old] -= 1
+        self.defects[defect_id] = group_id
+        self.counts[group_id] += 1
+        return True
+
+    def remove(self, defect_id):
+        old = self.defects.pop(defect_id, None)
+        if old is not None:
+            self.counts[old] -= 1
+        return old is not None
+
+    @traced(category='parse')
+    def ingest(self, path, prune=False):
+        """
+        Nạp một file export; trả về dict số dòng đã đọc / thay đổi / không đổi / đã xóa.
+        prune=True: export là ảnh chụp đầy đủ, defect không có trong file bị xóa.
+        """
+        stats = {'rows': 0, 'changed': 0, 'unchanged': 0, 'removed': 0, 'skipped': 0}
+        seen = set() if prune else None
+        for defect_id, severity, status, module in iter_export(path):
+            stats['rows'] += 1
+            if defect_id is None or defect_id == '':
+                stats['skipped'] += 1
+                continue
+            defect_id = str(defect_id)
+            if seen is not None:
+                seen.add(defect_id)
+            changed = self.upsert(defect_id, severity, status, module)
+            stats['changed' if changed else 'unchanged'] += 1
+        if seen is not None:
+            for defect_id in [defect_id for defect_id in self.defects if defect_id not in seen]:
+                self.remove(defect_id)
+                stats['removed'] += 1
+        return stats
+
+    def save(self, path=None):
+        """Ghi trạng thái (ghi file tạm rồi os.replace)"""
+        path = path or self.path
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'groups': self.groups, 'defects': self.defects}, f,
+                      ensure_ascii=False, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def group_counts(self):
+        """(severity, status, module) -> số defect"""
+        return {self.groups[group_id]: count for group_id, count in self.counts.items() if count}
+
+    def modules(self):
+        return sorted({module for _, _, module in self.group_counts()})
+
+    def by_severity(self, module=None):
+        """
+        {severity: {'fixed': n, 'open': n}} như `defects_by_severity` của dashboard;
+        luôn có 4 mức chuẩn, mức lạ được thêm vào sau.
+        """
+        result = {severity: {'fixed': 0, 'open': 0} for severity in SEVERITIES}
+        for (severity, status, group_module), count in self.group_counts().items():
+            if module is None or group_module == module:
+                result.setdefault(severity, {'fixed': 0, 'open': 0})[status] += count
+        return result
+
+    def by_module(self):
+        """{module: {'fixed': n, 'open': n}}, nhiều defect open nhất trước"""
+        result = {}
+        for (_, status, module), count in self.group_counts().items():
+            result.setdefault(module, {'fixed': 0, 'open': 0})[status] += count
+        return dict(sorted(result.items(), key=lambda item: (-item[1]['open'], item[0])))
+
+    def defect_spec(self, filename='defect_distribution_bar_chart.png', style='dashboard', module=None):
+        """Spec biểu đồ Defect Distribution by Severity (tiêu đề tính từ số liệu)"""
+        data = {'by_severity': self.by_severity(module)}
+        if module is not None:
+            counts = data['by_severity'].values()
+            fixed = sum(item['fixed'] for item in counts)
+            opened = sum(item['open'] for item in counts)
+            data['title'] = (f'Defect Distribution by Severity - {module}\n'
+                             f'Total: {fixed + opened} Defects ({fixed} Fixed, {opened} Open)')
+        return {'kind': 'defect_severity', 'style': style, 'data': data,
+                'output': {'filename': filename, 'dpi': 300}}
+
+
+def load_defects(exports, store_path=None, prune=False, verbose=True):
+    """Nạp các file export vào DefectStore (lưu lại nếu có store_path)"""
+    store = DefectStore(store_path)
+    for path in exports:
+        stats = store.ingest(path, prune=prune)
+        if verbose:
+            print(f"📥 {path}: {stats['rows']} dòng, {stats['changed']} thay đổi, "
+                  f"{stats['unchanged']} không đổi, {stats['removed']} đã xóa")
+    if store_path:
+        store.save()
+    return store
+
+
+def format_by_severity(by_severity):
+    """Các dòng thống kê defect theo severity (dùng cho phần tóm tắt của script)"""
+    total = sum(item['fixed'] + item['open'] for item in by_severity.values())
+    fixed = sum(item['fixed'] for item in by_severity.values())
+    lines = []
+    for severity, item in by_severity.items():
+        count = item['fixed'] + item['open']
+        share = count / total * 100 if total else 0
+        lines.append(f'  {severity}: {count} defects ({share:.0f}%)')
+    lines.append(f'  Total: {total} defects ({fixed} fixed, {total - fixed} open)')
+    return lines
+
+
+def _write_benchmark_export(path, num_defects, changed=0.0, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    statuses = ('Open', 'In Progress', 'Resolved', 'Closed', 'Reopened')
+    components = ('Cart Controller', 'Order Controller', 'Search Controller', 'User Profile',
+                  'Authorization Service', 'E2E Bookstore')
+    with open(path, 'w', encoding='utf-8', newline='') as fp:
+        writer = csv.writer(fp)
+        writer.writerow(['Issue key', 'Summary', 'Priority', 'Status', 'Component/s'])
+        for i in range(num_defects):
+            status = statuses[i * 7 % len(statuses)]
+            if changed and rng.random() < changed:
+                status = 'Closed' if status != 'Closed' else 'Reopened'
+            writer.writerow([f'BOOK-{i}', f'Defect {i}', ('Blocker', 'Major', 'Normal', 'Minor')[i * 3 % 4],
+                             status, components[i * 11 % len(components)]])
+
+
+def benchmark(num_defects=500000, changed=0.01):
+    """Thời gian nạp đầy đủ và nạp lại export có `changed` tỷ lệ dòng thay đổi"""
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first = os.path.join(tmp, 'export_1.csv')
+        second = os.path.join(tmp, 'export_2.csv')
+        store_path = os.path.join(tmp, 'defects.json')
+        _write_benchmark_export(first, num_defects)
+        _write_benchmark_export(second, num_defects, changed=changed)
+
+        for label, path in (('Nạp lần đầu', first), (f'Nạp lại ({changed:.0%} thay đổi)', second)):
+            started = time.perf_counter()
+            store = DefectStore(store_path)
+            stats = store.ingest(path)
+            store.save()
+            elapsed = time.perf_counter() - started
+            print(f"   • {label}: {stats['rows']} dòng, {stats['changed']} áp dụng, "
+                  f"{elapsed:.2f}s ({stats['rows'] / elapsed / 1000:.0f}k dòng/s)")
+        open_total = sum(item['open'] for item in store.by_severity().values())
+        print(f'   • {len(store.defects)} defect, {open_total} open, '
+              f'store {os.path.getsize(store_path) / 2 ** 20:.1f} MiB')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Nạp defect từ file export CSV / JSON lines')
+    parser.add_argument('exports', nargs='*', help='file export (.csv, .jsonl)')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE,
+                        help=f'lưu trạng thái để lần sau chỉ áp dụng dòng thay đổi (mặc định {DEFAULT_STORE})')
+    parser.add_argument('--prune', action='store_true', help='xóa defect không có trong export')
+    parser.add_argument('--module', help='chỉ thống kê một module')
+    parser.add_argument('--output', metavar='PNG', help='vẽ biểu đồ Defect Distribution by Severity')
+    parser.add_argument('--benchmark', action='store_true', help='đo thời gian nạp 500k defect')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark nạp defect:')
+        benchmark()
+        return
+    if not args.exports and not args.store:
+        parser.error('cần file export hoặc --store')
+
+    store = load_defects(args.exports, args.store, args.prune)
+    print(f'\n🐞 DEFECT DISTRIBUTION{f" ({args.module})" if args.module else ""}:')
+    print('\n'.join(format_by_severity(store.by_severity(args.module))))
+    if not args.module:
+        print('\nBY MODULE:')
+        for module, item in store.by_module().items():
+            print(f"  {module}: {item['open']} open, {item['fixed']} fixed")
+    if args.output:
+        from chart_engine import render
+
+        render(store.defect_spec(args.output, module=args.module))
+        print(f'✅ Đã lưu: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Giảm số điểm của chuỗi thời gian trước khi vẽ đường (pass rate, doanh thu...).
+
+Ở độ phân giải của biểu đồ, hàng nghìn tới hàng triệu điểm chỉ phủ vài nghìn
+cột pixel; matplotlib vẫn phải xử lý từng điểm và file SVG lớn theo số điểm.
+Hai phương pháp, đều trả về chỉ số (tăng dần) của các điểm được giữ, luôn gồm
+điểm đầu và điểm cuối:
+
+    - lttb: Largest-Triangle-Three-Buckets, giữ `budget` điểm tạo tam giác lớn
+      nhất với điểm đã chọn trước đó và trung bình bucket kế tiếp, giữ được dáng
+      đường với số điểm bằng số pixel.
+    - minmax: bao min/max theo cột pixel (kèm điểm đầu / cuối mỗi cột để đường
+      nối giữa các cột không bị lệch), ảnh raster gần như trùng với vẽ toàn bộ;
+      mọi đỉnh và mọi lần pass rate tụt đều còn nguyên giá trị.
+
+Điểm NaN (tháng chưa có dữ liệu...) bị bỏ khỏi kết quả.
+
+Cách dùng:
+    python downsample.py --benchmark [--points 10000 100000 1000000] [--dpi 100]
+"""
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def _numeric(x):
+    """Trục x (số hoặc datetime64) -> float64"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, budget):
+    """
+    Chỉ số của `budget` điểm theo Largest-Triangle-Three-Buckets.
+    Các bucket phụ thuộc nhau (điểm chọn ở bucket trước là đỉnh tam giác) nên
+    vòng lặp theo bucket, diện tích trong mỗi bucket tính bằng NumPy.
+    """
+    n = len(y)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+    x = _numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    # Trung bình từng bucket, thêm điểm cuối làm "bucket kế tiếp" của bucket cuối
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1])
+
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(budget - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs((ax - mean_x[bucket + 1]) * (y[low:high] - ay) -
+                      (ax - x[low:high]) * (mean_y[bucket + 1] - ay))
+        anchor = low + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def _first_per_group(indices, groups):
+    """Phần tử đầu tiên của `indices` trong mỗi nhóm (groups không giảm)"""
+    return indices[np.flatnonzero(np.diff(groups, prepend=-1))]
+
+
+def minmax(x, y, columns):
+    """
+    Chỉ số các điểm đầu, cuối, nhỏ nhất, lớn nhất của từng cột pixel (tối đa
+    4 điểm mỗi cột). x phải tăng dần; cột chia đều theo giá trị x.
+    """
+    n = len(y)
+    if n <= 4 * columns or columns < 1:
+        return np.arange(n)
+    x = _numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+    span = x[-1] - x[0]
+    column = (np.zeros(n, dtype=np.int64) if span <= 0 else
+              np.minimum(((x - x[0]) / span * columns).astype(np.int64), columns - 1))
+    starts = np.flatnonzero(np.diff(column, prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+    counts = ends - starts + 1
+
+    keep = [starts, ends]
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(y, starts), counts)
+        hits = np.flatnonzero(y == extreme)
+        keep.append(_first_per_group(hits, column[hits]))
+    return np.unique(np.concatenate(keep))
+
+
+def downsample(x, y, budget, method='minmax'):
+    """
+    (x, y) rút gọn cho `budget` pixel chiều ngang. Trả nguyên dữ liệu nếu đã
+    đủ ít điểm; NaN trong y bị bỏ khi rút gọn.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method not in METHODS:
+        raise ValueError(f'phương pháp không hỗ trợ: {method}')
+    limit = budget if method == 'lttb' else 4 * budget
+    if len(y) <= limit:
+        return x, y
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    keep = lttb(x, y, budget) if method == 'lttb' else minmax(x, y, budget)
+    return x[keep], y[keep]
+
+
+def pixel_width(ax, dpi=None):
+    """Chiều rộng vùng vẽ của axes tính bằng pixel ở dpi lúc lưu (mặc định dpi của figure)"""
+    figure = ax.figure
+    return max(1, int(ax.get_position().width * figure.get_figwidth() * (dpi or figure.dpi)))
+
+
+def _trend(points, seed=0):
+    """Pass rate giả lập: dao động quanh 90%, thỉnh thoảng tụt mạnh trong một lần chạy"""
+    rng = np.random.default_rng(seed)
+    timestamps = 1600000000000 + np.cumsum(rng.integers(60000, 3600000, points))
+    rates = np.clip(90 + np.cumsum(rng.normal(0, 0.05, points)) % 8 + rng.normal(0, 1.5, points), 0, 100)
+    dips = rng.choice(points, max(points // 20000, 3), replace=False)
+    rates[dips] = rng.uniform(5, 40, len(dips))
+    return timestamps, np.round(rates, 1)
+
+
+def benchmark(points=(10000, 100000, 1000000), dpi=100):
+    """
+    Thời gian render pass_rate_trend và kích thước PNG / SVG khi vẽ toàn bộ điểm
+    và khi rút gọn; tỷ lệ pixel khác với ảnh vẽ toàn bộ; các lần tụt pass rate
+    có còn trên biểu đồ.
+    """
+    import os
+    import tempfile
+    import time
+
+    from PIL import Image, ImageChops
+
+    from chart_engine import render
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Lần vẽ đầu tiên nạp font cache, không tính vào kết quả
+        render({'kind': 'pass_rate_trend', 'style': 'dashboard',
+                'data': {'timestamps': [1600000000000], 'pass_rates': [90.0]},
+                'output': {'filename': os.path.join(tmp, 'warmup.png'), 'dpi': dpi, 'svg': True}})
+        for count in points:
+            timestamps, rates = _trend(count)
+            data = {'timestamps': timestamps.tolist(), 'pass_rates': rates.tolist()}
+            images = {}
+            for method in (None,) + METHODS:
+                filename = os.path.join(tmp, f'{method}.png')
+                spec = {'kind': 'pass_rate_trend', 'style': 'dashboard', 'data': data,
+                        'style_overrides': {'downsample': method},
+                        'output': {'filename': filename, 'dpi': dpi, 'svg': True}}
+                started = time.perf_counter()
+                render(spec)
+                elapsed = time.perf_counter() - started
+                images[method] = Image.open(filename).convert('RGB')
+                diff = ImageChops.difference(images[None], images[method]).convert('L')
+                changed = np.count_nonzero(np.asarray(diff) > 32) / diff.width / diff.height * 100
+                budget = int(0.775 * 12 * dpi)
+                kept = downsample(timestamps.astype('datetime64[ms]'), rates, budget, method)[1] if method else rates
+                result = {'points': count, 'method': method or 'none', 'kept': len(kept),
+                          'render_ms': round(elapsed * 1000, 1), 'png_kib': round(os.path.getsize(filename) / 1024, 1),
+                          'svg_kib': round(os.path.getsize(os.path.join(tmp, f'{method}.svg')) / 1024, 1),
+                          'changed_pct': round(changed, 3), 'min_kept': float(kept.min()) == float(rates.min())}
+                results.append(result)
+                print(f'   • {count:>8d} điểm, {result["method"]:>6}: giữ {len(kept):>8d} điểm, '
+                      f'render {result["render_ms"]:8.1f} ms, PNG {result["png_kib"]:7.1f} KiB, '
+                      f'SVG {result["svg_kib"]:9.1f} KiB, pixel khác {changed:6.3f}%, '
+                      f'điểm thấp nhất {"còn" if result["min_kept"] else "mất"}')
+    return results
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rút gọn chuỗi thời gian trước khi vẽ')
+    parser.add_argument('--benchmark', action='store_true', help='so sánh vẽ toàn bộ với lttb / minmax')
+    parser.add_argument('--points', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(f'⏱️ Benchmark downsampling (pass_rate_trend, dpi {args.dpi}):')
+        benchmark(args.points, args.dpi)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
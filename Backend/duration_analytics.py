@@ -0,0 +1,216 @@
+"""
+Phân tích thời gian chạy test và suite.
+
+Jest chạy với `--runInBand` nên thời gian các suite cộng dồn trực tiếp vào thời
+gian CI. Module này tính p50/p95/p99 cho từng test và từng suite (vector hóa
+theo nhóm), top-N lần chạy test chậm nhất bằng heap giới hạn kích thước trên
+toàn bộ lịch sử, và tỷ trọng thời gian của từng file test, để biết nên shard
+hoặc tối ưu file nào trước.
+
+Cách dùng:
+    python duration_analytics.py [--store .test_history] [--top 15]
+"""
+
+import heapq
+
+import numpy as np
+
+from jest_report import suite_display_name
+from run_history import DEFAULT_HISTORY_DIR
+from tracing import traced
+
+PERCENTILES = (50, 95, 99)
+CHUNK_ROWS = 1 << 20
+
+
+@traced(category='aggregate')
+def grouped_percentiles(groups, values, num_groups, percentiles=PERCENTILES):
+    """
+    Percentile (nội suy tuyến tính, như np.percentile) của `values` theo từng nhóm.
+
+    Sắp xếp một lần theo (nhóm, giá trị) rồi lấy phần tử theo vị trí, không lặp
+    Python theo nhóm. Trả về (mảng num_groups x len(percentiles), số phần tử mỗi nhóm);
+    nhóm rỗng có giá trị NaN.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=num_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = np.full((num_groups, len(percentiles)), np.nan)
+    has = counts > 0
+    n, first = counts[has], starts[has]
+    for j, q in enumerate(percentiles):
+        position = (n - 1) * (q / 100)
+        lo = np.floor(position).astype(np.int64)
+        hi = np.minimum(lo + 1, n - 1)
+        low_values = sorted_values[first + lo]
+        result[has, j] = low_values + (sorted_values[first + hi] - low_values) * (position - lo)
+    return result, counts
+
+
+@traced(category='aggregate')
+def slowest_executions(durations, n=20, chunk=CHUNK_ROWS):
+    """
+    Top-N giá trị lớn nhất của cột duration bằng min-heap kích thước n.
+
+    Cột được đọc từng chunk (memmap), mỗi chunk chỉ đẩy n ứng viên lớn nhất
+    (argpartition) vào heap, nên bộ nhớ là O(n + chunk). Trả về [(duration, dòng)].
+    """
+    heap = []
+    for lo in range(0, len(durations), chunk):
+        block = np.nan_to_num(np.asarray(durations[lo:lo + chunk], dtype=np.float64), nan=-np.inf)
+        candidates = np.argpartition(block, -n)[-n:] if len(block) > n else np.arange(len(block))
+        for i in candidates:
+            item = (float(block[i]), lo + int(i))
+            if item[0] == -np.inf:
+                continue
+            if len(heap) < n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return sorted(heap, reverse=True)
+
+
+class DurationAnalytics:
+    """Thống kê thời gian từ các cột (test, suite, duration) của một hoặc nhiều lần chạy"""
+
+    def __init__(self, test_ids, test_suites, test_durations, suite_ids, suite_durations,
+                 test_names, suite_names, num_runs=1):
+        self.test_ids = test_ids
+        self.test_suites = test_suites
+        self.test_durations = test_durations
+        self.suite_ids = suite_ids
+        self.suite_durations = suite_durations
+        self.test_names = test_names        # [(suite, full_name)] theo id
+        self.suite_names = suite_names      # [suite] theo id
+        self.num_runs = num_runs
+
+    @classmethod
+    def from_history(cls, store):
+        """Dùng các cột của RunHistoryStore (memmap, không parse lại báo cáo)"""
+        return cls(store.column('tests', 'test'), store.column('tests', 'suite'),
+                   store.column('tests', 'duration_ms'), store.column('suites', 'suite'),
+                   store.column('suites', 'duration_ms'), store.test_names(),
+                   store.suite_names(), store.num_runs)
+
+    @classmethod
+    def from_run(cls, test_durations, suite_durations):
+        """Dùng số liệu của một lần chạy: {(suite, full_name): ms} và {suite: ms}"""
+        suite_names = list(dict.fromkeys(list(suite_durations) +
+                                         [suite for suite, _ in test_durations]))
+        suite_index = {suite: i for i, suite in enumerate(suite_names)}
+        test_names = list(test_durations)
+        return cls(np.arange(len(test_names)),
+                   np.array([suite_index[suite] for suite, _ in test_names], dtype=np.int64),
+                   np.array(list(test_durations.values()), dtype=np.float64),
+                   np.array([suite_index[suite] for suite in suite_durations], dtype=np.int64),
+                   np.array(list(suite_durations.values()), dtype=np.float64),
+                   test_names, suite_names)
+
+    def test_percentiles(self):
+        return grouped_percentiles(self.test_ids, self.test_durations, len(self.test_names))
+
+    def suite_percentiles(self):
+        return grouped_percentiles(self.suite_ids, self.suite_durations, len(self.suite_names))
+
+    def runtime_by_suite(self):
+        """Tổng thời gian (ms) của mỗi file test; file không có duration suite thì cộng từ test"""
+        durations = np.asarray(self.suite_durations, dtype=np.float64)
+        known = ~np.isnan(durations)
+        totals = np.bincount(np.asarray(self.suite_ids)[known], weights=durations[known],
+                             minlength=len(self.suite_names))
+        test_durations = np.asarray(self.test_durations, dtype=np.float64)
+        timed = ~np.isnan(test_durations)
+        from_tests = np.bincount(np.asarray(self.test_suites)[timed], weights=test_durations[timed],
+                                 minlength=len(self.suite_names))
+        return np.where(totals > 0, totals, from_tests)
+
+    def slowest_tests(self, n=15):
+        """Top-N test theo p95: [(tên hiển thị, p50, p95, p99)]"""
+        percentiles, _ = self.test_percentiles()
+        p95 = np.nan_to_num(percentiles[:, 1], nan=-1)
+        top = np.argsort(-p95, kind='stable')[:n]
+        return [(self.test_label(t), *percentiles[t].round(1).tolist()) for t in top if p95[t] >= 0]
+
+    def slowest_executions(self, n=20):
+        """Top-N lần chạy test chậm nhất trên toàn bộ lịch sử: [(tên, ms)]"""
+        return [(self.test_label(int(self.test_ids[row])), duration)
+                for duration, row in slowest_executions(self.test_durations, n)]
+
+    def test_label(self, test):
+        suite, full_name = self.test_names[test]
+        return f'{suite_display_name(suite)}: {full_name}'
+
+    def slow_tests_spec(self, filename='slow_tests_chart.png', n=15):
+        rows = self.slowest_tests(n)
+        return {
+            'kind': 'slow_tests',
+            'style': 'dashboard',
+            'data': {
+                'tests': [row[0] for row in rows],
+                'p50': [row[1] for row in rows],
+                'p95': [row[2] for row in rows],
+                'p99': [row[3] for row in rows],
+                'runs': self.num_runs,
+            },
+            'output': {'filename': filename, 'dpi': 300},
+        }
+
+    def runtime_share_spec(self, filename='runtime_share_chart.png'):
+        totals = self.runtime_by_suite()
+        grand_total = totals.sum()
+        shares = totals / grand_total * 100 if grand_total else np.zeros_like(totals)
+        order = np.argsort(-shares, kind='stable')
+        return {
+            'kind': 'runtime_share',
+            'style': 'dashboard',
+            'data': {
+                'suites': [suite_display_name(self.suite_names[s]) for s in order],
+                'shares': shares[order].round(1).tolist(),
+                'total_seconds': round(float(grand_total) / 1000, 1),
+                'runs': self.num_runs,
+            },
+            'output': {'filename': filename, 'dpi': 300},
+        }
+
+
+def main(argv=None):
+    import argparse
+
+    from chart_engine import render
+    from run_history import RunHistoryStore
+
+    parser = argparse.ArgumentParser(description='Phân tích thời gian chạy test')
+    parser.add_argument('--store', default=DEFAULT_HISTORY_DIR, help='thư mục lịch sử')
+    parser.add_argument('--top', type=int, default=15, help='số test chậm nhất hiển thị')
+    args = parser.parse_args(argv)
+
+    analytics = DurationAnalytics.from_history(RunHistoryStore(args.store))
+    print(f"🐢 Top {args.top} test chậm nhất (p50 / p95 / p99 ms):")
+    for name, p50, p95, p99 in analytics.slowest_tests(args.top):
+        print(f"   • {name}: {p50} / {p95} / {p99}")
+
+    print("\n⏱️ Lần chạy test chậm nhất trong lịch sử:")
+    for name, duration in analytics.slowest_executions(5):
+        print(f"   • {name}: {duration:.0f} ms")
+
+    percentiles, counts = analytics.suite_percentiles()
+    print("\n📁 Suite (p50 / p95 / p99 ms):")
+    for s, suite in enumerate(analytics.suite_names):
+        if counts[s]:
+            p50, p95, p99 = percentiles[s].round(1)
+            print(f"   • {suite_display_name(suite)}: {p50} / {p95} / {p99}")
+
+    for spec in (analytics.slow_tests_spec(n=args.top), analytics.runtime_share_spec()):
+        render(spec)
+        print(f"   ✅ Đã lưu: {spec['output']['filename']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Phát hiện test flaky (lúc pass lúc fail) trên lịch sử các lần chạy.
+
+Kết quả pass/fail của mỗi test qua các lần chạy được lưu thành mảng bit nén
+(np.packbits, mỗi test một hàng, mỗi lần chạy một bit). Số lần đổi trạng thái
+(flip) được tính trực tiếp trên dữ liệu nén bằng XOR với chính nó dịch 1 bit;
+chuỗi fail dài nhất tính theo từng khối test đã giải nén, nên bộ nhớ bị chặn
+kể cả với 10k test x 5k lần chạy.
+
+Cách dùng:
+    python flaky_tests.py [--store .test_history] [--top 20] [--output flaky_tests_heatmap.png]
+    python flaky_tests.py --benchmark
+"""
+
+import time
+
+import numpy as np
+
+from jest_report import suite_display_name
+from run_history import DEFAULT_HISTORY_DIR, STATUS_NOT_RUN, STATUS_PASSED
+from tracing import traced
+
+BLOCK_TESTS = 1024
+
+# Số bit 1 của mỗi giá trị byte
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(packed):
+    return _POPCOUNT[packed].sum(axis=1, dtype=np.int64)
+
+
+def _shift_left(packed):
+    """Dịch cả hàng bit sang trái 1 vị trí: bit của lần chạy i+1 về vị trí i"""
+    shifted = packed << 1
+    shifted[:, :-1] |= packed[:, 1:] >> 7
+    return shifted
+
+
+class FlakyMatrix:
+    """Ma trận bit test x lần chạy: `observed` (có chạy) và `passed` (pass)"""
+
+    def __init__(self, passed, observed, num_runs, test_names=None):
+        self.passed = passed
+        self.observed = observed
+        self.num_runs = num_runs
+        self.test_names = test_names
+
+    @property
+    def num_tests(self):
+        return self.observed.shape[0]
+
+    @classmethod
+    def from_arrays(cls, tests, runs, statuses, num_tests, num_runs, test_names=None):
+        """Dựng ma trận bit từ các cột (test, run, status) của bảng tests"""
+        width = (num_runs + 7) // 8
+        tests = np.asarray(tests, dtype=np.int64)
+        runs = np.asarray(runs, dtype=np.int64)
+        statuses = np.asarray(statuses)
+        ran = statuses != STATUS_NOT_RUN
+        index = tests * width + (runs >> 3)
+        bit = (np.uint8(0x80) >> (runs & 7).astype(np.uint8))
+
+        observed = np.zeros(num_tests * width, dtype=np.uint8)
+        passed = np.zeros(num_tests * width, dtype=np.uint8)
+        np.bitwise_or.at(observed, index[ran], bit[ran])
+        ok = statuses == STATUS_PASSED
+        np.bitwise_or.at(passed, index[ok], bit[ok])
+        return cls(passed.reshape(num_tests, width), observed.reshape(num_tests, width),
+                   num_runs, test_names)
+
+    @classmethod
+    def from_history(cls, store):
+        """Đọc 3 cột test/run/status từ RunHistoryStore"""
+        names = store.test_names()
+        return cls.from_arrays(store.column('tests', 'test'), store.column('tests', 'run'),
+                               store.column('tests', 'status'), len(names), store.num_runs,
+                               [f'{suite_display_name(suite)}: {full_name}' for suite, full_name in names])
+
+    @traced(category='aggregate')
+    def analyze(self, block=BLOCK_TESTS):
+        """Tính flip rate, chuỗi fail và flakiness score cho mọi test"""
+        n, runs = self.num_tests, self.num_runs
+        width = self.observed.shape[1]
+
+        # Mặt nạ các cặp (i, i+1) hợp lệ: bỏ bit cuối và bit đệm
+        pair_mask = np.packbits(np.arange(width * 8) < runs - 1)
+
+        observed_runs = np.zeros(n, dtype=np.int64)
+        failures = np.zeros(n, dtype=np.int64)
+        flips = np.zeros(n, dtype=np.int64)
+        pairs = np.zeros(n, dtype=np.int64)
+        longest = np.zeros(n, dtype=np.int64)
+        current = np.zeros(n, dtype=np.int64)
+
+        for lo in range(0, n, block):
+            hi = min(lo + block, n)
+            obs = self.observed[lo:hi]
+            ok = self.passed[lo:hi] & obs
+            fail = obs & ~ok
+
+            both = obs & _shift_left(obs) & pair_mask
+            observed_runs[lo:hi] = _popcount_rows(obs)
+            failures[lo:hi] = _popcount_rows(fail)
+            pairs[lo:hi] = _popcount_rows(both)
+            flips[lo:hi] = _popcount_rows((ok ^ _shift_left(ok)) & both)
+
+            # Chuỗi fail liên tiếp: vị trí bắt đầu/kết thúc từ diff của hàng bit
+            bits = np.unpackbits(fail, axis=1, count=runs)
+            padded = np.zeros((hi - lo, runs + 2), dtype=np.int8)
+            padded[:, 1:-1] = bits
+            edges = np.diff(padded, axis=1)
+            start_rows, start_cols = np.nonzero(edges == 1)
+            _, end_cols = np.nonzero(edges == -1)
+            lengths = end_cols - start_cols
+            np.maximum.at(longest[lo:hi], start_rows, lengths)
+            trailing = end_cols == runs
+            current[lo:hi][start_rows[trailing]] = lengths[trailing]
+
+        return FlakyReport(self, observed_runs, failures, flips, pairs, longest, current)
+
+
+class FlakyReport:
+    """Kết quả phân tích, mỗi mảng có một phần tử cho mỗi test"""
+
+    def __init__(self, matrix, observed_runs, failures, flips, pairs, longest, current):
+        self.matrix = matrix
+        self.observed_runs = observed_runs
+        self.failures = failures
+        self.flips = flips
+        self.longest_streak = longest
+        self.current_streak = current
+        self.flip_rate = np.divide(flips, pairs, out=np.zeros(len(flips)), where=pairs > 0)
+        self.fail_rate = np.divide(failures, observed_runs, out=np.zeros(len(flips)),
+                                   where=observed_runs > 0)
+        # Test đổi trạng thái thường xuyên và fail khoảng một nửa số lần -> điểm cao;
+        # test hỏng hẳn (fail liên tục) có flip rate thấp nên điểm thấp
+        self.score = self.flip_rate * (1 - np.abs(1 - 2 * self.fail_rate))
+
+    def top(self, n=20, min_runs=5):
+        """Id các test flaky nhất (score > 0, chạy ít nhất `min_runs` lần)"""
+        candidates = np.flatnonzero((self.score > 0) & (self.observed_runs >= min_runs))
+        order = np.argsort(-self.score[candidates], kind='stable')
+        return candidates[order[:n]]
+
+    def heatmap_spec(self, filename='flaky_tests_heatmap.png', top=20, last_runs=100):
+        """Spec cho chart engine: -1 = không chạy, 0 = fail, 1 = pass"""
+        tests = self.top(top)
+        runs = self.matrix.num_runs
+        first = max(runs - last_runs, 0)
+        obs = np.unpackbits(self.matrix.observed[tests], axis=1, count=runs)[:, first:]
+        ok = np.unpackbits(self.matrix.passed[tests], axis=1, count=runs)[:, first:]
+        cells = np.where(obs == 1, ok.astype(np.int8), np.int8(-1))
+        names = self.matrix.test_names or [f'test #{t}' for t in range(self.matrix.num_tests)]
+        return {
+            'kind': 'flaky_heatmap',
+            'style': 'dashboard',
+            'data': {
+                'tests': [names[t] for t in tests],
+                'scores': [round(float(self.score[t]), 3) for t in tests],
+                'cells': cells.tolist(),
+                'first_run': first,
+            },
+            'output': {'filename': filename, 'dpi': 300},
+        }
+
+
+def benchmark(num_tests=10000, num_runs=5000, seed=0):
+    """Đo thời gian dựng ma trận bit và phân tích 10k test x 5k lần chạy"""
+    rng = np.random.default_rng(seed)
+    fail_prob = np.where(rng.random(num_tests) < 0.05, 0.3, 0.002)
+
+    started = time.perf_counter()
+    # Sinh trực tiếp dạng nén để không cần 50M dòng trong bảng tests
+    width = (num_runs + 7) // 8
+    passed = np.empty((num_tests, width), dtype=np.uint8)
+    for lo in range(0, num_tests, BLOCK_TESTS):
+        hi = min(lo + BLOCK_TESTS, num_tests)
+        bits = rng.random((hi - lo, num_runs)) >= fail_prob[lo:hi, None]
+        passed[lo:hi] = np.packbits(bits, axis=1)
+    observed = np.packbits(np.ones(num_runs, dtype=bool))[None, :].repeat(num_tests, axis=0)
+    prepared = time.perf_counter()
+
+    report = FlakyMatrix(passed, observed, num_runs).analyze()
+    analyzed = time.perf_counter()
+
+    sample = 2_000_000
+    tests = rng.integers(0, num_tests, sample)
+    runs = rng.integers(0, num_runs, sample)
+    statuses = rng.integers(0, 2, sample).astype(np.int8)
+    FlakyMatrix.from_arrays(tests, runs, statuses, num_tests, num_runs)
+    packed = time.perf_counter()
+
+    print(f'   • dữ liệu giả lập ({num_tests} x {num_runs}): {prepared - started:6.2f}s')
+    print(f'   • phân tích (flip rate, streak, score): {analyzed - prepared:6.2f}s')
+    print(f'   • nén {sample:,} dòng (test, run, status) thành bit: {packed - analyzed:6.2f}s')
+    print(f'   • top flaky score: {report.score[report.top(1)][0]:.3f}, '
+          f'số test score > 0.1: {int((report.score > 0.1).sum())}')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Phát hiện test flaky từ lịch sử chạy')
+    parser.add_argument('--store', default=DEFAULT_HISTORY_DIR, help='thư mục lịch sử')
+    parser.add_argument('--top', type=int, default=20, help='số test hiển thị')
+    parser.add_argument('--output', default='flaky_tests_heatmap.png')
+    parser.add_argument('--benchmark', action='store_true', help='đo với 10k test x 5k lần chạy')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark flaky detector:')
+        benchmark()
+        return
+
+    from chart_engine import render
+    from run_history import RunHistoryStore
+
+    report = FlakyMatrix.from_history(RunHistoryStore(args.store)).analyze()
+    names = report.matrix.test_names
+    print(f"🔁 Top {args.top} flaky tests:")
+    for t in report.top(args.top):
+        print(f"   • {names[t]}: score {report.score[t]:.3f}, flip rate {report.flip_rate[t]:.2f}, "
+              f"fail {report.failures[t]}/{report.observed_runs[t]}, "
+              f"longest fail streak {report.longest_streak[t]}")
+    render(report.heatmap_spec(args.output, args.top))
+    print(f"   ✅ Đã lưu: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+Dashboard HTML tĩnh, một file duy nhất, vẽ biểu đồ phía trình duyệt.
+
+Số liệu của từng biểu đồ (lấy từ chart spec của TestAnalyticsCharts) được nhúng
+dạng JSON gọn và vẽ thành SVG bằng một đoạn JavaScript nhỏ, thay vì tải nhiều
+ảnh PNG 300 dpi. Tùy chọn `--fallback-images` nhúng thêm ảnh PNG nhỏ (bảng màu
+rút gọn) trong <noscript> cho trình duyệt tắt JavaScript.
+
+Mỗi phần của trang nằm giữa hai marker kèm hash nội dung:
+    <!-- section:modules 3f2a... --> ... <!-- /section:modules -->
+Khi tạo lại, phần có hash không đổi được giữ nguyên từ file cũ (không vẽ lại
+ảnh fallback); nếu không phần nào đổi thì file không bị ghi lại.
+
+Cách dùng:
+    python html_dashboard.py [jest-report.json] [--history DIR] [-o test_dashboard.html]
+                             [--fallback-images]
+"""
+
+import base64
+import hashlib
+import html
+import io
+import json
+import os
+import re
+
+import numpy as np
+
+from chart_engine import RATE_LABELS, RATE_THRESHOLDS, STYLES, render
+from downsample import downsample
+from test_analytics_dashboard import TestAnalyticsCharts
+from tracing import configure, traced
+
+DEFAULT_OUTPUT = 'test_dashboard.html'
+TEMPLATE_VERSION = 1
+FALLBACK_WIDTH = 480
+FALLBACK_COLORS = 64
+# Chiều rộng vùng vẽ của SVG pass rate trend (w - 2 * pad trong script)
+TREND_PIXELS = 392
+
+# Section -> (method của TestAnalyticsCharts, tiêu đề)
+SECTIONS = {
+    'summary': ('create_pie_chart', 'Test Case Execution Summary'),
+    'defects': ('create_defect_bar_chart', 'Defect Distribution by Severity'),
+    'modules': ('create_module_coverage_chart', 'Test Coverage by Module - Pass Rate'),
+    'trend': ('create_pass_rate_trend_chart', 'Pass Rate Over Time'),
+}
+
+_SECTION_RE = re.compile(r'<!-- section:(\w+) ([0-9a-f]+) -->.*?<!-- /section:\1 -->', re.S)
+
+_CSS = """
+body{font-family:system-ui,-apple-system,Segoe UI,sans-serif;margin:0;background:#f4f6f8;color:#222}
+header{background:#2f3e4e;color:#fff;padding:16px 24px}header h1{margin:0;font-size:20px}
+.stats{display:flex;flex-wrap:wrap;gap:12px;padding:16px 24px}
+.stat{background:#fff;border-radius:6px;padding:10px 16px;box-shadow:0 1px 2px #0002}
+.stat b{display:block;font-size:20px}
+main{display:grid;grid-template-columns:repeat(auto-fit,minmax(460px,1fr));gap:16px;padding:0 24px 24px}
+section{background:#fff;border-radius:6px;padding:12px 16px;box-shadow:0 1px 2px #0002}
+section h2{font-size:15px;margin:0 0 8px}svg{width:100%;height:auto;font-size:11px}
+.legend{display:flex;flex-wrap:wrap;gap:10px;font-size:12px;margin-top:6px}
+.legend i{display:inline-block;width:10px;height:10px;margin-right:4px}
+noscript img{max-width:100%}
+"""
+
+# Các hàm vẽ SVG phía trình duyệt, một hàm cho mỗi loại biểu đồ
+_JS = r"""
+(function(){
+const T=JSON.parse(document.getElementById('theme').textContent);
+const NS='http://www.w3.org/2000/svg';
+function el(tag,attrs,text){const e=document.createElementNS(NS,tag);
+  for(const k in attrs)e.setAttribute(k,attrs[k]);if(text!=null)e.textContent=text;return e}
+function svg(w,h){return el('svg',{viewBox:`0 0 ${w} ${h}`})}
+function legend(items){const d=document.createElement('div');d.className='legend';
+  for(const [c,l] of items){const s=document.createElement('span');s.innerHTML=`<i style="background:${c}"></i>`;
+    s.appendChild(document.createTextNode(l));d.appendChild(s)}return d}
+function rateColor(r){let i=0;while(i<T.thresholds.length&&r>=T.thresholds[i])i++;return T.palette[i]}
+function rateLegend(){return legend(T.rate_labels.map((l,i)=>[T.palette[i],l]).reverse())}
+const R={
+ pie_summary(d){const s=svg(300,220),total=d.passed+d.failed,cx=150,cy=110,r=90;
+  let a=-Math.PI/2;[[d.passed,T.pie[0]],[d.failed,T.pie[1]]].forEach(([v,c])=>{
+   if(!total||!v)return;const b=a+2*Math.PI*v/total,large=b-a>Math.PI?1:0;
+   const p=v===total?`M${cx-r},${cy}a${r},${r} 0 1,0 ${2*r},0a${r},${r} 0 1,0 ${-2*r},0`:
+    `M${cx},${cy}L${cx+r*Math.cos(a)},${cy+r*Math.sin(a)}A${r},${r} 0 ${large},1 ${cx+r*Math.cos(b)},${cy+r*Math.sin(b)}Z`;
+   s.appendChild(el('path',{d:p,fill:c,stroke:'#fff'}));
+   const m=(a+b)/2;s.appendChild(el('text',{x:cx+r*.6*Math.cos(m),y:cy+r*.6*Math.sin(m),'text-anchor':'middle','font-weight':'bold'},
+    `${v} (${(v/total*100).toFixed(1)}%)`));a=b});
+  const pct=v=>total?(v/total*100).toFixed(1)+'%':'0%';
+  return [s,legend([[T.pie[0],`Passed: ${d.passed} (${pct(d.passed)})`],[T.pie[1],`Failed: ${d.failed} (${pct(d.failed)})`],
+   ['#FFA500',`Not run: ${d.not_run||0}`]])]},
+ defect_severity(d){const cats=Object.keys(d.by_severity),w=460,h=240,pad=30;
+  const tot=cats.map(c=>d.by_severity[c].fixed+d.by_severity[c].open),max=Math.max(1,...tot);
+  const s=svg(w,h),bw=(w-2*pad)/cats.length;
+  cats.forEach((c,i)=>{const f=d.by_severity[c].fixed,o=d.by_severity[c].open,x=pad+i*bw+bw*.2,sc=(h-2*pad)/max;
+   s.appendChild(el('rect',{x,y:h-pad-f*sc,width:bw*.6,height:f*sc,fill:T.defect[0]}));
+   s.appendChild(el('rect',{x,y:h-pad-(f+o)*sc,width:bw*.6,height:o*sc,fill:T.defect[1]}));
+   s.appendChild(el('text',{x:x+bw*.3,y:h-pad-(f+o)*sc-4,'text-anchor':'middle','font-weight':'bold'},`Total: ${f+o}`));
+   s.appendChild(el('text',{x:x+bw*.3,y:h-pad+14,'text-anchor':'middle'},c))});
+  return [s,legend([[T.defect[0],'Fixed'],[T.defect[1],'Open']])]},
+ module_pass_rate(d){const mods=Object.keys(d.modules),w=460,left=150,bh=24,h=mods.length*bh+30,sc=(w-left-10)/100;
+  const s=svg(w,h);mods.forEach((m,i)=>{const r=d.modules[m],y=i*bh+4;
+   s.appendChild(el('text',{x:left-6,y:y+bh*.6,'text-anchor':'end'},m));
+   s.appendChild(el('rect',{x:left,y,width:r*sc,height:bh*.75,fill:rateColor(r),stroke:'#000','stroke-width':.5}));
+   s.appendChild(el('text',{x:left+r*sc-4,y:y+bh*.55,'text-anchor':'end','font-weight':'bold'},r+'%'))});
+  const ox=left+d.overall*sc;s.appendChild(el('line',{x1:ox,x2:ox,y1:0,y2:h-24,stroke:'red','stroke-dasharray':'5,3','stroke-width':2}));
+  s.appendChild(el('text',{x:ox,y:h-8,'text-anchor':'middle',fill:'red','font-weight':'bold'},`Overall: ${d.overall}%`));
+  return [s,rateLegend()]},
+ pass_rate_trend(d){const w=460,h=240,pad=34,n=d.rates.length,s=svg(w,h);let t=d.t0;
+  const ts=d.dt.map(v=>t+=v),t1=ts[0],t2=ts[n-1]||t1,X=v=>pad+(t2>t1?(v-t1)/(t2-t1):.5)*(w-2*pad),Y=r=>h-pad-r/100*(h-2*pad);
+  [0,50,100].forEach(r=>{s.appendChild(el('line',{x1:pad,x2:w-pad,y1:Y(r),y2:Y(r),stroke:'#ddd'}));
+   s.appendChild(el('text',{x:pad-4,y:Y(r)+4,'text-anchor':'end'},r+'%'))});
+  s.appendChild(el('polyline',{points:ts.map((v,i)=>`${X(v)},${Y(d.rates[i])}`).join(' '),fill:'none',stroke:T.line,'stroke-width':1.5}));
+  if((d.runs||n)<=200)ts.forEach((v,i)=>s.appendChild(el('circle',{cx:X(v),cy:Y(d.rates[i]),r:3,fill:rateColor(d.rates[i]),stroke:'#000','stroke-width':.5})));
+  const avg=d.avg??(n?d.rates.reduce((a,b)=>a+b,0)/n:0);
+  s.appendChild(el('line',{x1:pad,x2:w-pad,y1:Y(avg),y2:Y(avg),stroke:'red','stroke-dasharray':'5,3'}));
+  const day=v=>new Date(v*1000).toISOString().slice(0,10);
+  if(n){s.appendChild(el('text',{x:pad,y:h-10},day(t1)));s.appendChild(el('text',{x:w-pad,y:h-10,'text-anchor':'end'},day(t2)))}
+  s.appendChild(el('text',{x:w/2,y:14,'text-anchor':'middle','font-weight':'bold'},`${d.runs||n} runs, average ${avg.toFixed(1)}%`));
+  return [s,rateLegend()]},
+};
+document.querySelectorAll('section[data-kind]').forEach(sec=>{
+  const data=JSON.parse(sec.querySelector('script[type="application/json"]').textContent);
+  const box=sec.querySelector('.chart');R[sec.dataset.kind](data).forEach(n=>box.appendChild(n))});
+})();
+"""
+
+
+def _json(value):
+    """JSON gọn, an toàn khi nhúng trong thẻ <script>"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).replace('<', '\\u003c')
+
+
+def _digest(*parts):
+    return hashlib.sha256(_json(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def _section(name, digest, body):
+    return f'<!-- section:{name} {digest} -->\n{body}\n<!-- /section:{name} -->'
+
+
+def compact_data(kind, data):
+    """
+    Rút gọn dữ liệu trend: timestamp tính bằng giây, lưu dạng delta; lịch sử dài
+    được rút gọn min/max theo chiều rộng SVG (số lần chạy và trung bình giữ nguyên).
+    """
+    if kind != 'pass_rate_trend':
+        return data
+    timestamps, rates = downsample(np.asarray(data['timestamps'], dtype=np.int64),
+                                   np.asarray(data['pass_rates'], dtype=float), TREND_PIXELS)
+    seconds = (timestamps // 1000).tolist()
+    deltas = [b - a for a, b in zip([seconds[0]] + seconds, seconds)] if seconds else []
+    compact = {'t0': seconds[0] if seconds else 0, 'dt': deltas, 'rates': [round(rate, 1) for rate in rates.tolist()]}
+    if len(rates) < len(data['pass_rates']):
+        compact.update(runs=len(data['pass_rates']), avg=round(float(np.mean(data['pass_rates'])), 1))
+    return compact
+
+
+@traced(category='html')
+def fallback_image(spec, width=FALLBACK_WIDTH, colors=FALLBACK_COLORS):
+    """Ảnh PNG nhỏ (data URI) cho <noscript>: thumbnail từ buffer raster, bảng màu rút gọn"""
+    import tempfile
+
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'chart.png')
+        spec = dict(spec, output={'filename': filename, 'dpi': 100, 'thumbnail': width})
+        render(spec)
+        image = Image.open(os.path.join(tmp, 'chart_thumb.png')).convert('RGB')
+        buffer = io.BytesIO()
+        image.quantize(colors).save(buffer, format='PNG', optimize=True)
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def _theme():
+    dashboard = STYLES['dashboard']
+    return {
+        'thresholds': RATE_THRESHOLDS,
+        'rate_labels': RATE_LABELS,
+        'palette': dashboard['module_pass_rate']['palette'],
+        'pie': dashboard['pie_summary']['colors'],
+        'defect': (dashboard['defect_severity']['fixed_color'], dashboard['defect_severity']['open_color']),
+        'line': dashboard['pass_rate_trend']['line_color'],
+    }
+
+
+@traced(category='html')
+def build_sections(analytics, fallback_images=False, previous=None):
+    """
+    Các section của trang: [(tên, hash, nội dung)]. Section có hash trùng với
+    `previous` (tên -> nội dung cũ) được dùng lại nguyên văn.
+    """
+    previous = previous or {}
+    sections = []
+
+    def add(name, digest, build):
+        old = previous.get(name)
+        sections.append((name, digest, old[1] if old and old[0] == digest else _section(name, digest, build())))
+
+    add('head', _digest(TEMPLATE_VERSION, _CSS, _JS, _theme()), lambda: (
+        f'<style>{_CSS}</style>\n<script type="application/json" id="theme">{_json(_theme())}</script>'))
+
+    stats = analytics.summary_stats()
+    add('stats', _digest(stats), lambda: '<div class="stats">' + ''.join(
+        f'<div class="stat">{html.escape(label)}<b>{html.escape(str(value))}</b></div>'
+        for label, value in (('Total Tests', stats['total_tests']), ('Pass Rate', f"{stats['pass_rate']}%"),
+                             ('Failed', stats['failed']), ('Open Defects', stats['total_defects']),
+                             ('Best Module', (stats['best_module'] or {}).get('name', '-')),
+                             ('Worst Module', (stats['worst_module'] or {}).get('name', '-')))) + '</div>')
+
+    methods = analytics.chart_methods()
+    for name, (method, title) in SECTIONS.items():
+        if method not in methods:
+            continue
+        spec = analytics.chart_spec(method)
+        data = compact_data(spec['kind'], spec['data'])
+        title = (spec['data'].get('title') or title).split('\n')[0]
+        digest = _digest(spec['kind'], data, title, fallback_images)
+
+        def build(spec=spec, data=data, title=title):
+            fallback = (f'\n<noscript><img alt="{html.escape(title)}" src="{fallback_image(spec)}"></noscript>'
+                        if fallback_images else '')
+            return (f'<section id="{name}" data-kind="{spec["kind"]}"><h2>{html.escape(title)}</h2>\n'
+                    f'<script type="application/json">{_json(data)}</script>'
+                    f'<div class="chart"></div>{fallback}</section>')
+        add(name, digest, build)
+
+    add('script', _digest(TEMPLATE_VERSION, _JS), lambda: f'<script>{_JS}</script>')
+    return sections
+
+
+def read_sections(path):
+    """Section của file HTML cũ: tên -> (hash, nội dung)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return {}
+    return {match.group(1): (match.group(2), match.group(0)) for match in _SECTION_RE.finditer(content)}
+
+
+def write_dashboard(analytics, path=DEFAULT_OUTPUT, fallback_images=False):
+    """Ghi dashboard; trả về danh sách section được tạo lại (rỗng = file không đổi)"""
+    previous = read_sections(path)
+    sections = build_sections(analytics, fallback_images, previous)
+    changed = [name for name, digest, _ in sections if previous.get(name, (None,))[0] != digest]
+    if not changed and set(previous) == {name for name, _, _ in sections}:
+        return []
+
+    parts = {name: content for name, _, content in sections}
+    charts = '\n'.join(parts[name] for name in SECTIONS if name in parts)
+    document = (f'<!DOCTYPE html>\n<html lang="vi"><head><meta charset="utf-8">'
+                f'<meta name="viewport" content="width=device-width,initial-scale=1">'
+                f'<title>Test Analytics Dashboard</title>\n{parts["head"]}\n</head><body>\n'
+                f'<header><h1>Test Analytics Dashboard</h1></header>\n{parts["stats"]}\n'
+                f'<main>\n{charts}\n</main>\n{parts["script"]}\n</body></html>\n')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(document)
+    os.replace(tmp_path, path)
+    return changed
+
+
+def main(argv=None):
+    import argparse
+
+    from run_history import RunHistoryStore
+
+    parser = argparse.ArgumentParser(description='Tạo dashboard HTML tĩnh')
+    parser.add_argument('jest_report', nargs='*', help='báo cáo jest --json (tùy chọn)')
+    parser.add_argument('--summaries', nargs='+', default=[], metavar='FILE')
+    parser.add_argument('--history', metavar='DIR', help='thư mục lịch sử (biểu đồ xu hướng)')
+    parser.add_argument('--coverage', metavar='FILE', help='coverage-final.json hoặc lcov.info')
+    parser.add_argument('--defects', nargs='+', default=[], metavar='EXPORT', help='file export defect')
+    parser.add_argument('--defect-store', metavar='FILE', help='trạng thái defect để nạp tăng dần')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--fallback-images', action='store_true',
+                        help='nhúng ảnh PNG nhỏ cho trình duyệt tắt JavaScript')
+    parser.add_argument('--trace', metavar='FILE', help='ghi Chrome trace JSON (+ profile phẳng)')
+    args = parser.parse_args(argv)
+    configure(args.trace)
+
+    analytics = TestAnalyticsCharts()
+    analytics.load_inputs(args.jest_report, args.summaries)
+    if args.history:
+        analytics.history = RunHistoryStore(args.history)
+    if args.coverage:
+        analytics.load_coverage(args.coverage)
+    if args.defects or args.defect_store:
+        analytics.load_defects(args.defects, args.defect_store)
+
+    changed = write_dashboard(analytics, args.output, args.fallback_images)
+    size = os.path.getsize(args.output)
+    if changed:
+        print(f"✅ Đã ghi {args.output} ({size / 1024:.1f} KiB), section tạo lại: {', '.join(changed)}")
+    else:
+        print(f"✔️ {args.output} không đổi ({size / 1024:.1f} KiB)")
+
+    pngs = [os.path.getsize(f) for f in _chart_files(analytics) if os.path.exists(f)]
+    if pngs:
+        print(f"📦 So với {len(pngs)} ảnh PNG 300 dpi: {sum(pngs) / 1024:.1f} KiB "
+              f"(giảm {sum(pngs) / size:.0f} lần)")
+
+
+def _chart_files(analytics):
+    return [analytics.chart_spec(method)['output']['filename']
+            for method, _ in SECTIONS.values() if method in analytics.chart_methods()]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+"""
+Đọc báo cáo `jest --json` theo kiểu streaming cho các script thống kê test.
+
+Báo cáo được đọc từng chunk và tách thành các sự kiện JSON (giống ijson);
+mỗi test file trong `testResults` được parse trọn bằng json C, nên bộ nhớ
+dùng để parse chỉ phụ thuộc vào suite lớn nhất, không vào kích thước file. Chỉ các con số
+cần cho biểu đồ (số test passed/failed, pass rate theo suite, thời gian chạy
+từng test) được giữ lại.
+
+Cách dùng:
+    python jest_report.py report.json
+    python jest_report.py --benchmark
+"""
+
+import json
+import os
+import re
+from collections import namedtuple
+
+CHUNK_SIZE = 64 * 1024
+
+# Trạng thái assertion của Jest
+PASSED_STATUSES = ('passed',)
+FAILED_STATUSES = ('failed',)
+NOT_RUN_STATUSES = ('pending', 'skipped', 'todo', 'disabled')
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+_NUMBER = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?')
+_LITERAL = re.compile(r'true|false|null')
+_LITERAL_VALUES = {'true': True, 'false': False, 'null': None}
+
+AssertionResult = namedtuple('AssertionResult', 'suite full_name status duration')
+
+
+class _JsonScanner:
+    """
+    Đọc file JSON theo chunk, chỉ giữ một chunk (hoặc giá trị đang decode) trong
+    bộ nhớ. tokens() tách từng token; decode() parse trọn giá trị bắt đầu ở vị
+    trí hiện tại bằng json C, dùng cho các phần lặp lại nhiều lần (suite).
+    """
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = fp.read(chunk_size)
+        self.pos = 0
+        self.eof = not self.buf
+
+    def _read(self, size=None):
+        """Đọc thêm vào buffer (bỏ phần đã xử lý); False nếu hết file"""
+        more = self.fp.read(size or self.chunk_size)
+        self.buf = self.buf[self.pos:] + more
+        self.pos = 0
+        self.eof = not more
+        return not self.eof
+
+    def peek(self):
+        """Ký tự khác khoảng trắng tiếp theo ('' nếu hết file), không tiêu thụ"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof or not self._read():
+                return self.buf[self.pos:self.pos + 1]
+
+    def decode(self):
+        """Parse trọn một giá trị bằng json.JSONDecoder.raw_decode, đọc thêm khi giá trị chưa trọn"""
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise ValueError(f'JSON không hợp lệ hoặc bị cắt gần: {self.buf[self.pos:self.pos + 40]!r}')
+            # Tăng dần lượng đọc thêm để một giá trị lớn không bị parse lại quá nhiều lần
+            self._read(read_size)
+            read_size *= 2
+
+    def tokens(self):
+        """
+        Sinh các token (loại, giá trị). Trạng thái nằm trên self nên decode() có
+        thể được gọi giữa hai token.
+        """
+        while True:
+            buf = self.buf
+            pos = _WHITESPACE.match(buf, self.pos).end()
+            if pos >= len(buf):
+                self.pos = pos
+                if self.eof or not self._read():
+                    return
+                continue
+
+            ch = buf[pos]
+            if ch in '{}[]:,':
+                self.pos = pos + 1
+                yield ch, None
+                continue
+
+            if ch == '"':
+                match = _STRING.match(buf, pos)
+            elif ch == '-' or ch.isdigit():
+                match = _NUMBER.match(buf, pos)
+            else:
+                match = _LITERAL.match(buf, pos)
+
+            # Token có thể bị cắt ngang ở cuối chunk -> đọc thêm rồi thử lại
+            if not self.eof and (match is None or match.end() == len(buf)):
+                self.pos = pos
+                self._read()
+                continue
+            if match is None:
+                raise ValueError(f'JSON không hợp lệ gần: {buf[pos:pos + 40]!r}')
+
+            token = match.group()
+            self.pos = match.end()
+            if ch == '"':
+                yield 'string', json.loads(token) if '\\' in token else token[1:-1]
+            elif ch == '-' or ch.isdigit():
+                is_float = '.' in token or 'e' in token or 'E' in token
+                yield 'number', float(token) if is_float else int(token)
+            elif token == 'null':
+                yield 'null', None
+            else:
+                yield 'boolean', _LITERAL_VALUES[token]
+
+
+def iter_json_events(fp, chunk_size=CHUNK_SIZE, whole=()):
+    """
+    Sinh các sự kiện (prefix, event, value) giống `ijson.parse`.
+
+    prefix là đường dẫn tới giá trị, phần tử mảng được ký hiệu là `item`,
+    ví dụ `testResults.item.assertionResults.item.status`. Giá trị tại các
+    prefix trong `whole` được parse trọn bằng json C và trả về một sự kiện
+    (prefix, 'value', giá trị) thay cho các sự kiện con (nhanh hơn nhiều lần).
+    """
+    scanner = _JsonScanner(fp, chunk_size)
+    tokens = scanner.tokens()
+    prefix = ''
+    stack = []          # [(là map?, prefix của container)]
+    expect_key = False
+    expect_value = True
+    complete = False    # đã đọc xong một giá trị top-level
+
+    while True:
+        if expect_value and prefix in whole and scanner.peek() not in ('', ']'):
+            value = scanner.decode()
+            expect_value = False
+            complete = not stack
+            yield prefix, 'value', value
+            continue
+        kind, value = next(tokens, (None, None))
+        if kind is None:
+            break
+        expect_value = False
+        if kind == 'string' and expect_key:
+            parent = stack[-1][1]
+            yield parent, 'map_key', value
+            prefix = f'{parent}.{value}' if parent else value
+            expect_key = False
+        elif kind == '{':
+            yield prefix, 'start_map', None
+            stack.append((True, prefix))
+            expect_key = True
+        elif kind == '[':
+            yield prefix, 'start_array', None
+            stack.append((False, prefix))
+            prefix = f'{prefix}.item' if prefix else 'item'
+            expect_value = True
+        elif kind == '}' or kind == ']':
+            if not stack:
+                raise ValueError(f'JSON không hợp lệ: thừa {kind!r}')
+            prefix = stack.pop()[1]
+            expect_key = False
+            complete = not stack
+            yield prefix, 'end_map' if kind == '}' else 'end_array', None
+        elif kind == ',':
+            if stack and stack[-1][0]:
+                expect_key = True
+            else:
+                expect_value = True
+        elif kind == ':':
+            expect_value = True
+        else:
+            complete = not stack
+            yield prefix, kind, value
+
+    # Báo cáo đang ghi dở / bị cắt: không được coi như một báo cáo đầy đủ
+    if stack or not complete:
+        raise ValueError('JSON không đầy đủ: file kết thúc khi chưa đóng hết object / mảng')
+
+
+class JestReportReader:
+    """
+    Duyệt các assertion trong báo cáo `jest --json` mà không nạp cả file.
+
+    Các trường top-level được đọc theo sự kiện; mỗi phần tử của `testResults`
+    (một test file) được parse trọn bằng json C rồi bỏ, nên bộ nhớ chỉ phụ thuộc
+    vào suite lớn nhất, không phụ thuộc vào số suite hay kích thước báo cáo.
+    """
+
+    SUITE = 'testResults.item'
+    SUITE_FIELDS = ('status', 'startTime', 'endTime')
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, on_suite=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.on_suite = on_suite  # on_suite(suite, {'status', 'startTime', 'endTime'})
+        self.run_info = {}        # các trường top-level: startTime, numTotalTests...
+
+    def __iter__(self):
+        with open(self.path, encoding='utf-8') as fp:
+            yield from self._parse(fp)
+
+    def _parse(self, fp):
+        for prefix, event, value in iter_json_events(fp, self.chunk_size, whole=(self.SUITE,)):
+            if event == 'value':
+                if prefix == self.SUITE and isinstance(value, dict):
+                    yield from self._suite_results(value)
+            elif '.' not in prefix and event not in ('start_map', 'end_map',
+                                                     'start_array', 'end_array', 'map_key'):
+                self.run_info[prefix] = value
+
+    def _suite_results(self, result):
+        suite = result.get('name')
+        if suite is None:
+            suite = '<unknown>'
+        for test in result.get('assertionResults') or ():
+            full_name = test.get('fullName')
+            if full_name is None:
+                full_name = ' '.join(list(test.get('ancestorTitles') or ()) + [test.get('title', '')])
+            yield AssertionResult(suite, full_name, test.get('status'), test.get('duration'))
+        if self.on_suite is not None:
+            self.on_suite(suite, {field: result[field] for field in self.SUITE_FIELDS if field in result})
+
+
+def suite_display_name(path):
+    """`test/cartController.unit.test.js` -> `Cart Controller`, `bookstore.e2e.test.js` -> `E2E Bookstore`"""
+    name = re.split(r'[\\/]', path)[-1]
+    name = re.sub(r'\.(test|spec)\.[cm]?[jt]sx?$', '', name)
+    base, *tags = name.split('.')
+    words = re.sub(r'(?<=[a-z0-9])(?=[A-Z])', ' ', base).replace('_', ' ').replace('-', ' ').split()
+    title = ' '.join(word[:1].upper() + word[1:] for word in words)
+    if 'e2e' in tags:
+        title = 'E2E ' + title
+    return title
+
+
+class JestRunSummary:
+    """Số liệu tổng hợp của một lần chạy Jest"""
+
+    def __init__(self, keep_durations=True):
+        self.keep_durations = keep_durations
+        self.passed = 0
+        self.failed = 0
+        self.not_run = 0
+        self.start_time = None
+        self.suites = {}            # suite -> [passed, failed, not_run]
+        self.suite_durations = {}   # suite -> ms (endTime - startTime)
+        self.test_durations = {}    # (suite, full_name) -> ms
+
+    @property
+    def total(self):
+        """Số test đã thực thi (passed + failed)"""
+        return self.passed + self.failed
+
+    def add(self, result):
+        counts = self.suites.get(result.suite)
+        if counts is None:
+            counts = self.suites[result.suite] = [0, 0, 0]
+        if result.status in PASSED_STATUSES:
+            self.passed += 1
+            counts[0] += 1
+        elif result.status in FAILED_STATUSES:
+            self.failed += 1
+            counts[1] += 1
+        else:
+            self.not_run += 1
+            counts[2] += 1
+        if self.keep_durations and result.duration is not None:
+            self.test_durations[(result.suite, result.full_name)] = result.duration
+
+    def add_suite(self, suite, info):
+        if info.get('startTime') is not None and info.get('endTime') is not None:
+            self.suite_durations[suite] = info['endTime'] - info['startTime']
+
+    def pass_rate(self):
+        return round(self.passed / self.total * 100, 1) if self.total else 0.0
+
+    def module_pass_rates(self):
+        """Pass rate theo suite (tên hiển thị), sắp xếp giảm dần như biểu đồ gốc"""
+        counts = {}
+        # Nhiều file test có thể cùng tên hiển thị (cartController.part2.unit.test.js...): cộng dồn
+        for suite, (passed, failed, _) in self.suites.items():
+            total = counts.setdefault(suite_display_name(suite), [0, 0])
+            total[0] += passed
+            total[1] += failed
+        rates = {name: round(passed / (passed + failed) * 100, 1)
+                 for name, (passed, failed) in counts.items() if passed + failed}
+        return dict(sorted(rates.items(), key=lambda item: item[1], reverse=True))
+
+
+def summarize_jest_report(path, keep_durations=True, chunk_size=CHUNK_SIZE):
+    """Đọc streaming một báo cáo `jest --json` và trả về JestRunSummary"""
+    summary = JestRunSummary(keep_durations)
+    reader = JestReportReader(path, chunk_size, on_suite=summary.add_suite)
+    for result in reader:
+        summary.add(result)
+    summary.start_time = reader.run_info.get('startTime')
+    return summary
+
+
+def _write_benchmark_report(path, num_suites, tests_per_suite=21):
+    """Ghi một báo cáo Jest giả lập (ghi dần ra đĩa, không dựng cả object)"""
+    with open(path, 'w', encoding='utf-8') as fp:
+        fp.write('{"numTotalTests": %d, "startTime": 1700000000000, "testResults": [' %
+                 (num_suites * tests_per_suite))
+        for s in range(num_suites):
+            if s:
+                fp.write(',')
+            tests = []
+            for t in range(tests_per_suite):
+                status = 'failed' if (s * 7 + t) % 6 == 0 else 'passed'
+                tests.append(json.dumps({
+                    'ancestorTitles': [f'Suite {s}'],
+                    'duration': (s * 31 + t * 17) % 250,
+                    'failureMessages': ['Error: expected 200, received 500\n    at Object.<anonymous>']
+                    if status == 'failed' else [],
+                    'fullName': f'Suite {s} test case {t}',
+                    'status': status,
+                    'title': f'test case {t}',
+                }, ensure_ascii=False))
+            fp.write('{"assertionResults": [%s], "endTime": %d, "message": "", '
+                     '"name": "/app/Backend/test/module%dController.unit.test.js", '
+                     '"startTime": %d, "status": "failed", "summary": ""}'
+                     % (','.join(tests), 1700000001000 + s, s, 1700000000000 + s))
+        fp.write('], "success": false}')
+
+
+def benchmark(scales=(1, 10, 100), base_suites=6):
+    """Đo bộ nhớ giữ lại, bộ nhớ đỉnh và throughput khi báo cáo lớn gấp `scales` lần (so với json.load)"""
+    import tempfile
+    import time
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = os.path.join(tmp, f'report_{scale}x.json')
+            _write_benchmark_report(path, base_suites * scale)
+            size_mb = os.path.getsize(path) / 1e6
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            summary = summarize_jest_report(path, keep_durations=False)
+            elapsed = time.perf_counter() - started
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            started = time.perf_counter()
+            with open(path, encoding='utf-8') as fp:
+                json.load(fp)
+            json_elapsed = time.perf_counter() - started
+
+            # retained = kết quả giữ lại (theo số suite), peak = cả parser lẫn kết quả
+            print(f'   • {scale:>4}x: {size_mb:8.2f} MB, {summary.total + summary.not_run:>7} tests, '
+                  f'retained {retained / 1024:7.1f} KiB, peak {peak / 1024:7.1f} KiB, '
+                  f'{size_mb / elapsed:6.1f} MB/s (json.load {size_mb / json_elapsed:6.1f} MB/s)')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Đọc báo cáo jest --json (streaming)')
+    parser.add_argument('report', nargs='?', help='đường dẫn tới file jest --json')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='đo bộ nhớ đỉnh với báo cáo 1x, 10x và 100x')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark streaming parser (bộ nhớ đỉnh phải gần như không đổi):')
+        benchmark()
+    elif args.report:
+        summary = summarize_jest_report(args.report)
+        print(f'📊 Total: {summary.total}, Passed: {summary.passed}, '
+              f'Failed: {summary.failed}, Not run: {summary.not_run}')
+        print(f'   Pass Rate: {summary.pass_rate()}%')
+        for module, rate in summary.module_pass_rates().items():
+            print(f'   • {module}: {rate}%')
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,565 @@
+"""
+Tạo tải đồng thời cho API tìm kiếm (controllers/searchController.js) và báo cáo
+phân phối độ trễ.
+
+Các request được phát theo tỷ lệ trộn cấu hình được (`--mix`):
+    filter       POST /search/filter      regex title + countDocuments + skip/limit
+    topAuthors   GET  /search/topAuthors  aggregate $group theo tác giả
+    top10        GET  /search/top10       sort theo soldCount
+
+Tải dạng open-loop: request thứ i được lên lịch ở thời điểm start + i / rate bất
+kể các request trước đã xong chưa, và độ trễ được tính từ thời điểm lên lịch
+(không phải lúc thực sự gửi), nên thời gian chờ kết nối khi server chậm cũng
+được tính (tránh coordinated omission). Với `--rate 0`, mỗi kết nối gửi liên tục
+(closed-loop) để đo thông lượng tối đa.
+
+Độ trễ được ghi vào histogram chia bucket theo log (sai số tương đối ~1%), mỗi
+lần ghi chỉ là một phép log và một phép cộng, nên công cụ không làm sai kết quả
+khi tải cao. HTTP/1.1 keep-alive được viết trên asyncio streams, module chỉ
+dùng thư viện chuẩn (biểu đồ mới cần chart_engine).
+
+`--stub` chạy một server giả lập các route trên (độ trễ ngẫu nhiên, không cần
+MongoDB hay mạng) ngay trong process để kiểm tra chính công cụ.
+
+Cách dùng:
+    python load_test.py --url http://localhost:3001 --rate 200 --duration 30 --output latency.png
+    python load_test.py --stub --rate 500 --duration 10 --mix filter=6,topAuthors=2,top10=2
+    python load_test.py --stub --rate 0 --connections 32 --duration 5
+    python load_test.py --serve-stub 3101
+    python load_test.py --benchmark
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_URL = 'http://localhost:3001'
+DEFAULT_RATE = 100
+DEFAULT_DURATION = 10
+DEFAULT_CONNECTIONS = 16
+DEFAULT_MIX = 'filter=6,topAuthors=2,top10=2'
+PERCENTILES = (50, 90, 99, 99.9)
+
+ENDPOINTS = {
+    'filter': ('POST', '/search/filter'),
+    'topAuthors': ('GET', '/search/topAuthors'),
+    'top10': ('GET', '/search/top10'),
+}
+# Từ khóa tìm kiếm lấy từ tên sách trong sampleProduct_*.js (kèm một từ không khớp)
+TITLE_QUERIES = ('tâm', 'Tư Duy', 'IELTS', 'Thép', 'bóng đá', 'Tiếng Việt', 'trò chơi', 'Sao Kim',
+                 'lịch sử', 'GPT', 'Tái bản', 'không tồn tại', '')
+PRODUCT_TYPES = ('', 'V', 'K', 'G', 'T', 'A', 'N', 'C', 'I', 'Y', 'D')
+# Độ trễ trung vị (ms) của từng route trên stub server
+STUB_LATENCY_MS = {'filter': 8.0, 'topAuthors': 20.0, 'top10': 4.0}
+
+
+class LatencyHistogram:
+    """
+    Histogram độ trễ chia bucket theo log: bucket i chứa giá trị trong
+    [growth^i, growth^(i+1)) µs, từ 1 µs tới `max_seconds`. Percentile trả về
+    trung điểm (hình học) của bucket, sai số tương đối ≤ (growth - 1) / 2.
+    """
+
+    def __init__(self, precision=0.02, max_seconds=120.0):
+        self.growth = 1 + precision
+        self._scale = 1 / math.log(self.growth)
+        self.counts = [0] * (int(math.log(max_seconds * 1e6) * self._scale) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = seconds * 1e6
+        index = int(math.log(micros) * self._scale) + 1 if micros >= 1 else 0
+        if index >= len(self.counts):
+            index = len(self.counts) - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, index):
+        """Giá trị đại diện (giây) của bucket"""
+        if index == 0:
+            return 0.5e-6
+        return self.growth ** (index - 0.5) / 1e6
+
+    def percentile(self, pct):
+        """Độ trễ (giây) tại percentile `pct` (0-100); 0 nếu histogram rỗng"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def percentiles(self, points):
+        return {pct: self.percentile(pct) for pct in points}
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {'count': self.count, 'mean_ms': round(self.mean() * 1000, 3),
+                'min_ms': round(self.min * 1000, 3) if self.count else None,
+                'max_ms': round(self.max * 1000, 3),
+                'percentiles_ms': {str(pct): round(value * 1000, 3)
+                                   for pct, value in self.percentiles(PERCENTILES).items()}}
+
+
+def parse_mix(text):
+    """'filter=6,topAuthors=2' -> {'filter': 6.0, 'topAuthors': 2.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f'endpoint không hợp lệ: {name} (có: {", ".join(ENDPOINTS)})')
+        mix[name] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError('tỷ lệ trộn cần ít nhất một endpoint có trọng số > 0')
+    return mix
+
+
+def filter_body(rng, queries=TITLE_QUERIES):
+    """Body ngẫu nhiên cho POST /search/filter (trả về cùng query string phân trang)"""
+    body = {'title': rng.choice(queries), 'type': rng.choice(PRODUCT_TYPES)}
+    if rng.random() < 0.3:
+        low = rng.choice((0, 50000, 100000))
+        body.update(minPrice=low, maxPrice=low + rng.choice((100000, 200000, 500000)))
+    sort = rng.choice(('isSortByPrice', 'isSortByRating', 'isSortByDiscount', None))
+    if sort:
+        body[sort] = rng.choice((1, -1))
+    return body, f'?page={rng.randint(1, 5)}&limit={rng.choice((10, 20))}'
+
+
+class HttpConnection:
+    """Một kết nối HTTP/1.1 keep-alive tối giản (Content-Length hoặc chunked)"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        """Gửi request -> (status, số byte body)"""
+        if self.writer is None:
+            await self.open()
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        head = (f'{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+                f'Connection: keep-alive\r\nContent-Length: {len(payload)}\r\n')
+        if body is not None:
+            head += 'Content-Type: application/json\r\n'
+        self.writer.write(head.encode('latin-1') + b'\r\n' + payload)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('server đóng kết nối')
+        status = int(status_line.split(b' ', 2)[1])
+        length, chunked, keep_alive = None, False, True
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.partition(b':')
+            name = name.strip().lower()
+            if name == b'content-length':
+                length = int(value)
+            elif name == b'transfer-encoding':
+                chunked = b'chunked' in value.lower()
+            elif name == b'connection':
+                keep_alive = value.strip().lower() != b'close'
+
+        size = 0
+        if chunked:
+            while True:
+                chunk = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(chunk + 2)
+                size += chunk
+                if not chunk:
+                    break
+        elif length is not None:
+            size = len(await self.reader.readexactly(length))
+        else:
+            size = len(await self.reader.read())
+            keep_alive = False
+        if not keep_alive:
+            self.close()
+        return status, size
+
+
+class EndpointStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.statuses = {}
+        self.bytes = 0
+
+
+class LoadGenerator:
+    """
+    Phát request theo `mix` tới `url` trong `duration` giây (bỏ `warmup` giây đầu
+    khỏi thống kê). rate > 0: open-loop `rate` request/s qua tối đa `connections`
+    kết nối; rate = 0: closed-loop, mỗi kết nối gửi liên tục.
+    """
+
+    def __init__(self, url=DEFAULT_URL, mix=None, rate=DEFAULT_RATE, duration=DEFAULT_DURATION,
+                 connections=DEFAULT_CONNECTIONS, warmup=0.0, seed=0, queries=TITLE_QUERIES, timeout=10.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.mix = mix or parse_mix(DEFAULT_MIX)
+        self.rate = rate
+        self.duration = duration
+        self.connections = connections
+        self.warmup = warmup
+        self.timeout = timeout
+        self.queries = queries
+        self.rng = random.Random(seed)
+        self.stats = {name: EndpointStats() for name in self.mix}
+        self.elapsed = 0.0
+
+    def _next_request(self):
+        names = list(self.mix)
+        name = self.rng.choices(names, weights=[self.mix[key] for key in names])[0]
+        method, path = ENDPOINTS[name]
+        body = None
+        if name == 'filter':
+            body, query = filter_body(self.rng, self.queries)
+            path += query
+        return name, method, self.prefix + path, body
+
+    async def _send(self, pool, request, scheduled, measure_from):
+        name, method, path, body = request
+        stats = self.stats[name]
+        connection = await pool.get()
+        try:
+            status, size = await asyncio.wait_for(connection.request(method, path, body), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError, asyncio.IncompleteReadError):
+            connection.close()
+            status, size = None, 0
+        finally:
+            pool.put_nowait(connection)
+        latency = time.perf_counter() - scheduled
+        if scheduled < measure_from:
+            return
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        if status is None or status >= 400:
+            stats.errors += 1
+        else:
+            stats.histogram.record(latency)
+            stats.bytes += size
+
+    async def _open_loop(self, pool, started, measure_from):
+        interval = 1 / self.rate
+        deadline = started + self.duration
+        tasks = set()
+        sent = 0
+        while True:
+            now = time.perf_counter()
+            # Phát mọi request đã tới lịch (bù lại khi event loop thức dậy trễ)
+            while sent < self.rate * self.duration and started + sent * interval <= now:
+                task = asyncio.ensure_future(self._send(pool, self._next_request(),
+                                                        started + sent * interval, measure_from))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                sent += 1
+            next_time = started + sent * interval
+            if next_time >= deadline:
+                break
+            await asyncio.sleep(max(next_time - time.perf_counter(), 0))
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def _closed_loop(self, pool, started, measure_from):
+        deadline = started + self.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self._send(pool, self._next_request(), time.perf_counter(), measure_from)
+
+        await asyncio.gather(*(worker() for _ in range(self.connections)))
+
+    async def run(self):
+        pool = asyncio.Queue()
+        for _ in range(self.connections):
+            pool.put_nowait(HttpConnection(self.host, self.port))
+        started = time.perf_counter()
+        measure_from = started + self.warmup
+        try:
+            if self.rate > 0:
+                await self._open_loop(pool, started, measure_from)
+            else:
+                await self._closed_loop(pool, started, measure_from)
+        finally:
+            self.elapsed = time.perf_counter() - measure_from
+            while not pool.empty():
+                pool.get_nowait().close()
+        return self
+
+    def total(self):
+        histogram = LatencyHistogram()
+        for stats in self.stats.values():
+            histogram.merge(stats.histogram)
+        return histogram
+
+    def to_dict(self):
+        elapsed = max(self.elapsed, 1e-9)
+        endpoints = {}
+        for name, stats in self.stats.items():
+            entry = stats.histogram.to_dict()
+            entry.update(errors=stats.errors, throughput=round(stats.histogram.count / elapsed, 2),
+                         statuses={str(key): value for key, value in stats.statuses.items()},
+                         bytes=stats.bytes)
+            endpoints[name] = entry
+        total = self.total()
+        return {'target': f'http://{self.host}:{self.port}{self.prefix}', 'rate': self.rate,
+                'duration': round(elapsed, 3), 'connections': self.connections, 'mix': self.mix,
+                'throughput': round(total.count / elapsed, 2),
+                'errors': sum(stats.errors for stats in self.stats.values()),
+                'total': total.to_dict(), 'endpoints': endpoints}
+
+    def report(self):
+        result = self.to_dict()
+        mode = f"{self.rate:g} req/s" if self.rate > 0 else 'closed-loop'
+        lines = [f"🚦 {result['target']}: {mode}, {self.connections} kết nối, {result['duration']:.1f}s",
+                 f"{'endpoint':12s} {'ok':>8s} {'lỗi':>6s} {'req/s':>8s} "
+                 + ' '.join(f'{"p" + format(pct, "g"):>9s}' for pct in PERCENTILES) + f" {'max':>9s}  (ms)"]
+        rows = list(result['endpoints'].items()) + [('TỔNG', dict(result['total'], errors=result['errors'],
+                                                                 throughput=result['throughput']))]
+        for name, entry in rows:
+            values = ' '.join(f"{entry['percentiles_ms'][str(pct)]:9.2f}" for pct in PERCENTILES)
+            lines.append(f"{name:12s} {entry['count']:8d} {entry['errors']:6d} {entry['throughput']:8.1f} "
+                         f"{values} {entry['max_ms']:9.2f}")
+        return '\n'.join(lines)
+
+    def chart_spec(self, filename='latency_chart.png'):
+        """Spec biểu đồ phổ percentile độ trễ của từng endpoint"""
+        points = [0, 25, 50, 75, 90, 95, 99, 99.5, 99.9, 99.95, 99.99]
+        series = {}
+        for name, stats in self.stats.items():
+            if stats.histogram.count:
+                series[name] = [round(stats.histogram.percentile(pct) * 1000, 3) for pct in points]
+        result = self.to_dict()
+        return {'kind': 'latency_percentiles', 'style': 'dashboard',
+                'data': {'percentiles': points, 'series': series, 'throughput': result['throughput'],
+                         'errors': result['errors'], 'rate': self.rate, 'target': result['target']},
+                'output': {'filename': filename, 'dpi': 300}}
+
+
+class StubServer:
+    """
+    Server HTTP/1.1 giả lập các route của searchController: trả JSON cố định
+    sau một độ trễ ngẫu nhiên (log-normal quanh STUB_LATENCY_MS x `latency_scale`).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_scale=1.0, seed=0):
+        self.host = host
+        self.port = port
+        self.latency_scale = latency_scale
+        self.rng = random.Random(seed)
+        self.server = None
+        self.requests = 0
+        self._handlers = set()
+        products = [{'_id': f'{i:024x}', 'title': f'Sách mẫu {i}', 'author': f'Tác giả {i % 7}',
+                     'price': 50000 + i * 1000, 'soldCount': 1000 - i * 10, 'type': PRODUCT_TYPES[1 + i % 10]}
+                    for i in range(20)]
+        self.responses = {
+            '/search/topAuthors': json.dumps([{'_id': f'Tác giả {i}', 'count': 7 - i,
+                                               'books': [f'Sách mẫu {j}' for j in range(7 - i)]}
+                                              for i in range(5)]).encode('utf-8'),
+            '/search/top10': json.dumps(products[:10]).encode('utf-8'),
+        }
+        self.filter_pages = {limit: json.dumps({'products': products[:limit], 'total': 137}).encode('utf-8')
+                             for limit in (10, 20)}
+
+    def _route(self, method, target):
+        path, _, query = target.partition('?')
+        if method == 'POST' and path == '/search/filter':
+            limit = 20 if 'limit=20' in query else 10
+            return 200, self.filter_pages[limit], 'filter'
+        if method == 'GET' and path in self.responses:
+            return 200, self.responses[path], path.rsplit('/', 1)[-1]
+        return 404, b'{"status":"error","message":"Not found"}', None
+
+    async def _handle(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                status, body, endpoint = self._route(method, target)
+                if endpoint and self.latency_scale > 0:
+                    delay = STUB_LATENCY_MS[endpoint] * self.latency_scale * self.rng.lognormvariate(0, 0.5)
+                    await asyncio.sleep(delay / 1000)
+                self.requests += 1
+                writer.write(f'HTTP/1.1 {status} {"OK" if status == 200 else "Not Found"}\r\n'
+                             f'Content-Type: application/json; charset=utf-8\r\n'
+                             f'Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n'.encode('latin-1')
+                             + body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            # CancelledError: stop() đóng các kết nối keep-alive đang chờ request
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    async def stop(self):
+        self.server.close()
+        handlers = list(self._handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+
+async def run_load(generator, stub=None):
+    """Chạy generator; với `stub` (StubServer) thì bật stub trước và nhắm vào nó"""
+    if stub is not None:
+        await stub.start()
+        generator.host, generator.port, generator.prefix = stub.host, stub.port, ''
+        try:
+            return await generator.run()
+        finally:
+            await stub.stop()
+    return await generator.run()
+
+
+def benchmark(records=1000000, duration=3.0):
+    """Chi phí ghi histogram và thông lượng tối đa của công cụ với stub không độ trễ"""
+    histogram = LatencyHistogram()
+    values = [random.lognormvariate(-5, 1) for _ in range(10000)]
+    started = time.perf_counter()
+    for i in range(records):
+        histogram.record(values[i % 10000])
+    per_record = (time.perf_counter() - started) / records * 1e9
+    exact = sorted(values * (records // 10000))
+    errors = [abs(histogram.percentile(pct) / exact[max(0, math.ceil(len(exact) * pct / 100) - 1)] - 1)
+              for pct in PERCENTILES]
+    print(f'   • LatencyHistogram.record: {per_record:.0f} ns/lần, sai số percentile tối đa {max(errors):.2%}')
+
+    for connections in (1, 16):
+        generator = LoadGenerator(rate=0, duration=duration, connections=connections)
+        asyncio.run(run_load(generator, StubServer(latency_scale=0)))
+        result = generator.to_dict()
+        print(f"   • closed-loop, {connections:>2} kết nối, stub không độ trễ: {result['throughput']:.0f} req/s, "
+              f"p50 {result['total']['percentiles_ms']['50']:.2f} ms")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tạo tải cho API tìm kiếm và báo cáo độ trễ')
+    parser.add_argument('--url', default=DEFAULT_URL, help=f'gốc của API (mặc định {DEFAULT_URL})')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'tỷ lệ trộn endpoint (mặc định {DEFAULT_MIX})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help='số request/s (open-loop); 0 = closed-loop, gửi liên tục')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='thời gian chạy (giây)')
+    parser.add_argument('--warmup', type=float, default=0.0, help='số giây đầu không tính vào thống kê')
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS, help='số kết nối keep-alive')
+    parser.add_argument('--timeout', type=float, default=10.0, help='timeout mỗi request (giây)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', metavar='FILE', help='file từ khóa title cho /filter, mỗi dòng một từ')
+    parser.add_argument('--stub', action='store_true', help='chạy stub server trong process và nhắm vào nó')
+    parser.add_argument('--stub-latency', type=float, default=1.0,
+                        help='hệ số độ trễ của stub (0 = trả lời ngay)')
+    parser.add_argument('--serve-stub', type=int, metavar='PORT', help='chỉ chạy stub server ở cổng PORT')
+    parser.add_argument('--json', metavar='FILE', help='ghi kết quả dạng JSON')
+    parser.add_argument('--output', metavar='PNG', help='vẽ biểu đồ phổ percentile độ trễ')
+    parser.add_argument('--benchmark', action='store_true', help='đo chi phí của chính công cụ')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark công cụ tạo tải:')
+        benchmark()
+        return
+    if args.serve_stub is not None:
+        async def serve():
+            stub = await StubServer(port=args.serve_stub, latency_scale=args.stub_latency).start()
+            print(f'🧪 Stub server: {stub.url} (Ctrl+C để dừng)')
+            await stub.server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as error:
+        parser.error(str(error))
+    queries = TITLE_QUERIES
+    if args.queries:
+        with open(args.queries, encoding='utf-8') as f:
+            queries = tuple(line.strip() for line in f if line.strip()) or TITLE_QUERIES
+    generator = LoadGenerator(args.url, mix, args.rate, args.duration, args.connections, args.warmup,
+                              args.seed, queries, args.timeout)
+    stub = StubServer(latency_scale=args.stub_latency, seed=args.seed) if args.stub else None
+    asyncio.run(run_load(generator, stub))
+    print(generator.report())
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(generator.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f'\n✅ Đã lưu: {args.json}')
+    if args.output:
+        from chart_engine import render
+
+        render(generator.chart_spec(args.output))
+        print(f'✅ Đã lưu: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,596 @@
+"""
+Thống kê bán hàng từ file mongoexport (JSON lines) của collection `orders`.
+
+Mỗi order có dạng như model Order: `products: [{productId, quantity}]`, `total`,
+`discount`, `status`, `createdAt`. File được đọc theo chunk `--chunk-size` order
+(dòng thô, chưa parse) và mỗi chunk được xử lý trong một worker process: parse
+cả chunk bằng một lần `json.loads`, factorize productId / status trong chunk,
+rồi group-by bằng `np.bincount`. Process chính chỉ gộp các tổng nhỏ (theo
+product, status, ngày) vào mảng toàn cục, và chỉ giữ tối đa 2 chunk / worker
+đang xử lý, nên bộ nhớ không phụ thuộc kích thước file.
+
+Kết quả:
+    - số order, dòng sản phẩm, doanh thu và giảm giá theo status (mọi status)
+    - số lượng bán và doanh thu theo product, doanh thu theo ngày (chỉ các order
+      không bị hủy / trả hàng, xem NOT_SOLD_STATUSES)
+    - top N product theo số lượng bán
+
+Doanh thu của order (`total`) được chia cho các dòng sản phẩm theo tỷ lệ
+quantity x giá (giá lấy từ export products nếu có, ngược lại theo quantity).
+
+Với export của collection `products` (`--products`), số lượng bán tính từ order
+được đối chiếu với `soldCount` lưu trên Product (trường mà route /top10 dùng để
+sắp xếp).
+
+Cách dùng:
+    mongoexport --db=webbansach --collection=orders --out=orders.jsonl
+    mongoexport --db=webbansach --collection=products --out=products.jsonl
+    python order_analytics.py orders.jsonl --products products.jsonl [--top 10] [--output top_products.png]
+    python order_analytics.py orders.jsonl --workers 8 --json orders_summary.json
+    python order_analytics.py --benchmark [--orders 4000000]
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import tracing
+from tracing import traced
+
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_TOP = 10
+NOT_SOLD_STATUSES = frozenset(('cancelled', 'canceled', 'cancel', 'returned', 'refunded', 'failed'))
+
+# Giá của product (productId -> giá) trong worker, đặt bởi _init_worker
+_prices = {}
+
+
+def _oid(value):
+    """ObjectId dạng extended JSON (`{"$oid": "..."}`) hoặc chuỗi -> chuỗi"""
+    return value.get('$oid', '') if isinstance(value, dict) else str(value or '')
+
+
+def _number(value):
+    if isinstance(value, dict):
+        for key in ('$numberLong', '$numberInt', '$numberDouble', '$numberDecimal'):
+            if key in value:
+                return float(value[key])
+        return 0.0
+    return float(value or 0)
+
+
+def _numbers(values):
+    """List số (có thể là None hoặc extended JSON) -> mảng float64, None = 0"""
+    try:
+        return np.nan_to_num(np.asarray(values, dtype=np.float64))
+    except (TypeError, ValueError):
+        return np.array([_number(value) for value in values], dtype=np.float64)
+
+
+def _day(value):
+    """createdAt (`{"$date": ...}`, chuỗi ISO hoặc epoch ms) -> 'YYYY-MM-DD' (UTC), None nếu không có"""
+    if isinstance(value, dict):
+        value = value.get('$date', '')
+        if isinstance(value, dict):
+            value = _number(value)
+    if isinstance(value, (int, float)):
+        return str(np.datetime64(int(value), 'ms').astype('datetime64[D]'))
+    return value[:10] if value else None
+
+
+def _init_worker(prices=None, trace=False):
+    global _prices
+    _prices = prices or {}
+    if trace:
+        tracing.enable(worker=True)
+
+
+def _parse_chunk(data):
+    """Bytes nhiều dòng JSON -> list order; dòng lỗi bị bỏ qua (trả về số dòng lỗi)"""
+    lines = [line for line in data.split(b'\n') if line.strip()]
+    try:
+        return json.loads(b'[' + b','.join(lines) + b']'), 0
+    except ValueError:
+        orders = []
+        for line in lines:
+            try:
+                orders.append(json.loads(line))
+            except ValueError:
+                pass
+        return orders, len(lines) - len(orders)
+
+
+def aggregate_chunk(data):
+    """
+    Tổng hợp một chunk order (bytes JSON lines) -> dict các tổng theo product,
+    status và ngày (mã product / status chỉ có nghĩa trong chunk này).
+    """
+    with tracing.span('orders.parse_chunk'):
+        orders, skipped = _parse_chunk(data)
+
+    with tracing.span('orders.factorize'):
+        products, statuses = {}, {}
+        line_product, line_quantity, sizes = [], [], []
+        totals, discounts, order_status, days = [], [], [], []
+        for order in orders:
+            totals.append(order.get('total'))
+            discounts.append(order.get('discount'))
+            status = order.get('status') or 'pending'
+            code = statuses.get(status)
+            if code is None:
+                code = statuses[status] = len(statuses)
+            order_status.append(code)
+            created = order.get('createdAt')
+            if created.__class__ is dict:
+                created = created.get('$date')
+                if created.__class__ is dict:
+                    created = _number(created)
+            days.append(created[:10] if created.__class__ is str else _day(created))
+            items = order.get('products') or ()
+            sizes.append(len(items))
+            for item in items:
+                product = item.get('productId')
+                if product.__class__ is dict:
+                    product = product.get('$oid', '')
+                code = products.get(product)
+                if code is None:
+                    code = products[product] = len(products)
+                line_product.append(code)
+                line_quantity.append(item.get('quantity'))
+
+    with tracing.span('orders.group_by'):
+        # Status khác nhau chỉ ở hoa thường / khoảng trắng được gộp lại
+        names = [str(status).strip().lower() for status in statuses]
+        merged = {}
+        status_codes = np.array([merged.setdefault(name, len(merged)) for name in names], dtype=np.int32)
+        statuses = merged
+        num_orders, num_products, num_statuses = len(orders), len(products), len(statuses)
+        totals = _numbers(totals)
+        order_status = status_codes[np.asarray(order_status, dtype=np.int32)] if num_orders else \
+            np.zeros(0, dtype=np.int32)
+        line_product = np.asarray(line_product, dtype=np.int32)
+        line_order = np.repeat(np.arange(num_orders, dtype=np.int32), sizes)
+        line_quantity = _numbers(line_quantity)
+        # Order không có createdAt (NaT) không thuộc ngày nào, chỉ được đếm riêng
+        days = np.asarray(days, dtype='datetime64[D]').reshape(-1)
+        dated = ~np.isnat(days)
+        day_codes, day_index = np.unique(days[dated], return_inverse=True)
+
+        sold_status = np.array([name not in NOT_SOLD_STATUSES for name in statuses], dtype=bool)
+        sold_order = sold_status[order_status] if num_orders else np.zeros(0, dtype=bool)
+        sold_line = sold_order[line_order]
+        sold_dated = sold_order[dated]
+
+        # Chia total của order cho các dòng theo quantity x giá
+        price = np.array([_prices.get(product, 1.0) for product in products], dtype=np.float64)
+        weight = line_quantity * price[line_product] if len(line_product) else line_quantity
+        order_weight = np.bincount(line_order, weights=weight, minlength=num_orders)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            line_revenue = np.where(order_weight[line_order] > 0,
+                                    weight / order_weight[line_order] * totals[line_order], 0.0)
+
+        order_units = np.bincount(line_order, weights=line_quantity, minlength=num_orders)
+        return {
+            'orders': num_orders, 'lines': len(line_product), 'skipped': skipped,
+            'products': list(products),
+            'units': np.bincount(line_product[sold_line], weights=line_quantity[sold_line],
+                                 minlength=num_products),
+            'revenue': np.bincount(line_product[sold_line], weights=line_revenue[sold_line],
+                                   minlength=num_products),
+            'statuses': list(statuses),
+            'status_orders': np.bincount(order_status, minlength=num_statuses),
+            'status_revenue': np.bincount(order_status, weights=totals, minlength=num_statuses),
+            'status_discount': np.bincount(order_status, weights=_numbers(discounts), minlength=num_statuses),
+            'status_units': np.bincount(order_status, weights=order_units, minlength=num_statuses),
+            'days': day_codes.astype(np.int64),
+            'day_revenue': np.bincount(day_index[sold_dated], weights=totals[dated][sold_dated],
+                                       minlength=len(day_codes)),
+            'day_orders': np.bincount(day_index[sold_dated], minlength=len(day_codes)),
+            'undated': int(np.count_nonzero(~dated)),
+            'undated_revenue': float(totals[~dated & sold_order].sum()),
+        }
+
+
+def _run_chunk(data):
+    """Job của worker: tổng hợp chunk, kèm span tracing cần gửi về process chính"""
+    with tracing.span('orders.chunk', bytes=len(data)):
+        part = aggregate_chunk(data)
+    part['trace'] = tracing.worker_events()
+    return part
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Đọc file theo chunk `chunk_size` dòng, trả về bytes thô (chưa parse)"""
+    with open(path, 'rb') as f:
+        lines = []
+        for line in f:
+            lines.append(line)
+            if len(lines) >= chunk_size:
+                yield b''.join(lines)
+                lines = []
+        if lines:
+            yield b''.join(lines)
+
+
+def load_catalog(path):
+    """Export products -> dict productId -> (title, giá, soldCount hoặc None)"""
+    catalog = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip().rstrip(',')
+            if not line or line in '[]':
+                continue
+            product = json.loads(line)
+            sold = product.get('soldCount')
+            catalog[_oid(product.get('_id'))] = (product.get('title') or '', _number(product.get('price')),
+                                                 None if sold is None else _number(sold))
+    return catalog
+
+
+
+
+class OrderAggregate:
+    """Tổng hợp toàn cục, gộp dần từ kết quả của từng chunk"""
+
+    def __init__(self):
+        self.orders = self.lines = self.skipped = 0
+        self.undated = 0            # order không có createdAt, không nằm trong tổng theo ngày
+        self.undated_revenue = 0.0
+        self._product_index = {}    # productId -> mã toàn cục
+        self.units = np.zeros(0)
+        self.revenue = np.zeros(0)
+        self.by_status = {}         # status -> [orders, revenue, discount, units]
+        self._days = {}             # ngày (tính từ 1970-01-01) -> [revenue, orders]
+
+    @property
+    def product_ids(self):
+        return list(self._product_index)
+
+    @property
+    def num_products(self):
+        return len(self._product_index)
+
+    def merge(self, part):
+        tracing.add_events(part.get('trace'))
+        self.orders += part['orders']
+        self.lines += part['lines']
+        self.skipped += part['skipped']
+        self.undated += part['undated']
+        self.undated_revenue += part['undated_revenue']
+
+        index = self._product_index
+        codes = np.fromiter((index.setdefault(product, len(index)) for product in part['products']),
+                            dtype=np.int64, count=len(part['products']))
+        if len(index) > len(self.units):
+            grow = max(len(index), 2 * len(self.units)) - len(self.units)
+            self.units = np.concatenate([self.units, np.zeros(grow)])
+            self.revenue = np.concatenate([self.revenue, np.zeros(grow)])
+        # Mã product trong một chunk là duy nhất nên cộng trực tiếp theo index
+        self.units[codes] += part['units']
+        self.revenue[codes] += part['revenue']
+
+        for i, status in enumerate(part['statuses']):
+            entry = self.by_status.setdefault(status, [0, 0.0, 0.0, 0.0])
+            entry[0] += int(part['status_orders'][i])
+            entry[1] += float(part['status_revenue'][i])
+            entry[2] += float(part['status_discount'][i])
+            entry[3] += float(part['status_units'][i])
+        for day, revenue, orders in zip(part['days'].tolist(), part['day_revenue'].tolist(),
+                                        part['day_orders'].tolist()):
+            entry = self._days.setdefault(day, [0.0, 0])
+            entry[0] += revenue
+            entry[1] += orders
+
+    def by_day(self):
+        """(ngày datetime64[D], doanh thu, số order) sắp theo ngày"""
+        days = np.array(sorted(self._days), dtype=np.int64)
+        revenue = np.array([self._days[day][0] for day in days.tolist()])
+        orders = np.array([self._days[day][1] for day in days.tolist()], dtype=np.int64)
+        return days.astype('datetime64[D]'), revenue, orders
+
+    def top_products(self, n=DEFAULT_TOP, by='units'):
+        """Mã toàn cục của `n` product bán nhiều nhất (theo số lượng hoặc doanh thu)"""
+        values = (self.units if by == 'units' else self.revenue)[:self.num_products]
+        if n < len(values):
+            top = np.argpartition(-values, n)[:n]
+        else:
+            top = np.arange(len(values))
+        return top[np.argsort(-values[top], kind='stable')]
+
+    def revenue_series(self):
+        """Doanh thu theo ngày dạng RevenueSeries (ngày trước order đầu / sau order cuối là NaN)"""
+        from revenue_analytics import RevenueSeries
+
+        days, revenue, _ = self.by_day()
+        if not len(days):
+            return RevenueSeries.from_years({})
+        first_year = int(str(days[0])[:4])
+        last_year = int(str(days[-1])[:4])
+        start = np.datetime64(f'{first_year}-01-01')
+        full = np.full(int((np.datetime64(f'{last_year + 1}-01-01') - start).astype(int)), np.nan)
+        offsets = (days - start).astype(np.int64)
+        full[offsets[0]:offsets[-1] + 1] = 0.0
+        full[offsets] = revenue
+        daily = {}
+        for year in range(first_year, last_year + 1):
+            begin = int((np.datetime64(f'{year}-01-01') - start).astype(int))
+            end = int((np.datetime64(f'{year + 1}-01-01') - start).astype(int))
+            daily[year] = full[begin:end]
+        return RevenueSeries.from_years({}, daily)
+
+    @traced('orders.cross_check')
+    def cross_check(self, catalog, tolerance=0, top=DEFAULT_TOP):
+        """
+        Đối chiếu số lượng bán tính từ order với soldCount của Product.
+        Trả về dict: số product đã kiểm tra / khớp, danh sách lệch (lệch nhiều nhất
+        trước), productId có trong order nhưng không có trong catalog, và số product
+        chung giữa top theo soldCount (route /top10) và top theo order.
+        """
+        ids = [product for product, (_, _, sold) in catalog.items() if sold is not None]
+        stored = np.array([catalog[product][2] for product in ids], dtype=np.float64)
+        codes = np.fromiter((self._product_index.get(product, -1) for product in ids),
+                            dtype=np.int64, count=len(ids))
+        computed = np.where(codes >= 0, self.units[np.maximum(codes, 0)] if len(self.units) else 0.0, 0.0)
+        diff = computed - stored
+        wrong = np.flatnonzero(np.abs(diff) > tolerance)
+        wrong = wrong[np.argsort(-np.abs(diff[wrong]), kind='stable')]
+
+        by_stored = {ids[i] for i in np.argsort(-stored, kind='stable')[:top].tolist()}
+        product_ids = self.product_ids
+        by_orders = {product_ids[code] for code in self.top_products(top).tolist()}
+        return {
+            'checked': len(ids),
+            'matched': len(ids) - len(wrong),
+            'mismatched': [{'productId': ids[i], 'title': catalog[ids[i]][0], 'soldCount': stored[i],
+                            'computed': computed[i], 'diff': diff[i]} for i in wrong.tolist()],
+            'unknown_products': [product for product in product_ids if product not in catalog],
+            'top_overlap': len(by_stored & by_orders),
+            'top': min(top, len(ids)),
+        }
+
+    def to_dict(self, catalog=None, top=DEFAULT_TOP):
+        catalog = catalog or {}
+        product_ids = self.product_ids
+        days, revenue, orders = self.by_day()
+        return {
+            'orders': self.orders, 'lines': self.lines, 'skipped': self.skipped,
+            'products': self.num_products, 'undated': self.undated, 'undated_revenue': self.undated_revenue,
+            'by_status': {status: {'orders': entry[0], 'revenue': entry[1], 'discount': entry[2],
+                                   'units': entry[3]} for status, entry in self.by_status.items()},
+            'by_day': {'days': [str(day) for day in days], 'revenue': revenue.tolist(),
+                       'orders': orders.tolist()},
+            'top_products': [{'productId': product_ids[code],
+                              'title': catalog.get(product_ids[code], ('',))[0],
+                              'units': float(self.units[code]), 'revenue': float(self.revenue[code])}
+                             for code in self.top_products(top).tolist()],
+        }
+
+    def report(self, catalog=None, top=DEFAULT_TOP):
+        catalog = catalog or {}
+        lines = [f'🛒 {self.orders} order, {self.lines} dòng sản phẩm, {self.num_products} product'
+                 + (f' ({self.skipped} dòng lỗi bị bỏ qua)' if self.skipped else '')]
+        lines.append('\n📦 THEO STATUS:')
+        for status, (orders, revenue, discount, units) in sorted(self.by_status.items(),
+                                                                 key=lambda item: -item[1][1]):
+            lines.append(f'   • {status:12s} {orders:>9d} order  {units:>10,.0f} sp  '
+                         f'{revenue:>16,.0f}₫  (giảm giá {discount:,.0f}₫)')
+        days, revenue, _ = self.by_day()
+        if len(days):
+            lines.append(f'\n📅 {len(days)} ngày có order ({days[0]} → {days[-1]}), '
+                         f'doanh thu {revenue.sum():,.0f}₫, ngày cao nhất {days[revenue.argmax()]}: '
+                         f'{revenue.max():,.0f}₫')
+        if self.undated:
+            lines.append(f'   ⚠️ {self.undated} order không có createdAt (doanh thu {self.undated_revenue:,.0f}₫), '
+                         f'không tính vào doanh thu theo ngày')
+        product_ids = self.product_ids
+        lines.append(f'\n🏆 TOP {top} PRODUCT BÁN CHẠY:')
+        for rank, code in enumerate(self.top_products(top).tolist(), 1):
+            title = catalog.get(product_ids[code], (product_ids[code],))[0] or product_ids[code]
+            lines.append(f'   {rank:2d}. {title[:50]:50s} {self.units[code]:>10,.0f} sp  '
+                         f'{self.revenue[code]:>16,.0f}₫')
+        return '\n'.join(lines)
+
+    def chart_spec(self, filename='top_products_chart.png', catalog=None, top=DEFAULT_TOP):
+        """Spec biểu đồ top product theo số lượng bán, kèm soldCount đang lưu nếu có"""
+        catalog = catalog or {}
+        product_ids = self.product_ids
+        codes = self.top_products(top).tolist()
+        sold = [catalog.get(product_ids[code], (None, None, None))[2] for code in codes]
+        return {'kind': 'top_products', 'style': 'dashboard',
+                'data': {'products': [catalog.get(product_ids[code], ('',))[0] or product_ids[code]
+                                      for code in codes],
+                         'units': [float(self.units[code]) for code in codes],
+                         'sold_count': sold if any(value is not None for value in sold) else [],
+                         'orders': self.orders},
+                'output': {'filename': filename, 'dpi': 300}}
+
+
+@traced('orders.aggregate')
+def aggregate_orders(path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, prices=None):
+    """
+    Tổng hợp file export order. workers=None dùng số core của máy; workers=1 xử lý
+    tuần tự trong process hiện tại. Tối đa 2 chunk / worker được đọc trước.
+    """
+    workers = workers or os.cpu_count() or 1
+    aggregate = OrderAggregate()
+    if workers == 1:
+        _init_worker(prices)
+        for data in iter_chunks(path, chunk_size):
+            aggregate.merge(_run_chunk(data))
+        return aggregate
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(prices, tracing.enabled())) as pool:
+        pending = deque()
+        for data in iter_chunks(path, chunk_size):
+            pending.append(pool.submit(_run_chunk, data))
+            if len(pending) >= 2 * workers:
+                aggregate.merge(pending.popleft().result())
+        while pending:
+            aggregate.merge(pending.popleft().result())
+    return aggregate
+
+
+def _write_benchmark_export(path, num_orders, num_products=5000, seed=0):
+    """Export order giả lập (1-5 dòng sản phẩm / order) và export products tương ứng"""
+    rng = np.random.default_rng(seed)
+    ids = [f'{i:024x}' for i in range(1, num_products + 1)]
+    prices = rng.integers(50, 500, num_products) * 1000
+    popularity = rng.permutation(1 / np.arange(1, num_products + 1) ** 0.8)
+    popularity /= popularity.sum()
+    statuses = ('delivered', 'pending', 'shipping', 'cancelled')
+    status_weights = (0.7, 0.1, 0.15, 0.05)
+    sold = np.zeros(num_products, dtype=np.int64)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for start in range(0, num_orders, 20000):
+            count = min(20000, num_orders - start)
+            sizes = rng.integers(1, 6, count)
+            products = rng.choice(num_products, sizes.sum(), p=popularity)
+            quantities = rng.integers(1, 4, sizes.sum())
+            status = rng.choice(len(statuses), count, p=status_weights)
+            created = (np.datetime64('2023-01-01T00:00:00') +
+                       rng.integers(0, 3 * 365 * 86400, count).astype('timedelta64[s]'))
+            bounds = np.concatenate([[0], np.cumsum(sizes)])
+            totals = np.add.reduceat(quantities * prices[products], bounds[:-1])
+            kept = np.repeat(status != statuses.index('cancelled'), sizes)
+            np.add.at(sold, products[kept], quantities[kept])
+            products, quantities = products.tolist(), quantities.tolist()
+            out = []
+            for i in range(count):
+                items = ','.join(f'{{"productId":{{"$oid":"{ids[products[j]]}"}},"quantity":{quantities[j]}}}'
+                                 for j in range(bounds[i], bounds[i + 1]))
+                out.append(f'{{"_id":{{"$oid":"{start + i:024x}"}},"products":[{items}],'
+                           f'"status":"{statuses[status[i]]}","total":{totals[i]},"discount":0,'
+                           f'"createdAt":{{"$date":"{created[i]}.000Z"}}}}\n')
+            f.write(''.join(out))
+    catalog_path = os.path.splitext(path)[0] + '_products.jsonl'
+    with open(catalog_path, 'w', encoding='utf-8') as f:
+        for i, product in enumerate(ids):
+            # 1% product có soldCount lệch để kiểm tra phần đối chiếu
+            stored = int(sold[i]) + (7 if i % 100 == 0 else 0)
+            f.write(json.dumps({'_id': {'$oid': product}, 'title': f'Book {i}',
+                                'price': int(prices[i]), 'soldCount': stored}) + '\n')
+    return catalog_path
+
+
+def _peak_rss_mib():
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark(num_orders=1000000, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Thông lượng tổng hợp với 1 worker và `workers` worker. Chạy file nhỏ (1/4)
+    trước: RSS đỉnh của process chính không tăng theo kích thước file.
+    """
+    import tempfile
+    import time
+
+    cpu = os.cpu_count() or 1
+    worker_counts = sorted({1, workers or cpu})
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {}
+        for size in (num_orders // 4, num_orders):
+            path = os.path.join(tmp, f'orders_{size}.jsonl')
+            started = time.perf_counter()
+            files[size] = (path, load_catalog(_write_benchmark_export(path, size)))
+            print(f'   • Tạo {size} order ({os.path.getsize(path) / 2 ** 20:.0f} MiB): '
+                  f'{time.perf_counter() - started:.1f}s')
+        print(f'   • RSS đỉnh trước khi tổng hợp: {_peak_rss_mib():.0f} MiB')
+
+        for size, (path, catalog) in files.items():
+            size_mib = os.path.getsize(path) / 2 ** 20
+            prices = {product: price for product, (_, price, _) in catalog.items()}
+            for count in worker_counts:
+                started = time.perf_counter()
+                aggregate = aggregate_orders(path, count, chunk_size, prices)
+                elapsed = time.perf_counter() - started
+                print(f'   • {size} order, {count} worker(s): {elapsed:6.2f}s, '
+                      f'{aggregate.orders / elapsed / 1000:4.0f}k order/s, '
+                      f'{aggregate.lines / elapsed / 1e6:4.2f}M dòng/s, {size_mib / elapsed:5.1f} MiB/s, '
+                      f'RSS đỉnh {_peak_rss_mib():.0f} MiB')
+            check = aggregate.cross_check(catalog)
+            print(f"     soldCount: {check['matched']}/{check['checked']} khớp, "
+                  f"{len(check['mismatched'])} lệch")
+    if cpu == 1:
+        print('   ⚠️ Máy chỉ có 1 core: không đo được tăng tốc của worker pool')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Thống kê bán hàng từ mongoexport collection orders')
+    parser.add_argument('orders', nargs='?', help='file JSON lines của mongoexport orders')
+    parser.add_argument('--products', metavar='EXPORT',
+                        help='export products: giá để chia doanh thu và soldCount để đối chiếu')
+    parser.add_argument('--workers', type=int, default=None, help='số worker process (mặc định: số core)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='số order mỗi chunk')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='số product trong top')
+    parser.add_argument('--tolerance', type=float, default=0,
+                        help='độ lệch soldCount được chấp nhận khi đối chiếu')
+    parser.add_argument('--limit', type=int, default=20, help='số product lệch tối đa được in')
+    parser.add_argument('--json', metavar='FILE', help='ghi kết quả tổng hợp dạng JSON')
+    parser.add_argument('--output', metavar='PNG', help='vẽ biểu đồ top product')
+    parser.add_argument('--revenue-output', metavar='PNG', help='vẽ biểu đồ doanh thu theo tháng')
+    parser.add_argument('--fail-on-mismatch', action='store_true',
+                        help='thoát mã 1 nếu soldCount lệch với số lượng bán từ order')
+    parser.add_argument('--trace', metavar='FILE', help='ghi Chrome trace JSON (+ profile phẳng)')
+    parser.add_argument('--benchmark', action='store_true', help='đo thông lượng với export giả lập')
+    parser.add_argument('--orders', dest='bench_orders', type=int, default=1000000,
+                        help='số order của benchmark')
+    args = parser.parse_args(argv)
+
+    tracing.configure(args.trace)
+    if args.benchmark:
+        print('⏱️ Benchmark thống kê order:')
+        benchmark(args.bench_orders, args.workers, args.chunk_size)
+        return
+    if not args.orders:
+        parser.error('cần file export order hoặc --benchmark')
+
+    catalog = load_catalog(args.products) if args.products else {}
+    prices = {product: price for product, (_, price, _) in catalog.items() if price > 0}
+    aggregate = aggregate_orders(args.orders, args.workers, args.chunk_size, prices)
+    print(aggregate.report(catalog, args.top))
+
+    mismatched = False
+    if catalog:
+        check = aggregate.cross_check(catalog, args.tolerance, args.top)
+        mismatched = bool(check['mismatched'])
+        print(f"\n🔍 ĐỐI CHIẾU soldCount: {check['matched']}/{check['checked']} product khớp, "
+              f"top {check['top']} theo soldCount trùng {check['top_overlap']}/{check['top']} "
+              f"với top theo order")
+        for entry in check['mismatched'][:args.limit]:
+            print(f"   • {entry['title'][:50] or entry['productId']}: soldCount {entry['soldCount']:,.0f}, "
+                  f"từ order {entry['computed']:,.0f} ({entry['diff']:+,.0f})")
+        if len(check['mismatched']) > args.limit:
+            print(f"   … và {len(check['mismatched']) - args.limit} product khác")
+        if check['unknown_products']:
+            print(f"   ⚠️ {len(check['unknown_products'])} productId trong order không có trong export products")
+    if args.json:
+        result = aggregate.to_dict(catalog, args.top)
+        if catalog:
+            result['cross_check'] = check
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'\n✅ Đã lưu: {args.json}')
+    if args.output or args.revenue_output:
+        from chart_engine import render
+
+        if args.output:
+            render(aggregate.chart_spec(args.output, catalog, args.top))
+            print(f'✅ Đã lưu: {args.output}')
+        if args.revenue_output:
+            render(aggregate.revenue_series().chart_spec(args.revenue_output))
+            print(f'✅ Đã lưu: {args.revenue_output}')
+    if args.fail_on_mismatch and mismatched:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
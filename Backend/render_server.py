@@ -0,0 +1,433 @@
+"""
+Render daemon: giữ sẵn chart engine (matplotlib, font cache, TestAnalyticsCharts)
+trong một process chạy lâu để các job báo cáo nhỏ không phải trả chi phí import
+và khởi động mỗi lần vẽ một biểu đồ.
+
+Giao thức HTTP/1.1 (keep-alive) qua localhost hoặc Unix socket:
+    POST /render   body = spec của chart_engine ({'kind', 'style', 'data', 'style_overrides'}) kèm
+                   'format': 'png' | 'svg' và 'dpi' -> trả về bytes ảnh
+    GET  /stats    số request, cache hit/miss, dung lượng cache (JSON)
+    GET  /health   'ok'
+
+Kết quả render được giữ trong LRU trong bộ nhớ theo khóa spec_key (dữ liệu +
+style đã resolve + định dạng + mã engine), giới hạn theo dung lượng.
+
+Module này chỉ import thư viện chuẩn ở mức module, nên client (RenderClient,
+--render) khởi động nhanh; chart engine chỉ được import trong process server.
+
+Cách dùng:
+    python render_server.py --serve --socket /tmp/charts.sock [--cache-mib 256]
+    python render_server.py --serve --port 8765
+    python render_server.py --render spec.json --socket /tmp/charts.sock   # ghi spec['output']['filename']
+    python render_server.py --benchmark
+"""
+
+import http.client
+import json
+import os
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MIB = 256
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+DEFAULT_FORMAT = 'png'
+DEFAULT_DPI = 300
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class RenderError(ValueError):
+    """Spec không hợp lệ (thiếu kind, kind/format không hỗ trợ...)"""
+
+
+class LRUBytes:
+    """LRU trong bộ nhớ: khóa -> bytes, giới hạn tổng dung lượng"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            self.size -= len(self.entries.popitem(last=False)[1])
+
+
+class ChartRenderer:
+    """Chart engine đã nạp sẵn + LRU kết quả; render tuần tự (matplotlib không thread-safe)"""
+
+    def __init__(self, cache_bytes=DEFAULT_CACHE_MIB * 2 ** 20, warm=True):
+        import io
+
+        import matplotlib
+        matplotlib.use('Agg')
+
+        import chart_engine
+        import test_analytics_dashboard  # noqa: F401 - nạp sẵn toàn bộ stack của TestAnalyticsCharts
+
+        self._io = io
+        self.engine = chart_engine
+        self.cache = LRUBytes(cache_bytes)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.render_seconds = 0.0
+        self.started = time.time()
+        if warm:
+            self.warm_up()
+
+    def warm_up(self):
+        """Vẽ thử mỗi loại biểu đồ đơn giản một lần: nạp font cache, glyph, canvas"""
+        for spec in ({'kind': 'pie_summary', 'data': {'passed': 9, 'failed': 1}},
+                     {'kind': 'module_pass_rate', 'data': {'modules': {'Cart': 90.0}, 'overall': 90.0}}):
+            for fmt in CONTENT_TYPES:
+                self._draw(dict(spec, style='dashboard'), fmt, 50)
+
+    def _draw(self, spec, fmt, dpi):
+        fig, style = self.engine.ENGINE.draw(spec)
+        fig.tight_layout()
+        buffer = self._io.BytesIO()
+        fig.savefig(buffer, format=fmt, **self.engine.save_options(style, dpi))
+        return buffer.getvalue()
+
+    def render(self, request):
+        """request: spec + 'format' + 'dpi' -> (bytes, content type, cache hit?)"""
+        fmt = request.get('format', DEFAULT_FORMAT)
+        if fmt not in CONTENT_TYPES:
+            raise RenderError(f'định dạng không hỗ trợ: {fmt}')
+        kind = request.get('kind')
+        if kind not in self.engine.DRAWERS:
+            raise RenderError(f'loại biểu đồ không hỗ trợ: {kind}')
+        dpi = request.get('dpi', DEFAULT_DPI)
+        spec = {'kind': kind, 'style': request.get('style', 'dashboard'), 'data': request.get('data', {}),
+                'output': {'filename': f'chart.{fmt}', 'dpi': dpi}}
+        if request.get('style_overrides'):
+            # Nằm trong spec nên cũng nằm trong spec_key: spec có override không trùng cache với spec không có
+            spec['style_overrides'] = request['style_overrides']
+        with self.lock:
+            self.requests += 1
+            key = self.engine.spec_key(spec)
+            body = self.cache.get(key)
+            if body is not None:
+                return body, CONTENT_TYPES[fmt], True
+            started = time.perf_counter()
+            body = self._draw(spec, fmt, dpi)
+            self.render_seconds += time.perf_counter() - started
+            self.cache.put(key, body)
+        return body, CONTENT_TYPES[fmt], False
+
+    def stats(self):
+        cache = self.cache
+        return {'requests': self.requests, 'hits': cache.hits, 'misses': cache.misses,
+                'cached': len(cache.entries), 'cache_bytes': cache.size, 'max_bytes': cache.max_bytes,
+                'render_seconds': round(self.render_seconds, 3), 'uptime': round(time.time() - self.started, 1)}
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ChartRender/1.0'
+
+    def _send(self, status, body, content_type='application/json', headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, b'ok', 'text/plain')
+        elif self.path == '/stats':
+            self._send_json(200, self.server.renderer.stats())
+        else:
+            self._send_json(404, {'error': f'không có {self.path}'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = self.rfile.read(length)
+        if self.path != '/render':
+            self._send_json(404, {'error': f'không có {self.path}'})
+            return
+        started = time.perf_counter()
+        try:
+            body, content_type, hit = self.server.renderer.render(json.loads(payload))
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send_json(400, {'error': f'{type(exc).__name__}: {exc}'})
+            return
+        self._send(200, body, content_type,
+                   (('X-Render-Cache', 'hit' if hit else 'miss'),
+                    ('X-Render-Ms', f'{(time.perf_counter() - started) * 1000:.2f}')))
+
+    def address_string(self):
+        # Unix socket không có địa chỉ (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(renderer, port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """HTTP server trên localhost:port, hoặc trên Unix socket nếu có socket_path"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, RenderHandler)
+    else:
+        server = ThreadingHTTPServer(('127.0.0.1', port), RenderHandler)
+        server.daemon_threads = True
+    server.renderer = renderer
+    server.verbose = verbose
+    return server
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=60):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RenderClient:
+    """Client giữ một kết nối keep-alive tới render daemon"""
+
+    def __init__(self, port=DEFAULT_PORT, socket_path=None, timeout=60):
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.connection = None
+        self.last_cache = None
+
+    def _connect(self):
+        if self.socket_path:
+            return UnixHTTPConnection(self.socket_path, self.timeout)
+        return http.client.HTTPConnection('127.0.0.1', self.port, timeout=self.timeout)
+
+    def _request(self, method, path, body=None):
+        for attempt in (0, 1):
+            if self.connection is None:
+                self.connection = self._connect()
+            try:
+                headers = {'Content-Type': 'application/json'} if body is not None else {}
+                self.connection.request(method, path, body, headers)
+                response = self.connection.getresponse()
+                return response, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                # Server đóng kết nối keep-alive cũ: mở lại một lần
+                self.close()
+                if attempt:
+                    raise
+
+    def render(self, spec, fmt=None, dpi=None):
+        """Spec chart_engine -> bytes ảnh; định dạng / dpi lấy từ spec['output'] nếu không truyền"""
+        output = spec.get('output', {})
+        fmt = fmt or os.path.splitext(output.get('filename', ''))[1].lstrip('.') or DEFAULT_FORMAT
+        request = {'kind': spec['kind'], 'style': spec.get('style', 'dashboard'), 'data': spec['data'],
+                   'format': fmt, 'dpi': dpi or output.get('dpi', DEFAULT_DPI)}
+        if spec.get('style_overrides'):
+            request['style_overrides'] = spec['style_overrides']
+        response, body = self._request('POST', '/render',
+                                       json.dumps(request, ensure_ascii=False, default=str).encode('utf-8'))
+        if response.status != 200:
+            raise RenderError(json.loads(body).get('error', response.reason))
+        self.last_cache = response.getheader('X-Render-Cache')
+        return body
+
+    def save(self, spec):
+        """Render spec qua daemon và ghi ra spec['output']['filename']"""
+        filename = spec['output']['filename']
+        body = self.render(spec)
+        with open(filename, 'wb') as f:
+            f.write(body)
+        return filename
+
+    def stats(self):
+        return json.loads(self._request('GET', '/stats')[1])
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self._request('GET', '/health')[0].status == 200:
+                    return True
+            except OSError:
+                self.close()
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(0.05)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+# Chạy lạnh: process mới import chart engine rồi vẽ một spec (như một script báo cáo)
+COLD_SCRIPT = '''
+import json, sys
+import matplotlib
+matplotlib.use("Agg")
+from chart_engine import render
+with open(sys.argv[1], encoding="utf-8") as f:
+    render(json.load(f))
+'''
+
+
+def _bench_spec(i, filename, dpi):
+    points = 30
+    return {'kind': 'pass_rate_trend', 'style': 'dashboard',
+            'data': {'timestamps': [1700000000000 + d * 86400000 for d in range(points)],
+                     'pass_rates': [80 + (d * 7 + i) % 17 for d in range(points)],
+                     'title': f'Pass Rate Trend #{i}'},
+            'output': {'filename': filename, 'dpi': dpi}}
+
+
+def _ms(values):
+    return statistics.median(values) * 1000
+
+
+def benchmark(cold_runs=5, requests=50, dpi=100):
+    """
+    So sánh một lần vẽ bằng script mới (import + vẽ) với gọi render daemon:
+    trong process (kết nối keep-alive), process client mới (--render), cache hit.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spec_path = os.path.join(tmp, 'spec.json')
+        with open(spec_path, 'w', encoding='utf-8') as f:
+            json.dump(_bench_spec(0, os.path.join(tmp, 'cold.png'), dpi), f)
+
+        cold = []
+        for _ in range(cold_runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', COLD_SCRIPT, spec_path], cwd=HERE, check=True)
+            cold.append(time.perf_counter() - started)
+        print(f'   • script lạnh (import + vẽ):       {_ms(cold):8.1f} ms')
+
+        socket_path = os.path.join(tmp, 'render.sock')
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, os.path.join(HERE, 'render_server.py'), '--serve',
+                                   '--socket', socket_path], cwd=HERE, stdout=subprocess.DEVNULL)
+        client = RenderClient(socket_path=socket_path)
+        try:
+            if not client.wait_ready():
+                raise RuntimeError('render daemon không khởi động được')
+            print(f'   • khởi động daemon (một lần):      {(time.perf_counter() - started) * 1000:8.1f} ms')
+
+            misses, hits, processes = [], [], []
+            for i in range(1, requests + 1):
+                begin = time.perf_counter()
+                client.render(_bench_spec(i, 'chart.png', dpi))
+                misses.append(time.perf_counter() - begin)
+            for _ in range(requests):
+                begin = time.perf_counter()
+                client.render(_bench_spec(1, 'chart.png', dpi))
+                hits.append(time.perf_counter() - begin)
+            for i in range(cold_runs):
+                begin = time.perf_counter()
+                subprocess.run([sys.executable, os.path.join(HERE, 'render_server.py'), '--render', spec_path,
+                                '--socket', socket_path], cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+                processes.append(time.perf_counter() - begin)
+            stats = client.stats()
+        finally:
+            client.close()
+            server.terminate()
+            server.wait()
+
+    results = {'dpi': dpi, 'cold_ms': _ms(cold), 'daemon_miss_ms': _ms(misses), 'daemon_hit_ms': _ms(hits),
+               'client_process_ms': _ms(processes), 'stats': stats}
+    print(f'   • daemon, spec mới (vẽ thật):      {results["daemon_miss_ms"]:8.1f} ms '
+          f'(x{results["cold_ms"] / results["daemon_miss_ms"]:.1f})')
+    print(f'   • daemon, cache hit:               {results["daemon_hit_ms"]:8.2f} ms '
+          f'(x{results["cold_ms"] / results["daemon_hit_ms"]:.0f})')
+    print(f'   • process client mới (--render):   {results["client_process_ms"]:8.1f} ms '
+          f'(x{results["cold_ms"] / results["client_process_ms"]:.1f})')
+    print(f'   • cache: {stats["hits"]} hit / {stats["misses"]} miss, {stats["cache_bytes"] / 1024:.0f} KiB')
+    return results
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Render daemon cho chart engine')
+    parser.add_argument('--serve', action='store_true', help='chạy daemon')
+    parser.add_argument('--render', metavar='SPEC', help='gửi spec JSON tới daemon, ghi output.filename')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='cổng localhost')
+    parser.add_argument('--socket', metavar='PATH', help='dùng Unix socket thay cho cổng TCP')
+    parser.add_argument('--cache-mib', type=float, default=DEFAULT_CACHE_MIB, help='dung lượng LRU (MiB)')
+    parser.add_argument('--verbose', action='store_true', help='in log từng request')
+    parser.add_argument('--benchmark', action='store_true', help='so sánh script lạnh với daemon')
+    parser.add_argument('--requests', type=int, default=50, help='số request mỗi phép đo của benchmark')
+    parser.add_argument('--dpi', type=int, default=100, help='dpi của benchmark')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(f'⏱️ Benchmark render daemon (pass_rate_trend, dpi {args.dpi}):')
+        benchmark(requests=args.requests, dpi=args.dpi)
+    elif args.serve:
+        started = time.perf_counter()
+        server = make_server(ChartRenderer(int(args.cache_mib * 2 ** 20)), args.port, args.socket, args.verbose)
+        where = args.socket or f'http://127.0.0.1:{args.port}'
+        print(f'🚀 Render daemon sẵn sàng sau {time.perf_counter() - started:.2f}s: {where}', flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args.socket and os.path.exists(args.socket):
+                os.unlink(args.socket)
+    elif args.render:
+        with open(args.render, encoding='utf-8') as f:
+            spec = json.load(f)
+        client = RenderClient(args.port, args.socket)
+        try:
+            filename = client.save(spec)
+        except (OSError, RenderError) as exc:
+            print(f'❌ Không render được qua daemon: {exc}')
+            sys.exit(1)
+        print(f'✅ Đã lưu: {filename} (cache {client.last_cache})')
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+"""
+Thống kê doanh thu từ file mongoexport (JSON lines) của collection `revenues`.
+
+Mỗi document có dạng `{"year": 2024, "revenue": [...]}` như model Revenue:
+mảng 12 phần tử là doanh thu theo tháng (trang AdminRevenue hiện dùng dạng
+này), mảng 365 / 366 phần tử là doanh thu theo ngày. Nhiều document cùng năm
+(ví dụ export của nhiều chi nhánh) được cộng dồn. Số dạng extended JSON của
+mongoexport (`{"$numberLong": "..."}`, `$numberDouble`, `$numberDecimal`) được
+chấp nhận.
+
+File được đọc từng dòng thành mảng NumPy; doanh thu ngày của mọi năm nằm trong
+một mảng liên tục và được cộng theo tháng bằng một lần `np.add.reduceat`. Mọi
+phép tổng hợp (quý, năm, YoY, trung bình trượt, dự báo) là phép toán vector
+trên ma trận năm x 12 tháng. Các tháng bằng 0 ở cuối năm cuối cùng được coi là
+chưa có số liệu (NaN), nên YoY của năm hiện tại so sánh cùng kỳ.
+
+Dự báo: chỉ số mùa vụ theo tháng (trung bình tỷ lệ tháng / trung bình năm của
+các năm đủ 12 tháng) nhân với xu hướng tuyến tính của chuỗi đã khử mùa vụ.
+
+Cách dùng:
+    mongoexport --db=webbansach --collection=revenues --out=revenues.jsonl
+    python revenue_analytics.py revenues.jsonl [--output revenue_chart.png]
+    python revenue_analytics.py revenues.jsonl --period quarter --horizon 8 --json revenue.json
+    python revenue_analytics.py --benchmark
+"""
+
+import json
+
+import numpy as np
+
+from tracing import traced
+
+MONTHS = 12
+QUARTERS = 4
+DEFAULT_WINDOW = 12
+DEFAULT_HORIZON = 12
+MONTH_LABELS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+_NUMBER_KEYS = ('$numberLong', '$numberInt', '$numberDouble', '$numberDecimal')
+
+
+def _extended_json(obj):
+    """object_hook cho json: `{"$numberLong": "5"}` -> 5.0"""
+    if len(obj) == 1:
+        for key in _NUMBER_KEYS:
+            if key in obj:
+                return float(obj[key])
+    return obj
+
+
+def days_in_year(year):
+    return int((np.datetime64(f'{year + 1}-01-01') - np.datetime64(f'{year}-01-01')).astype(int))
+
+
+@traced('parse.revenue_export')
+def read_export(path):
+    """Đọc file mongoexport -> (dict năm -> 12 tháng, dict năm -> doanh thu ngày)"""
+    monthly, daily = {}, {}
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line in '[]':
+                continue
+            doc = json.loads(line.rstrip(','), object_hook=_extended_json)
+            year = int(doc['year'])
+            values = np.asarray(doc.get('revenue') or [], dtype=np.float64)
+            if len(values) <= MONTHS:
+                target, size = monthly, MONTHS
+            elif len(values) == days_in_year(year):
+                target, size = daily, len(values)
+            else:
+                raise ValueError(f'{path}:{line_no}: năm {year} có {len(values)} giá trị '
+                                 f'(cần ≤ 12 tháng hoặc {days_in_year(year)} ngày)')
+            if len(values) < size:
+                values = np.concatenate([values, np.full(size - len(values), np.nan)])
+            if year in target:
+                # NaN + số = số: tháng thiếu ở một chi nhánh không xóa số của chi nhánh khác
+                both = np.isnan(target[year]) & np.isnan(values)
+                target[year] = np.where(both, np.nan, np.nan_to_num(target[year]) + np.nan_to_num(values))
+            else:
+                target[year] = values
+    return monthly, daily
+
+
+def _sum_groups(values, axis=-1):
+    """Tổng bỏ qua NaN, nhưng nhóm toàn NaN cho NaN (không phải 0)"""
+    return np.where(np.isnan(values).all(axis=axis), np.nan, np.nansum(values, axis=axis))
+
+
+def moving_average(values, window):
+    """
+    Trung bình trượt `window` điểm (kết thúc tại mỗi điểm) bằng cumsum, bỏ qua NaN;
+    NaN khi cửa sổ chưa đủ `window` điểm hoặc không có giá trị nào.
+    """
+    if window < 1:
+        raise ValueError(f'window phải >= 1, nhận {window}')
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    result = np.full(len(values), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result[window - 1:] = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+    return result
+
+
+class RevenueSeries:
+    """Doanh thu dạng ma trận năm x 12 tháng (NaN = không có số liệu), kèm chuỗi ngày nếu có"""
+
+    def __init__(self, years, monthly, daily=None):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.monthly = np.asarray(monthly, dtype=np.float64).reshape(len(self.years), MONTHS)
+        self.daily = daily          # doanh thu ngày từ 1/1 của năm đầu, NaN = không có
+
+    @classmethod
+    def from_years(cls, monthly, daily=None):
+        """Từ dict năm -> 12 tháng và dict năm -> doanh thu ngày (năm thiếu = NaN)"""
+        daily = daily or {}
+        known = sorted(set(monthly) | set(daily))
+        if not known:
+            return cls([], np.empty((0, MONTHS)))
+        years = np.arange(known[0], known[-1] + 1)
+        first = np.datetime64(f'{years[0]}-01-01')
+        month_starts = (np.arange(f'{years[0]}-01', f'{years[-1] + 1}-01', dtype='datetime64[M]')
+                        .astype('datetime64[D]') - first).astype(np.int64)
+
+        matrix = np.full((len(years), MONTHS), np.nan)
+        for year, values in monthly.items():
+            matrix[year - years[0]] = values
+        days = None
+        if daily:
+            days = np.full(int((np.datetime64(f'{years[-1] + 1}-01-01') - first).astype(int)), np.nan)
+            for year, values in daily.items():
+                start = month_starts[(year - years[0]) * MONTHS]
+                days[start:start + len(values)] = values
+            from_days = np.add.reduceat(np.nan_to_num(days), month_starts)
+            has_days = np.add.reduceat(~np.isnan(days), month_starts) > 0
+            from_days = np.where(has_days, from_days, np.nan).reshape(len(years), MONTHS)
+            matrix = np.where(has_days.reshape(len(years), MONTHS),
+                              np.nan_to_num(matrix) + from_days, matrix)
+
+        # Các tháng bằng 0 ở cuối năm cuối cùng: chưa có số liệu
+        last = matrix[-1]
+        reported = np.flatnonzero(np.nan_to_num(last) > 0)
+        last[reported[-1] + 1 if len(reported) else 0:] = np.nan
+        return cls(years, matrix, days)
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_years(*read_export(path))
+
+    def __len__(self):
+        return len(self.years)
+
+    @property
+    def months(self):
+        """Tháng của từng phần tử trong chuỗi phẳng (datetime64[M])"""
+        if not len(self.years):
+            return np.array([], dtype='datetime64[M]')
+        return np.arange(f'{self.years[0]}-01', f'{self.years[-1] + 1}-01', dtype='datetime64[M]')
+
+    @property
+    def series(self):
+        """Chuỗi doanh thu tháng phẳng theo thời gian"""
+        return self.monthly.ravel()
+
+    def quarterly(self):
+        return _sum_groups(self.monthly.reshape(len(self.years), QUARTERS, MONTHS // QUARTERS))
+
+    def yearly(self):
+        return _sum_groups(self.monthly)
+
+    def yoy(self):
+        """
+        Tăng trưởng so với năm trước (%), tính trên cùng các tháng có số liệu của
+        năm sau (năm đang chạy so với cùng kỳ năm trước). Phần tử đầu là NaN.
+        """
+        if len(self.years) < 2:
+            return np.full(len(self.years), np.nan)
+        current, previous = self.monthly[1:], self.monthly[:-1]
+        mask = ~np.isnan(current)
+        now = np.where(mask, current, 0.0).sum(axis=1)
+        before = np.where(mask & ~np.isnan(previous), previous, 0.0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            growth = np.where((before > 0) & mask.any(axis=1), (now / before - 1) * 100, np.nan)
+        return np.concatenate([[np.nan], growth])
+
+    def monthly_yoy(self):
+        """Tăng trưởng (%) của từng tháng so với cùng tháng năm trước, ma trận (năm - 1) x 12"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.monthly[:-1] > 0, (self.monthly[1:] / self.monthly[:-1] - 1) * 100, np.nan)
+
+    def moving_average(self, window=DEFAULT_WINDOW, daily=False):
+        """Trung bình trượt trên chuỗi tháng (hoặc chuỗi ngày nếu `daily`)"""
+        if daily:
+            if self.daily is None:
+                raise ValueError('không có số liệu theo ngày')
+            return moving_average(self.daily, window)
+        return moving_average(self.series, window)
+
+    def seasonal_index(self):
+        """Chỉ số mùa vụ 12 tháng từ các năm đủ 12 tháng (toàn 1 nếu không có năm nào)"""
+        complete = self.monthly[~np.isnan(self.monthly).any(axis=1)]
+        complete = complete[complete.mean(axis=1) > 0]
+        if not len(complete):
+            return np.ones(MONTHS)
+        index = (complete / complete.mean(axis=1, keepdims=True)).mean(axis=0)
+        return np.where(index > 0, index, 1.0)
+
+    @traced('revenue.forecast')
+    def forecast(self, horizon=DEFAULT_HORIZON):
+        """
+        Dự báo `horizon` tháng sau tháng cuối có số liệu -> (tháng, dự báo, độ lệch chuẩn
+        của phần dư). Xu hướng tuyến tính của chuỗi đã khử mùa vụ x chỉ số mùa vụ.
+        """
+        values = self.series
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) < 2:
+            return np.array([], dtype='datetime64[M]'), np.array([]), 0.0
+        index = self.seasonal_index()
+        season = np.tile(index, len(self.years))
+        slope, intercept = np.polyfit(valid, values[valid] / season[valid], 1)
+        residual = values[valid] - (slope * valid + intercept) * season[valid]
+
+        steps = np.arange(valid[-1] + 1, valid[-1] + 1 + horizon)
+        predicted = np.clip((slope * steps + intercept) * index[steps % MONTHS], 0, None)
+        months = self.months[0] + steps
+        return months, predicted, float(residual.std())
+
+    def to_dict(self, window=DEFAULT_WINDOW, horizon=DEFAULT_HORIZON):
+        def clean(values):
+            return [None if np.isnan(value) else round(float(value), 2) for value in np.ravel(values)]
+
+        months, predicted, sigma = self.forecast(horizon)
+        return {
+            'years': self.years.tolist(),
+            'monthly': [clean(row) for row in self.monthly],
+            'quarterly': [clean(row) for row in self.quarterly()],
+            'yearly': clean(self.yearly()),
+            'yoy_percent': clean(self.yoy()),
+            'moving_average': {'window': window, 'values': clean(self.moving_average(window))},
+            'forecast': {'months': [str(month) for month in months], 'values': clean(predicted),
+                         'sigma': round(sigma, 2)},
+        }
+
+    def report(self):
+        lines = ['💰 DOANH THU THEO NĂM:']
+        for year, total, growth, quarters in zip(self.years.tolist(), self.yearly(), self.yoy(),
+                                                 self.quarterly()):
+            if np.isnan(total):
+                lines.append(f'   • {year}: không có số liệu')
+                continue
+            change = '' if np.isnan(growth) else f' ({growth:+.1f}% YoY)'
+            parts = ', '.join(f'Q{i + 1} {value:,.0f}' for i, value in enumerate(quarters)
+                              if not np.isnan(value))
+            lines.append(f'   • {year}: {total:,.0f}₫{change} — {parts}')
+        reported = self.series[~np.isnan(self.series)]
+        if len(reported):
+            lines.append(f'\nTổng doanh thu: {reported.sum():,.0f}₫')
+            lines.append(f'Doanh thu trung bình mỗi tháng: {reported[reported > 0].mean():,.0f}₫'
+                         if (reported > 0).any() else 'Doanh thu trung bình mỗi tháng: 0₫')
+        months, predicted, sigma = self.forecast()
+        if len(months):
+            lines.append(f'\n🔮 Dự báo {len(months)} tháng tới (±{sigma:,.0f}₫):')
+            lines.append('   ' + ', '.join(f'{month}: {value:,.0f}' for month, value in zip(months, predicted)))
+        return '\n'.join(lines)
+
+    def chart_spec(self, filename='revenue_chart.png', period='month', window=DEFAULT_WINDOW,
+                   horizon=DEFAULT_HORIZON):
+        """Spec biểu đồ doanh thu theo tháng / quý, kèm trung bình trượt và dự báo"""
+        if period == 'quarter':
+            periods = self.months[::MONTHS // QUARTERS]
+            values = self.quarterly().ravel()
+            window = max(window // (MONTHS // QUARTERS), 1)
+            forecast_periods, forecast, sigma = [], [], 0.0
+        else:
+            periods, values = self.months, self.series
+            forecast_periods, forecast, sigma = self.forecast(horizon)
+        # Bỏ các kỳ NaN ở cuối (năm đang chạy)
+        reported = np.flatnonzero(~np.isnan(values))
+        end = reported[-1] + 1 if len(reported) else 0
+        periods, values = periods[:end], values[:end]
+        averages = moving_average(values, window) if len(values) >= window else np.full(len(values), np.nan)
+
+        def clean(items):
+            return [None if np.isnan(value) else round(float(value), 2) for value in items]
+
+        yoy = self.yoy()
+        latest_growth = yoy[~np.isnan(yoy)][-1] if (~np.isnan(yoy)).any() else None
+        return {'kind': 'revenue_trend', 'style': 'dashboard',
+                'data': {'periods': [str(item) for item in periods], 'values': clean(values),
+                         'period': period, 'window': window, 'moving_average': clean(averages),
+                         'forecast_periods': [str(item) for item in forecast_periods],
+                         'forecast': clean(forecast), 'sigma': round(sigma, 2),
+                         'total': float(np.nansum(values)),
+                         'yoy': None if latest_growth is None else round(float(latest_growth), 1)},
+                'output': {'filename': filename, 'dpi': 300}}
+
+
+def load_revenue(path):
+    return RevenueSeries.load(path)
+
+
+def _write_benchmark_export(path, years, branches, seed=0):
+    """Export giả lập: `branches` document doanh thu ngày cho mỗi năm"""
+    rng = np.random.default_rng(seed)
+    first = 2025 - years + 1
+    with open(path, 'w', encoding='utf-8') as f:
+        for year in range(first, 2026):
+            days = days_in_year(year)
+            season = 1 + 0.3 * np.sin(np.arange(days) / days * 2 * np.pi)
+            for _ in range(branches):
+                values = rng.gamma(4.0, 250000 * (1 + 0.03 * (year - first)), days) * season
+                f.write(json.dumps({'year': year, 'revenue': values.round().astype(int).tolist()}) + '\n')
+
+
+def benchmark(years=100, branches=20, repeat=3):
+    """Thời gian đọc export doanh thu ngày và tính các phép tổng hợp"""
+    import os
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'revenues.jsonl')
+        _write_benchmark_export(path, years, branches)
+        size_mib = os.path.getsize(path) / 2 ** 20
+
+        started = time.perf_counter()
+        monthly, daily = read_export(path)
+        parsing = time.perf_counter() - started
+        values = sum(len(item) for item in daily.values()) * branches
+        print(f'   • Đọc {years} năm x {branches} chi nhánh ({values} giá trị ngày, {size_mib:.1f} MiB): '
+              f'{parsing:.2f}s ({size_mib / parsing:.1f} MiB/s)')
+
+        steps = {
+            'from_years': lambda: RevenueSeries.from_years(monthly, daily),
+        }
+        series = RevenueSeries.from_years(monthly, daily)
+        steps.update({
+            'quarterly + yearly': lambda: (series.quarterly(), series.yearly()),
+            'yoy + monthly_yoy': lambda: (series.yoy(), series.monthly_yoy()),
+            'moving_average(12)': lambda: series.moving_average(12),
+            'moving_average(30 ngày)': lambda: series.moving_average(30, daily=True),
+            'forecast(12)': lambda: series.forecast(12),
+        })
+        for label, step in steps.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                step()
+                timings.append(time.perf_counter() - started)
+            print(f'   • {label:24s} {min(timings) * 1000:8.2f} ms')
+
+
+def main(argv=None):
+    import argparse
+
+    def positive_int(text):
+        value = int(text)
+        if value < 1:
+            raise argparse.ArgumentTypeError(f'phải >= 1, nhận {value}')
+        return value
+
+    parser = argparse.ArgumentParser(description='Thống kê doanh thu từ mongoexport collection revenues')
+    parser.add_argument('export', nargs='?', help='file JSON lines của mongoexport')
+    parser.add_argument('--period', choices=('month', 'quarter'), default='month', help='kỳ của biểu đồ')
+    parser.add_argument('--window', type=positive_int, default=DEFAULT_WINDOW,
+                        help='số tháng của trung bình trượt (>= 1)')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help='số tháng dự báo')
+    parser.add_argument('--json', metavar='FILE', help='ghi kết quả tổng hợp dạng JSON')
+    parser.add_argument('--output', metavar='PNG', help='vẽ biểu đồ doanh thu')
+    parser.add_argument('--trace', metavar='FILE', help='ghi Chrome trace JSON (+ profile phẳng)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='đo thời gian với 100 năm doanh thu ngày của 20 chi nhánh')
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        import tracing
+
+        tracing.configure(args.trace)
+    if args.benchmark:
+        print('⏱️ Benchmark thống kê doanh thu:')
+        benchmark()
+        return
+    if not args.export:
+        parser.error('cần file export hoặc --benchmark')
+
+    series = load_revenue(args.export)
+    if not len(series):
+        print(f'⚠️ {args.export} không có document doanh thu')
+        return
+    print(series.report())
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(series.to_dict(args.window, args.horizon), f, ensure_ascii=False, indent=2)
+        print(f'\n✅ Đã lưu: {args.json}')
+    if args.output:
+        from chart_engine import render
+
+        render(series.chart_spec(args.output, args.period, args.window, args.horizon))
+        print(f'✅ Đã lưu: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""
+So sánh hai lần chạy test: test mới fail, mới pass, chậm đi / nhanh lên rõ rệt,
+test thêm mới và test bị bỏ.
+
+Mỗi test được định danh bằng hash ổn định (blake2b 64 bit) của đường dẫn suite
+đã chuẩn hóa + full name, nên so sánh được giữa các máy CI có thư mục gốc khác
+nhau. Lần chạy gốc được đánh index bằng dict hash -> dòng, lần chạy hiện tại
+tra index một lượt (tuyến tính theo số test), sau đó mọi phép so sánh trạng
+thái / thời gian là phép toán vector trên NumPy.
+
+Mỗi phía có thể là báo cáo `jest --json` hoặc một lần chạy trong lịch sử:
+    python run_diff.py base-report.json jest-report.json [--output run_diff_chart.png]
+    python run_diff.py --history .test_history            # hai lần chạy gần nhất
+    python run_diff.py --history .test_history --runs 0 -1
+    python run_diff.py --benchmark
+"""
+
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from jest_report import CHUNK_SIZE, JestReportReader
+from run_history import (DEFAULT_HISTORY_DIR, STATUS_FAILED, STATUS_NOT_RUN, STATUS_PASSED,
+                         status_code)
+from tracing import traced
+
+# Test chậm đi / nhanh lên khi lệch quá tỷ lệ này và quá số ms này
+DEFAULT_RATIO = 0.5
+DEFAULT_MIN_DELTA_MS = 50
+
+CATEGORIES = ('newly_failed', 'newly_passed', 'slower', 'faster', 'added', 'removed', 'still_failing')
+CATEGORY_LABELS = {
+    'newly_failed': 'Newly Failed', 'newly_passed': 'Newly Passed', 'slower': 'Slower',
+    'faster': 'Faster', 'added': 'Added', 'removed': 'Removed', 'still_failing': 'Still Failing',
+}
+
+_TEST_DIR = re.compile(r'(?:^|/)((?:__tests__|tests?|e2e)/.*)$')
+
+
+@lru_cache(maxsize=4096)
+def stable_suite_path(path):
+    """
+    Đường dẫn suite không phụ thuộc máy chạy: từ thư mục test trở đi
+    (`/ci/x/Backend/test/a.test.js` -> `test/a.test.js`), ngược lại chỉ tên file.
+    """
+    path = path.replace('\\', '/')
+    match = _TEST_DIR.search(path)
+    return match.group(1) if match else path.rsplit('/', 1)[-1]
+
+
+def test_key(suite, full_name):
+    """Hash 64 bit (int64) ổn định của suite + full name"""
+    digest = hashlib.blake2b(f'{stable_suite_path(suite)}\0{full_name}'.encode('utf-8'),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class RunSnapshot:
+    """Kết quả một lần chạy dạng cột: key, mã trạng thái, thời gian (ms, NaN nếu không có)"""
+
+    def __init__(self, keys, statuses, durations, names, label=''):
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.statuses = np.asarray(statuses, dtype=np.int8)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.names = names          # list (suite, full_name) theo dòng
+        self.label = label
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_results(cls, results, label=''):
+        """Từ iterable (suite, full_name, status, duration)"""
+        keys, statuses, durations, names = [], [], [], []
+        for suite, full_name, status, duration in results:
+            keys.append(test_key(suite, full_name))
+            statuses.append(status_code(status))
+            durations.append(np.nan if duration is None else duration)
+            names.append((suite, full_name))
+        return cls(keys, statuses, durations, names, label)
+
+    @classmethod
+    @traced(category='parse')
+    def from_report(cls, path, label=None, chunk_size=CHUNK_SIZE):
+        """Đọc streaming một báo cáo `jest --json`"""
+        return cls.from_results(JestReportReader(path, chunk_size), label or os.path.basename(path))
+
+    @classmethod
+    def from_history(cls, store, run):
+        """Một lần chạy trong RunHistoryStore (run âm: đếm từ lần chạy mới nhất)"""
+        run = range(store.num_runs)[run]
+        start = int(store.column('runs', 'test_start')[run])
+        count = int(store.column('runs', 'test_count')[run])
+        rows = slice(start, start + count)
+        tests = np.asarray(store.column('tests', 'test')[rows])
+        test_names = store.test_names()
+        names = [test_names[test] for test in tests.tolist()]
+        ts = int(store.column('runs', 'run_ts')[run])
+        label = f'run {run} ({np.datetime64(ts, "ms").astype("datetime64[s]")})'
+        return cls([test_key(suite, full_name) for suite, full_name in names],
+                   store.column('tests', 'status')[rows], store.column('tests', 'duration_ms')[rows],
+                   names, label)
+
+    def pass_rate(self):
+        passed = int(np.count_nonzero(self.statuses == STATUS_PASSED))
+        executed = passed + int(np.count_nonzero(self.statuses == STATUS_FAILED))
+        return round(passed / executed * 100, 1) if executed else 0.0
+
+
+def _occurrences(keys):
+    """Thứ tự xuất hiện của từng dòng trong các dòng cùng key: [a, b, a, a] -> [0, 0, 1, 2]"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(keys)]))
+    occurrences = np.empty(len(keys), dtype=np.int64)
+    occurrences[order] = np.arange(len(keys)) - group_start
+    return occurrences
+
+
+class RunDiff:
+    """Kết quả so sánh: mỗi nhóm là mảng dòng (của lần chạy hiện tại, riêng removed là của gốc)"""
+
+    def __init__(self, base, current, groups):
+        self.base = base
+        self.current = current
+        self.groups = groups
+        self.delta_ms = None    # current - base cho các dòng slower/faster
+
+    @classmethod
+    @traced(category='aggregate')
+    def compute(cls, base, current, ratio=DEFAULT_RATIO, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+        # Index (hash, lần xuất hiện) -> dòng của lần chạy gốc: các test trùng tên
+        # (test.each, title lặp lại) được ghép theo thứ tự xuất hiện
+        index = dict(zip(zip(base.keys.tolist(), _occurrences(base.keys).tolist()), range(len(base))))
+        position = np.fromiter((index.get(key, -1) for key in
+                                zip(current.keys.tolist(), _occurrences(current.keys).tolist())),
+                               dtype=np.int64, count=len(current))
+        matched = position >= 0
+        seen = np.zeros(len(base), dtype=bool)
+        seen[position[matched]] = True
+
+        rows = np.flatnonzero(matched)
+        before = base.statuses[position[rows]]
+        after = current.statuses[rows]
+        base_ms = base.durations[position[rows]]
+        current_ms = current.durations[rows]
+        delta = current_ms - base_ms
+        # So sánh thời gian chỉ khi test pass ở cả hai lần (NaN tự loại khỏi phép so sánh)
+        timed = (before == STATUS_PASSED) & (after == STATUS_PASSED)
+        with np.errstate(invalid='ignore'):
+            slower = timed & (current_ms > base_ms * (1 + ratio)) & (delta >= min_delta_ms)
+            faster = timed & (base_ms > current_ms * (1 + ratio)) & (-delta >= min_delta_ms)
+
+        groups = {
+            'newly_failed': rows[(before != STATUS_FAILED) & (after == STATUS_FAILED)],
+            'newly_passed': rows[(before == STATUS_FAILED) & (after == STATUS_PASSED)],
+            'slower': rows[slower][np.argsort(-delta[slower], kind='stable')],
+            'faster': rows[faster][np.argsort(delta[faster], kind='stable')],
+            'added': np.flatnonzero(~matched),
+            'removed': np.flatnonzero(~seen),
+            'still_failing': rows[(before == STATUS_FAILED) & (after == STATUS_FAILED)],
+        }
+        diff = cls(base, current, groups)
+        changed = slower | faster
+        diff.delta_ms = dict(zip(rows[changed].tolist(), delta[changed].tolist()))
+        return diff
+
+    def counts(self):
+        return {name: len(self.groups[name]) for name in CATEGORIES}
+
+    def has_regressions(self):
+        return bool(len(self.groups['newly_failed']) or len(self.groups['slower']))
+
+    def _entry(self, name, row):
+        snapshot = self.base if name == 'removed' else self.current
+        suite, full_name = snapshot.names[row]
+        entry = {'suite': stable_suite_path(suite), 'test': full_name}
+        if name == 'added':
+            entry['status'] = int(self.current.statuses[row])
+        if name in ('slower', 'faster'):
+            delta = self.delta_ms[row]
+            entry.update(current_ms=round(float(self.current.durations[row]), 1),
+                         base_ms=round(float(self.current.durations[row] - delta), 1))
+        return entry
+
+    def to_dict(self, limit=None):
+        return {
+            'base': {'label': self.base.label, 'tests': len(self.base), 'pass_rate': self.base.pass_rate()},
+            'current': {'label': self.current.label, 'tests': len(self.current),
+                        'pass_rate': self.current.pass_rate()},
+            'counts': self.counts(),
+            'tests': {name: [self._entry(name, row) for row in self.groups[name][:limit].tolist()]
+                      for name in CATEGORIES},
+        }
+
+    def report(self, limit=20):
+        """Báo cáo regression dạng text"""
+        lines = [f'🔍 RUN DIFF: {self.base.label} -> {self.current.label}',
+                 f'   • Tests: {len(self.base)} -> {len(self.current)}, '
+                 f'Pass Rate: {self.base.pass_rate()}% -> {self.current.pass_rate()}%']
+        lines += [f'   • {CATEGORY_LABELS[name]}: {count}' for name, count in self.counts().items()]
+        for name, icon in (('newly_failed', '❌'), ('slower', '🐢'), ('newly_passed', '✅'),
+                           ('removed', '➖')):
+            rows = self.groups[name]
+            if not len(rows):
+                continue
+            lines.append(f'\n{icon} {CATEGORY_LABELS[name]} ({len(rows)}):')
+            for row in rows[:limit].tolist():
+                entry = self._entry(name, row)
+                timing = (f" ({entry['base_ms']:.0f} -> {entry['current_ms']:.0f} ms)"
+                          if 'current_ms' in entry else '')
+                lines.append(f"   • {entry['suite']} › {entry['test']}{timing}")
+            if len(rows) > limit:
+                lines.append(f'   … và {len(rows) - limit} test khác')
+        return '\n'.join(lines)
+
+    def chart_spec(self, filename='run_diff_chart.png'):
+        """Spec biểu đồ số test theo từng nhóm thay đổi"""
+        return {'kind': 'run_diff', 'style': 'dashboard',
+                'data': {'counts': self.counts(), 'labels': CATEGORY_LABELS,
+                         'base': self.base.label, 'current': self.current.label,
+                         'base_rate': self.base.pass_rate(), 'current_rate': self.current.pass_rate()},
+                'output': {'filename': filename, 'dpi': 300}}
+
+
+def diff_runs(base, current, ratio=DEFAULT_RATIO, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    return RunDiff.compute(base, current, ratio, min_delta_ms)
+
+
+def _synthetic_run(num_tests, seed, label):
+    rng = np.random.default_rng(seed)
+    names = [(f'/ci/{seed}/Backend/test/module{i % 200}.unit.test.js', f'Module {i % 200} case {i}')
+             for i in range(num_tests)]
+    statuses = np.where(rng.random(num_tests) < 0.9, STATUS_PASSED, STATUS_FAILED)
+    statuses[rng.random(num_tests) < 0.01] = STATUS_NOT_RUN
+    durations = rng.gamma(2.0, 40.0, num_tests)
+    keys = [test_key(suite, full_name) for suite, full_name in names]
+    return RunSnapshot(keys, statuses, durations, names, label)
+
+
+def benchmark(num_tests=50000, repeat=5):
+    """Thời gian so sánh hai lần chạy `num_tests` test (không tính thời gian đọc báo cáo)"""
+    import time
+
+    base = _synthetic_run(num_tests, 1, 'base')
+    current = _synthetic_run(num_tests, 2, 'current')
+    # Bỏ 1% test và đảo thứ tự để không có lợi thế cùng thứ tự
+    keep = np.random.default_rng(3).permutation(num_tests)[:int(num_tests * 0.99)]
+    current = RunSnapshot(current.keys[keep], current.statuses[keep], current.durations[keep],
+                          [current.names[i] for i in keep.tolist()], 'current')
+
+    started = time.perf_counter()
+    keys = [test_key(suite, full_name) for suite, full_name in base.names]
+    hashing = time.perf_counter() - started
+    assert keys == base.keys.tolist()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        diff = diff_runs(base, current)
+        timings.append(time.perf_counter() - started)
+    counts = ', '.join(f'{name} {count}' for name, count in diff.counts().items())
+    print(f'   • {num_tests} vs {len(current)} tests: diff {min(timings) * 1000:.1f} ms, '
+          f'hash IDs {hashing * 1000:.1f} ms/run')
+    print(f'   • {counts}')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='So sánh hai lần chạy test')
+    parser.add_argument('reports', nargs='*', metavar='REPORT', help='báo cáo gốc và báo cáo hiện tại')
+    parser.add_argument('--history', metavar='DIR', nargs='?', const=DEFAULT_HISTORY_DIR,
+                        help='so sánh hai lần chạy trong lịch sử')
+    parser.add_argument('--runs', type=int, nargs=2, default=(-2, -1), metavar=('BASE', 'CURRENT'),
+                        help='id lần chạy trong lịch sử (âm = tính từ lần mới nhất)')
+    parser.add_argument('--ratio', type=float, default=DEFAULT_RATIO,
+                        help='tỷ lệ thay đổi thời gian để tính là chậm đi / nhanh lên')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS)
+    parser.add_argument('--limit', type=int, default=20, help='số test tối đa mỗi nhóm trong báo cáo')
+    parser.add_argument('--json', metavar='FILE', help='ghi báo cáo JSON')
+    parser.add_argument('--output', metavar='PNG', help='vẽ biểu đồ run diff')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='thoát mã 1 nếu có test mới fail hoặc chậm đi')
+    parser.add_argument('--benchmark', action='store_true', help='đo thời gian diff hai lần chạy 50k test')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark run diff:')
+        benchmark()
+        return
+    if args.history:
+        from run_history import RunHistoryStore
+
+        store = RunHistoryStore(args.history)
+        if store.num_runs < 2:
+            parser.error(f'{args.history} cần ít nhất 2 lần chạy')
+        base, current = (RunSnapshot.from_history(store, run) for run in args.runs)
+    elif len(args.reports) == 2:
+        base, current = (RunSnapshot.from_report(path) for path in args.reports)
+    else:
+        parser.error('cần 2 báo cáo (gốc, hiện tại) hoặc --history')
+
+    diff = diff_runs(base, current, args.ratio, args.min_delta_ms)
+    print(diff.report(args.limit))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(diff.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f'\n✅ Đã lưu: {args.json}')
+    if args.output:
+        from chart_engine import render
+
+        render(diff.chart_spec(args.output))
+        print(f'✅ Đã lưu: {args.output}')
+    if args.fail_on_regression and diff.has_regressions():
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+"""
+Lưu lịch sử các lần chạy test dạng cột (columnar), chỉ ghi nối thêm (append-only).
+
+Mỗi bảng là một thư mục, mỗi cột là một file nhị phân NumPy thô (đọc lại bằng
+np.memmap), nên biểu đồ xu hướng trên hàng nghìn lần chạy CI chỉ đọc đúng các
+cột cần dùng thay vì parse lại từng báo cáo Jest.
+
+    <root>/meta.json                số dòng hợp lệ của từng bảng / từ điển tên
+    <root>/runs/<cột>.bin           một dòng cho mỗi lần chạy (index theo run_ts)
+    <root>/suites/<cột>.bin         một dòng cho mỗi (lần chạy, suite)
+    <root>/tests/<cột>.bin          một dòng cho mỗi (lần chạy, test)
+    <root>/names/{suites,tests}.jsonl   từ điển tên -> id
+
+meta.json được ghi sau cùng (os.replace), nên một lần ghi bị ngắt giữa chừng
+không làm hỏng dữ liệu cũ: phần thừa ở cuối file cột bị cắt bỏ ở lần ghi sau.
+
+Cách dùng:
+    python run_history.py ingest jest-report.json [--store .test_history]
+    python run_history.py trend [--output pass_rate_trend_chart.png]
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from jest_report import (CHUNK_SIZE, FAILED_STATUSES, PASSED_STATUSES, JestReportReader,
+                         JestRunSummary, iter_json_events)
+from tracing import traced
+
+DEFAULT_HISTORY_DIR = '.test_history'
+BATCH_SIZE = 65536
+
+# Mã trạng thái test trong cột tests/status
+STATUS_FAILED = 0
+STATUS_PASSED = 1
+STATUS_NOT_RUN = 2
+
+SCHEMA = {
+    'runs': {
+        'run_ts': 'i8',         # thời điểm chạy (ms từ epoch)
+        'total': 'i4',
+        'passed': 'i4',
+        'failed': 'i4',
+        'not_run': 'i4',
+        'duration_ms': 'f8',    # tổng thời gian các suite
+        'suite_start': 'i8',    # dòng đầu tiên của lần chạy trong bảng suites
+        'suite_count': 'i4',
+        'test_start': 'i8',     # dòng đầu tiên của lần chạy trong bảng tests
+        'test_count': 'i8',
+    },
+    'suites': {
+        'run': 'i4',
+        'suite': 'i4',
+        'passed': 'i4',
+        'failed': 'i4',
+        'not_run': 'i4',
+        'duration_ms': 'f4',
+    },
+    'tests': {
+        'run': 'i4',
+        'test': 'i4',
+        'suite': 'i4',
+        'status': 'i1',
+        'duration_ms': 'f4',    # NaN nếu Jest không ghi duration
+    },
+}
+
+
+def status_code(status):
+    if status in PASSED_STATUSES:
+        return STATUS_PASSED
+    if status in FAILED_STATUSES:
+        return STATUS_FAILED
+    return STATUS_NOT_RUN
+
+
+def report_start_time(path, chunk_size=CHUNK_SIZE):
+    """startTime top-level của báo cáo `jest --json` (Jest ghi trước testResults), None nếu không có"""
+    with open(path, encoding='utf-8') as fp:
+        # Suite được parse trọn bằng json C nên kể cả khi startTime nằm cuối file vẫn đọc nhanh
+        for prefix, event, value in iter_json_events(fp, chunk_size, whole=(JestReportReader.SUITE,)):
+            if prefix == 'startTime' and event == 'number':
+                return value
+    return None
+
+
+class RunHistoryStore:
+    """Kho lịch sử chạy test dạng cột trên đĩa"""
+
+    def __init__(self, root=DEFAULT_HISTORY_DIR):
+        self.root = root
+        self._names = None      # {'suites': {name: id}, 'tests': {(suite, full_name): id}}
+        meta_path = os.path.join(root, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {
+                'version': 1,
+                'rows': {table: 0 for table in SCHEMA},
+                'names': {'suites': 0, 'tests': 0},
+                'ts_sorted': True,
+                'last_ts': None,
+            }
+
+    def __getstate__(self):
+        # Không gửi từ điển tên sang worker process
+        state = dict(self.__dict__)
+        state['_names'] = None
+        return state
+
+    @property
+    def num_runs(self):
+        return self.meta['rows']['runs']
+
+    def _path(self, table, column):
+        return os.path.join(self.root, table, column + '.bin')
+
+    def column(self, table, name):
+        """Đọc một cột dưới dạng np.memmap (chỉ đọc, chỉ các dòng hợp lệ)"""
+        rows = self.meta['rows'][table]
+        dtype = np.dtype(SCHEMA[table][name])
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(table, name), dtype=dtype, mode='r', shape=(rows,))
+
+    def columns(self, table, names):
+        return {name: self.column(table, name) for name in names}
+
+    # ----- từ điển tên -----
+
+    def _load_names(self):
+        if self._names is None:
+            self._names = {'suites': {}, 'tests': {}}
+            for kind, counted in self.meta['names'].items():
+                path = os.path.join(self.root, 'names', kind + '.jsonl')
+                if not counted:
+                    continue
+                with open(path, encoding='utf-8') as f:
+                    for i, line in zip(range(counted), f):
+                        name = json.loads(line)
+                        self._names[kind][tuple(name) if kind == 'tests' else name] = i
+        return self._names
+
+    def suite_names(self):
+        """List tên suite theo id"""
+        names = self._load_names()['suites']
+        return sorted(names, key=names.get)
+
+    def test_names(self):
+        """List (suite, full_name) theo id"""
+        names = self._load_names()['tests']
+        return sorted(names, key=names.get)
+
+    def suite_id(self, suite):
+        return self._load_names()['suites'].get(suite)
+
+    # ----- ghi -----
+
+    def _append(self, files, table, values):
+        for name, dtype in SCHEMA[table].items():
+            files[table][name].write(np.asarray(values[name], dtype=dtype).tobytes())
+
+    def _open_tables(self):
+        """Mở file cột để ghi nối, cắt bỏ phần thừa của lần ghi bị ngắt trước đó"""
+        files = {}
+        for table, columns in SCHEMA.items():
+            os.makedirs(os.path.join(self.root, table), exist_ok=True)
+            files[table] = {}
+            for name, dtype in columns.items():
+                f = open(self._path(table, name), 'ab')
+                f.truncate(self.meta['rows'][table] * np.dtype(dtype).itemsize)
+                files[table][name] = f
+        return files
+
+    def find_run(self, run_ts):
+        """Id lần chạy có đúng run_ts, None nếu chưa có"""
+        matches = np.flatnonzero(self.column('runs', 'run_ts') == run_ts)
+        return int(matches[0]) if len(matches) else None
+
+    @traced(category='parse')
+    def append_report(self, path, run_ts=None, chunk_size=CHUNK_SIZE):
+        """
+        Đọc streaming một báo cáo `jest --json` và ghi nối vào lịch sử, trả về id lần chạy.
+        Báo cáo có run_ts đã có trong lịch sử (ghi lại cùng một báo cáo) bị bỏ qua, trả về None,
+        trước khi đọc các suite.
+        """
+        if run_ts is None:
+            run_ts = report_start_time(path, chunk_size) or int(time.time() * 1000)
+        if self.find_run(run_ts) is not None:
+            return None
+
+        names = self._load_names()
+        suite_ids, test_ids = names['suites'], names['tests']
+        new_suites, new_tests = [], []
+        run = self.num_runs
+        test_start = self.meta['rows']['tests']
+
+        summary = JestRunSummary(keep_durations=False)
+        reader = JestReportReader(path, chunk_size, on_suite=summary.add_suite)
+        files = self._open_tables()
+        try:
+            batch = {'test': [], 'suite': [], 'status': [], 'duration_ms': []}
+            written = 0
+
+            def flush():
+                size = len(batch['test'])
+                if size:
+                    self._append(files, 'tests', {**batch, 'run': np.full(size, run)})
+                    for values in batch.values():
+                        values.clear()
+                return size
+
+            for result in reader:
+                summary.add(result)
+                suite = suite_ids.get(result.suite)
+                if suite is None:
+                    suite = suite_ids[result.suite] = len(suite_ids)
+                    new_suites.append(result.suite)
+                key = (result.suite, result.full_name)
+                test = test_ids.get(key)
+                if test is None:
+                    test = test_ids[key] = len(test_ids)
+                    new_tests.append(key)
+                batch['test'].append(test)
+                batch['suite'].append(suite)
+                batch['status'].append(status_code(result.status))
+                batch['duration_ms'].append(np.nan if result.duration is None else result.duration)
+                if len(batch['test']) >= BATCH_SIZE:
+                    written += flush()
+            written += flush()
+
+            suites = list(summary.suites.items())
+            self._append(files, 'suites', {
+                'run': [run] * len(suites),
+                'suite': [suite_ids[suite] for suite, _ in suites],
+                'passed': [counts[0] for _, counts in suites],
+                'failed': [counts[1] for _, counts in suites],
+                'not_run': [counts[2] for _, counts in suites],
+                'duration_ms': [summary.suite_durations.get(suite, np.nan) for suite, _ in suites],
+            })
+
+            self._append(files, 'runs', {
+                'run_ts': [run_ts],
+                'total': [summary.total],
+                'passed': [summary.passed],
+                'failed': [summary.failed],
+                'not_run': [summary.not_run],
+                'duration_ms': [sum(summary.suite_durations.values())],
+                'suite_start': [self.meta['rows']['suites']],
+                'suite_count': [len(suites)],
+                'test_start': [test_start],
+                'test_count': [written],
+            })
+        except BaseException:
+            # Từ điển tên trong bộ nhớ đã có id chưa được ghi -> nạp lại lần sau
+            self._names = None
+            raise
+        finally:
+            for columns in files.values():
+                for f in columns.values():
+                    f.close()
+
+        self._append_names('suites', new_suites)
+        self._append_names('tests', [list(key) for key in new_tests])
+
+        meta = self.meta
+        meta['rows']['runs'] += 1
+        meta['rows']['suites'] += len(suites)
+        meta['rows']['tests'] += written
+        meta['names'] = {'suites': len(suite_ids), 'tests': len(test_ids)}
+        if meta['last_ts'] is not None and run_ts < meta['last_ts']:
+            meta['ts_sorted'] = False
+        meta['last_ts'] = run_ts if meta['last_ts'] is None else max(run_ts, meta['last_ts'])
+        self._save_meta()
+        return run
+
+    def _append_names(self, kind, names):
+        os.makedirs(os.path.join(self.root, 'names'), exist_ok=True)
+        path = os.path.join(self.root, 'names', kind + '.jsonl')
+        counted = self.meta['names'][kind]
+        with open(path, 'a+b') as f:
+            # Bỏ các tên thừa của lần ghi bị ngắt trước đó
+            f.seek(0)
+            f.truncate(sum(len(line) for _, line in zip(range(counted), f)))
+            for name in names:
+                f.write((json.dumps(name, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    def _save_meta(self):
+        path = os.path.join(self.root, 'meta.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(path + '.tmp', path)
+
+    # ----- truy vấn -----
+
+    def run_indices(self, start=None, end=None):
+        """Id các lần chạy có run_ts trong [start, end), sắp xếp theo thời gian"""
+        ts = self.column('runs', 'run_ts')
+        if self.meta['ts_sorted']:
+            lo = 0 if start is None else np.searchsorted(ts, start, side='left')
+            hi = len(ts) if end is None else np.searchsorted(ts, end, side='left')
+            return np.arange(lo, hi)
+        order = np.argsort(ts, kind='stable')
+        sorted_ts = ts[order]
+        lo = 0 if start is None else np.searchsorted(sorted_ts, start, side='left')
+        hi = len(ts) if end is None else np.searchsorted(sorted_ts, end, side='left')
+        return order[lo:hi]
+
+    @traced(category='aggregate')
+    def pass_rate_trend(self, start=None, end=None):
+        """(run_ts, pass rate %) theo thời gian, chỉ đọc 3 cột của bảng runs"""
+        runs = self.run_indices(start, end)
+        ts = np.asarray(self.column('runs', 'run_ts')[runs])
+        passed = np.asarray(self.column('runs', 'passed')[runs], dtype=float)
+        failed = np.asarray(self.column('runs', 'failed')[runs], dtype=float)
+        executed = passed + failed
+        rates = np.divide(passed * 100, executed, out=np.zeros_like(passed), where=executed > 0)
+        return ts, np.round(rates, 1)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Lịch sử các lần chạy test (columnar)')
+    parser.add_argument('--store', default=DEFAULT_HISTORY_DIR, help='thư mục lịch sử')
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help='ghi nối báo cáo jest --json vào lịch sử')
+    ingest.add_argument('reports', nargs='+')
+    trend = sub.add_parser('trend', help='vẽ biểu đồ pass rate theo thời gian')
+    trend.add_argument('--output', default='pass_rate_trend_chart.png')
+    args = parser.parse_args(argv)
+
+    store = RunHistoryStore(args.store)
+    if args.command == 'ingest':
+        for report in args.reports:
+            run = store.append_report(report)
+            if run is None:
+                print(f"   ⏭️ {report}: lần chạy này đã có trong lịch sử, bỏ qua")
+            else:
+                print(f"   ✅ {report} -> run #{run}")
+        print(f"📚 Lịch sử: {store.num_runs} lần chạy, {store.meta['rows']['tests']} kết quả test")
+    else:
+        from test_analytics_dashboard import TestAnalyticsCharts
+
+        analytics = TestAnalyticsCharts()
+        analytics.history = store
+        analytics.create_pass_rate_trend_chart(args.output)
+        print(f"   ✅ Đã lưu: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Bản tổng hợp có thể gộp (mergeable) cho các lần chạy Jest chia shard.
+
+Khi chia các suite Backend ra nhiều node CI bằng `jest --shard=i/N`, mỗi node
+tạo một ShardSummary từ báo cáo của mình:
+
+    npx jest --shard=1/4 --json --outputFile=shard-1.json
+    python shard_summary.py summarize shard-1.json -o shard-1.summary.json
+
+rồi gộp tất cả thành một view duy nhất cho dashboard:
+
+    python shard_summary.py merge shard-*.summary.json -o merged.summary.json
+    python test_analytics_dashboard.py --summaries shard-*.summary.json
+
+Phép gộp có tính kết hợp và giao hoán. Số đếm (tổng và theo suite) khớp chính
+xác với lần chạy không chia shard. Quantile thời gian dùng sketch log-bucket
+(kiểu DDSketch): mỗi giá trị trả về sai lệch tương đối không quá
+`relative_accuracy` (mặc định 1%) so với giá trị thật ở cùng thứ hạng.
+Chỉ dùng thư viện chuẩn.
+"""
+
+import json
+import math
+import time
+from functools import reduce
+
+from jest_report import CHUNK_SIZE, JestReportReader, JestRunSummary
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+SUMMARY_FORMAT = 'shard-summary/1'
+
+
+class QuantileSketch:
+    """
+    Sketch quantile log-bucket: giá trị x > 0 rơi vào bucket ceil(log_gamma(x)),
+    gamma = (1 + a) / (1 - a). Gộp hai sketch = cộng số đếm từng bucket.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}       # chỉ số bucket -> số giá trị
+        self.zero_count = 0     # giá trị <= 0 (test chạy dưới 1 ms)
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Gộp `other` vào sketch này (cùng relative_accuracy)"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Không thể gộp sketch có relative_accuracy khác nhau')
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def quantile(self, q):
+        """Giá trị ở thứ hạng floor(q * (count - 1)), sai số tương đối <= relative_accuracy"""
+        if not self.count:
+            return None
+        rank = math.floor(q * (self.count - 1))
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'buckets': {str(index): count for index, count in sorted(self.buckets.items())},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
+
+
+class ShardSummary(JestRunSummary):
+    """
+    JestRunSummary không giữ thời gian từng test, thay bằng sketch quantile
+    (toàn bộ và theo suite) để kích thước không phụ thuộc số test.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        super().__init__(keep_durations=False)
+        self.relative_accuracy = relative_accuracy
+        self.shards = 1
+        self.duration_sketch = QuantileSketch(relative_accuracy)
+        self.suite_sketches = {}    # suite -> QuantileSketch thời gian test
+
+    def add(self, result):
+        super().add(result)
+        if result.duration is not None:
+            self.duration_sketch.add(result.duration)
+            sketch = self.suite_sketches.get(result.suite)
+            if sketch is None:
+                sketch = self.suite_sketches[result.suite] = QuantileSketch(self.relative_accuracy)
+            sketch.add(result.duration)
+
+    def merge(self, other):
+        """Gộp hai summary thành summary mới (không thay đổi đầu vào)"""
+        merged = ShardSummary(self.relative_accuracy)
+        merged.shards = 0
+        return merged.absorb(self).absorb(other)
+
+    def absorb(self, other):
+        """Cộng dồn `other` vào summary này"""
+        self.passed += other.passed
+        self.failed += other.failed
+        self.not_run += other.not_run
+        self.shards += other.shards
+        for suite, counts in other.suites.items():
+            total = self.suites.setdefault(suite, [0, 0, 0])
+            for i, count in enumerate(counts):
+                total[i] += count
+        for suite, duration in other.suite_durations.items():
+            self.suite_durations[suite] = self.suite_durations.get(suite, 0) + duration
+        for suite, sketch in other.suite_sketches.items():
+            target = self.suite_sketches.get(suite)
+            if target is None:
+                target = self.suite_sketches[suite] = QuantileSketch(self.relative_accuracy)
+            target.merge(sketch)
+        self.duration_sketch.merge(other.duration_sketch)
+        if other.start_time is not None:
+            self.start_time = (other.start_time if self.start_time is None
+                               else min(self.start_time, other.start_time))
+        return self
+
+    __add__ = merge
+
+    def duration_quantiles(self, quantiles=(0.5, 0.95, 0.99)):
+        return [self.duration_sketch.quantile(q) for q in quantiles]
+
+    def to_dict(self):
+        return {
+            'format': SUMMARY_FORMAT,
+            'shards': self.shards,
+            'passed': self.passed,
+            'failed': self.failed,
+            'not_run': self.not_run,
+            'start_time': self.start_time,
+            'suites': self.suites,
+            'suite_durations': self.suite_durations,
+            'duration_sketch': self.duration_sketch.to_dict(),
+            'suite_sketches': {suite: sketch.to_dict() for suite, sketch in self.suite_sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format') != SUMMARY_FORMAT:
+            raise ValueError(f"Không phải file shard summary ({SUMMARY_FORMAT})")
+        duration_sketch = QuantileSketch.from_dict(data['duration_sketch'])
+        summary = cls(duration_sketch.relative_accuracy)
+        summary.shards = data['shards']
+        summary.passed = data['passed']
+        summary.failed = data['failed']
+        summary.not_run = data['not_run']
+        summary.start_time = data['start_time']
+        summary.suites = {suite: list(counts) for suite, counts in data['suites'].items()}
+        summary.suite_durations = dict(data['suite_durations'])
+        summary.duration_sketch = duration_sketch
+        summary.suite_sketches = {suite: QuantileSketch.from_dict(sketch)
+                                  for suite, sketch in data['suite_sketches'].items()}
+        return summary
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def summarize_shard(path, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, chunk_size=CHUNK_SIZE):
+    """Đọc streaming báo cáo `jest --json` của một shard và trả về ShardSummary"""
+    summary = ShardSummary(relative_accuracy)
+    reader = JestReportReader(path, chunk_size, on_suite=summary.add_suite)
+    for result in reader:
+        summary.add(result)
+    summary.start_time = reader.run_info.get('startTime')
+    return summary
+
+
+def merge_summaries(summaries, relative_accuracy=None):
+    """
+    Gộp nhiều ShardSummary (thứ tự bất kỳ cho cùng kết quả), cộng dồn tại chỗ.
+    relative_accuracy mặc định lấy theo summary đầu tiên (các shard phải cùng giá trị).
+    """
+    summaries = iter(summaries)
+    first = next(summaries, None)
+    if relative_accuracy is None:
+        relative_accuracy = first.relative_accuracy if first is not None else DEFAULT_RELATIVE_ACCURACY
+    merged = ShardSummary(relative_accuracy)
+    merged.shards = 0
+    if first is None:
+        return merged
+    return reduce(ShardSummary.absorb, summaries, merged.absorb(first))
+
+
+def benchmark(num_shards=100, num_suites=400, tests_per_suite=50):
+    """So sánh gộp `num_shards` shard với lần chạy không chia shard"""
+    import os
+    import random
+    import tempfile
+
+    from jest_report import _write_benchmark_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'report.json')
+        _write_benchmark_report(path, num_suites, tests_per_suite)
+
+        # Chia suite cho các shard giống `jest --shard`, mỗi shard đọc phần của mình
+        full = summarize_shard(path)
+        shards = [ShardSummary() for _ in range(num_shards)]
+        durations = []
+        shard_of = {}
+        reader = JestReportReader(path, on_suite=lambda suite, info:
+                                  shards[shard_of[suite]].add_suite(suite, info))
+        for result in reader:
+            shard = shard_of.setdefault(result.suite, len(shard_of) % num_shards)
+            shards[shard].add(result)
+            durations.append(result.duration)
+
+    payloads = [json.dumps(shard.to_dict()) for shard in shards]
+    started = time.perf_counter()
+    loaded = [ShardSummary.from_dict(json.loads(p)) for p in payloads]
+    parsed = time.perf_counter()
+    merged = merge_summaries(loaded)
+    elapsed = time.perf_counter() - parsed
+
+    random.shuffle(shards)
+    shuffled = merge_summaries(shards)
+    assert (merged.passed, merged.failed, merged.not_run, merged.suites) == \
+           (full.passed, full.failed, full.not_run, full.suites)
+    assert merged.suite_durations == full.suite_durations
+    assert shuffled.to_dict() == merged.to_dict()
+
+    durations.sort()
+    print(f'   • đọc {num_shards} shard summary: {(parsed - started) * 1000:.1f} ms, '
+          f'{sum(map(len, payloads)) / num_shards / 1024:.1f} KiB/shard')
+    print(f'   • gộp {num_shards} shard: {elapsed * 1000:.1f} ms')
+    print(f'   • số đếm khớp chính xác: {merged.total} test, {len(merged.suites)} suite')
+    for q in (0.5, 0.95, 0.99):
+        exact = durations[math.floor(q * (len(durations) - 1))]
+        estimate = merged.duration_sketch.quantile(q)
+        error = abs(estimate - exact) / exact if exact else 0.0
+        print(f'   • p{q * 100:g}: thật {exact} ms, sketch {estimate:.2f} ms '
+              f'(sai số {error:.2%}, giới hạn {merged.relative_accuracy:.0%})')
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tổng hợp và gộp kết quả Jest chia shard')
+    parser.add_argument('--benchmark', action='store_true', help='đo gộp 100 shard')
+    sub = parser.add_subparsers(dest='command')
+    summarize_cmd = sub.add_parser('summarize', help='tạo summary từ báo cáo jest --json của một shard')
+    summarize_cmd.add_argument('report')
+    summarize_cmd.add_argument('-o', '--output', required=True)
+    summarize_cmd.add_argument('--relative-accuracy', type=float, default=DEFAULT_RELATIVE_ACCURACY)
+    merge_cmd = sub.add_parser('merge', help='gộp nhiều file summary')
+    merge_cmd.add_argument('summaries', nargs='+')
+    merge_cmd.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print('⏱️ Benchmark gộp shard summary:')
+        benchmark()
+    elif args.command == 'summarize':
+        summary = summarize_shard(args.report, args.relative_accuracy)
+        summary.save(args.output)
+        print(f"✅ Đã lưu: {args.output} ({summary.total} test, {len(summary.suites)} suite)")
+    elif args.command == 'merge':
+        summary = merge_summaries(ShardSummary.load(path) for path in args.summaries)
+        summary.save(args.output)
+        print(f"✅ Đã gộp {summary.shards} shard: {args.output} "
+              f"({summary.total} test, pass rate {summary.pass_rate()}%)")
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
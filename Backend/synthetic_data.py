@@ -0,0 +1,722 @@
+"""
+Sinh dữ liệu giả lập có seed để chạy các công cụ analytics ở quy mô thật.
+
+Mỗi định dạng được sinh theo batch bằng NumPy và ghi thẳng ra đĩa, không dựng
+cả file trong bộ nhớ. Generator dừng khi đủ `--count` bản ghi, hoặc khi file
+đạt `--size` (ví dụ 10GB); gần tới --size batch được thu nhỏ nên file chỉ vượt
+khoảng một bản ghi. Cùng seed và tham số cho ra cùng nội dung từng byte; với
+--count, file nhỏ hơn là tiền tố (theo batch) của file lớn hơn.
+
+Định dạng (bản ghi = đơn vị của --count):
+    jest       báo cáo `jest --json` (suite). --runs R: R lần chạy cùng bộ suite
+               vào một thư mục, cho lịch sử / flaky / run diff
+    shards     N báo cáo `jest --shard=i/N --json` (suite chia vòng tròn)
+    coverage   coverage-final.json hoặc lcov.info, theo phần mở rộng (file nguồn)
+    defects    export issue tracker: .csv kiểu Jira, .jsonl kiểu GitHub (defect)
+    products   mongoexport collection products theo schema Product (sản phẩm)
+    orders     mongoexport collection orders theo schema Order (order), kèm
+               <tên>_products.jsonl có soldCount khớp với order, trừ --mismatch
+               tỷ lệ sản phẩm bị lệch
+    revenues   mongoexport collection revenues theo schema Revenue (document)
+    all        mọi định dạng trên vào một thư mục, --size áp dụng cho từng file
+
+Cách dùng:
+    python synthetic_data.py jest report.json --size 10GB --seed 7
+    python synthetic_data.py jest history/ --runs 90 --count 2000
+    python synthetic_data.py shards shards/ --shards 8 --size 2GB
+    python synthetic_data.py coverage coverage/lcov.info --count 50000
+    python synthetic_data.py orders orders.jsonl --size 10GB --products 200000
+    python synthetic_data.py all data/ --size 1GB
+"""
+
+import csv
+import io
+import json
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+from jest_report import suite_display_name
+
+BUFFER_SIZE = 1 << 20
+SIZE_PROBE = 8                  # số bản ghi của batch đầu khi chạy theo --size
+BASE_TIME_MS = 1672531200000    # 2023-01-01T00:00:00Z
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 10 ** 3, 'KB': 10 ** 3, 'KIB': 2 ** 10, 'M': 10 ** 6, 'MB': 10 ** 6,
+              'MIB': 2 ** 20, 'G': 10 ** 9, 'GB': 10 ** 9, 'GIB': 2 ** 30, 'T': 10 ** 12, 'TB': 10 ** 12,
+              'TIB': 2 ** 40}
+DEFAULT_COUNTS = {'jest': 200, 'shards': 200, 'coverage': 500, 'defects': 100000, 'products': 10000,
+                  'orders': 100000, 'revenues': 600}
+# Mỗi định dạng một luồng ngẫu nhiên riêng: thêm định dạng không làm đổi dữ liệu cũ
+STREAMS = {'jest': 1, 'outcome': 2, 'coverage': 3, 'defects': 4, 'products': 5, 'orders': 6,
+           'revenues': 7, 'popularity': 8}
+# Tiền tố ObjectId (4 byte timestamp) của từng collection
+OID_PREFIX = {'products': 0x63b0c000, 'orders': 0x63b0d000, 'users': 0x63b0e000, 'items': 0x63b0f000,
+              'revenues': 0x63b10000}
+
+TEST_MODULES = ('cartController', 'orderController', 'searchController', 'userProfile', 'authorizationService',
+                'productController', 'reviewController', 'voucherController', 'revenueController',
+                'feedbackController', 'uploadController', 'userController', 'emailService', 'bookstore')
+TEST_ACTIONS = ('addToCart', 'removeFromCart', 'checkout', 'filter', 'topAuthors', 'top10', 'login', 'register',
+                'updateProfile', 'createOrder', 'cancelOrder', 'applyVoucher', 'getRevenue', 'uploadImage',
+                'postReview', 'getFavorites')
+TEST_CASES = ('should return 200 with valid data', 'should return 400 when body is missing',
+              'should return 401 without token', 'should return 404 for unknown id', 'should paginate results',
+              'should sort by price', 'should handle database errors', 'should validate input',
+              'should not call next() twice', 'should update soldCount')
+SOURCE_FILES = {'controllers': ('feedbackController', 'orderController', 'productController', 'revenueController',
+                                'reviewController', 'searchController', 'uploadController', 'userController',
+                                'voucherController', 'cartController', 'authorizationController'),
+                'services': ('emailService', 'verityService', 'authorizationService', 'paymentService'),
+                'models': ('Feedback', 'Order', 'Product', 'Revenue', 'Review', 'Unc', 'User', 'Voucher')}
+PRODUCT_TYPES = ('V', 'K', 'G', 'T', 'A', 'N', 'C', 'I', 'Y', 'D')
+PUBLISHERS = ('NXB Trẻ', 'NXB Kim Đồng', 'NXB Tổng hợp TP.HCM', 'NXB Lao Động', 'NXB Thế Giới', 'NXB Hội Nhà Văn',
+              'NXB Giáo Dục', 'NXB Phụ Nữ')
+SUPPLIERS = ('First News', 'Nhã Nam', 'Alpha Books', 'Đông A', 'Fahasa', 'Thái Hà Books', 'Skybooks')
+FAMILY_NAMES = ('Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ',
+                'Ngô', 'Dương', 'Lý')
+MIDDLE_NAMES = ('Văn', 'Thị', 'Minh', 'Ngọc', 'Thanh', 'Đức', 'Hoàng', 'Quốc', 'Thu', 'Gia')
+GIVEN_NAMES = ('An', 'Bình', 'Châu', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hoa', 'Hùng', 'Khánh', 'Lan',
+               'Linh', 'Long', 'Mai', 'Nam', 'Phương', 'Quân', 'Sơn', 'Tâm', 'Thảo', 'Trang', 'Tuấn', 'Vy', 'Yến')
+STREETS = ('Lê Lợi', 'Nguyễn Huệ', 'Hai Bà Trưng', 'Trần Hưng Đạo', 'Lý Thường Kiệt', 'Điện Biên Phủ',
+           'Võ Văn Tần', 'Cách Mạng Tháng 8', 'Nguyễn Trãi', 'Phan Đình Phùng')
+CITIES = ('Quận 1, TP.HCM', 'Quận 3, TP.HCM', 'Thủ Đức, TP.HCM', 'Ba Đình, Hà Nội', 'Cầu Giấy, Hà Nội',
+          'Hải Châu, Đà Nẵng', 'Ninh Kiều, Cần Thơ', 'TP. Huế')
+TITLE_WORDS = ('sách', 'cuộc', 'sống', 'tư', 'duy', 'nhân', 'tâm', 'đắc', 'kinh', 'tế', 'học', 'lịch', 'sử',
+               'việt', 'nam', 'thế', 'giới', 'tình', 'yêu', 'hạnh', 'phúc', 'bí', 'mật', 'thành', 'công', 'kỹ',
+               'năng', 'giao', 'tiếp', 'tiếng', 'anh', 'trẻ', 'em', 'tuổi', 'thơ', 'hành', 'trình', 'khám', 'phá',
+               'tâm', 'lý', 'nghệ', 'thuật', 'lãnh', 'đạo', 'đầu', 'tư', 'tài', 'chính', 'sức', 'khỏe', 'du', 'ký')
+ORDER_STATUSES = ('pending', 'confirmed', 'shipping', 'delivered', 'cancelled', 'returned')
+ORDER_STATUS_WEIGHTS = (0.08, 0.07, 0.1, 0.68, 0.05, 0.02)
+NOT_SOLD = ('cancelled', 'returned')
+PAYMENT_TYPES = ('cod', 'momo', 'vnpay', 'banking')
+PAYMENT_WEIGHTS = (0.6, 0.2, 0.12, 0.08)
+JIRA_PRIORITIES = ('Blocker', 'Critical', 'Major', 'Normal', 'Minor', 'Trivial')
+JIRA_STATUSES = ('Open', 'In Progress', 'Reopened', 'Resolved', 'Closed', 'Done')
+GITHUB_SEVERITIES = ('S1', 'S2', 'S3', 'S4')
+DEFECT_SYMPTOMS = ('returns 500', 'wrong total', 'timeout', 'missing validation', 'duplicate request',
+                   'stale cache', 'wrong sort order', 'null pointer', 'slow query', 'broken layout')
+
+
+def parse_size(text):
+    """'10GB' -> 10000000000, '512MiB' -> 536870912, '1e6' -> 1000000"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?(?:e\d+)?)\s*([a-zA-Z]*)\s*', str(text))
+    if not match or match.group(2).upper() not in SIZE_UNITS:
+        raise ValueError(f'kích thước không hợp lệ: {text}')
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def parse_count(text):
+    return int(float(text))
+
+
+def _rng(seed, stream, *extra):
+    return np.random.default_rng([seed, STREAMS[stream], *extra])
+
+
+def _hash(seed, ids, salt=0):
+    """Hash 64 bit (splitmix64) của từng id: thuộc tính chỉ phụ thuộc (seed, id), không cần giữ bảng"""
+    with np.errstate(over='ignore'):
+        x = np.asarray(ids, dtype=np.uint64) + np.uint64((seed * 0x9E3779B9 + salt * 0x85EBCA6B) & (2 ** 64 - 1))
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def _oids(collection, ids):
+    prefix = OID_PREFIX[collection]
+    return [f'{prefix:08x}{i:016x}' for i in np.asarray(ids).tolist()]
+
+
+def _iso(ms):
+    """Mảng epoch millisecond -> chuỗi ISO 8601 UTC như mongoexport"""
+    return [text + 'Z' for text in np.datetime_as_string(np.asarray(ms, dtype='int64').astype('datetime64[ms]'),
+                                                           unit='ms').tolist()]
+
+
+def _batch(batch, done, written, count, size):
+    """
+    Số bản ghi của batch tiếp theo (0 = đã đủ --count hoặc --size). Với --size,
+    batch đầu chỉ có SIZE_PROBE bản ghi để đo cỡ bản ghi, các batch sau được
+    thu nhỏ theo phần còn thiếu nên file nhỏ không bị một batch lớn làm vượt --size.
+    """
+    if size is not None:
+        if written >= size:
+            return 0
+        if done:
+            batch = min(batch, max(1, math.ceil((size - written) * done / written)))
+        else:
+            batch = min(batch, SIZE_PROBE)
+    if count is not None:
+        return max(0, min(batch, count - done))
+    return batch
+
+
+class Output:
+    """File ghi nhị phân có bộ đếm byte và số bản ghi; `separator` nối các bản ghi"""
+
+    def __init__(self, path, separator=''):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.separator = separator
+        self.bytes = 0
+        self.records = 0
+        self.fp = open(path, 'wb', buffering=BUFFER_SIZE)
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.fp.write(data)
+        self.bytes += len(data)
+
+    def write_records(self, records):
+        if not records:
+            return
+        text = self.separator.join(records)
+        self.write(self.separator + text if self.records else text)
+        self.records += len(records)
+
+    def stats(self):
+        return {'path': self.path, 'records': self.records, 'bytes': self.bytes}
+
+    def close(self):
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ---------------------------------------------------------------- Jest
+
+class _JestReport:
+    """Một báo cáo `jest --json` đang ghi: các số đếm top-level được ghi sau testResults"""
+
+    def __init__(self, path, start_time):
+        self.out = Output(path, separator=',')
+        self.counts = dict.fromkeys(('numFailedTestSuites', 'numFailedTests', 'numPassedTestSuites',
+                                     'numPassedTests', 'numPendingTests', 'numTotalTestSuites', 'numTotalTests'), 0)
+        self.out.write('{"startTime":%d,"testResults":[' % start_time)
+
+    def close(self):
+        counts = self.counts
+        footer = ','.join(f'"{key}":{value}' for key, value in counts.items())
+        self.out.write(f'],{footer},"success":{"false" if counts["numFailedTests"] else "true"},'
+                       f'"wasInterrupted":false}}')
+        self.out.close()
+        return self.out.stats()
+
+
+def _jest_suites(structure, outcome, first, count):
+    """
+    `count` suite bắt đầu từ suite thứ `first`. Cấu trúc (tên suite / test, tỷ
+    lệ lỗi của suite, thời gian cơ sở) lấy từ `structure`, nên giống nhau giữa
+    các lần chạy; kết quả từng test lấy từ `outcome` của lần chạy.
+    Trả về [(văn bản suite, số test passed / failed / pending, thời gian ms)].
+    """
+    tests = np.clip(np.round(structure.lognormal(2.8, 0.6, count)), 1, 400).astype(np.int64)
+    failure_rate = structure.choice((0.002, 0.03, 0.2), count, p=(0.8, 0.15, 0.05))
+    base = structure.lognormal(2.5, 1.0, count)
+    total = int(tests.sum())
+    draws = outcome.random(total)
+    jitter = outcome.lognormal(0, 0.3, total)
+    suite_of = np.repeat(np.arange(count), tests)
+    failed = draws < failure_rate[suite_of]
+    pending = draws > 0.99
+    durations = np.maximum(np.round(base[suite_of] * jitter), 1).astype(np.int64).tolist()
+    failed, pending = failed.tolist(), pending.tolist()
+
+    suites = []
+    position = 0
+    for k in range(count):
+        index = first + k
+        module = TEST_MODULES[index % len(TEST_MODULES)]
+        part = index // len(TEST_MODULES)
+        kind = 'e2e' if module == 'bookstore' else 'unit'
+        filename = f'{module}.{kind}.test.js' if not part else f'{module}.part{part}.{kind}.test.js'
+        display = suite_display_name(filename)
+        records = []
+        counts = [0, 0, 0]
+        elapsed = 0
+        message = ''
+        for j in range(int(tests[k])):
+            action = TEST_ACTIONS[(index * 7 + j // 4) % len(TEST_ACTIONS)]
+            case = f'{TEST_CASES[(index + j) % len(TEST_CASES)]} #{j}'
+            test = position + j
+            if pending[test] and not failed[test]:
+                status, duration, failures = 'pending', 'null', '[]'
+                counts[2] += 1
+            else:
+                duration = durations[test]
+                elapsed += duration
+                if failed[test]:
+                    status = 'failed'
+                    counts[1] += 1
+                    failures = '[%s]' % json.dumps(
+                        'Error: expect(received).toBe(expected) // Object.is equality\n\n'
+                        f'Expected: 200\nReceived: 500\n    at Object.<anonymous> '
+                        f'(/app/Backend/test/{filename}:{12 + j * 9}:{31})', ensure_ascii=False)
+                    message = message or f'  ● {display} › {action} › {case}'
+                else:
+                    status, failures = 'passed', '[]'
+                    counts[0] += 1
+            records.append(f'{{"ancestorTitles":["{display}","{action}"],"duration":{duration},'
+                           f'"failureMessages":{failures},"fullName":"{display} {action} {case}",'
+                           f'"location":null,"status":"{status}","title":"{case}"}}')
+        position += int(tests[k])
+        elapsed += 40
+        suites.append((f'{{"assertionResults":[{",".join(records)}],"endTime":{{end}},'
+                       f'"message":{json.dumps(message, ensure_ascii=False)},'
+                       f'"name":"/app/Backend/test/{filename}","startTime":{{start}},'
+                       f'"status":"{"failed" if counts[1] else "passed"}","summary":""}}', counts, elapsed))
+    return suites
+
+
+def _write_suites(reports, count, size, seed, run, batch=100):
+    """Ghi suite vòng tròn vào các báo cáo (1 báo cáo = jest, N = shards) tới khi đủ count / size"""
+    structure = _rng(seed, 'jest')
+    outcome = _rng(seed, 'outcome', run)
+    clocks = [None] * len(reports)
+    done = 0
+    while True:
+        n = _batch(batch, done, sum(report.out.bytes for report in reports), count, size)
+        if not n:
+            break
+        pending = [[] for _ in reports]
+        for k, (text, (passed, failed, skipped), elapsed) in enumerate(_jest_suites(structure, outcome, done, n)):
+            shard = (done + k) % len(reports)
+            report = reports[shard]
+            start = clocks[shard] if clocks[shard] is not None else report.start_time
+            clocks[shard] = start + elapsed
+            pending[shard].append(text.replace('{start}', str(start)).replace('{end}', str(start + elapsed)))
+            counts = report.counts
+            counts['numTotalTestSuites'] += 1
+            counts['numFailedTestSuites' if failed else 'numPassedTestSuites'] += 1
+            counts['numPassedTests'] += passed
+            counts['numFailedTests'] += failed
+            counts['numPendingTests'] += skipped
+            counts['numTotalTests'] += passed + failed + skipped
+        for report, texts in zip(reports, pending):
+            report.out.write_records(texts)
+        done += n
+    return [report.close() for report in reports]
+
+
+def _open_report(path, start_time):
+    report = _JestReport(path, start_time)
+    report.start_time = start_time
+    return report
+
+
+def write_jest(path, count=None, size=None, seed=0, runs=1, interval_hours=24):
+    """
+    Báo cáo `jest --json`. runs > 1: `path` là thư mục, mỗi lần chạy một file
+    jest-report-NNNN.json (cùng bộ suite, kết quả khác nhau, cách nhau interval_hours).
+    """
+    if runs <= 1:
+        return _write_suites([_open_report(path, BASE_TIME_MS)], count, size, seed, 0)
+    stats = []
+    for run in range(runs):
+        report = _open_report(os.path.join(path, f'jest-report-{run:04d}.json'),
+                              BASE_TIME_MS + run * interval_hours * 3600000)
+        stats += _write_suites([report], count, size, seed, run)
+    return stats
+
+
+def write_shards(directory, shards=4, count=None, size=None, seed=0):
+    """N báo cáo `jest --shard=i/N --json`; --count / --size tính trên tổng các shard"""
+    reports = [_open_report(os.path.join(directory, f'shard-{i + 1}.json'), BASE_TIME_MS)
+               for i in range(shards)]
+    return _write_suites(reports, count, size, seed, 0)
+
+
+# ---------------------------------------------------------------- coverage
+
+def _source_path(index):
+    """File nguồn thứ `index`: các file thật của Backend trước, sau đó là các package giả lập"""
+    names = [(directory, name) for directory, files in SOURCE_FILES.items() for name in files]
+    directory, name = names[index % len(names)]
+    package = index // len(names)
+    root = '/app/Backend' if not package else f'/app/Backend/packages/pkg{package}'
+    return f'{root}/{directory}/{name}.js'
+
+
+def _coverage_files(rng, first, count):
+    """(đường dẫn, số dòng của statement, lượt chạy statement, lượt chạy function, lượt chạy nhánh 2 chiều)"""
+    statements = np.clip(np.round(rng.lognormal(4.6, 0.8, count)), 5, 5000).astype(np.int64)
+    coverage = rng.beta(5, 2, count)
+    files = []
+    for k in range(count):
+        n = int(statements[k])
+        lines = np.cumsum(rng.integers(1, 4, n))
+        covered = rng.random(n) < coverage[k]
+        hits = np.where(covered, rng.geometric(0.05, n), 0)
+        functions = max(1, n // 8)
+        function_hits = np.where(rng.random(functions) < coverage[k], rng.geometric(0.1, functions), 0)
+        branches = n // 4
+        branch_hits = np.where(rng.random((branches, 2)) < coverage[k] * 0.9, rng.geometric(0.1, (branches, 2)), 0)
+        files.append((_source_path(first + k), lines.tolist(), hits.tolist(), function_hits.tolist(),
+                      branch_hits.tolist()))
+    return files
+
+
+def _istanbul_entry(path, lines, hits, function_hits, branch_hits):
+    def location(line, start=4, end=40):
+        return f'{{"start":{{"line":{line},"column":{start}}},"end":{{"line":{line},"column":{end}}}}}'
+
+    statement_map = ','.join(f'"{i}":{location(line)}' for i, line in enumerate(lines))
+    fn_map = ','.join(f'"{i}":{{"name":"fn{i}","decl":{location(lines[i * 8], 9, 20)},'
+                      f'"loc":{location(lines[i * 8], 0, 80)},"line":{lines[i * 8]}}}'
+                      for i in range(len(function_hits)))
+    branch_map = ','.join(f'"{i}":{{"loc":{location(lines[i * 4])},"type":"if",'
+                          f'"locations":[{location(lines[i * 4])},{location(lines[i * 4])}],"line":{lines[i * 4]}}}'
+                          for i in range(len(branch_hits)))
+    s = ','.join(f'"{i}":{value}' for i, value in enumerate(hits))
+    f = ','.join(f'"{i}":{value}' for i, value in enumerate(function_hits))
+    b = ','.join(f'"{i}":[{taken},{skipped}]' for i, (taken, skipped) in enumerate(branch_hits))
+    return (f'{json.dumps(path)}:{{"path":{json.dumps(path)},"statementMap":{{{statement_map}}},'
+            f'"fnMap":{{{fn_map}}},"branchMap":{{{branch_map}}},"s":{{{s}}},"f":{{{f}}},"b":{{{b}}}}}')
+
+
+def _lcov_record(path, lines, hits, function_hits, branch_hits):
+    out = ['TN:', f'SF:{path}']
+    out += [f'FN:{lines[i * 8]},fn{i}' for i in range(len(function_hits))]
+    out += [f'FNDA:{value},fn{i}' for i, value in enumerate(function_hits)]
+    out += [f'FNF:{len(function_hits)}', f'FNH:{sum(1 for value in function_hits if value)}']
+    out += [f'DA:{line},{value}' for line, value in zip(lines, hits)]
+    out += [f'LF:{len(hits)}', f'LH:{sum(1 for value in hits if value)}']
+    for i, (taken, other) in enumerate(branch_hits):
+        executed = taken or other
+        out.append(f'BRDA:{lines[i * 4]},{i},0,{taken if executed else "-"}')
+        out.append(f'BRDA:{lines[i * 4]},{i},1,{other if executed else "-"}')
+    out += [f'BRF:{2 * len(branch_hits)}', f'BRH:{sum((a > 0) + (b > 0) for a, b in branch_hits)}',
+            'end_of_record', '']
+    return '\n'.join(out)
+
+
+def write_coverage(path, count=None, size=None, seed=0, batch=50):
+    """coverage-final.json của Istanbul, hoặc lcov.info nếu đuôi file là .info"""
+    lcov = path.endswith('.info')
+    rng = _rng(seed, 'coverage')
+    with Output(path, separator='' if lcov else ',') as out:
+        if not lcov:
+            out.write('{')
+        while True:
+            n = _batch(batch, out.records, out.bytes, count, size)
+            if not n:
+                break
+            files = _coverage_files(rng, out.records, n)
+            out.write_records([(_lcov_record if lcov else _istanbul_entry)(*item) for item in files])
+        if not lcov:
+            out.write('}')
+        return out.stats()
+
+
+# ---------------------------------------------------------------- defect
+
+def write_defects(path, count=None, size=None, seed=0, batch=20000):
+    """Export defect: .csv như Jira (Issue key, Priority, Status, Component/s), .jsonl như GitHub"""
+    rng = _rng(seed, 'defects')
+    components = [suite_display_name(f'{module}.{"e2e" if module == "bookstore" else "unit"}.test.js')
+                  for module in TEST_MODULES]
+    jsonl = path.endswith(('.jsonl', '.json'))
+    with Output(path) as out:
+        if not jsonl:
+            out.write('Issue key,Summary,Priority,Status,Component/s,Created\r\n')
+        while True:
+            n = _batch(batch, out.records, out.bytes, count, size)
+            if not n:
+                break
+            first = out.records
+            component = rng.integers(0, len(components), n).tolist()
+            symptom = rng.integers(0, len(DEFECT_SYMPTOMS), n).tolist()
+            action = rng.integers(0, len(TEST_ACTIONS), n).tolist()
+            priority = rng.choice(len(JIRA_PRIORITIES), n, p=(0.03, 0.07, 0.25, 0.4, 0.2, 0.05))
+            closed = rng.random(n) < 0.7
+            status = np.where(closed, rng.choice((3, 4, 5), n), rng.choice((0, 1, 2), n, p=(0.6, 0.3, 0.1))).tolist()
+            created = _iso(BASE_TIME_MS + (first + np.arange(n)) * 600000 + rng.integers(0, 600000, n))
+            priority = priority.tolist()
+            if jsonl:
+                out.write_records([json.dumps({
+                    'number': first + i + 1,
+                    'title': f'[{components[component[i]]}] {TEST_ACTIONS[action[i]]} {DEFECT_SYMPTOMS[symptom[i]]}',
+                    'state': 'closed' if status[i] >= 3 else 'open',
+                    'severity': GITHUB_SEVERITIES[min(priority[i], 5) * 4 // 6],
+                    'component': components[component[i]], 'created_at': created[i]}, ensure_ascii=False) + '\n'
+                    for i in range(n)])
+            else:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([f'BOOK-{first + i + 1}',
+                                  f'{TEST_ACTIONS[action[i]]} {DEFECT_SYMPTOMS[symptom[i]]}, module {components[component[i]]}',
+                                  JIRA_PRIORITIES[priority[i]], JIRA_STATUSES[status[i]], components[component[i]],
+                                  created[i]] for i in range(n))
+                out.write(buffer.getvalue())
+                out.records += n
+        return out.stats()
+
+
+# ---------------------------------------------------------------- products / orders
+
+def product_prices(seed, ids):
+    """Giá bán của sản phẩm: hàm của (seed, id) nên order không cần bảng sản phẩm"""
+    return ((_hash(seed, ids, 1) % np.uint64(470)).astype(np.int64) + 30) * 1000
+
+
+def _product_records(rng, seed, first, count, sold=None, mismatch=0.0):
+    ids = np.arange(first, first + count)
+    prices = product_prices(seed, ids)
+    discount = rng.choice((0, 5, 10, 15, 20, 25, 30, 40, 50), count)
+    original = (np.round(prices / (1 - discount / 100) / 1000) * 1000).astype(np.int64)
+    words = rng.integers(0, len(TITLE_WORDS), (count, 6)).tolist()
+    lengths = rng.integers(2, 7, count).tolist()
+    author = rng.integers(0, 50000, count).tolist()
+    if sold is None:
+        sold_count = np.round(rng.lognormal(4, 1.5, count)).astype(np.int64)
+    else:
+        sold_count = sold[first:first + count].copy()
+        # Một phần sản phẩm có soldCount lệch so với order (kiểm tra phần đối chiếu)
+        sold_count += np.where(rng.random(count) < mismatch, rng.integers(1, 50, count), 0)
+    rating = np.round(rng.uniform(3, 5, count), 1).tolist()
+    reviews = rng.integers(0, 5000, count).tolist()
+    kind = rng.integers(0, len(PRODUCT_TYPES), count).tolist()
+    pages = rng.integers(60, 900, count).tolist()
+    year = rng.integers(1990, 2025, count).tolist()
+    publisher = rng.integers(0, len(PUBLISHERS), count).tolist()
+    supplier = rng.integers(0, len(SUPPLIERS), count).tolist()
+    prices, original, discount, sold_count = (prices.tolist(), original.tolist(), discount.tolist(),
+                                              sold_count.tolist())
+    records = []
+    for i, oid in enumerate(_oids('products', ids)):
+        title = ' '.join(TITLE_WORDS[w] for w in words[i][:lengths[i]]).capitalize()
+        records.append(
+            f'{{"_id":{{"$oid":"{oid}"}},"imgSrc":"https://res.cloudinary.com/bookstore/image/upload/'
+            f'books/{first + i}.jpg","title":"{title}","author":"Tác giả {author[i]}",'
+            f'"price":{prices[i]},"originalPrice":{original[i]},"discount":{discount[i]},"rating":{rating[i]},'
+            f'"reviewsCount":{reviews[i]},"soldCount":{sold_count[i]},"features":[],"similarBooks":[],'
+            f'"sku":"BK{first + i:08d}","ageGroup":"Trên 16 tuổi","supplier":"{SUPPLIERS[supplier[i]]}",'
+            f'"publisher":"{PUBLISHERS[publisher[i]]}","publicationYear":{year[i]},"language":"Tiếng Việt",'
+            f'"weight":"{200 + pages[i] // 2} gr","dimensions":"20.5 x 14 cm","pages":{pages[i]},'
+            f'"binding":"Bìa mềm","description":"{title}.","type":"{PRODUCT_TYPES[kind[i]]}","__v":0}}\n')
+    return records
+
+
+def write_products(path, count=None, size=None, seed=0, sold=None, mismatch=0.0, batch=20000):
+    """Export collection products; sold: soldCount lấy từ order (xem write_orders)"""
+    rng = _rng(seed, 'products')
+    with Output(path) as out:
+        while True:
+            n = _batch(batch, out.records, out.bytes, count, size)
+            if not n:
+                break
+            out.write_records(_product_records(rng, seed, out.records, n, sold, mismatch))
+        return out.stats()
+
+
+def _user_fields(seed, users):
+    """Tên, điện thoại, email, địa chỉ cố định của từng user (hàm của seed, user id)"""
+    h = _hash(seed, users, 2)
+    parts = [(h >> np.uint64(shift)) % np.uint64(size) for shift, size in
+             ((0, len(FAMILY_NAMES)), (8, len(MIDDLE_NAMES)), (16, len(GIVEN_NAMES)), (24, len(STREETS)),
+              (32, len(CITIES)), (40, 300))]
+    family, middle, given, street, city, number = (part.astype(np.int64).tolist() for part in parts)
+    phone = (h % np.uint64(10 ** 8)).astype(np.int64).tolist()
+    return [(f'{FAMILY_NAMES[family[i]]} {MIDDLE_NAMES[middle[i]]} {GIVEN_NAMES[given[i]]}', f'09{phone[i]:08d}',
+             f'user{user}@example.com', f'{number[i] + 1} {STREETS[street[i]]}, {CITIES[city[i]]}')
+            for i, user in enumerate(np.asarray(users).tolist())]
+
+
+def write_orders(path, count=None, size=None, seed=0, products=10000, users=100000, orders_per_day=2000,
+                 mismatch=0.01, batch=20000):
+    """
+    Export collection orders: 1-5 sản phẩm / order theo độ phổ biến rank^-0.8,
+    createdAt tăng dần. Sau đó ghi <tên>_products.jsonl với soldCount = tổng
+    quantity của order không bị hủy / trả hàng (lệch ở `mismatch` tỷ lệ sản phẩm).
+    Với --size, số sản phẩm được bớt để file sản phẩm cũng không vượt --size.
+    """
+    if size is not None:
+        probe = _product_records(_rng(seed, 'products'), seed, 0, 64)
+        products = max(1, min(products, size * len(probe) // len(''.join(probe).encode('utf-8'))))
+    rng = _rng(seed, 'orders')
+    popularity = _rng(seed, 'popularity')
+    ranked = popularity.permutation(products)
+    cdf = np.cumsum(1 / np.arange(1, products + 1) ** 0.8)
+    cdf /= cdf[-1]
+    sold = np.zeros(products, dtype=np.int64)
+    not_sold = [ORDER_STATUSES.index(status) for status in NOT_SOLD]
+    clock = float(BASE_TIME_MS)
+    items_written = 0
+
+    with Output(path) as out:
+        while True:
+            n = _batch(batch, out.records, out.bytes, count, size)
+            if not n:
+                break
+            first = out.records
+            sizes = rng.integers(1, 6, n)
+            lines = int(sizes.sum())
+            items = ranked[np.minimum(np.searchsorted(cdf, rng.random(lines)), products - 1)]
+            quantities = rng.integers(1, 4, lines)
+            bounds = np.concatenate([[0], np.cumsum(sizes)])
+            subtotal = np.add.reduceat(quantities * product_prices(seed, items), bounds[:-1])
+            discount = np.where(rng.random(n) < 0.15, np.minimum(np.round(subtotal * 0.1, -3), 50000), 0)
+            status = rng.choice(len(ORDER_STATUSES), n, p=ORDER_STATUS_WEIGHTS)
+            payment = rng.choice(len(PAYMENT_TYPES), n, p=PAYMENT_WEIGHTS).tolist()
+            gaps = rng.exponential(86400000 / orders_per_day, n)
+            created = _iso(clock + np.cumsum(gaps))
+            clock += float(gaps.sum())
+            user_ids = rng.integers(0, users, n)
+            people = _user_fields(seed, user_ids)
+
+            kept = ~np.isin(np.repeat(status, sizes), not_sold)
+            np.add.at(sold, items[kept], quantities[kept])
+
+            product_oids = _oids('products', items)
+            item_oids = _oids('items', np.arange(items_written, items_written + lines))
+            items_written += lines
+            order_oids = _oids('orders', np.arange(first, first + n))
+            user_oids = _oids('users', user_ids)
+            quantities, bounds, total = quantities.tolist(), bounds.tolist(), (subtotal - discount).tolist()
+            discount, status = discount.astype(np.int64).tolist(), status.tolist()
+            records = []
+            for i in range(n):
+                name, phone, email, address = people[i]
+                products_json = ','.join(f'{{"productId":{{"$oid":"{product_oids[j]}"}},"quantity":{quantities[j]},'
+                                         f'"_id":{{"$oid":"{item_oids[j]}"}}}}'
+                                         for j in range(bounds[i], bounds[i + 1]))
+                records.append(
+                    f'{{"_id":{{"$oid":"{order_oids[i]}"}},"userId":{{"$oid":"{user_oids[i]}"}},"name":"{name}",'
+                    f'"phone":"{phone}","email":"{email}","address":"{address}","products":[{products_json}],'
+                    f'"type":"{PAYMENT_TYPES[payment[i]]}","status":"{ORDER_STATUSES[status[i]]}",'
+                    f'"total":{int(total[i])},"discount":{discount[i]},"createdAt":{{"$date":"{created[i]}"}},'
+                    f'"__v":0}}\n')
+            out.write_records(records)
+        stats = [out.stats()]
+    catalog = os.path.splitext(path)[0] + '_products.jsonl'
+    stats.append(write_products(catalog, products, None, seed, sold, mismatch))
+    return stats
+
+
+# ---------------------------------------------------------------- revenue
+
+def write_revenues(path, count=None, size=None, seed=0, years=30, start_year=1996, daily=False, batch=2000):
+    """
+    Export collection revenues: document i thuộc năm start_year + i % years (mỗi
+    năm nhiều document = nhiều chi nhánh), doanh thu 12 tháng hoặc từng ngày.
+    """
+    rng = _rng(seed, 'revenues')
+    with Output(path) as out:
+        while True:
+            n = _batch(batch, out.records, out.bytes, count, size)
+            if not n:
+                break
+            first = out.records
+            year = start_year + (first + np.arange(n)) % years
+            periods = 366 if daily else 12
+            season = 1 + 0.3 * np.sin(np.arange(periods) / periods * 2 * np.pi)
+            trend = 1 + 0.04 * (year - start_year)
+            scale = (25000000 / (30 if daily else 1)) * trend[:, None] * rng.lognormal(0, 0.3, n)[:, None]
+            values = np.round(rng.gamma(4.0, 0.25, (n, periods)) * season * scale, -3).astype(np.int64)
+            oids = _oids('revenues', np.arange(first, first + n))
+            records = []
+            for i, (oid, y) in enumerate(zip(oids, year.tolist())):
+                days = 366 if y % 4 == 0 and (y % 100 != 0 or y % 400 == 0) else 365
+                row = values[i, :days] if daily else values[i]
+                records.append(f'{{"_id":{{"$oid":"{oid}"}},"year":{y},"revenue":{json.dumps(row.tolist())}}}\n')
+            out.write_records(records)
+        return out.stats()
+
+
+# ---------------------------------------------------------------- CLI
+
+def write_all(directory, count=None, size=None, seed=0, shards=4, products=10000):
+    """Mọi định dạng vào `directory`; --count / --size áp dụng cho từng file"""
+    def amount(kind):
+        return (count, size) if count is not None or size is not None else (DEFAULT_COUNTS[kind], None)
+
+    join = os.path.join
+    stats = write_jest(join(directory, 'jest-report.json'), *amount('jest'), seed=seed)
+    stats += write_shards(join(directory, 'shards'), shards, *amount('shards'), seed=seed)
+    stats.append(write_coverage(join(directory, 'coverage', 'coverage-final.json'), *amount('coverage'), seed=seed))
+    stats.append(write_coverage(join(directory, 'coverage', 'lcov.info'), *amount('coverage'), seed=seed))
+    stats.append(write_defects(join(directory, 'defects.csv'), *amount('defects'), seed=seed))
+    stats.append(write_defects(join(directory, 'defects.jsonl'), *amount('defects'), seed=seed))
+    stats += write_orders(join(directory, 'orders.jsonl'), *amount('orders'), seed=seed, products=products)
+    stats.append(write_revenues(join(directory, 'revenues.jsonl'), *amount('revenues'), seed=seed))
+    return stats
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sinh dữ liệu giả lập có seed cho các công cụ analytics')
+    sub = parser.add_subparsers(dest='command')
+    commands = {}
+    for name, help_text in (('jest', 'báo cáo jest --json'), ('shards', 'báo cáo jest --shard=i/N'),
+                            ('coverage', 'coverage-final.json / lcov.info'), ('defects', 'export defect .csv / .jsonl'),
+                            ('products', 'mongoexport products'), ('orders', 'mongoexport orders + products'),
+                            ('revenues', 'mongoexport revenues'), ('all', 'mọi định dạng vào một thư mục')):
+        command = commands[name] = sub.add_parser(name, help=help_text)
+        command.add_argument('path', help='file output (thư mục với shards, all, jest --runs)')
+        command.add_argument('--count', type=parse_count, help='số bản ghi')
+        command.add_argument('--size', type=parse_size, help='dung lượng file, ví dụ 500MB, 10GB, 2GiB')
+        command.add_argument('--seed', type=int, default=0)
+    commands['jest'].add_argument('--runs', type=int, default=1, help='số lần chạy (path là thư mục)')
+    commands['jest'].add_argument('--interval-hours', type=float, default=24, help='khoảng cách giữa các lần chạy')
+    for name in ('shards', 'all'):
+        commands[name].add_argument('--shards', type=int, default=4)
+    for name in ('orders', 'all'):
+        commands[name].add_argument('--products', type=parse_count, default=10000, help='số sản phẩm')
+    commands['orders'].add_argument('--users', type=parse_count, default=100000)
+    commands['orders'].add_argument('--orders-per-day', type=float, default=2000)
+    commands['orders'].add_argument('--mismatch', type=float, default=0.01,
+                                    help='tỷ lệ sản phẩm có soldCount lệch so với order')
+    commands['revenues'].add_argument('--years', type=int, default=30)
+    commands['revenues'].add_argument('--start-year', type=int, default=1996)
+    commands['revenues'].add_argument('--daily', action='store_true', help='doanh thu từng ngày thay vì 12 tháng')
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        parser.print_help()
+        return
+    count = args.count
+    if count is None and args.size is None and args.command != 'all':
+        count = DEFAULT_COUNTS[args.command]
+    common = {'count': count, 'size': args.size, 'seed': args.seed}
+    started = time.perf_counter()
+    if args.command == 'jest':
+        stats = write_jest(args.path, runs=args.runs, interval_hours=args.interval_hours, **common)
+    elif args.command == 'shards':
+        stats = write_shards(args.path, args.shards, **common)
+    elif args.command == 'coverage':
+        stats = [write_coverage(args.path, **common)]
+    elif args.command == 'defects':
+        stats = [write_defects(args.path, **common)]
+    elif args.command == 'products':
+        stats = [write_products(args.path, **common)]
+    elif args.command == 'orders':
+        stats = write_orders(args.path, products=args.products, users=args.users,
+                             orders_per_day=args.orders_per_day, mismatch=args.mismatch, **common)
+    elif args.command == 'revenues':
+        stats = [write_revenues(args.path, years=args.years, start_year=args.start_year, daily=args.daily,
+                                **common)]
+    else:
+        stats = write_all(args.path, shards=args.shards, products=args.products, **common)
+    elapsed = time.perf_counter() - started
+
+    total = sum(item['bytes'] for item in stats)
+    for item in stats[:20]:
+        print(f'   • {item["path"]}: {item["records"]} bản ghi, {item["bytes"] / 2 ** 20:.1f} MiB')
+    if len(stats) > 20:
+        print(f'   • ... và {len(stats) - 20} file khác')
+    print(f'✅ Đã ghi {len(stats)} file, {total / 2 ** 20:.1f} MiB trong {elapsed:.1f}s '
+          f'({total / 2 ** 20 / max(elapsed, 1e-9):.1f} MiB/s, seed {args.seed})')
+
+
+if __name__ == '__main__':
+    main()
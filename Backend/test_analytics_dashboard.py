@@ -4,193 +4,270 @@ Bao gồm:
 1. Test Case Execution Summary (Pie Chart)
 2. Defect Distribution by Severity (Bar Chart)  
 3. Test Coverage by Module (Horizontal Bar Chart)
+
+Mặc định dùng số liệu đã tổng hợp sẵn; truyền đường dẫn báo cáo `jest --json`
+để lấy số liệu trực tiếp từ lần chạy test:
+    npm test -- --json --outputFile=jest-report.json
+    python test_analytics_dashboard.py jest-report.json
+
+Khi chạy chia shard trên nhiều node, truyền báo cáo của mọi shard (hoặc file
+summary của shard_summary.py qua --summaries) để gộp thành một view:
+    python test_analytics_dashboard.py shard-1.json shard-2.json shard-3.json
+
+Với `--coverage coverage/coverage-final.json` (hoặc lcov.info), biểu đồ Test
+Coverage by Module dùng line/branch/function coverage thật thay cho pass rate.
+
+Số defect mặc định là số liệu tổng hợp sẵn; `--defects export.csv` (CSV / JSON
+lines từ issue tracker) thay bằng số liệu thật, `--defect-store .defects.json`
+giữ trạng thái để lần nạp sau chỉ áp dụng các dòng thay đổi.
+
+Thêm `--trace trace.json` (hoặc đặt biến môi trường ANALYTICS_TRACE) để ghi
+thời gian từng giai đoạn ra Chrome trace JSON và profile phẳng (xem tracing.py).
 """
 
-import matplotlib.pyplot as plt
-import numpy as np
-from matplotlib.patches import Patch, Rectangle
+import os
 
-class TestAnalyticsCharts:
+from analytics_data import AnalyticsData
+from chart_batch import CHART_FILES, chart_jobs, render_batch
+from chart_cache import RenderCache
+from chart_engine import THUMBNAIL_WIDTH, RenderContext, export_targets, render, spec_key
+from coverage_report import METRICS, CoverageReport
+from duration_analytics import DurationAnalytics
+from flaky_tests import FlakyMatrix
+from run_diff import RunDiff, RunSnapshot
+from run_history import RunHistoryStore
+from tracing import configure, span, traced
+
+class TestAnalyticsCharts(AnalyticsData):
     def __init__(self):
-        # Dữ liệu thực tế từ dự án
-        self.total_tests = 127
-        self.passed_tests = 107
-        self.failed_tests = 20
-        self.pass_rate = 84.3
-        
-        # Defect data
-        self.defects_by_severity = {
-            'Critical': {'fixed': 0, 'open': 4},
-            'High': {'fixed': 0, 'open': 8},
-            'Medium': {'fixed': 0, 'open': 6}, 
-            'Low': {'fixed': 0, 'open': 2}
-        }
-        
-        # Module performance data
-        self.module_data = {
-            'Authorization Service': 90.6,
-            'Cart Controller': 89.7,
-            'Search Controller': 87.5,
-            'E2E Bookstore': 87.5,
-            'Order Controller': 84.6,
-            'User Profile': 46.2
-        }
-    
-    def create_pie_chart(self):
+        super().__init__()
+
+        # Lịch sử các lần chạy (RunHistoryStore), dùng cho biểu đồ xu hướng
+        self.history = None
+
+        # Coverage theo module (CoverageReport) và chỉ số vẽ: lines/branches/functions
+        self.coverage = None
+        self.coverage_metric = 'lines'
+
+    def load_coverage(self, path, metric='lines'):
+        """Nạp coverage-final.json / lcov.info cho biểu đồ Test Coverage by Module"""
+        self.coverage = CoverageReport.load(path)
+        self.coverage_metric = metric
+        return self.coverage
+
+    @traced(category='aggregate')
+    def chart_spec(self, method, filename=None):
+        """Spec cho chart engine của từng biểu đồ"""
+        filename = filename or CHART_FILES[method]
+        if method == 'create_pie_chart':
+            kind, data = 'pie_summary', {
+                'passed': self.passed_tests,
+                'failed': self.failed_tests,
+                'not_run': self.not_run_tests,
+            }
+        elif method == 'create_defect_bar_chart':
+            kind, data = 'defect_severity', {'by_severity': self.defects_by_severity}
+        elif method == 'create_pass_rate_trend_chart':
+            timestamps, pass_rates = self.history.pass_rate_trend()
+            kind, data = 'pass_rate_trend', {'timestamps': timestamps.tolist(),
+                                             'pass_rates': pass_rates.tolist()}
+        elif method == 'create_flaky_heatmap_chart':
+            return FlakyMatrix.from_history(self.history).analyze().heatmap_spec(filename)
+        elif method == 'create_slow_tests_chart':
+            return self.duration_analytics().slow_tests_spec(filename)
+        elif method == 'create_runtime_share_chart':
+            return self.duration_analytics().runtime_share_spec(filename)
+        elif method == 'create_run_diff_chart':
+            return self.run_diff().chart_spec(filename)
+        elif self.coverage is not None:
+            return self.coverage.module_spec(self.coverage_metric, filename)
+        else:
+            kind, data = 'module_pass_rate', {'modules': self.module_data, 'overall': self.pass_rate}
+        return {'kind': kind, 'style': 'dashboard', 'data': data,
+                'output': {'filename': filename, 'dpi': 300}}
+
+    def chart_methods(self):
+        """Các biểu đồ vẽ được với dữ liệu hiện có"""
+        methods = ['create_pie_chart', 'create_defect_bar_chart', 'create_module_coverage_chart']
+        if self.history is not None and self.history.num_runs:
+            methods.append('create_pass_rate_trend_chart')
+        if self.history is not None and self.history.num_runs >= 2:
+            methods.append('create_flaky_heatmap_chart')
+        if self.test_durations or (self.history is not None and self.history.num_runs):
+            methods += ['create_slow_tests_chart', 'create_runtime_share_chart']
+        if self.history is not None and self.history.num_runs >= 2:
+            methods.append('create_run_diff_chart')
+        return methods
+
+    def duration_analytics(self):
+        """Thống kê thời gian: toàn bộ lịch sử nếu có, ngược lại lần chạy đã nạp"""
+        if self.history is not None and self.history.num_runs:
+            return DurationAnalytics.from_history(self.history)
+        return DurationAnalytics.from_run(self.test_durations, self.suite_durations)
+
+    def run_diff(self):
+        """So sánh hai lần chạy gần nhất trong lịch sử"""
+        return RunDiff.compute(RunSnapshot.from_history(self.history, -2),
+                               RunSnapshot.from_history(self.history, -1))
+
+    def chart_key(self, method, filename):
+        """Khóa render cache: dữ liệu biểu đồ + style + định dạng/dpi output"""
+        return spec_key(self.chart_spec(method, filename))
+
+    @traced(category='chart')
+    def create_pie_chart(self, filename='test_execution_pie_chart.png'):
         """Biểu đồ tròn - Test Case Execution Summary"""
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        sizes = [self.passed_tests, self.failed_tests]
-        labels = [f'Passed\n{self.passed_tests}\n({self.passed_tests/self.total_tests*100:.1f}%)',
-                 f'Failed\n{self.failed_tests}\n({self.failed_tests/self.total_tests*100:.1f}%)']
-        colors = ['#90EE90', '#FF6B6B']
-        explode = (0.05, 0.05)
-        
-        wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, explode=explode,
-                                         autopct='%1.1f%%', shadow=True, startangle=90,
-                                         textprops={'fontsize': 11, 'fontweight': 'bold'})
-        
-        ax.set_title('Test Case Execution Summary', fontsize=14, fontweight='bold', pad=20)
-        
-        # Legend
-        legend_elements = [
-            Rectangle((0, 0), 1, 1, facecolor='#DDA0DD', label=f'Test cases executed: {self.total_tests} (100%)'),
-            Rectangle((0, 0), 1, 1, facecolor='#90EE90', label=f'Test cases passed: {self.passed_tests} ({self.passed_tests/self.total_tests*100:.1f}%)'),
-            Rectangle((0, 0), 1, 1, facecolor='#FF6B6B', label=f'Test cases failed: {self.failed_tests} ({self.failed_tests/self.total_tests*100:.1f}%)'),
-            Rectangle((0, 0), 1, 1, facecolor='#FFD700', label='Test cases blocked: 0 (0%)'),
-            Rectangle((0, 0), 1, 1, facecolor='#FFA500', label='Test cases not run: 0 (0%)')
-        ]
-        
-        ax.legend(handles=legend_elements, loc='center left', bbox_to_anchor=(1.05, 0.5))
-        plt.tight_layout()
-        plt.savefig('test_execution_pie_chart.png', dpi=300, bbox_inches='tight')
-        return fig
-    
-    def create_defect_bar_chart(self):
+        return render(self.chart_spec('create_pie_chart', filename))
+
+    @traced(category='chart')
+    def create_defect_bar_chart(self, filename='defect_distribution_bar_chart.png'):
         """Biểu đồ cột - Defect Distribution by Severity"""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        categories = list(self.defects_by_severity.keys())
-        fixed_counts = [self.defects_by_severity[cat]['fixed'] for cat in categories]
-        open_counts = [self.defects_by_severity[cat]['open'] for cat in categories]
-        
-        x = np.arange(len(categories))
-        width = 0.6
-        
-        bars_fixed = ax.bar(x, fixed_counts, width, label='Number of defects fixed', color='#5B9BD5')
-        bars_open = ax.bar(x, open_counts, width, bottom=fixed_counts,
-                          label='Number of defects remain open', color='#C55454')
-        
-        # Labels và formatting
-        ax.set_ylabel('Number of defects', fontweight='bold')
-        ax.set_xlabel('Severity', fontweight='bold')
-        ax.set_title('Defect Distribution by Severity\nTotal: 20 Defects (0 Fixed, 20 Open)', fontweight='bold')
-        ax.set_xticks(x)
-        ax.set_xticklabels(categories)
-        ax.legend()
-        
-        # Thêm labels trên bars
-        for i, cat in enumerate(categories):
-            total = fixed_counts[i] + open_counts[i]
-            ax.text(i, total + 0.3, f'Total: {total}', ha='center', va='bottom', fontweight='bold')
-            if open_counts[i] > 0:
-                ax.text(i, open_counts[i]/2, str(open_counts[i]), ha='center', va='center', 
-                       color='white', fontweight='bold', fontsize=12)
-        
-        ax.grid(True, alpha=0.3, axis='y')
-        ax.set_ylim(0, max(open_counts) + 3)
-        plt.tight_layout()
-        plt.savefig('defect_distribution_bar_chart.png', dpi=300, bbox_inches='tight')
-        return fig
-    
-    def create_module_coverage_chart(self):
+        return render(self.chart_spec('create_defect_bar_chart', filename))
+
+    @traced(category='chart')
+    def create_module_coverage_chart(self, filename='module_coverage_horizontal_chart.png'):
         """Biểu đồ ngang - Test Coverage by Module"""
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        modules = list(self.module_data.keys())
-        pass_rates = list(self.module_data.values())
-        
-        # Định màu theo performance
-        colors = []
-        for rate in pass_rates:
-            if rate >= 90:
-                colors.append('#92D050')    # Excellent
-            elif rate >= 80:
-                colors.append('#FFC000')    # Good  
-            elif rate >= 70:
-                colors.append('#F79646')    # Acceptable
-            else:
-                colors.append('#FF6B6B')    # Needs improvement
-        
-        y_pos = np.arange(len(modules))
-        bars = ax.barh(y_pos, pass_rates, color=colors, edgecolor='black', linewidth=0.8, height=0.7)
-        
-        # Overall pass rate line
-        ax.axvline(x=self.pass_rate, color='red', linestyle='--', linewidth=2, alpha=0.8)
-        ax.text(self.pass_rate + 1, len(modules) - 0.3, f'{self.pass_rate}%', 
-               rotation=90, va='top', ha='left', color='red', fontweight='bold')
-        
-        # Labels
-        ax.set_yticks(y_pos)
-        ax.set_yticklabels(modules)
-        ax.set_xlabel('Pass Rate (%)', fontweight='bold')
-        ax.set_ylabel('Module', fontweight='bold')
-        ax.set_title(f'Test Coverage by Module - Pass Rate\nOverall Pass Rate: {self.pass_rate}%', fontweight='bold')
-        
-        # Thêm phần trăm trên bars
-        for i, (bar, rate) in enumerate(zip(bars, pass_rates)):
-            width = bar.get_width()
-            ax.text(width - 3, bar.get_y() + bar.get_height()/2, f'{rate}%',
-                   ha='right', va='center', fontweight='bold',
-                   color='white' if rate < 60 else 'black')
-        
-        # Performance legend
-        legend_elements = [
-            Patch(facecolor='#92D050', label='Excellent (≥90%)'),
-            Patch(facecolor='#FFC000', label='Good (80-89%)'),
-            Patch(facecolor='#F79646', label='Acceptable (70-79%)'),
-            Patch(facecolor='#FF6B6B', label='Needs Improvement (<70%)')
-        ]
-        ax.legend(handles=legend_elements, loc='lower right')
-        
-        ax.set_xlim(0, 100)
-        ax.grid(True, alpha=0.3, axis='x')
-        plt.tight_layout()
-        plt.savefig('module_coverage_horizontal_chart.png', dpi=300, bbox_inches='tight')
-        return fig
-    
-    def generate_all_charts(self):
-        """Tạo tất cả biểu đồ"""
+        return render(self.chart_spec('create_module_coverage_chart', filename))
+
+    @traced(category='chart')
+    def create_pass_rate_trend_chart(self, filename='pass_rate_trend_chart.png'):
+        """Biểu đồ đường - Pass Rate Over Time (từ lịch sử các lần chạy)"""
+        return render(self.chart_spec('create_pass_rate_trend_chart', filename))
+
+    @traced(category='chart')
+    def create_flaky_heatmap_chart(self, filename='flaky_tests_heatmap.png'):
+        """Heatmap - Flaky Tests (từ lịch sử các lần chạy)"""
+        return render(self.chart_spec('create_flaky_heatmap_chart', filename))
+
+    @traced(category='chart')
+    def create_slow_tests_chart(self, filename='slow_tests_chart.png'):
+        """Biểu đồ ngang - Slowest Tests (p50/p95/p99)"""
+        return render(self.chart_spec('create_slow_tests_chart', filename))
+
+    @traced(category='chart')
+    def create_runtime_share_chart(self, filename='runtime_share_chart.png'):
+        """Biểu đồ ngang - Runtime Share by Test File"""
+        return render(self.chart_spec('create_runtime_share_chart', filename))
+
+    @traced(category='chart')
+    def create_run_diff_chart(self, filename='run_diff_chart.png'):
+        """Biểu đồ ngang - Run Diff (so với lần chạy trước)"""
+        return render(self.chart_spec('create_run_diff_chart', filename))
+
+    @traced(category='chart')
+    def generate_all_charts(self, headless=False, workers=None, cache=None):
+        """Tạo tất cả biểu đồ
+
+        headless=True: vẽ song song trên backend Agg, mỗi biểu đồ một worker
+        process (`workers` worker, mặc định = số core), không gọi plt.show().
+        cache: RenderCache, biểu đồ có dữ liệu không đổi sẽ dùng lại file cũ.
+        """
         print("🎨 Đang tạo tất cả biểu đồ thống kê...")
         print("=" * 50)
-        
-        print("📊 1. Test Case Execution Summary (Pie Chart)...")
-        fig1 = self.create_pie_chart()
-        print("   ✅ Đã lưu: test_execution_pie_chart.png")
-        
-        print("\n📊 2. Defect Distribution by Severity (Bar Chart)...")  
-        fig2 = self.create_defect_bar_chart()
-        print("   ✅ Đã lưu: defect_distribution_bar_chart.png")
-        
-        print("\n📊 3. Test Coverage by Module (Horizontal Bar Chart)...")
-        fig3 = self.create_module_coverage_chart()
-        print("   ✅ Đã lưu: module_coverage_horizontal_chart.png")
-        
-        print("\n🎉 Hoàn thành! Đã tạo 3 biểu đồ thống kê test.")
-        print("\n📈 SUMMARY REPORT:")
-        print(f"   • Total Tests: {self.total_tests}")
-        print(f"   • Pass Rate: {self.pass_rate}%")
-        print(f"   • Total Defects: {sum([data['open'] for data in self.defects_by_severity.values()])}")
-        print(f"   • Best Module: {max(self.module_data, key=self.module_data.get)} ({max(self.module_data.values())}%)")
-        print(f"   • Worst Module: {min(self.module_data, key=self.module_data.get)} ({min(self.module_data.values())}%)")
-        
-        # Hiển thị tất cả biểu đồ
-        plt.show()
-
-def main():
+
+        if headless:
+            for filename, elapsed in render_batch(chart_jobs(self), workers, cache):
+                print(f"   ✅ Đã lưu: {filename} ({elapsed:.2f}s)")
+        else:
+            steps = [
+                ("📊 1. Test Case Execution Summary (Pie Chart)...", 'create_pie_chart'),
+                ("📊 2. Defect Distribution by Severity (Bar Chart)...", 'create_defect_bar_chart'),
+                ("📊 3. Test Coverage by Module (Horizontal Bar Chart)...", 'create_module_coverage_chart'),
+                ("📊 4. Pass Rate Over Time (Line Chart)...", 'create_pass_rate_trend_chart'),
+                ("📊 5. Flaky Tests (Heatmap)...", 'create_flaky_heatmap_chart'),
+                ("📊 6. Slowest Tests (Horizontal Bar Chart)...", 'create_slow_tests_chart'),
+                ("📊 7. Runtime Share by Test File (Horizontal Bar Chart)...", 'create_runtime_share_chart'),
+                ("📊 8. Run Diff vs Previous Run (Horizontal Bar Chart)...", 'create_run_diff_chart'),
+            ]
+            methods = self.chart_methods()
+            steps = [step for step in steps if step[1] in methods]
+            context = RenderContext(interactive=True)
+            for i, (title, method) in enumerate(steps):
+                print(("\n" if i else "") + title)
+                with span(f'TestAnalyticsCharts.{method}', 'chart'):
+                    spec = self.chart_spec(method)
+                    render(spec, cache, context)
+                print(f"   ✅ Đã lưu: {spec['output']['filename']}")
+
+        print(f"\n🎉 Hoàn thành! Đã tạo {len(self.chart_methods())} biểu đồ thống kê test.")
+        if cache is not None:
+            print(f"📦 Render cache: {cache.report()}")
+        self.print_summary()
+
+        # Hiển thị tất cả biểu đồ rồi đóng figure
+        if not headless:
+            context.show()
+
+    @traced(category='chart')
+    def export_report(self, pdf_filename='test_analytics_report.pdf', output_dir='',
+                      thumbnail_width=THUMBNAIL_WIDTH, svg=True):
+        """
+        Vẽ mỗi biểu đồ một lần và xuất cùng lúc: PNG, thumbnail, SVG và một
+        trang trong file PDF tổng hợp tất cả biểu đồ.
+        """
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        print(f"📄 Đang xuất báo cáo: {pdf_filename}")
+        print("=" * 50)
+        metadata = {'Title': 'Test Analytics Report', 'Subject': f'Pass rate {self.pass_rate}%'}
+        with PdfPages(pdf_filename, metadata=metadata) as pdf:
+            for method in self.chart_methods():
+                spec = self.chart_spec(method, os.path.join(output_dir, CHART_FILES[method]))
+                spec['output'].update(thumbnail=thumbnail_width, svg=svg)
+                with span(f'TestAnalyticsCharts.{method}', 'chart'):
+                    render(spec, pdf=pdf)
+                print(f"   ✅ {', '.join(target for _, target in export_targets(spec['output']))}")
+        print(f"\n🎉 Hoàn thành! {len(self.chart_methods())} biểu đồ, {pdf_filename} có "
+              f"{len(self.chart_methods())} trang.")
+        self.print_summary()
+
+def main(argv=None):
     """Hàm chính"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tạo biểu đồ thống kê test')
+    parser.add_argument('jest_report', nargs='*',
+                        help='báo cáo jest --json (tùy chọn); nhiều file = các shard của cùng một lần chạy')
+    parser.add_argument('--summaries', nargs='+', default=[], metavar='FILE',
+                        help='shard summary tạo bởi shard_summary.py, được gộp với các báo cáo')
+    parser.add_argument('--headless', action='store_true',
+                        help='vẽ song song trên backend Agg, không mở cửa sổ')
+    parser.add_argument('--workers', type=int, default=None, help='số worker khi chạy headless')
+    parser.add_argument('--no-cache', action='store_true', help='luôn vẽ lại, bỏ qua render cache')
+    parser.add_argument('--report-pdf', metavar='FILE',
+                        help='xuất mọi biểu đồ một lần: PNG, thumbnail, SVG và một file PDF nhiều trang')
+    parser.add_argument('--thumbnail-width', type=int, default=THUMBNAIL_WIDTH,
+                        help='chiều rộng thumbnail (pixel) khi dùng --report-pdf')
+    parser.add_argument('--history', metavar='DIR',
+                        help='thư mục lịch sử chạy test; báo cáo Jest (nếu có, chưa ghi) được ghi nối vào đây')
+    parser.add_argument('--defects', nargs='+', default=[], metavar='EXPORT',
+                        help='file export defect (.csv, .jsonl) cho biểu đồ Defect Distribution')
+    parser.add_argument('--defect-store', metavar='FILE',
+                        help='lưu trạng thái defect, lần sau chỉ áp dụng dòng thay đổi')
+    parser.add_argument('--coverage', metavar='FILE',
+                        help='coverage-final.json hoặc lcov.info cho biểu đồ Test Coverage by Module')
+    parser.add_argument('--coverage-metric', choices=METRICS, default='lines')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='ghi thời gian từng giai đoạn ra Chrome trace JSON (+ profile phẳng)')
+    args = parser.parse_args(argv)
+    configure(args.trace)
+
     analytics = TestAnalyticsCharts()
-    analytics.generate_all_charts()
+    analytics.load_inputs(args.jest_report, args.summaries)
+    if args.defects or args.defect_store:
+        analytics.load_defects(args.defects, args.defect_store)
+    if args.coverage:
+        print(f"📥 Đang đọc coverage: {args.coverage}")
+        analytics.load_coverage(args.coverage, args.coverage_metric)
+    if args.history:
+        analytics.history = RunHistoryStore(args.history)
+        if len(args.jest_report) == 1 and analytics.history.append_report(args.jest_report[0]) is None:
+            print(f"⏭️ {args.jest_report[0]} đã có trong lịch sử, không ghi lại")
+    if args.report_pdf:
+        analytics.export_report(args.report_pdf, thumbnail_width=args.thumbnail_width)
+        return
+    cache = None if args.no_cache else RenderCache()
+    analytics.generate_all_charts(headless=args.headless, workers=args.workers, cache=cache)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+# Các module analytics nằm phẳng trong Backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
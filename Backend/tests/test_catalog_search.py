@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from catalog_search import Catalog, SearchIndex, load_fixtures, random_queries
+
+
+@pytest.fixture(scope='module')
+def books():
+    return load_fixtures()
+
+
+@pytest.mark.parametrize('size, seed', [(0, 0), (5000, 0), (5000, 3)])
+def test_index_matches_linear_scan(books, size, seed):
+    catalog = Catalog.synthetic(size, books, seed) if size else Catalog.from_books(books)
+    index = SearchIndex(catalog)
+    for query in random_queries(catalog, 100, seed):
+        expected_total, expected_ids = index.scan(folded=True, **query)
+        total, ids = index.search(**query)
+        assert total == expected_total, query
+        assert np.array_equal(ids, expected_ids), query
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+import chart_benchmark
+
+
+def _results(stage_seconds, peak_mib):
+    return {'results': {'pass_rate': {'stages': {'render': stage_seconds}, 'peak_python_mib': peak_mib}}}
+
+
+def test_regression_against_zero_baseline_is_reported(tmp_path, monkeypatch, capsys):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(_results(0.0, 0.0)), encoding='utf-8')
+    monkeypatch.setattr(chart_benchmark, 'run_benchmarks', lambda *args: _results(0.5, 50.0))
+
+    with pytest.raises(SystemExit) as exit_info:
+        chart_benchmark.main(['-o', str(tmp_path / 'current.json'), '--baseline', str(baseline)])
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    assert 'pass_rate / render' in out and 'pass_rate / peak_python_mib' in out
+    assert 'baseline 0' in out
+
+
+def test_compare_ignores_small_absolute_changes():
+    assert chart_benchmark.compare(_results(0.0011, 1.0), _results(0.001, 1.0)) == []
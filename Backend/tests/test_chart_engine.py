@@ -0,0 +1,56 @@
+import chart_engine
+from chart_cache import RenderCache
+from chart_engine import render
+
+PIE_SPEC = {'kind': 'pie_summary', 'style': 'dashboard', 'data': {'passed': 107, 'failed': 20}}
+
+
+def _spec_at(filename, **output):
+    return dict(PIE_SPEC, output={'filename': filename, 'dpi': 50, **output})
+
+
+def _spec(tmp_path, **output):
+    return _spec_at(str(tmp_path / 'pie.png'), **output)
+
+
+def test_cache_hit_skips_drawing(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    assert render(_spec(tmp_path), cache) is not None
+    assert render(_spec(tmp_path), cache) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_show_bypasses_cache(tmp_path, monkeypatch):
+    shown = []
+    monkeypatch.setattr(chart_engine.plt, 'show', lambda: shown.append(len(chart_engine.plt.get_fignums())))
+    cache = RenderCache(str(tmp_path / 'cache'))
+    for _ in range(2):
+        assert render(_spec(tmp_path, show=True), cache) is not None
+    assert shown == [1, 1]
+    assert chart_engine.plt.get_fignums() == []
+    # File vẫn được lưu vào cache cho lần chạy không hiển thị
+    assert render(_spec(tmp_path), cache) is None
+
+
+def test_spec_key_fingerprint_is_computed_once(monkeypatch):
+    chart_engine.engine_fingerprint()
+    monkeypatch.setattr(chart_engine, 'source_fingerprint', lambda module: 1 / 0)
+    key = chart_engine.spec_key(_spec_at('a.png'))
+    assert key == chart_engine.spec_key(_spec_at('b.png'))
+    assert key != chart_engine.spec_key(dict(_spec_at('a.png'), data={'passed': 1, 'failed': 1}))
+
+
+def test_interactive_context_bypasses_cache(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    for run in range(2):
+        context = chart_engine.RenderContext(interactive=True)
+        assert render(_spec(tmp_path), cache, context) is not None
+        # Figure phải nằm trong context để show() hiển thị ở mọi lần chạy
+        assert len(context) == 1
+        assert chart_engine.plt.get_fignums()
+        shown = []
+        monkeypatch.setattr(chart_engine.plt, 'show', lambda: shown.append(True))
+        context.show()
+        assert shown == [True]
+    assert cache.hits == 0
+    assert render(_spec(tmp_path), cache) is None
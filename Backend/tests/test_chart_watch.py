@@ -0,0 +1,32 @@
+import os
+
+from chart_watch import ChartWatcher
+from jest_report import _write_benchmark_report
+
+
+def test_partial_report_is_not_rendered(tmp_path):
+    source = tmp_path / 'source.json'
+    _write_benchmark_report(str(source), num_suites=12)
+    text = source.read_text(encoding='utf-8')
+
+    results = tmp_path / 'results'
+    charts = tmp_path / 'charts'
+    results.mkdir()
+    charts.mkdir()
+    report = results / 'jest-report.json'
+    watcher = ChartWatcher(str(results), output_dir=str(charts))
+
+    # Jest ghi báo cáo dần dần: mọi trạng thái ghi dở đều phải bị bỏ qua
+    step = len(text) // 7
+    for end in range(step, len(text), step):
+        report.write_text(text[:end], encoding='utf-8')
+        assert watcher.update(watcher.scan()) == []
+        assert watcher.summaries == {}
+        assert os.listdir(charts) == []
+
+    report.write_text(text, encoding='utf-8')
+    written = watcher.update(watcher.scan())
+    assert written
+    assert sorted(os.listdir(charts)) == sorted(os.path.basename(name) for name in written)
+    _, summary = watcher.summaries[str(report)]
+    assert summary.passed + summary.failed == 12 * 21
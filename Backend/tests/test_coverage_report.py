@@ -0,0 +1,66 @@
+import pytest
+
+from coverage_report import CoverageReport, iter_lcov_records, lcov_record_totals
+from synthetic_data import main as generate
+
+LCOV = '''TN:
+SF:/app/Backend/controllers/orderController.js
+FN:1,createOrder
+FN:20,cancelOrder
+FNDA:3,createOrder
+FNDA:0,cancelOrder
+FNF:2
+FNH:1
+DA:2,3
+DA:3,3,Zm9v
+DA:21,0
+DA:22,0
+BRDA:4,0,0,2
+BRDA:4,0,1,0
+BRDA:23,1,0,-
+BRDA:23,1,1,-
+BRF:4
+BRH:1
+LF:4
+LH:2
+end_of_record
+TN:
+SF:/app/Backend/routes/index.js
+DA:1,1
+end_of_record
+TN:
+SF:/app/Backend/models/Order.js
+DA:1,1
+DA:2,5
+end_of_record
+'''
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('chunk_size', [7, 64 * 1024])
+def test_lcov_records(tmp_path, newline, chunk_size):
+    path = tmp_path / 'lcov.info'
+    path.write_bytes(LCOV.replace('\n', newline).encode('utf-8'))
+    with open(path, encoding='utf-8', newline='') as fp:
+        records = dict(iter_lcov_records(fp, chunk_size))
+    assert records == {
+        '/app/Backend/controllers/orderController.js': (4, 2, 4, 1, 2, 1),
+        '/app/Backend/models/Order.js': (2, 2, 0, 0, 0, 0),
+    }
+
+
+def test_lcov_matches_istanbul(tmp_path):
+    reports = []
+    for name in ('coverage-final.json', 'lcov.info'):
+        path = str(tmp_path / name)
+        generate(['coverage', path, '--count', '200', '--seed', '3'])
+        reports.append(CoverageReport.load(path))
+    istanbul, lcov = reports
+    assert lcov.files == istanbul.files == 200
+    assert dict(zip(lcov.modules, lcov.totals.tolist())) == dict(zip(istanbul.modules, istanbul.totals.tolist()))
+
+
+def test_lcov_record_totals_counts_unevaluated_branches():
+    record = ('SF:src/a.js\nFN:1,f\nFN:2,g\nFNDA:3,f\nFNDA:0,g\nDA:1,2\nDA:2,0\n'
+              'BRDA:1,0,0,1\nBRDA:1,0,1,-\nend_of_record\n')
+    assert lcov_record_totals(record) == (2, 1, 2, 1, 2, 1)
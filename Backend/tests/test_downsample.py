@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from downsample import _trend, downsample, lttb, minmax
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(1)
+    y = 90 + rng.normal(0, 0.5, 100000)
+    y[31337] = 5.0          # pass rate tụt trong một lần chạy
+    y[77777] = 120.0
+    return np.arange(len(y)) * 60000, y
+
+
+@pytest.mark.parametrize('method, select', [('lttb', lambda x, y: lttb(x, y, 500)),
+                                            ('minmax', lambda x, y: minmax(x, y, 500))])
+def test_keeps_first_last_and_extremes(series, method, select):
+    x, y = series
+    keep = select(x, y)
+    assert keep[0] == 0 and keep[-1] == len(y) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert {int(np.argmin(y)), int(np.argmax(y))} <= set(keep.tolist())
+    assert len(keep) <= (500 if method == 'lttb' else 4 * 500)
+
+
+def test_minmax_keeps_every_column_extreme():
+    x, y = _trend(200000)
+    keep = minmax(x, y, 300)
+    reduced_x, reduced_y = x[keep], y[keep]
+    for low, high in zip(np.linspace(x[0], x[-1], 301)[:-1], np.linspace(x[0], x[-1], 301)[1:]):
+        column = (x >= low) & (x < high)
+        kept = (reduced_x >= low) & (reduced_x < high)
+        if column.any():
+            assert reduced_y[kept].min() == y[column].min()
+            assert reduced_y[kept].max() == y[column].max()
+
+
+def test_downsample_drops_nan_and_accepts_datetimes():
+    x = np.datetime64('2024-01-01') + np.arange(10000)
+    y = np.sin(np.arange(10000) / 50.0)
+    y[::7] = np.nan
+    for method in ('lttb', 'minmax'):
+        reduced_x, reduced_y = downsample(x, y, 100, method)
+        assert np.isfinite(reduced_y).all()
+        assert reduced_x.dtype == x.dtype and reduced_x[0] == x[1] and reduced_x[-1] == x[-1]
@@ -0,0 +1,49 @@
+import heapq
+
+import numpy as np
+import pytest
+
+from duration_analytics import DurationAnalytics, grouped_percentiles, slowest_executions
+
+
+def test_grouped_percentiles_match_numpy():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 50, 5000)
+    values = rng.lognormal(3, 1, 5000)
+    values[::13] = np.nan
+    groups[groups == 7] = 8             # nhóm 7 rỗng
+
+    result, counts = grouped_percentiles(groups, values, 51)
+    for group in range(51):
+        mine = values[(groups == group) & ~np.isnan(values)]
+        assert counts[group] == len(mine)
+        if len(mine):
+            np.testing.assert_allclose(result[group], np.percentile(mine, (50, 95, 99)))
+        else:
+            assert np.isnan(result[group]).all()
+
+
+def test_single_value_group():
+    result, _ = grouped_percentiles([0], [12.5], 1, percentiles=(0, 50, 100))
+    assert result.tolist() == [[12.5, 12.5, 12.5]]
+
+
+@pytest.mark.parametrize('chunk', [7, 100, 1 << 20])
+def test_slowest_executions_across_chunks(chunk):
+    durations = np.random.default_rng(1).exponential(50, 1000)
+    durations[[3, 500]] = np.nan
+    top = slowest_executions(durations, n=10, chunk=chunk)
+    expected = heapq.nlargest(10, ((value, row) for row, value in enumerate(durations.tolist())
+                                   if not np.isnan(value)))
+    assert top == expected
+
+
+def test_run_percentiles_and_runtime_share():
+    analytics = DurationAnalytics.from_run(
+        {('a.test.js', 'x'): 10.0, ('a.test.js', 'y'): 30.0, ('b.test.js', 'z'): 5.0},
+        {'a.test.js': 45.0})
+    percentiles, counts = analytics.test_percentiles()
+    assert counts.tolist() == [1, 1, 1]
+    assert percentiles[:, 0].tolist() == [10.0, 30.0, 5.0]
+    # b.test.js không có duration suite -> cộng từ test
+    assert analytics.runtime_by_suite().tolist() == [45.0, 5.0]
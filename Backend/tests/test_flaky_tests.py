@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from flaky_tests import FlakyMatrix
+from run_history import STATUS_FAILED, STATUS_NOT_RUN, STATUS_PASSED
+
+
+def _expected(statuses):
+    """Tính trực tiếp trên từng hàng trạng thái (test x lần chạy)"""
+    rows = []
+    for row in statuses.tolist():
+        ran = [status != STATUS_NOT_RUN for status in row]
+        failed = [status == STATUS_FAILED for status in row]
+        pairs = [i for i in range(len(row) - 1) if ran[i] and ran[i + 1]]
+        flips = sum(failed[i] != failed[i + 1] for i in pairs)
+        longest = streak = 0
+        for is_failed in failed:
+            streak = streak + 1 if is_failed else 0
+            longest = max(longest, streak)
+        rows.append((sum(ran), sum(failed), len(pairs), flips, longest, streak))
+    return rows
+
+
+@pytest.mark.parametrize('num_runs', [1, 8, 21, 64])
+def test_bit_matrix_matches_direct_count(num_runs):
+    rng = np.random.default_rng(num_runs)
+    num_tests = 40
+    statuses = rng.choice([STATUS_PASSED, STATUS_FAILED, STATUS_NOT_RUN], (num_tests, num_runs), p=(0.6, 0.3, 0.1))
+    statuses[0] = STATUS_FAILED         # hỏng hẳn: chuỗi fail chạy tới lần cuối
+    tests, runs = np.indices(statuses.shape)
+    report = FlakyMatrix.from_arrays(tests.ravel(), runs.ravel(), statuses.ravel(),
+                                     num_tests, num_runs).analyze(block=16)
+
+    expected = _expected(statuses)
+    assert report.observed_runs.tolist() == [row[0] for row in expected]
+    assert report.failures.tolist() == [row[1] for row in expected]
+    assert report.flips.tolist() == [row[3] for row in expected]
+    assert report.longest_streak.tolist() == [row[4] for row in expected]
+    assert report.current_streak.tolist() == [row[5] for row in expected]
+    np.testing.assert_allclose(report.flip_rate, [flips / pairs if pairs else 0.0
+                                                  for _, _, pairs, flips, _, _ in expected])
+
+
+def test_flaky_ranks_above_broken():
+    num_runs = 50
+    statuses = np.array([
+        [STATUS_PASSED, STATUS_FAILED] * (num_runs // 2),     # flaky
+        [STATUS_FAILED] * num_runs,                           # hỏng hẳn
+        [STATUS_PASSED] * num_runs,                           # ổn định
+    ])
+    tests, runs = np.indices(statuses.shape)
+    report = FlakyMatrix.from_arrays(tests.ravel(), runs.ravel(), statuses.ravel(), 3, num_runs).analyze()
+    assert report.top(3).tolist() == [0]
+    assert report.score[0] == pytest.approx(1.0)
+    assert report.current_streak.tolist() == [1, num_runs, 0]
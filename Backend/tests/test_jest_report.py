@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from jest_report import (AssertionResult, JestRunSummary, _write_benchmark_report, iter_json_events,
+                         summarize_jest_report)
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / 'report.json'
+    _write_benchmark_report(str(path), num_suites=20)
+    return path
+
+
+def test_complete_report(report):
+    summary = summarize_jest_report(str(report), chunk_size=64)
+    assert summary.passed + summary.failed == 20 * 21
+    assert len(summary.suites) == 20
+    assert summary.start_time == 1700000000000
+
+
+@pytest.mark.parametrize('cut', ['}]', '},', '"status": "passed"'])
+def test_truncated_report_raises(tmp_path, report, cut):
+    text = report.read_text(encoding='utf-8')
+    truncated = tmp_path / 'truncated.json'
+    truncated.write_text(text[:text.index(cut, len(text) // 3) + len(cut)], encoding='utf-8')
+    with pytest.raises(ValueError):
+        summarize_jest_report(str(truncated))
+
+
+@pytest.mark.parametrize('text', ['', '   ', '{"a": [1, 2', '{"a": 1}}', ']'])
+def test_incomplete_json_raises(text):
+    with pytest.raises(ValueError):
+        list(iter_json_events(io.StringIO(text)))
+
+
+def test_events_match_ijson_prefixes():
+    events = list(iter_json_events(io.StringIO('{"a": [1, {"b": "x"}], "c": null}'), chunk_size=3))
+    assert events == [
+        ('', 'start_map', None), ('', 'map_key', 'a'), ('a', 'start_array', None),
+        ('a.item', 'number', 1), ('a.item', 'start_map', None), ('a.item', 'map_key', 'b'),
+        ('a.item.b', 'string', 'x'), ('a.item', 'end_map', None), ('a', 'end_array', None),
+        ('', 'map_key', 'c'), ('c', 'null', None), ('', 'end_map', None),
+    ]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"a": [12345, {"b": [1, 2]}], "c": []}', [12345, {'b': [1, 2]}]),
+    ('{"a": [], "c": []}', []),
+])
+def test_whole_values_decoded_across_chunks(text, expected):
+    events = list(iter_json_events(io.StringIO(text), chunk_size=3, whole=('a.item',)))
+    assert [value for prefix, event, value in events if prefix == 'a.item'] == expected
+    assert all(event == 'value' for prefix, event, value in events if prefix == 'a.item')
+    assert events[-1] == ('', 'end_map', None)
+
+
+def test_truncated_whole_value_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_events(io.StringIO('{"a": [{"b": 1}, {"b": '), chunk_size=4, whole=('a.item',)))
+
+
+def test_module_pass_rates_sum_suites_sharing_display_name():
+    summary = JestRunSummary()
+    for suite, statuses in [
+        ('test/cartController.unit.test.js', ['passed'] * 3),
+        ('test/cartController.part2.unit.test.js', ['failed']),
+        ('test/bookstore.e2e.test.js', ['passed', 'failed']),
+    ]:
+        for i, status in enumerate(statuses):
+            summary.add(AssertionResult(suite, f'test {i}', status, 1))
+    assert summary.module_pass_rates() == {'Cart Controller': 75.0, 'E2E Bookstore': 50.0}
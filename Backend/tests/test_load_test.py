@@ -0,0 +1,37 @@
+import math
+import random
+
+import pytest
+
+from load_test import LatencyHistogram
+
+
+@pytest.mark.parametrize('precision', [0.01, 0.02, 0.1])
+def test_percentile_within_relative_error_bound(precision):
+    rng = random.Random(precision)
+    samples = [rng.lognormvariate(math.log(0.05), 1.0) for _ in range(20000)]
+    histogram = LatencyHistogram(precision)
+    for value in samples:
+        histogram.record(value)
+
+    ordered = sorted(samples)
+    bound = math.sqrt(histogram.growth) - 1     # ≈ (growth - 1) / 2
+    for pct in (1, 50, 90, 99, 99.9, 100):
+        exact = ordered[max(1, math.ceil(len(ordered) * pct / 100)) - 1]
+        assert abs(histogram.percentile(pct) - exact) <= bound * exact + 1e-12
+
+
+def test_merge_matches_single_histogram():
+    values = [0.0005 * (i + 1) for i in range(1000)]
+    whole, left, right = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i, value in enumerate(values):
+        whole.record(value)
+        (left if i % 2 else right).record(value)
+    merged = left.merge(right)
+    assert merged.counts == whole.counts
+    assert merged.percentiles((50, 99)) == whole.percentiles((50, 99))
+    assert merged.min == whole.min and merged.max == whole.max
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().percentile(99) == 0.0
@@ -0,0 +1,30 @@
+"""Memcheck của chart engine chạy trong process riêng để RSS đỉnh không lẫn với các test khác"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ENGINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'chart_engine.py')
+RENDERS = 100
+TOLERANCE_MIB = 12
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='cần /proc để đọc RSS')
+
+
+def _memcheck(*extra):
+    return subprocess.run([sys.executable, ENGINE, '--memcheck', str(RENDERS), '--warmup', '0.5',
+                           '--tolerance-mib', str(TOLERANCE_MIB), *extra],
+                          capture_output=True, text=True, env=dict(os.environ, MPLBACKEND='Agg'))
+
+
+def test_render_context_rss_stays_flat():
+    result = _memcheck()
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_memcheck_detects_leaking_pyplot_figures():
+    # Cách cũ (plt.figure không đóng) phải bị bắt, nếu không test trên vô nghĩa
+    result = _memcheck('--pyplot')
+    assert result.returncode == 1, result.stdout + result.stderr
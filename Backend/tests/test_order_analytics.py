@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pytest
+
+import order_analytics
+from order_analytics import OrderAggregate, aggregate_chunk, aggregate_orders
+
+A, B, C = 'a' * 24, 'b' * 24, 'c' * 24
+ORDERS = [
+    {'_id': {'$oid': '1' * 24}, 'products': [{'productId': {'$oid': A}, 'quantity': 2},
+                                             {'productId': {'$oid': B}, 'quantity': 1}],
+     'status': 'delivered', 'total': 300, 'discount': 10, 'createdAt': {'$date': '2024-03-01T10:00:00.000Z'}},
+    {'_id': {'$oid': '2' * 24}, 'products': [{'productId': A, 'quantity': 1}],
+     'status': 'Cancelled ', 'total': 100, 'discount': 0, 'createdAt': {'$date': {'$numberLong': '1709251200000'}}},
+    {'_id': {'$oid': '3' * 24}, 'products': [{'productId': {'$oid': C}, 'quantity': 4}],
+     'status': 'pending', 'total': {'$numberInt': '80'}, 'discount': None},
+]
+
+
+def _chunk(orders):
+    return ''.join(json.dumps(order) + '\n' for order in orders).encode('utf-8')
+
+
+@pytest.fixture(autouse=True)
+def no_prices():
+    order_analytics._init_worker({})
+
+
+def test_aggregate_chunk():
+    part = aggregate_chunk(_chunk(ORDERS) + b'{broken\n')
+    assert (part['orders'], part['lines'], part['skipped']) == (3, 4, 1)
+    units = dict(zip(part['products'], part['units'].tolist()))
+    assert units == {A: 2.0, B: 1.0, C: 4.0}     # order bị hủy không tính
+    revenue = dict(zip(part['products'], part['revenue'].tolist()))
+    assert revenue[A] == pytest.approx(200) and revenue[B] == pytest.approx(100)
+    statuses = dict(zip(part['statuses'], part['status_orders'].tolist()))
+    assert statuses == {'delivered': 1, 'cancelled': 1, 'pending': 1}
+    # Order không có createdAt không rơi vào ngày 1970-01-01
+    assert part['days'].astype('datetime64[D]').astype(str).tolist() == ['2024-03-01']
+    assert part['day_revenue'].tolist() == [300.0] and part['day_orders'].tolist() == [1]
+    assert (part['undated'], part['undated_revenue']) == (1, 80.0)
+
+
+def test_merge_chunks_matches_single_chunk():
+    whole = OrderAggregate()
+    whole.merge(aggregate_chunk(_chunk(ORDERS)))
+    split = OrderAggregate()
+    for order in reversed(ORDERS):
+        split.merge(aggregate_chunk(_chunk([order])))
+    for aggregate in (whole, split):
+        units = dict(zip(aggregate.product_ids, aggregate.units[:aggregate.num_products].tolist()))
+        assert units == {A: 2.0, B: 1.0, C: 4.0}
+        assert aggregate.by_status['delivered'] == [1, 300.0, 10.0, 3.0]
+        days, revenue, orders = aggregate.by_day()
+        assert days.astype(str).tolist() == ['2024-03-01'] and revenue.tolist() == [300.0]
+        assert aggregate.undated == 1
+    assert [A, B, C] == sorted(split.product_ids)
+    assert whole.top_products(2).tolist() == [whole.product_ids.index(C), whole.product_ids.index(A)]
+
+
+def test_revenue_series_starts_at_first_dated_order():
+    aggregate = OrderAggregate()
+    aggregate.merge(aggregate_chunk(_chunk(ORDERS)))
+    series = aggregate.revenue_series()
+    assert series.years.tolist() == [2024]
+    assert 'không có createdAt' in aggregate.report()
+
+
+def test_cross_check(tmp_path):
+    aggregate = OrderAggregate()
+    aggregate.merge(aggregate_chunk(_chunk(ORDERS)))
+    catalog = {A: ('Book A', 100.0, 2.0), B: ('Book B', 100.0, 5.0), 'd' * 24: ('Book D', 10.0, 0.0),
+               'e' * 24: ('Book E', 10.0, None)}
+    result = aggregate.cross_check(catalog, top=2)
+    assert (result['checked'], result['matched']) == (3, 2)
+    assert [(entry['productId'], entry['computed'], entry['diff']) for entry in result['mismatched']] == \
+           [(B, 1.0, -4.0)]
+    assert result['unknown_products'] == [C]
+    assert (result['top_overlap'], result['top']) == (1, 2)
+
+
+def test_aggregate_orders_with_benchmark_export(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    catalog_path = order_analytics._write_benchmark_export(path, 3000, num_products=200)
+    catalog = order_analytics.load_catalog(catalog_path)
+    aggregate = aggregate_orders(path, workers=1, chunk_size=700)
+    assert aggregate.orders == 3000 and aggregate.undated == 0
+    result = aggregate.cross_check(catalog)
+    # Export giả lập cố ý lệch soldCount ở 1% product (i % 100 == 0)
+    assert sorted(entry['diff'] for entry in result['mismatched']) == [-7.0, -7.0]
+    with open(path, encoding='utf-8') as f:
+        totals = sum(json.loads(line)['total'] for line in f)
+    assert np.isclose(sum(entry[1] for entry in aggregate.by_status.values()), totals)
@@ -0,0 +1,60 @@
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from chart_engine import render
+from render_server import ChartRenderer, RenderClient, RenderError, make_server
+
+SPEC = {'kind': 'pie_summary', 'style': 'dashboard', 'data': {'passed': 107, 'failed': 20},
+        'output': {'filename': 'chart.png', 'dpi': 40}}
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    socket_path = str(tmp_path_factory.mktemp('daemon') / 'render.sock')
+    server = make_server(ChartRenderer(warm=False), socket_path=socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = RenderClient(socket_path=socket_path, timeout=30)
+    assert client.wait_ready(10)
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def _size(body):
+    return Image.open(io.BytesIO(body)).size
+
+
+def _local_size(tmp_path, spec):
+    filename = str(tmp_path / 'local.png')
+    render(dict(spec, output=dict(spec['output'], filename=filename)))
+    return Image.open(filename).size
+
+
+def test_round_trip_matches_local_render(client, tmp_path):
+    body = client.render(SPEC)
+    assert client.last_cache == 'miss'
+    assert _size(body) == _local_size(tmp_path, SPEC)
+    assert client.render(SPEC) == body
+    assert client.last_cache == 'hit'
+
+
+def test_style_overrides_reach_the_daemon(client, tmp_path):
+    plain = client.render(SPEC)
+    spec = dict(SPEC, style_overrides={'figsize': [5, 2]})
+    body = client.render(spec)
+    assert client.last_cache == 'miss'
+    assert _size(body) != _size(plain)
+    assert _size(body) == _local_size(tmp_path, spec)
+
+
+def test_svg_and_errors(client):
+    assert client.render(SPEC, fmt='svg').lstrip().startswith(b'<?xml')
+    with pytest.raises(RenderError):
+        client.render(dict(SPEC, kind='nope'))
+    stats = client.stats()
+    assert stats['hits'] >= 1 and stats['misses'] >= 3
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import revenue_analytics
+from revenue_analytics import RevenueSeries, moving_average
+
+PATTERN = np.array([80, 90, 100, 110, 120, 130, 120, 110, 100, 90, 80, 70], dtype=float)
+
+
+def partial_year(values, months):
+    return np.concatenate([values[:months], np.zeros(12 - months)])
+
+
+def test_yoy_compares_same_months_of_previous_year():
+    series = RevenueSeries.from_years({
+        2022: PATTERN,
+        2023: PATTERN * 1.1,
+        2024: partial_year(PATTERN * 1.21, 3),
+    })
+    assert np.isnan(series.monthly[-1, 3:]).all()
+    growth = series.yoy()
+    assert np.isnan(growth[0])
+    np.testing.assert_allclose(growth[1:], [10.0, 10.0])
+
+
+def test_forecast_continues_seasonal_pattern():
+    series = RevenueSeries.from_years({2022: PATTERN, 2023: PATTERN, 2024: partial_year(PATTERN, 3)})
+    months, predicted, sigma = series.forecast(horizon=4)
+    assert [str(month) for month in months] == ['2024-04', '2024-05', '2024-06', '2024-07']
+    np.testing.assert_allclose(predicted, PATTERN[3:7])
+    assert sigma == pytest.approx(0.0, abs=1e-9)
+
+
+def test_moving_average_rejects_empty_window():
+    with pytest.raises(ValueError):
+        moving_average(PATTERN, 0)
+
+
+def test_cli_rejects_window_below_one(capsys):
+    with pytest.raises(SystemExit):
+        revenue_analytics.main(['revenues.jsonl', '--window', '0'])
+    assert '--window' in capsys.readouterr().err
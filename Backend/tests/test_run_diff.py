@@ -0,0 +1,47 @@
+import numpy as np
+
+import run_diff  # không import test_key trực tiếp: pytest sẽ coi nó là một test
+from run_diff import RunDiff, RunSnapshot, stable_suite_path
+
+SUITE = '/ci/build-1/Backend/test/cartController.unit.test.js'
+
+
+def _run(rows, suite=SUITE, label=''):
+    return RunSnapshot.from_results([(suite, name, status, ms) for name, status, ms in rows], label)
+
+
+BASE = [('adds item', 'passed', 100), ('removes item', 'passed', 40), ('checkout', 'failed', 10),
+        ('totals', 'passed', 5), ('each case', 'passed', 10), ('each case', 'passed', 12)]
+
+
+def test_identical_runs_have_no_changes():
+    # test.each sinh nhiều test cùng full name
+    diff = RunDiff.compute(_run(BASE), _run(BASE))
+    assert diff.counts() == {'newly_failed': 0, 'newly_passed': 0, 'slower': 0, 'faster': 0,
+                             'added': 0, 'removed': 0, 'still_failing': 1}
+
+
+def test_duplicate_names_are_matched_by_occurrence():
+    diff = RunDiff.compute(_run(BASE), _run(BASE[:-1]))
+    assert diff.counts()['removed'] == 1 and diff.counts()['added'] == 0
+    diff = RunDiff.compute(_run(BASE), _run(BASE + [('each case', 'failed', 3)]))
+    assert diff.counts()['added'] == 1 and diff.counts()['newly_failed'] == 0
+
+
+def test_categories():
+    current = [('adds item', 'passed', 300), ('removes item', 'failed', 40), ('checkout', 'passed', 10),
+               ('totals', 'passed', 5), ('new test', 'passed', 1)]
+    diff = RunDiff.compute(_run(BASE), _run(current, suite='D:\\agent\\Backend\\test\\cartController.unit.test.js'))
+    counts = diff.counts()
+    assert (counts['slower'], counts['newly_failed'], counts['newly_passed'], counts['added'],
+            counts['removed']) == (1, 1, 1, 1, 2)
+    entry = diff.to_dict()['tests']['slower'][0]
+    assert entry == {'suite': 'test/cartController.unit.test.js', 'test': 'adds item',
+                     'current_ms': 300.0, 'base_ms': 100.0}
+    assert diff.has_regressions()
+
+
+def test_keys_ignore_checkout_directory():
+    assert stable_suite_path('/a/b/Backend/test/x.test.js') == 'test/x.test.js'
+    assert run_diff.test_key('/a/test/x.test.js', 't') == run_diff.test_key('C:\\b\\test\\x.test.js', 't')
+    assert np.asarray([run_diff.test_key('/a/test/x.test.js', 't')]).dtype == np.int64
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+
+from jest_report import _write_benchmark_report
+from run_history import RunHistoryStore, report_start_time
+
+
+def _report(path, num_suites, start_time):
+    _write_benchmark_report(str(path), num_suites)
+    text = path.read_text(encoding='utf-8').replace('"startTime": 1700000000000,', f'"startTime": {start_time},', 1)
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_same_report_is_stored_once(tmp_path):
+    first = _report(tmp_path / 'first.json', 5, 1700000000000)
+    second = _report(tmp_path / 'second.json', 8, 1700000600000)
+    store = RunHistoryStore(str(tmp_path / 'history'))
+
+    assert store.append_report(first) == 0
+    assert store.append_report(first) is None
+    assert store.append_report(second) == 1
+
+    store = RunHistoryStore(str(tmp_path / 'history'))
+    assert store.append_report(second) is None
+    assert store.num_runs == 2
+    assert store.column('runs', 'run_ts').tolist() == [1700000000000, 1700000600000]
+    assert store.meta['rows']['tests'] == (5 + 8) * 21
+    assert len(store.test_names()) == 8 * 21
+    assert np.asarray(store.column('tests', 'run')).tolist() == [0] * 5 * 21 + [1] * 8 * 21
+
+
+def test_dashboard_rerun_does_not_duplicate_history(tmp_path, monkeypatch):
+    from test_analytics_dashboard import main
+
+    report = _report(tmp_path / 'report.json', 5, 1700000000000)
+    history = str(tmp_path / 'history')
+    monkeypatch.chdir(tmp_path)
+    for _ in range(2):
+        main([report, '--history', history, '--headless', '--workers', '1', '--no-cache'])
+
+    with open(tmp_path / 'history' / 'meta.json', encoding='utf-8') as f:
+        assert json.load(f)['rows']['runs'] == 1
+
+
+def test_duplicate_run_is_skipped_before_streaming(tmp_path, monkeypatch):
+    report = _report(tmp_path / 'report.json', 5, 1700000000000)
+    store = RunHistoryStore(str(tmp_path / 'history'))
+    assert store.append_report(report) == 0
+
+    def fail(*args, **kwargs):
+        raise AssertionError('báo cáo trùng không được đọc các suite')
+
+    monkeypatch.setattr('run_history.JestReportReader._parse', fail)
+    assert store.append_report(report) is None
+    assert store.append_report(report, run_ts=1700000000000) is None
+
+
+def test_report_start_time_after_test_results(tmp_path):
+    path = tmp_path / 'report.json'
+    path.write_text('{"testResults": [{"name": "a.test.js", "assertionResults": []}], "startTime": 42}',
+                    encoding='utf-8')
+    assert report_start_time(str(path), chunk_size=8) == 42
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from jest_report import JestReportReader, _write_benchmark_report
+from shard_summary import QuantileSketch, ShardSummary, main, merge_summaries, summarize_shard
+
+
+def _shards(path, num_shards, relative_accuracy):
+    """Chia suite cho các shard giống `jest --shard`"""
+    shards = [ShardSummary(relative_accuracy) for _ in range(num_shards)]
+    shard_of = {}
+    reader = JestReportReader(path, on_suite=lambda suite, info: shards[shard_of[suite]].add_suite(suite, info))
+    for result in reader:
+        shards[shard_of.setdefault(result.suite, len(shard_of) % num_shards)].add(result)
+    return shards
+
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.02])
+def test_merge_matches_unsharded_run(tmp_path, relative_accuracy):
+    path = str(tmp_path / 'report.json')
+    _write_benchmark_report(path, num_suites=30)
+    full = summarize_shard(path, relative_accuracy)
+    shards = _shards(path, 4, relative_accuracy)
+
+    merged = merge_summaries(shards)
+    assert merged.relative_accuracy == relative_accuracy
+    assert merged.shards == 4
+    assert (merged.passed, merged.failed, merged.suites) == (full.passed, full.failed, full.suites)
+    assert merged.duration_sketch.to_dict() == full.duration_sketch.to_dict()
+    assert merge_summaries(reversed(shards)).to_dict() == merged.to_dict()
+
+
+def test_merge_cli_keeps_relative_accuracy(tmp_path):
+    report = str(tmp_path / 'report.json')
+    _write_benchmark_report(report, num_suites=10)
+    outputs = []
+    for i in range(2):
+        outputs.append(str(tmp_path / f'shard-{i}.summary.json'))
+        main(['summarize', report, '-o', outputs[-1], '--relative-accuracy', '0.02'])
+    merged_path = str(tmp_path / 'merged.summary.json')
+    main(['merge', *outputs, '-o', merged_path])
+
+    with open(merged_path, encoding='utf-8') as f:
+        merged = ShardSummary.from_dict(json.load(f))
+    assert merged.shards == 2
+    assert merged.relative_accuracy == 0.02
+    assert merged.total == 2 * 10 * 21
+
+
+def test_merge_rejects_mixed_accuracy():
+    with pytest.raises(ValueError):
+        merge_summaries([ShardSummary(0.01), ShardSummary(0.02)])
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_merge_empty():
+    merged = merge_summaries([])
+    assert merged.shards == 0 and merged.total == 0
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from synthetic_data import parse_size, write_defects, write_jest, write_orders
+
+
+def _read(path):
+    with open(path, 'rb') as fp:
+        return fp.read()
+
+
+@pytest.mark.parametrize('writer, name', [(write_jest, 'report.json'), (write_defects, 'defects.csv'),
+                                          (write_orders, 'orders.jsonl')])
+def test_same_seed_gives_identical_bytes(tmp_path, writer, name):
+    paths = [str(tmp_path / run / name) for run in ('a', 'b', 'c')]
+    for path, seed in zip(paths, (7, 7, 8)):
+        os.makedirs(os.path.dirname(path))
+        writer(path, size=50000, seed=seed)
+    assert _read(paths[0]) == _read(paths[1])
+    assert _read(paths[0]) != _read(paths[2])
+
+
+def test_orders_and_catalog_stay_near_size(tmp_path):
+    size = parse_size('200KB')
+    orders, catalog = write_orders(str(tmp_path / 'orders.jsonl'), size=size)
+    assert size <= orders['bytes'] < size * 1.05
+    assert catalog['bytes'] < size * 1.05
+    assert catalog['records'] < 10000
@@ -0,0 +1,297 @@
+"""
+Đo thời gian từng giai đoạn của pipeline thống kê (tracing span).
+
+Tracing mặc định tắt: `span()` trả về một context manager rỗng dùng chung và
+hàm bọc bởi `@traced()` chỉ kiểm tra một biến toàn cục rồi gọi thẳng hàm gốc,
+nên chi phí khi tắt gần như bằng 0. Bật bằng `--trace FILE` trên các script hỗ
+trợ, hoặc biến môi trường cho mọi script:
+
+    ANALYTICS_TRACE=trace.json python test_analytics_dashboard.py jest-report.json
+    python test_analytics_dashboard.py jest-report.json --trace trace.json
+
+Khi thoát, kết quả được ghi ra:
+    trace.json          Chrome trace-event JSON (mở bằng chrome://tracing hoặc Perfetto)
+    trace.profile.txt   profile phẳng: số lần gọi, tổng thời gian, self time
+
+Span trong worker process (chart_batch headless) được gửi về process chính và
+hiện thành một track riêng cho mỗi worker. Module chỉ dùng thư viện chuẩn.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+ENV_VAR = 'ANALYTICS_TRACE'
+
+_tracer = None
+
+
+class _NullSpan:
+    """Span rỗng dùng khi tracing tắt"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Lưu các span đã kết thúc dưới dạng trace event 'X' (complete event)"""
+
+    def __init__(self, worker=False):
+        self.worker = worker
+        self.pid = os.getpid()
+        self.events = []
+        self._lock = threading.Lock()
+
+    def record(self, name, category, start_ns, end_ns, args=None):
+        event = {
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': start_ns / 1000, 'dur': (end_ns - start_ns) / 1000,
+            'pid': self.pid, 'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def take(self):
+        """Lấy và xóa các event đã ghi (worker gửi về process chính)"""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+    def extend(self, events):
+        with self._lock:
+            self.events.extend(events)
+
+    def chrome_trace(self):
+        """Dict theo định dạng Chrome trace-event, thời gian tính từ event đầu tiên"""
+        events = sorted(self.events, key=lambda event: event['ts'])
+        origin = events[0]['ts'] if events else 0
+        trace_events = []
+        for pid in sorted({event['pid'] for event in events}):
+            label = 'main' if pid == self.pid else f'worker {pid}'
+            trace_events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                                 'args': {'name': label}})
+        for event in events:
+            trace_events.append(dict(event, ts=round(event['ts'] - origin, 3),
+                                     dur=round(event['dur'], 3)))
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def profile(self):
+        """
+        Profile phẳng theo tên span: name -> [số lần, tổng µs, self µs, max µs].
+        Self time = thời gian của span trừ các span con trực tiếp (cùng thread).
+        """
+        stats = {}
+        threads = {}
+        for event in self.events:
+            threads.setdefault((event['pid'], event['tid']), []).append(event)
+        for events in threads.values():
+            events.sort(key=lambda event: (event['ts'], -event['dur']))
+            stack = []      # [event, thời gian của các span con]
+            for event in events + [None]:
+                while stack and (event is None or
+                                 event['ts'] >= stack[-1][0]['ts'] + stack[-1][0]['dur']):
+                    done, children = stack.pop()
+                    entry = stats.setdefault(done['name'], [0, 0.0, 0.0, 0.0])
+                    entry[0] += 1
+                    entry[1] += done['dur']
+                    entry[2] += done['dur'] - children
+                    entry[3] = max(entry[3], done['dur'])
+                    if stack:
+                        stack[-1][1] += done['dur']
+                if event is not None:
+                    stack.append([event, 0.0])
+        return stats
+
+    def format_profile(self):
+        stats = self.profile()
+        lines = [f"{'span':48s} {'calls':>6s} {'total ms':>10s} {'self ms':>10s} "
+                 f"{'mean ms':>9s} {'max ms':>9s}"]
+        for name, (calls, total, own, longest) in sorted(stats.items(), key=lambda item: -item[1][2]):
+            lines.append(f'{name[:48]:48s} {calls:6d} {total / 1000:10.1f} {own / 1000:10.1f} '
+                         f'{total / calls / 1000:9.2f} {longest / 1000:9.1f}')
+        return '\n'.join(lines)
+
+    def write(self, path):
+        """Ghi Chrome trace JSON ra `path` và profile phẳng ra `<stem>.profile.txt`"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        profile_path = os.path.splitext(path)[0] + '.profile.txt'
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            f.write(self.format_profile() + '\n')
+        return profile_path
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+def enabled():
+    return _tracer is not None
+
+
+def enable(worker=False):
+    """Bật tracing (thay tracer cũ, ví dụ bản sao tracer cha trong worker fork)"""
+    global _tracer
+    _tracer = Tracer(worker=worker)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def span(name, category='analytics', **args):
+    """Context manager đo một giai đoạn; không làm gì khi tracing tắt"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, category, args)
+
+
+def traced(name=None, category='analytics'):
+    """Decorator đo mỗi lần gọi hàm; tên span mặc định là tên đầy đủ của hàm"""
+
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(label, category, start, time.perf_counter_ns())
+
+        return wrapper
+
+    return decorator
+
+
+def worker_events():
+    """Event của worker process cần gửi về process chính (rỗng nếu không phải worker)"""
+    tracer = _tracer
+    return tracer.take() if tracer is not None and tracer.worker else []
+
+
+def add_events(events):
+    """Nhận event từ worker vào tracer của process chính"""
+    if _tracer is not None and events:
+        _tracer.extend(events)
+
+
+def finish(path, quiet=False):
+    """Ghi trace + profile; in profile phẳng trừ khi quiet"""
+    tracer = disable()
+    if tracer is None:
+        return None
+    profile_path = tracer.write(path)
+    if not quiet:
+        print(f"\n🔬 Trace: {path} ({len(tracer.events)} span), profile: {profile_path}")
+        print(tracer.format_profile())
+    return profile_path
+
+
+def configure(path=None, quiet=False):
+    """
+    Bật tracing nếu có `path` (--trace) hoặc biến môi trường ANALYTICS_TRACE;
+    kết quả được ghi khi process thoát. Trả về đường dẫn trace hoặc None.
+    """
+    path = path or os.environ.get(ENV_VAR)
+    if not path:
+        return None
+    if _tracer is None:
+        enable()
+        atexit.register(finish, path, quiet)
+    return path
+
+
+def overhead(calls=1_000_000):
+    """Chi phí mỗi lần gọi (ns) của hàm @traced và span() khi tắt / bật"""
+
+    def noop():
+        return None
+
+    wrapped = traced('overhead')(noop)
+    results = {}
+    previous = disable()
+    try:
+        for label in ('disabled', 'enabled'):
+            if label == 'enabled':
+                enable()
+            timings = {}
+            for kind, call in (('baseline', noop), ('traced', wrapped)):
+                started = time.perf_counter_ns()
+                for _ in range(calls):
+                    call()
+                timings[kind] = (time.perf_counter_ns() - started) / calls
+            started = time.perf_counter_ns()
+            for _ in range(calls):
+                with span('overhead'):
+                    pass
+            timings['span'] = (time.perf_counter_ns() - started) / calls
+            results[label] = timings
+    finally:
+        disable()
+        if previous is not None:
+            globals()['_tracer'] = previous
+    return results
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tracing pipeline thống kê test')
+    parser.add_argument('trace', nargs='?', help='file Chrome trace JSON cần in profile phẳng')
+    parser.add_argument('--overhead', action='store_true', help='đo chi phí tracing khi tắt / bật')
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    if args.overhead:
+        print(f'⏱️ Chi phí tracing ({args.calls} lần gọi, ns/lần):')
+        for label, timings in overhead(args.calls).items():
+            extra = timings['traced'] - timings['baseline']
+            print(f"   • {label:8s}: hàm gốc {timings['baseline']:6.1f}, @traced {timings['traced']:6.1f} "
+                  f"(+{extra:.1f}), span() {timings['span']:6.1f}")
+        return
+    if not args.trace:
+        parser.error('cần file trace hoặc --overhead')
+
+    with open(args.trace, encoding='utf-8') as f:
+        trace = json.load(f)
+    tracer = Tracer()
+    tracer.events = [event for event in trace['traceEvents'] if event.get('ph') == 'X']
+    print(tracer.format_profile())
+
+
+if __name__ == '__main__':
+    main()